@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Codec for the compact per-day CGM storage format (cgm_daily_series)
+One blob per patient-day: zigzag varint deltas on a 5-minute grid, a validity bitmap and trend codes
+"""
+
+import base64
+import numpy as np
+from typing import Dict, Any, Optional, Sequence, List
+
+CODEC_VERSION = 1
+GRID_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // GRID_MINUTES
+SECONDS_PER_DAY = 86400
+
+# Trend code 0 means no trend; names match the alert engine's glucose_trend values
+TREND_NAMES = (
+    None,
+    'Rising Quickly',
+    'Rising',
+    'Rising Slowly',
+    'Stable',
+    'Falling Slowly',
+    'Falling',
+    'Falling Quickly',
+)
+TREND_CODES = {name: code for code, name in enumerate(TREND_NAMES) if name}
+
+# Three varint bytes cover deltas up to +/-2^20, far beyond any glucose range
+MAX_VARINT_BYTES = 3
+
+
+def _zigzag_encode(deltas: np.ndarray) -> np.ndarray:
+    return ((deltas << 1) ^ (deltas >> 63)).astype(np.uint64)
+
+
+def _zigzag_decode(encoded: np.ndarray) -> np.ndarray:
+    encoded = encoded.astype(np.int64, copy=False)
+    return (encoded >> 1) ^ -(encoded & 1)
+
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """
+    LEB128-encode non-negative integers without a Python-level loop
+
+    Args:
+        values: Unsigned integers below 2^21
+
+    Returns:
+        Packed varint bytes
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    if values.size == 0:
+        return b''
+    if values.max() >= 1 << (7 * MAX_VARINT_BYTES):
+        raise ValueError("Value too large for CGM varint encoding")
+
+    widths = 1 + (values >= 1 << 7).astype(np.int64) + (values >= 1 << 14).astype(np.int64)
+    ends = np.cumsum(widths)
+    starts = ends - widths
+    total = int(ends[-1])
+
+    # Each output byte knows which value it belongs to and its 7-bit group position
+    owner = np.repeat(np.arange(values.size), widths)
+    position = np.arange(total) - np.repeat(starts, widths)
+    out = (values[owner] >> (7 * position).astype(np.uint64)) & 0x7F
+    continuation = position < (widths[owner] - 1)
+    out |= continuation.astype(np.uint64) << 7
+    return out.astype(np.uint8).tobytes()
+
+
+def decode_varints(payload: bytes) -> np.ndarray:
+    """
+    Decode LEB128 varints into an int64 array
+
+    When every value fits in one byte (the common case for 5-minute deltas)
+    this is a dtype cast of a zero-copy view over the payload.
+    """
+    raw = np.frombuffer(payload, dtype=np.uint8)
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    continuation = raw >= 0x80
+    if not continuation.any():
+        return raw.astype(np.int64)
+
+    ends = np.flatnonzero(~continuation)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    position = np.arange(raw.size) - np.repeat(starts, ends - starts + 1)
+    groups = (raw & 0x7F).astype(np.int64) << (7 * position)
+    return np.add.reduceat(groups, starts)
+
+
+def encode_day(
+    glucose: Sequence,
+    trends: Optional[Sequence] = None
+) -> Dict[str, Any]:
+    """
+    Encode one day of grid-aligned readings
+
+    Args:
+        glucose: SLOTS_PER_DAY values in mg/dL, NaN where no reading
+        trends: Optional per-slot trend codes (0 = none)
+
+    Returns:
+        Column values for a cgm_daily_series row
+    """
+    glucose = np.asarray(glucose, dtype=np.float64)
+    if glucose.size != SLOTS_PER_DAY:
+        raise ValueError(f"Expected {SLOTS_PER_DAY} slots, got {glucose.size}")
+
+    valid = ~np.isnan(glucose)
+    values = np.rint(glucose[valid]).astype(np.int64)
+    deltas = np.diff(values, prepend=0)
+
+    row = {
+        'codec_version': CODEC_VERSION,
+        'grid_minutes': GRID_MINUTES,
+        'valid_count': int(values.size),
+        'validity_bitmap': np.packbits(valid).tobytes(),
+        'glucose_deltas': encode_varints(_zigzag_encode(deltas)),
+        'trend_codes': None,
+        'min_glucose': int(values.min()) if values.size else None,
+        'max_glucose': int(values.max()) if values.size else None,
+        'mean_glucose': round(float(values.mean()), 1) if values.size else None,
+    }
+    if trends is not None:
+        row['trend_codes'] = np.asarray(trends, dtype=np.uint8)[valid].tobytes()
+    return row
+
+
+def decode_day(
+    validity_bitmap: bytes,
+    glucose_deltas: bytes,
+    trend_codes: Optional[bytes] = None,
+    codec_version: int = CODEC_VERSION
+) -> Dict[str, np.ndarray]:
+    """
+    Decode one cgm_daily_series row
+
+    Returns:
+        'glucose': float64 array of SLOTS_PER_DAY values with NaN gaps,
+        'valid': boolean slot mask,
+        'trend_codes': uint8 codes for the valid slots (a zero-copy view)
+    """
+    if codec_version != CODEC_VERSION:
+        raise ValueError(f"Unsupported CGM codec version: {codec_version}")
+
+    valid = np.unpackbits(np.frombuffer(validity_bitmap, dtype=np.uint8), count=SLOTS_PER_DAY).view(bool)
+    values = np.cumsum(_zigzag_decode(decode_varints(glucose_deltas)))
+
+    glucose = np.full(SLOTS_PER_DAY, np.nan)
+    glucose[valid] = values
+    return {
+        'glucose': glucose,
+        'valid': valid,
+        'trend_codes': np.frombuffer(trend_codes or b'', dtype=np.uint8),
+    }
+
+
+def decode_days(rows: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Decode consecutive patient-day rows into one continuous grid
+
+    Args:
+        rows: Dicts with 'series_date' (YYYY-MM-DD), 'validity_bitmap' and 'glucose_deltas'
+
+    Returns:
+        'timestamps': epoch seconds of every grid slot, 'glucose': values with NaN gaps
+    """
+    if not rows:
+        return {'timestamps': np.zeros(0), 'glucose': np.zeros(0)}
+
+    rows = sorted(rows, key=lambda row: row['series_date'])
+    for row in rows:
+        if row.get('codec_version', CODEC_VERSION) != CODEC_VERSION:
+            raise ValueError(f"Unsupported CGM codec version: {row['codec_version']}")
+
+    days = np.array([row['series_date'] for row in rows], dtype='datetime64[D]')
+    day_starts = days.astype('datetime64[s]').astype(np.int64)
+
+    # Varints are self-delimiting, so every day decodes in one pass over the joined payloads
+    bitmaps = np.frombuffer(b''.join(row['validity_bitmap'] for row in rows), dtype=np.uint8)
+    valid = np.unpackbits(bitmaps.reshape(len(rows), -1), axis=1, count=SLOTS_PER_DAY).view(bool)
+    cumulative = np.cumsum(_zigzag_decode(decode_varints(b''.join(row['glucose_deltas'] for row in rows))))
+
+    # Each day's deltas restart from zero: remove the running total carried over from earlier days
+    counts = valid.sum(axis=1)
+    totals = np.concatenate(([0], cumulative))
+    carried = totals[np.cumsum(counts) - counts]
+
+    glucose = np.full((len(rows), SLOTS_PER_DAY), np.nan)
+    glucose[valid] = cumulative - np.repeat(carried, counts)
+
+    offsets = np.arange(SLOTS_PER_DAY, dtype=np.int64) * GRID_MINUTES * 60
+    timestamps = (day_starts[:, None] + offsets[None, :]).ravel().astype(np.float64)
+    return {'timestamps': timestamps, 'glucose': glucose.ravel()}
+
+
+def rows_from_response(days: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Base64-decode the blob columns of a get_cgm_daily_series response"""
+    rows = []
+    for day in days:
+        row = dict(day)
+        for column in ('validity_bitmap', 'glucose_deltas', 'trend_codes'):
+            if row.get(column) is not None:
+                row[column] = base64.b64decode(row[column])
+        rows.append(row)
+    return rows
+
+
+def readings_to_days(
+    timestamps: Sequence,
+    values: Sequence,
+    trends: Optional[Sequence] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Snap raw readings (epoch seconds, UTC days) to the grid and encode each day
+
+    Readings are assigned to the nearest 5-minute slot; when two land in the
+    same slot the later one wins.
+
+    Returns:
+        Mapping of 'YYYY-MM-DD' to encoded row columns
+    """
+    ts = np.asarray(timestamps, dtype=np.float64)
+    vals = np.asarray(values, dtype=np.float64)
+    codes = None if trends is None else np.asarray(trends, dtype=np.uint8)
+    if ts.size == 0:
+        return {}
+
+    order = np.argsort(ts, kind='stable')
+    slot_index = np.rint(ts[order] / (GRID_MINUTES * 60)).astype(np.int64)
+    day_index = slot_index // SLOTS_PER_DAY
+
+    encoded = {}
+    day_ids, day_starts = np.unique(day_index, return_index=True)
+    day_ends = np.append(day_starts[1:], slot_index.size)
+    for day, lo, hi in zip(day_ids, day_starts, day_ends):
+        idx = order[lo:hi]
+        slots = slot_index[lo:hi] - day * SLOTS_PER_DAY
+        grid = np.full(SLOTS_PER_DAY, np.nan)
+        grid[slots] = vals[idx]
+        grid_codes = None
+        if codes is not None:
+            grid_codes = np.zeros(SLOTS_PER_DAY, dtype=np.uint8)
+            grid_codes[slots] = codes[idx]
+        series_date = str(np.datetime64(int(day), 'D'))
+        encoded[series_date] = encode_day(grid, grid_codes)
+    return encoded
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+In-memory drug interaction graph for the medical assistant agent
+Loads the drug_interactions table once, then checks whole medication lists without database round-trips
+"""
+
+import re
+import threading
+import time
+from collections import namedtuple
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# Interaction table is reference data; reload it at most every 6 hours
+DEFAULT_CACHE_TTL_SECONDS = 6 * 3600
+
+# Longest ingredient or brand name in words ("insulin glargine", "potassium chloride")
+MAX_NAME_WORDS = 3
+
+SEVERITY_RANK = {'Contraindicated': 0, 'Major': 1, 'Moderate': 2, 'Minor': 3}
+
+Interaction = namedtuple('Interaction', ['severity', 'description', 'management'])
+
+Conflict = namedtuple(
+    'Conflict',
+    ['medication_a', 'medication_b', 'ingredient_a', 'ingredient_b', 'severity', 'description', 'management']
+)
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def _words(name: str) -> List[str]:
+    return [word for word in _NON_WORD.split(name.lower()) if word]
+
+
+class InteractionGraph:
+    """
+    Adjacency map of ingredient -> {ingredient -> Interaction}
+
+    Medication names resolve to ingredient sets through an index of ingredient
+    names and brand names (from medication_synonyms); resolution scans word
+    n-grams of the name, so salt forms and dosages ("Metformin HCl 500mg") still
+    resolve. Each name is resolved once and memoized.
+    """
+
+    def __init__(
+        self,
+        ingredients: Iterable[Tuple[str, str]],
+        interactions: Iterable[Tuple[str, str, str, str, Optional[str]]],
+        synonyms: Iterable[Tuple[str, str]] = ()
+    ):
+        """
+        Args:
+            ingredients: (ingredient_id, ingredient_name) rows
+            interactions: (ingredient_a, ingredient_b, severity, description, management) rows
+            synonyms: (brand_name, generic_name) rows
+        """
+        self.ingredient_names: Dict[str, str] = {}
+        self._name_index: Dict[str, FrozenSet[str]] = {}
+        self._adjacency: Dict[str, Dict[str, Interaction]] = {}
+        self._resolved: Dict[str, FrozenSet[str]] = {}
+
+        for ingredient_id, name in ingredients:
+            self.ingredient_names[ingredient_id] = name
+            self._add_name(name, {ingredient_id})
+
+        # A brand maps to every ingredient named in its generic ("sitagliptin and metformin")
+        for brand, generic in synonyms:
+            ids = self._scan(_words(generic))
+            if ids:
+                self._add_name(brand, ids)
+
+        for a, b, severity, description, management in interactions:
+            interaction = Interaction(severity, description, management)
+            self._adjacency.setdefault(a, {})[b] = interaction
+            self._adjacency.setdefault(b, {})[a] = interaction
+
+    def _add_name(self, name: str, ids) -> None:
+        key = ' '.join(_words(name))
+        if key:
+            self._name_index[key] = self._name_index.get(key, frozenset()) | frozenset(ids)
+
+    def _scan(self, words: List[str]) -> FrozenSet[str]:
+        found = set()
+        index = self._name_index
+        for start in range(len(words)):
+            for length in range(1, min(MAX_NAME_WORDS, len(words) - start) + 1):
+                ids = index.get(' '.join(words[start:start + length]))
+                if ids:
+                    found.update(ids)
+        return frozenset(found)
+
+    def resolve(self, medication_name: str) -> FrozenSet[str]:
+        """Ingredient ids contained in a medication name (empty if unknown)"""
+        ids = self._resolved.get(medication_name)
+        if ids is None:
+            ids = self._resolved[medication_name] = self._scan(_words(medication_name))
+        return ids
+
+    def interaction(self, ingredient_a: str, ingredient_b: str) -> Optional[Interaction]:
+        """Direct lookup of one ingredient pair"""
+        return self._adjacency.get(ingredient_a, {}).get(ingredient_b)
+
+    def check(self, medications: List[str], new_medication: Optional[str] = None) -> List[Conflict]:
+        """
+        Check a medication list for pairwise interactions
+
+        Args:
+            medications: Medication names (brand, generic or "brand (generic)")
+            new_medication: Optional candidate; when given only pairs involving it are reported
+
+        Returns:
+            Conflicts ordered from most to least severe
+        """
+        resolved = [(name, self.resolve(name)) for name in medications]
+        if new_medication:
+            pairs = [((new_medication, self.resolve(new_medication)), other) for other in resolved]
+        else:
+            pairs = [
+                (resolved[i], resolved[j])
+                for i in range(len(resolved))
+                for j in range(i + 1, len(resolved))
+            ]
+
+        adjacency = self._adjacency
+        conflicts = []
+        seen = set()
+        for (name_a, ids_a), (name_b, ids_b) in pairs:
+            for a in ids_a:
+                neighbours = adjacency.get(a)
+                if not neighbours:
+                    continue
+                for b in ids_b:
+                    found = neighbours.get(b)
+                    if found is None:
+                        continue
+                    key = (name_a, name_b, min(a, b), max(a, b))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    conflicts.append(Conflict(
+                        name_a, name_b,
+                        self.ingredient_names.get(a, a), self.ingredient_names.get(b, b),
+                        found.severity, found.description, found.management
+                    ))
+
+        conflicts.sort(key=lambda c: SEVERITY_RANK.get(c.severity, len(SEVERITY_RANK)))
+        return conflicts
+
+    @classmethod
+    def from_table(cls, table: Dict[str, Any]) -> 'InteractionGraph':
+        """Build from a get_drug_interaction_table handler response"""
+        return cls(
+            ingredients=[(row[0], row[1]) for row in table.get('ingredients', [])],
+            interactions=[tuple(row[:5]) for row in table.get('interactions', [])],
+            synonyms=[(row[0], row[1]) for row in table.get('synonyms', [])]
+        )
+
+
+_graph_lock = threading.Lock()
+_cached_graph: Optional[InteractionGraph] = None
+_cached_at = 0.0
+
+
+def get_interaction_graph(
+    load_table: Callable[[], Dict[str, Any]],
+    ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS
+) -> InteractionGraph:
+    """
+    Process-wide cached graph, rebuilt from load_table() when older than ttl_seconds
+
+    If a reload fails the previous graph keeps serving until the next attempt.
+    """
+    global _cached_graph, _cached_at
+
+    graph = _cached_graph
+    if graph is not None and time.monotonic() - _cached_at < ttl_seconds:
+        return graph
+
+    with _graph_lock:
+        if _cached_graph is not None and time.monotonic() - _cached_at < ttl_seconds:
+            return _cached_graph
+        try:
+            _cached_graph = InteractionGraph.from_table(load_table())
+        except Exception:
+            if _cached_graph is None:
+                raise
+        _cached_at = time.monotonic()
+        return _cached_graph
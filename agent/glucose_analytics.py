@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Vectorized CGM glucose analytics for the medical assistant agent
+Computes the international consensus CGM metric set from columnar (timestamp, mg/dL) arrays
+"""
+
+import warnings
+import numpy as np
+from typing import Dict, Any, Optional, Sequence
+
+# Readings are resampled onto a regular grid so every metric is time-weighted
+GRID_MINUTES = 5
+# Gaps up to this length are linearly interpolated; longer gaps count as missing data
+DEFAULT_MAX_GAP_MINUTES = 15
+SECONDS_PER_DAY = 86400
+
+# Consensus glycemic ranges (mg/dL), Battelino et al. 2019
+VERY_LOW_THRESHOLD = 54
+LOW_THRESHOLD = 70
+HIGH_THRESHOLD = 180
+VERY_HIGH_THRESHOLD = 250
+TIGHT_RANGE_HIGH = 140
+
+# An episode must last at least 15 minutes and ends after 15 minutes back in range
+MIN_EPISODE_MINUTES = 15
+EPISODE_DURATION_BUCKETS = ((15, 30), (30, 60), (60, 120), (120, None))
+
+AGP_PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_AGP_BIN_MINUTES = 15
+
+
+def to_epoch_seconds(timestamps: Sequence) -> np.ndarray:
+    """
+    Convert timestamps to float64 epoch seconds
+
+    Args:
+        timestamps: numpy datetime64 array or numeric epoch seconds
+
+    Returns:
+        float64 array of epoch seconds
+    """
+    ts = np.asarray(timestamps)
+    if np.issubdtype(ts.dtype, np.datetime64):
+        return ts.astype('datetime64[s]').astype(np.int64).astype(np.float64)
+    return ts.astype(np.float64, copy=False)
+
+
+def resample_to_grid(
+    timestamps: Sequence,
+    values: Sequence,
+    grid_minutes: int = GRID_MINUTES,
+    max_gap_minutes: int = DEFAULT_MAX_GAP_MINUTES,
+    utc_offset_minutes: int = 0,
+    presorted: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    Resample irregular CGM readings onto a regular grid aligned to local midnight
+
+    Grid points inside a gap of at most max_gap_minutes are linearly interpolated.
+    Grid points inside longer gaps take the nearest reading if it is within half a
+    grid step, otherwise they are NaN (missing).
+
+    Args:
+        timestamps: Reading timestamps (datetime64 or epoch seconds)
+        values: Glucose values in mg/dL
+        grid_minutes: Grid resolution in minutes
+        max_gap_minutes: Longest gap that is interpolated
+        utc_offset_minutes: Patient's UTC offset, used to align days to local midnight
+        presorted: Skip sorting when timestamps are already ascending
+
+    Returns:
+        Dictionary with 'grid' (local epoch seconds) and 'glucose' (mg/dL, NaN = missing)
+    """
+    ts = to_epoch_seconds(timestamps) + utc_offset_minutes * 60.0
+    glucose = np.asarray(values, dtype=np.float64)
+
+    keep = ~np.isnan(glucose) & ~np.isnan(ts)
+    ts, glucose = ts[keep], glucose[keep]
+
+    if not presorted:
+        order = np.argsort(ts, kind='stable')
+        ts, glucose = ts[order], glucose[order]
+
+    # Duplicate timestamps keep the last reading received
+    if ts.size > 1:
+        last_of_run = np.append(ts[1:] != ts[:-1], True)
+        ts, glucose = ts[last_of_run], glucose[last_of_run]
+
+    if ts.size == 0:
+        return {'grid': np.empty(0), 'glucose': np.empty(0)}
+
+    step = grid_minutes * 60.0
+    start = np.floor(ts[0] / SECONDS_PER_DAY) * SECONDS_PER_DAY
+    end = np.floor(ts[-1] / SECONDS_PER_DAY) * SECONDS_PER_DAY + SECONDS_PER_DAY
+    grid = np.arange(start, end, step)
+
+    right = np.searchsorted(ts, grid, side='left')
+    inside = (right > 0) & (right < ts.size)
+    right_c = np.clip(right, 0, ts.size - 1)
+    left_c = np.clip(right - 1, 0, ts.size - 1)
+
+    exact = ts[right_c] == grid
+    gap = ts[right_c] - ts[left_c]
+    interpolate = inside & (gap <= max_gap_minutes * 60.0)
+
+    dist_left = np.abs(grid - ts[left_c])
+    dist_right = np.abs(ts[right_c] - grid)
+    nearest = np.where(dist_left <= dist_right, glucose[left_c], glucose[right_c])
+    near_enough = np.minimum(dist_left, dist_right) <= step / 2
+
+    resampled = np.where(
+        exact, glucose[right_c],
+        np.where(interpolate, np.interp(grid, ts, glucose),
+                 np.where(near_enough, nearest, np.nan))
+    )
+
+    return {'grid': grid, 'glucose': resampled}
+
+
+def _band_percentages(glucose: np.ndarray, valid: np.ndarray, n_valid: int) -> Dict[str, float]:
+    """Time spent in each consensus range, as a percentage of valid sensor time"""
+    g = glucose[valid]
+    counts = {
+        'time_very_low_percent': np.count_nonzero(g < VERY_LOW_THRESHOLD),
+        'time_low_percent': np.count_nonzero((g >= VERY_LOW_THRESHOLD) & (g < LOW_THRESHOLD)),
+        'time_in_range_percent': np.count_nonzero((g >= LOW_THRESHOLD) & (g <= HIGH_THRESHOLD)),
+        'time_high_percent': np.count_nonzero((g > HIGH_THRESHOLD) & (g <= VERY_HIGH_THRESHOLD)),
+        'time_very_high_percent': np.count_nonzero(g > VERY_HIGH_THRESHOLD),
+        'time_in_tight_range_percent': np.count_nonzero((g >= LOW_THRESHOLD) & (g <= TIGHT_RANGE_HIGH)),
+    }
+    return {key: round(100.0 * count / n_valid, 2) for key, count in counts.items()}
+
+
+def _mage(glucose: np.ndarray, sd: float) -> Optional[float]:
+    """
+    Mean Amplitude of Glycemic Excursions
+
+    Turning points are found in one vectorized pass; a zigzag over the turning
+    points then keeps only excursions larger than one standard deviation.
+    Excursions are averaged over both directions (peak-to-nadir and nadir-to-peak).
+    """
+    v = glucose[~np.isnan(glucose)]
+    if v.size < 3 or not sd:
+        return None
+
+    d = np.diff(v)
+    moving = np.flatnonzero(d != 0)
+    if moving.size < 2:
+        return None
+    direction = np.sign(d[moving])
+    turns = moving[np.flatnonzero(direction[1:] != direction[:-1]) + 1]
+    extrema = np.concatenate(([v[0]], v[turns], [v[-1]])).tolist()
+
+    amplitudes = []
+    trend = 0
+    low = high = last_pivot = candidate = extrema[0]
+    for x in extrema[1:]:
+        if trend == 0:
+            low, high = min(low, x), max(high, x)
+            if x - low >= sd:
+                trend, last_pivot, candidate = 1, low, x
+            elif high - x >= sd:
+                trend, last_pivot, candidate = -1, high, x
+        elif trend == 1:
+            if x > candidate:
+                candidate = x
+            elif candidate - x >= sd:
+                amplitudes.append(candidate - last_pivot)
+                trend, last_pivot, candidate = -1, candidate, x
+        else:
+            if x < candidate:
+                candidate = x
+            elif x - candidate >= sd:
+                amplitudes.append(last_pivot - candidate)
+                trend, last_pivot, candidate = 1, candidate, x
+
+    if trend != 0 and abs(candidate - last_pivot) >= sd:
+        amplitudes.append(abs(candidate - last_pivot))
+
+    return round(float(np.mean(amplitudes)), 1) if amplitudes else None
+
+
+def _episodes(
+    glucose: np.ndarray,
+    threshold: float,
+    grid_minutes: int,
+    min_minutes: int = MIN_EPISODE_MINUTES
+) -> Dict[str, Any]:
+    """
+    Detect hypoglycemic episodes below a threshold using run-length encoding
+
+    Runs separated by less than min_minutes back in range are merged, and merged
+    runs shorter than min_minutes are discarded. Missing data ends an episode.
+    """
+    missing = np.isnan(glucose)
+    below = np.nan_to_num(glucose, nan=np.inf) < threshold
+    edges = np.diff(np.concatenate(([0], below.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    min_points = int(np.ceil(min_minutes / grid_minutes))
+    if starts.size:
+        # A short return to range merges two runs, but a gap with any missing point does not
+        missing_before = np.concatenate(([0], np.cumsum(missing)))
+        gap_has_missing = missing_before[starts[1:]] > missing_before[ends[:-1]]
+        new_episode = np.concatenate(([True], ((starts[1:] - ends[:-1]) >= min_points) | gap_has_missing))
+        last_of_episode = np.concatenate((new_episode[1:], [True]))
+        starts, ends = starts[new_episode], ends[last_of_episode]
+
+    durations = (ends - starts) * grid_minutes
+    durations = durations[durations >= min_minutes]
+
+    by_duration = {}
+    for low, high in EPISODE_DURATION_BUCKETS:
+        label = f"{low}+" if high is None else f"{low}-{high - 1}"
+        upper = np.inf if high is None else high
+        by_duration[label] = int(np.count_nonzero((durations >= low) & (durations < upper)))
+
+    return {
+        'count': int(durations.size),
+        'total_minutes': int(durations.sum()),
+        'median_duration_minutes': float(np.median(durations)) if durations.size else 0.0,
+        'longest_duration_minutes': int(durations.max()) if durations.size else 0,
+        'by_duration_minutes': by_duration,
+    }
+
+
+def _agp(glucose: np.ndarray, grid_minutes: int, bin_minutes: int) -> Dict[str, Any]:
+    """
+    Ambulatory Glucose Profile: percentiles per time-of-day bin across all days
+
+    The grid is aligned to local midnight, so it reshapes to (days, bins, points_per_bin)
+    and every percentile curve comes out of a single nanpercentile call. bin_minutes
+    must be a multiple of grid_minutes that divides the day (compute_glucose_metrics
+    checks this).
+    """
+    points_per_day = (24 * 60) // grid_minutes
+    points_per_bin = bin_minutes // grid_minutes
+    bins = points_per_day // points_per_bin
+    days = glucose.size // points_per_day
+
+    pooled = glucose[:days * points_per_day].reshape(days, bins, points_per_bin)
+    pooled = pooled.transpose(1, 0, 2).reshape(bins, -1)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        curves = np.nanpercentile(pooled, AGP_PERCENTILES, axis=1)
+
+    agp = {
+        'bin_minutes': bin_minutes,
+        'minute_of_day': (np.arange(bins) * bin_minutes).tolist(),
+    }
+    for pct, curve in zip(AGP_PERCENTILES, curves):
+        agp[f'p{pct}'] = [None if np.isnan(x) else round(float(x), 1) for x in curve]
+    return agp
+
+
+def compute_glucose_metrics(
+    timestamps: Sequence,
+    values: Sequence,
+    grid_minutes: int = GRID_MINUTES,
+    max_gap_minutes: int = DEFAULT_MAX_GAP_MINUTES,
+    utc_offset_minutes: int = 0,
+    agp_bin_minutes: int = DEFAULT_AGP_BIN_MINUTES,
+    presorted: bool = False
+) -> Dict[str, Any]:
+    """
+    Compute the consensus CGM metric set for one patient
+
+    Args:
+        timestamps: Reading timestamps (datetime64 or epoch seconds)
+        values: Glucose values in mg/dL
+        grid_minutes: Resampling grid resolution in minutes
+        max_gap_minutes: Longest gap that is interpolated
+        utc_offset_minutes: Patient's UTC offset for time-of-day alignment
+        agp_bin_minutes: Width of each AGP time-of-day bin; a multiple of grid_minutes
+            that divides the day (ValueError otherwise)
+        presorted: Skip sorting when timestamps are already ascending
+
+    Returns:
+        Dictionary of metrics: coverage, mean, SD, CV, GMI, time in ranges,
+        MAGE, hypoglycemic episodes by level and duration, and the AGP curves
+    """
+    if agp_bin_minutes <= 0 or agp_bin_minutes % grid_minutes or (24 * 60) % agp_bin_minutes:
+        raise ValueError(
+            f"agp_bin_minutes must be a multiple of grid_minutes ({grid_minutes}) "
+            f"that divides 1440, got {agp_bin_minutes}"
+        )
+
+    resampled = resample_to_grid(
+        timestamps, values,
+        grid_minutes=grid_minutes,
+        max_gap_minutes=max_gap_minutes,
+        utc_offset_minutes=utc_offset_minutes,
+        presorted=presorted
+    )
+    glucose = resampled['glucose']
+    valid = ~np.isnan(glucose)
+    n_valid = int(np.count_nonzero(valid))
+
+    if n_valid == 0:
+        return {
+            'status': 'no_data',
+            'readings': int(np.size(values)),
+            'days': 0,
+            'sensor_active_percent': 0.0
+        }
+
+    g = glucose[valid]
+    mean = float(g.mean())
+    sd = float(g.std(ddof=1)) if n_valid > 1 else 0.0
+
+    metrics = {
+        'status': 'success',
+        'readings': int(np.size(values)),
+        'days': glucose.size * grid_minutes // (24 * 60),
+        'sensor_active_percent': round(100.0 * n_valid / glucose.size, 1),
+        'mean_glucose': round(mean, 1),
+        'standard_deviation': round(sd, 1),
+        'coefficient_of_variation_percent': round(100.0 * sd / mean, 1),
+        'gmi_percent': round(3.31 + 0.02392 * mean, 1),
+    }
+    metrics.update(_band_percentages(glucose, valid, n_valid))
+    metrics['mage'] = _mage(glucose, sd)
+    metrics['hypo_episodes'] = {
+        'level_1': _episodes(glucose, LOW_THRESHOLD, grid_minutes),
+        'level_2': _episodes(glucose, VERY_LOW_THRESHOLD, grid_minutes),
+    }
+    metrics['agp'] = _agp(glucose, grid_minutes, agp_bin_minutes)
+    return metrics
+
+
+def compute_glucose_metrics_batch(
+    patient_ids: Sequence,
+    timestamps: Sequence,
+    values: Sequence,
+    **kwargs
+) -> Dict[Any, Dict[str, Any]]:
+    """
+    Compute metrics for many patients from one set of columnar arrays
+
+    Rows are grouped with a single lexsort, then each patient's slice is a view
+    into the sorted arrays and is processed without further sorting.
+
+    Args:
+        patient_ids: Patient identifier for each reading
+        timestamps: Reading timestamps (datetime64 or epoch seconds)
+        values: Glucose values in mg/dL
+        **kwargs: Passed through to compute_glucose_metrics
+
+    Returns:
+        Dictionary mapping patient_id to its metrics
+    """
+    ids = np.asarray(patient_ids)
+    ts = to_epoch_seconds(timestamps)
+    glucose = np.asarray(values, dtype=np.float64)
+
+    if ids.size == 0:
+        return {}
+
+    unique_ids, codes = np.unique(ids, return_inverse=True)
+    order = np.lexsort((ts, codes))
+    codes, ts, glucose = codes[order], ts[order], glucose[order]
+    boundaries = np.flatnonzero(np.diff(codes)) + 1
+
+    kwargs['presorted'] = True
+    results = {}
+    for code, ts_slice, g_slice in zip(
+        codes[np.concatenate(([0], boundaries))],
+        np.split(ts, boundaries),
+        np.split(glucose, boundaries)
+    ):
+        patient_id = unique_ids[code]
+        key = patient_id.item() if hasattr(patient_id, 'item') else patient_id
+        results[key] = compute_glucose_metrics(ts_slice, g_slice, **kwargs)
+    return results
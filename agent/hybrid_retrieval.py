@@ -0,0 +1,140 @@
+"""
+Lexical retrieval and rank fusion for the knowledge base
+
+Vector search alone misses exact identifiers: medication names, ICD-10 codes
+(E11.9), and acronyms such as AREDS, HbA1c or anti-VEGF. This module provides a
+BM25 inverted index with a tokenizer that keeps those terms intact, and
+reciprocal rank fusion (RRF) to merge the lexical and vector rankings.
+"""
+
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Alphanumeric runs, keeping internal '.', '-' and '/' (e11.9, anti-vegf, mg/dl)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+COMPOUND_SEPARATORS = re.compile(r"[.\-/]")
+# Versioned names: AREDS2 -> AREDS, COVID19 -> COVID
+VERSION_SUFFIX = re.compile(r"^([a-z]{3,})\d+$")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its
+me my no not of on or our should so than that the their them then there these they this
+to was we were what when where which who why will with you your
+""".split())
+
+# Conventional RRF constant; damps the weight of the very top ranks
+RRF_K = 60
+
+
+def _normalize(token: str) -> str:
+    """Fold simple English plurals; codes and tokens with digits are left alone"""
+    if token.isalpha() and len(token) > 4 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def medical_tokenize(text: str) -> List[str]:
+    """
+    Lower-cased tokens that keep medical identifiers intact
+
+    Compound tokens are indexed whole and also as their joined and split forms,
+    so "anti-VEGF" matches "anti-VEGF", "antiVEGF" and "VEGF", and "E11.9"
+    matches "E11.9", "E119" and "E11". Versioned names also index their stem
+    ("AREDS2" matches "AREDS").
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        if token in STOPWORDS:
+            continue
+        tokens.append(_normalize(token))
+        versioned = VERSION_SUFFIX.match(token)
+        if versioned:
+            tokens.append(_normalize(versioned.group(1)))
+        parts = [p for p in COMPOUND_SEPARATORS.split(token) if p]
+        if len(parts) > 1:
+            tokens.append(''.join(parts))
+            tokens.extend(_normalize(p) for p in parts if len(p) > 1 and p not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed document list (document ids are list positions)
+
+    Postings are NumPy arrays per term, so a query costs one vectorised update
+    per distinct query term.
+    """
+
+    def __init__(self, documents: Iterable[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        lengths = []
+        for doc_id, text in enumerate(documents):
+            tokens = medical_tokenize(text)
+            lengths.append(len(tokens))
+            for token in tokens:
+                postings[token][doc_id] = postings[token].get(doc_id, 0) + 1
+
+        self.doc_lengths = np.asarray(lengths, dtype=np.float32)
+        self.avg_length = float(self.doc_lengths.mean()) if lengths else 0.0
+        count = len(lengths)
+        self.postings = {}
+        for token, docs in postings.items():
+            ids = np.fromiter(docs.keys(), dtype=np.int64, count=len(docs))
+            tfs = np.fromiter(docs.values(), dtype=np.float32, count=len(docs))
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            self.postings[token] = (ids, tfs, idf)
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def search(self, query: str, top_n: int = 20,
+               within: Optional[Tuple[int, int]] = None) -> List[Tuple[int, float]]:
+        """(doc id, score) for the best top_n documents containing any query term
+
+        within restricts the result to doc ids in [start, end).
+        """
+        scores = np.zeros(len(self), dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / (self.avg_length or 1.0))
+        for token in set(medical_tokenize(query)):
+            if token not in self.postings:
+                continue
+            ids, tfs, idf = self.postings[token]
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + norm[ids])
+
+        if within is not None:
+            start, end = within
+            scores[:start] = 0
+            scores[end:] = 0
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        top = matched[np.argsort(-scores[matched])[:top_n]]
+        return [(int(i), float(scores[i])) for i in top]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = RRF_K,
+                           limit: int = None) -> List[Tuple[Hashable, float]]:
+    """
+    Merge ranked id lists: score(d) = sum over lists of 1 / (k + rank)
+
+    Args:
+        rankings: Id lists, best first
+        k: RRF constant
+        limit: Number of fused results to return
+
+    Returns:
+        (id, fused score), best first
+    """
+    fused: Dict[Hashable, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            fused[item] += 1.0 / (k + rank)
+    ordered = sorted(fused.items(), key=lambda kv: kv[1], reverse=True)
+    return ordered[:limit] if limit else ordered
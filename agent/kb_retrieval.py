@@ -0,0 +1,318 @@
+"""
+Knowledge base retrieval backends for the specialist tools
+
+'bedrock' (default) queries the Bedrock Knowledge Base / OpenSearch Serverless
+collection; 'pgvector' embeds the query here and searches the kb_chunks table in
+Aurora through the database handler, optionally ranking the patient's own
+document chunks in the same query; 'snapshot' searches a memory-mapped export of
+the KB in-process (local_vector_index.py). Select with KB_RETRIEVAL_BACKEND.
+
+Every backend is hybrid: a lexical pass (BM25 locally, PostgreSQL full-text in
+pgvector, OpenSearch BM25 behind Bedrock's HYBRID search) is fused with the
+vector pass, so exact terms like HbA1c or AREDS2 are not missed and fewer
+chunks are needed.
+
+Chunks carry a domain metadata attribute (diabetes, amd, general; tagged by
+kb/preprocess_corpus.py and kb/prepare_corpus.py). The specialist tools pass
+their domain and every backend applies it inside the search (Bedrock metadata
+filter, SQL predicate, snapshot partition), so only in-domain chunks are
+ranked. A KB without domain tags falls back to the unfiltered search.
+
+Snapshot locations: KB_SNAPSHOT_DIR/<kb_name> (default /tmp/kb-snapshots), kept
+in sync with KB_SNAPSHOT_S3_URI/<kb_name> when that is set.
+"""
+
+import json
+import os
+import time
+from functools import lru_cache
+from typing import Callable, Optional, List, Dict, Any
+
+import boto3
+import numpy as np
+import requests
+from local_vector_index import SnapshotManager
+from hybrid_retrieval import TOKEN_PATTERN, STOPWORDS
+
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"
+EMBEDDING_DIMENSIONS = 1024
+
+RETRIEVAL_BACKENDS = ('bedrock', 'pgvector', 'snapshot')
+
+# Chunks handed to the specialist prompts after fusion
+DEFAULT_TOP_K = 4
+
+# Adaptive top-k: first and widened fetch sizes, and chunks kept for a clear match
+ADAPTIVE_INITIAL_K = 3
+ADAPTIVE_MAX_K = 8
+STRONG_MATCH_MAX_K = 2
+
+# Relevance thresholds (cosine similarity for snapshot/pgvector, Bedrock's score otherwise);
+# tune from the TopScore/ScoreGap metrics
+STRONG_SCORE = float(os.environ.get('KB_STRONG_SCORE', 0.55))
+WEAK_SCORE = float(os.environ.get('KB_WEAK_SCORE', 0.35))
+SCORE_GAP = float(os.environ.get('KB_SCORE_GAP', 0.08))
+
+METRICS_NAMESPACE = "MedicalAssistant/KnowledgeBase"
+
+# Seconds between checks for a newer snapshot version
+SNAPSHOT_CHECK_INTERVAL = 300
+
+# Seconds a domain stays marked untagged before its filter is tried again
+UNTAGGED_DOMAIN_TTL = 600
+
+_snapshot_managers: Dict[str, SnapshotManager] = {}
+
+# (backend, kb_name, domain) -> monotonic expiry: the filtered search came back empty
+# while the unfiltered one did not, so searches skip the filter until the entry expires
+_untagged_domains: Dict[tuple, float] = {}
+
+
+def get_retrieval_backend() -> str:
+    """Backend named by KB_RETRIEVAL_BACKEND; unknown values fall back to 'bedrock'"""
+    backend = os.environ.get('KB_RETRIEVAL_BACKEND', 'bedrock').lower()
+    return backend if backend in RETRIEVAL_BACKENDS else 'bedrock'
+
+
+@lru_cache(maxsize=1)
+def _bedrock_runtime():
+    region_name = boto3.Session().region_name or os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
+    return boto3.client('bedrock-runtime', region_name=region_name)
+
+
+def embed_text(text: str) -> np.ndarray:
+    """Unit-length Titan v2 embedding, the same model the knowledge base is built with"""
+    response = _bedrock_runtime().invoke_model(
+        modelId=EMBEDDING_MODEL_ID,
+        body=json.dumps({
+            "inputText": text,
+            "dimensions": EMBEDDING_DIMENSIONS,
+            "normalize": True
+        })
+    )
+    vector = np.asarray(json.loads(response['body'].read())['embedding'], dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@lru_cache(maxsize=256)
+def embed_query(query: str) -> tuple:
+    """Cached query embedding; the specialist tools repeat the same prefixed queries"""
+    return tuple(float(x) for x in embed_text(query))
+
+
+def retrieve_pgvector(query: str, kb_name: str, lambda_url: str, k: int = DEFAULT_TOP_K,
+                      patient_id: Optional[str] = None, audit_context: Optional[Dict[str, Any]] = None,
+                      domain: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Nearest chunks from the pgvector store
+
+    Args:
+        query: Natural-language query
+        kb_name: Knowledge base name (kb_chunks.kb_name)
+        lambda_url: Database handler URL
+        k: Number of chunks
+        patient_id: Include this patient's own document chunks in the ranking
+        audit_context: session_id/source forwarded to the audit trail
+        domain: Only rank KB chunks whose metadata domain matches (patient chunks are unaffected)
+
+    Returns:
+        List of {origin, source, document_id, content, score}, best first
+    """
+    payload = {
+        "action": "vector_search_kb",
+        "query_embedding": list(embed_query(query)),
+        "query_text": query,
+        "kb_name": kb_name,
+        "k": k,
+        **(audit_context or {})
+    }
+    if patient_id:
+        payload["patient_id"] = patient_id
+    if domain:
+        payload["domain"] = domain
+
+    response = requests.post(lambda_url.rstrip('/'), json=payload, timeout=30)
+    result = response.json()
+    if response.status_code != 200 or result.get('status') != 'success':
+        raise RuntimeError(result.get('message', f"HTTP {response.status_code}"))
+    return result.get('results', [])
+
+
+def get_snapshot_manager(kb_name: str) -> SnapshotManager:
+    """Snapshot manager for one knowledge base, created on first use"""
+    manager = _snapshot_managers.get(kb_name)
+    if manager is None:
+        root = os.path.join(os.environ.get('KB_SNAPSHOT_DIR', '/tmp/kb-snapshots'), kb_name)
+        s3_root = os.environ.get('KB_SNAPSHOT_S3_URI')
+        manager = SnapshotManager(
+            root,
+            s3_uri=f"{s3_root.rstrip('/')}/{kb_name}" if s3_root else None,
+            check_interval=float(os.environ.get('KB_SNAPSHOT_CHECK_INTERVAL', SNAPSHOT_CHECK_INTERVAL))
+        )
+        _snapshot_managers[kb_name] = manager
+    return manager
+
+
+def retrieve_snapshot(query: str, kb_name: str, k: int = DEFAULT_TOP_K,
+                      domain: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Nearest chunks from the local snapshot (one domain partition when given); no network call when the
+    query embedding is cached"""
+    index = get_snapshot_manager(kb_name).current()
+    model = index.manifest.get('embedding_model')
+    if model != EMBEDDING_MODEL_ID:
+        raise ValueError(f"Snapshot {index.version} was embedded with {model}, queries use {EMBEDDING_MODEL_ID}")
+    return index.hybrid_search(np.asarray(embed_query(query), dtype=np.float32), query, k, domain=domain)
+
+
+def domain_search(search: Callable[[str, int, Optional[str]], List[Dict[str, Any]]], backend: str,
+                  kb_name: str, domain: Optional[str]) -> Callable[[str, int], List[Dict[str, Any]]]:
+    """
+    (query, k) search restricted to domain, for adaptive_retrieve
+
+    Args:
+        search: Backend search, (query, k, domain) -> results best first
+        backend: Backend name
+        kb_name: Knowledge base name
+        domain: Metadata domain to filter on; None searches everything
+
+    An empty filtered result usually means no chunk carries the domain tag; the
+    search is repeated unfiltered. The domain is treated as untagged only when
+    that unfiltered search does return chunks (so an empty or failing KB is not
+    mistaken for an untagged one), and only for UNTAGGED_DOMAIN_TTL seconds, so
+    a KB re-ingested with tags, or a transient miss, is picked up again.
+    """
+    def run(q: str, k: int) -> List[Dict[str, Any]]:
+        key = (backend, kb_name, domain)
+        if not domain or _untagged_domains.get(key, 0) > time.monotonic():
+            return search(q, k, None)
+        results = search(q, k, domain)
+        if results:
+            _untagged_domains.pop(key, None)
+            return results
+        results = search(q, k, None)
+        if results:
+            print(f"⚠️ Warning: no '{domain}' chunks in {kb_name} ({backend}); searching all domains "
+                  f"for the next {UNTAGGED_DOMAIN_TTL}s")
+            _untagged_domains[key] = time.monotonic() + UNTAGGED_DOMAIN_TTL
+        return results
+    return run
+
+
+def relevance(result: Dict[str, Any]) -> float:
+    """Comparable relevance: cosine similarity when the backend reports it (fused scores are rank-based)"""
+    similarity = result.get('similarity')
+    return float(similarity if similarity is not None else result['score'])
+
+
+def keyword_query(query: str) -> str:
+    """Reformulation for a weak first pass: distinct content words only, original order"""
+    words = [w for w in TOKEN_PATTERN.findall(query.lower()) if w not in STOPWORDS]
+    return ' '.join(dict.fromkeys(words))
+
+
+def cutoff(results: List[Dict[str, Any]], max_k: int) -> List[Dict[str, Any]]:
+    """Leading results up to the first score gap or weak score (at least one, at most max_k)"""
+    kept = results[:1]
+    for previous, result in zip(results, results[1:max_k]):
+        score = relevance(result)
+        if score < WEAK_SCORE or relevance(previous) - score > SCORE_GAP \
+                or relevance(results[0]) - score > 2 * SCORE_GAP:
+            break
+        kept.append(result)
+    return kept
+
+
+def emit_retrieval_metrics(backend: str, outcome: str, candidates: List[Dict[str, Any]],
+                           chosen: List[Dict[str, Any]], elapsed_ms: float):
+    """One CloudWatch EMF record; picked up from stdout by the log agent, no API call"""
+    scores = sorted((relevance(r) for r in candidates), reverse=True)
+    record = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRICS_NAMESPACE,
+                "Dimensions": [["Backend"], ["Backend", "Outcome"]],
+                "Metrics": [
+                    {"Name": "ChosenK", "Unit": "Count"},
+                    {"Name": "CandidateK", "Unit": "Count"},
+                    {"Name": "TopScore", "Unit": "None"},
+                    {"Name": "ScoreGap", "Unit": "None"},
+                    {"Name": "RetrievalLatency", "Unit": "Milliseconds"}
+                ]
+            }]
+        },
+        "Backend": backend,
+        "Outcome": outcome,
+        "ChosenK": len(chosen),
+        "CandidateK": len(candidates),
+        "TopScore": scores[0] if scores else 0.0,
+        "ScoreGap": scores[0] - scores[1] if len(scores) > 1 else 0.0,
+        "RetrievalLatency": round(elapsed_ms, 2),
+        "Scores": [round(score, 4) for score in scores]
+    }
+    print(json.dumps(record))
+
+
+def adaptive_retrieve(search: Callable[[str, int], List[Dict[str, Any]]], query: str,
+                      backend: str) -> List[Dict[str, Any]]:
+    """
+    Retrieve as few chunks as the scores justify
+
+    Args:
+        search: Backend search, (query, k) -> results best first
+        query: Query text
+        backend: Backend name for the metrics dimension
+
+    Outcomes:
+        strong  - top score >= STRONG_SCORE; up to STRONG_MATCH_MAX_K chunks before the first gap
+        partial - top score between the thresholds; up to ADAPTIVE_INITIAL_K chunks
+        widened - weak first pass; ADAPTIVE_MAX_K candidates from the original and keyword
+                  queries are merged and up to DEFAULT_TOP_K returned
+    """
+    start = time.perf_counter()
+    candidates = search(query, ADAPTIVE_INITIAL_K)
+    top = relevance(candidates[0]) if candidates else 0.0
+
+    if top >= STRONG_SCORE:
+        outcome, chosen = 'strong', cutoff(candidates, STRONG_MATCH_MAX_K)
+    elif top >= WEAK_SCORE:
+        outcome, chosen = 'partial', cutoff(candidates, ADAPTIVE_INITIAL_K)
+    else:
+        outcome = 'widened'
+        merged = {}
+        reformulated = keyword_query(query)
+        queries = [query] + ([reformulated] if reformulated and reformulated != query.lower() else [])
+        for q in queries:
+            for result in search(q, ADAPTIVE_MAX_K):
+                key = (result.get('source'), result['content'])
+                if key not in merged or relevance(result) > relevance(merged[key]):
+                    merged[key] = result
+        candidates = sorted(merged.values(), key=relevance, reverse=True)
+        chosen = candidates[:DEFAULT_TOP_K]
+
+    emit_retrieval_metrics(backend, outcome, candidates, chosen, (time.perf_counter() - start) * 1000)
+    return chosen
+
+
+def format_results(query: str, results: List[Dict[str, Any]]) -> str:
+    """Same text layout as the Bedrock retrieve path, so prompts see one format"""
+    if not results:
+        return f"No results found in knowledge base for query: {query}"
+
+    formatted_results = f"Knowledge Base Results for: {query}\n\n"
+    for i, result in enumerate(results, 1):
+        if result.get('origin') == 'patient_document':
+            source = f"\nSource: Your records - {result['source']}"
+        else:
+            source = f"\nSource: {result['source']}" if result.get('source') else ""
+        formatted_results += f"Result {i}:\nScore: {relevance(result):.4f}\nContent: {result['content']}{source}\n\n"
+    return formatted_results
+
+
+# Map the snapshot at start-up so the first consultation does not pay for it
+if get_retrieval_backend() == 'snapshot':
+    try:
+        get_snapshot_manager(os.environ.get('KB_SNAPSHOT_NAME', 'diabetes-agent-kb')).current()
+    except Exception as e:
+        print(f"⚠️ Warning: KB snapshot not loaded at start-up: {e}")
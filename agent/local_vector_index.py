@@ -0,0 +1,233 @@
+"""
+In-process vector search over a memory-mapped knowledge base snapshot
+
+Snapshots are written by kb/export_snapshot.py: a float16 embedding matrix,
+UTF-8 chunk texts with byte offsets, and per-chunk metadata. The matrix and
+texts are memory-mapped, so start-up cost stays small and pages are shared
+between processes. Search is exact (brute-force inner product on unit vectors).
+NumPy has no fast float16 GEMV, so matrices under a memory budget are widened to
+float32 once at load time (a 20k-chunk KB then searches in ~5 ms); larger ones
+are widened block by block on every query. A BM25 index over the chunk texts is
+built at load time for hybrid (lexical + vector) search. Snapshots group rows
+by domain and record each domain's row range, so a domain-filtered search
+scores only that slice.
+
+SnapshotManager follows the CURRENT pointer of a snapshot root (local directory,
+optionally mirrored from S3) and swaps in a new version without a restart.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Optional, List, Dict, Any, Tuple
+
+import numpy as np
+from hybrid_retrieval import BM25Index, reciprocal_rank_fusion
+
+SNAPSHOT_FILES = ('manifest.json', 'embeddings.npy', 'texts.bin', 'offsets.npy', 'metadata.jsonl')
+
+# Largest embedding matrix kept resident as float32 (the snapshot itself stays float16)
+DEFAULT_RESIDENT_MB = 512
+
+# Rows converted to float32 per matmul block (~16 MB at 1024 dimensions)
+SEARCH_BLOCK_ROWS = 4096
+
+# Candidates taken from each of the vector and BM25 rankings before fusion
+HYBRID_CANDIDATES = 20
+
+
+class SnapshotIndex:
+    """One immutable snapshot version, memory-mapped read-only"""
+
+    def __init__(self, path: str, resident_mb: float = DEFAULT_RESIDENT_MB):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+        self.version = os.path.basename(os.path.normpath(path))
+        self.embeddings = np.load(os.path.join(path, 'embeddings.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(path, 'offsets.npy'))
+        self.texts = np.memmap(os.path.join(path, 'texts.bin'), dtype=np.uint8, mode='r')
+        with open(os.path.join(path, 'metadata.jsonl')) as f:
+            self.metadata = [json.loads(line) for line in f]
+
+        if not (len(self.embeddings) == len(self.metadata) == len(self.offsets) - 1 == self.manifest['count']):
+            raise ValueError(f"Inconsistent snapshot at {path}")
+
+        # domain -> (start, end) row range; older snapshots have none
+        self.partitions = {domain: tuple(rows) for domain, rows in self.manifest.get('partitions', {}).items()}
+
+        widened_mb = self.embeddings.shape[0] * self.embeddings.shape[1] * 4 / 1e6
+        self._matrix = np.asarray(self.embeddings, dtype=np.float32) if widened_mb <= resident_mb else None
+        self.lexical = BM25Index(self.text(i) for i in range(len(self.metadata)))
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+    def text(self, i: int) -> str:
+        return bytes(self.texts[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    def rows(self, domain: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """Row range searched for domain (all rows when None); None if the snapshot has no such partition"""
+        if domain is None:
+            return 0, len(self)
+        return self.partitions.get(domain)
+
+    def scores(self, query: np.ndarray, rows: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Cosine similarity of the query with every chunk in rows (default all), in row order"""
+        first, last = rows or (0, len(self))
+        query = np.asarray(query, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        if self._matrix is not None:
+            return self._matrix[first:last] @ query
+        out = np.empty(last - first, dtype=np.float32)
+        # Too large to keep widened: convert one block at a time instead of the whole matrix
+        for start in range(first, last, SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.embeddings[start:min(start + SEARCH_BLOCK_ROWS, last)], dtype=np.float32)
+            out[start - first:start - first + len(block)] = block @ query
+        return out
+
+    def _top(self, scores: np.ndarray, n: int) -> np.ndarray:
+        n = min(n, len(scores))
+        top = np.argpartition(-scores, n - 1)[:n]
+        return top[np.argsort(-scores[top])]
+
+    def _result(self, i: int, score: float) -> Dict[str, Any]:
+        return {
+            'origin': 'kb',
+            'source': self.metadata[i].get('source_uri'),
+            'document_id': None,
+            'content': self.text(i),
+            'score': score
+        }
+
+    def search(self, query: np.ndarray, k: int = 5, domain: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-k chunks by cosine similarity as {origin, source, document_id, content, score}, best first"""
+        rows = self.rows(domain)
+        if not rows or rows[0] == rows[1]:
+            return []
+        scores = self.scores(query, rows)
+        return [self._result(rows[0] + int(i), float(scores[i])) for i in self._top(scores, k)]
+
+    def hybrid_search(self, query: np.ndarray, query_text: str, k: int = 5,
+                      candidates: int = HYBRID_CANDIDATES, domain: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-k chunks by reciprocal rank fusion of the vector and BM25 rankings
+
+        score is the fused score; similarity is the chunk's cosine similarity to the query.
+        With a domain, only that domain's partition is searched.
+        """
+        rows = self.rows(domain)
+        if not rows or rows[0] == rows[1]:
+            return []
+        first = rows[0]
+        scores = self.scores(query, rows)
+        vector_ranking = [first + int(i) for i in self._top(scores, candidates)]
+        lexical_ranking = [i for i, _ in self.lexical.search(query_text, candidates, within=rows)]
+        fused = reciprocal_rank_fusion([vector_ranking, lexical_ranking], limit=k)
+        return [dict(self._result(i, score), similarity=float(scores[i - first])) for i, score in fused]
+
+
+class SnapshotManager:
+    """
+    Serves the live snapshot under root and hot-swaps when CURRENT changes
+
+    Args:
+        root: Local snapshot root (contains CURRENT and version directories)
+        s3_uri: Optional s3://bucket/prefix published by export_snapshot.py; new
+            versions are downloaded into root before they are swapped in, and
+            downloads older than the previous version are deleted after a swap
+        check_interval: Seconds between CURRENT checks (checks happen on search)
+        resident_mb: Budget for the float32 copy of the embedding matrix
+    """
+
+    def __init__(self, root: str, s3_uri: Optional[str] = None, check_interval: float = 60.0,
+                 resident_mb: float = DEFAULT_RESIDENT_MB):
+        self.root = root
+        self.s3_uri = s3_uri
+        self.check_interval = check_interval
+        self.resident_mb = resident_mb
+        self._index: Optional[SnapshotIndex] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _remote_version(self) -> Optional[str]:
+        import boto3
+        bucket, _, prefix = self.s3_uri[len('s3://'):].partition('/')
+        prefix = prefix.strip('/')
+        s3 = boto3.client('s3')
+        key = f"{prefix}/CURRENT" if prefix else "CURRENT"
+        version = s3.get_object(Bucket=bucket, Key=key)['Body'].read().decode('utf-8').strip()
+
+        target = os.path.join(self.root, version)
+        if not os.path.isdir(target):
+            # Download next to the target and rename, so a half-copied version is never visible
+            os.makedirs(self.root, exist_ok=True)
+            staging = tempfile.mkdtemp(prefix=f".{version}-", dir=self.root)
+            try:
+                for name in SNAPSHOT_FILES:
+                    s3.download_file(bucket, f"{prefix}/{version}/{name}" if prefix else f"{version}/{name}",
+                                     os.path.join(staging, name))
+                os.rename(staging, target)
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+        return version
+
+    def _local_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, 'CURRENT')) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def refresh(self) -> bool:
+        """Load the version CURRENT points at if it differs from the live one; True if swapped"""
+        version = self._remote_version() if self.s3_uri else self._local_version()
+        if not version or (self._index and self._index.version == version):
+            return False
+        index = SnapshotIndex(os.path.join(self.root, version), self.resident_mb)
+        previous = self._index.version if self._index else None
+        # Plain reference swap: in-flight searches finish on the old mapping
+        self._index = index
+        print(f"✅ Loaded KB snapshot {version} ({len(index):,} chunks)")
+        if self.s3_uri:
+            self._prune(keep={version, previous})
+        return True
+
+    def _prune(self, keep: set):
+        """Delete downloaded versions other than the live and previous ones"""
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            # Dot-prefixed entries are downloads in progress
+            if name in keep or name.startswith('.') or not os.path.isdir(path):
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            print(f"Removed old KB snapshot {name}")
+
+    def current(self) -> SnapshotIndex:
+        """Live snapshot, checking for a newer version at most every check_interval seconds"""
+        now = time.monotonic()
+        if self._index is None or now - self._checked_at >= self.check_interval:
+            # One caller checks; others keep serving the current index meanwhile
+            if self._lock.acquire(blocking=self._index is None):
+                try:
+                    self._checked_at = now
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        if self._index is None:
+                            raise
+                        print(f"⚠️ Warning: KB snapshot refresh failed, keeping {self._index.version}: {e}")
+                finally:
+                    self._lock.release()
+        if self._index is None:
+            raise FileNotFoundError(f"No KB snapshot found under {self.root}")
+        return self._index
+
+    def search(self, query: np.ndarray, k: int = 5, domain: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.current().search(query, k, domain=domain)
+
+    def hybrid_search(self, query: np.ndarray, query_text: str, k: int = 5,
+                      domain: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.current().hybrid_search(query, query_text, k, domain=domain)
@@ -101,92 +101,193 @@ def get_patient_records(patient_id: Optional[str] = None, medical_record_number:
             "message": f"Unexpected error accessing patient database: {str(e)}"
         }
 
-def search_patients_by_name(first_name: Optional[str] = None, last_name: Optional[str] = None) -> Dict[str, Any]:
+# Handler actions -> AgentCore Gateway tool names (lambda/database-handler/api_spec.json)
+GATEWAY_TOOLS = {
+    "search_patients": "search_patients_by_name",
+    "get_diabetes_patients": "get_diabetes_patients_list",
+}
+
+def get_gateway_token() -> Optional[str]:
+    """Cognito client-credentials access token for the gateway's JWT authorizer"""
+    client_id = get_ssm_parameter("/app/medicalassistant/agentcore/gateway_client_id")
+    client_secret = get_ssm_parameter("/app/medicalassistant/agentcore/gateway_client_secret")
+    token_endpoint = get_ssm_parameter("/app/medicalassistant/agentcore/token_endpoint")
+    if not all([client_id, client_secret, token_endpoint]):
+        return None
+    
+    response = requests.post(
+        token_endpoint,
+        data={
+            'grant_type': 'client_credentials',
+            'client_id': client_id,
+            'client_secret': client_secret,
+            'scope': 'patient-database/read patient-database/write'
+        },
+        headers={'Content-Type': 'application/x-www-form-urlencoded'},
+        timeout=30
+    )
+    if response.status_code != 200:
+        return None
+    return response.json().get('access_token')
+
+def call_gateway_action(action: str, **params) -> Dict[str, Any]:
     """
-    Search for patients by name (client-side filtering)
+    Invoke a database handler action as an authenticated AgentCore Gateway tool
+    
+    The handler serves all-patient actions only to gateway tool invocations, so
+    this goes through MCP tools/call with a Cognito bearer token.
     
     Args:
-        first_name: Patient's first name to search for
-        last_name: Patient's last name to search for
+        action: Handler action name (a key of GATEWAY_TOOLS)
+        **params: Action parameters (None values are omitted)
         
     Returns:
-        Dictionary containing matching patients
+        Parsed response body or error information
     """
     try:
-        # Get all patients first
-        all_patients_result = get_patient_records()
+        gateway_url = get_gateway_url()
+        if not gateway_url:
+            return {
+                "status": "error",
+                "message": "Gateway URL not configured. Please set up AgentCore Gateway first."
+            }
+        
+        token = get_gateway_token()
+        if not token:
+            return {
+                "status": "error",
+                "message": "Could not get a gateway access token. Run setup_gateway_oauth.py first."
+            }
         
-        if all_patients_result["status"] != "success":
-            return all_patients_result
+        arguments = {key: value for key, value in params.items() if value is not None}
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "tools/call",
+            "params": {"name": GATEWAY_TOOLS[action], "arguments": arguments}
+        }
         
-        patients = all_patients_result.get("patients", [])
-        matching_patients = []
+        response = requests.post(
+            gateway_url,
+            json=payload,
+            headers={'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'},
+            timeout=30
+        )
         
-        # Filter patients by name
-        for patient in patients:
-            match = True
-            
-            if first_name:
-                patient_first = patient.get("first_name", "").lower()
-                if first_name.lower() not in patient_first:
-                    match = False
-            
-            if last_name:
-                patient_last = patient.get("last_name", "").lower()
-                if last_name.lower() not in patient_last:
-                    match = False
-            
-            if match:
-                matching_patients.append(patient)
+        if response.status_code != 200:
+            return {
+                "status": "error",
+                "message": f"Gateway request failed for {action}",
+                "status_code": response.status_code
+            }
         
+        result = response.json().get("result") or {}
+        content = result.get("content") or []
+        if result.get("isError") or not content:
+            return {
+                "status": "error",
+                "message": f"Gateway tool call failed for {action}"
+            }
+        
+        # Tool text is the handler's Lambda response; the payload is its JSON body
+        handler_response = json.loads(content[0].get("text") or "{}")
+        body = handler_response.get("body", handler_response)
+        return json.loads(body) if isinstance(body, str) else body
+        
+    except requests.exceptions.Timeout:
+        return {
+            "status": "error",
+            "message": "Request timeout - database may be slow to respond"
+        }
+    except requests.exceptions.ConnectionError:
         return {
-            "status": "success",
-            "patients": matching_patients,
-            "count": len(matching_patients),
-            "message": f"Found {len(matching_patients)} patients matching search criteria"
+            "status": "error", 
+            "message": "Cannot connect to patient database gateway"
         }
-        
     except Exception as e:
         return {
             "status": "error",
-            "message": f"Error searching patients: {str(e)}"
+            "message": f"Unexpected error accessing patient database: {str(e)}"
         }
 
-def get_diabetes_patients() -> Dict[str, Any]:
+def search_patients_by_name(
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+    page_size: int = 25,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
     """
-    Get all patients with diabetes diagnosis
+    Search for patients by name (filtered and paginated in the database)
     
+    Args:
+        first_name: Patient's first name (or fragment) to search for
+        last_name: Patient's last name (or fragment) to search for
+        page_size: Maximum patients to return (server caps at 100)
+        cursor: next_cursor from a previous page
+        
     Returns:
-        Dictionary containing diabetes patients
+        Dictionary containing one page of matching patients and next_cursor
     """
-    try:
-        # Get all patients first
-        all_patients_result = get_patient_records()
-        
-        if all_patients_result["status"] != "success":
-            return all_patients_result
-        
-        patients = all_patients_result.get("patients", [])
-        diabetes_patients = []
-        
-        # Filter for diabetes patients
-        for patient in patients:
-            diabetes_type = patient.get("diabetes_type")
-            if diabetes_type and diabetes_type.strip():
-                diabetes_patients.append(patient)
-        
-        return {
-            "status": "success",
-            "patients": diabetes_patients,
-            "count": len(diabetes_patients),
-            "message": f"Found {len(diabetes_patients)} patients with diabetes diagnosis"
-        }
-        
-    except Exception as e:
+    if not first_name and not last_name:
         return {
             "status": "error",
-            "message": f"Error retrieving diabetes patients: {str(e)}"
+            "message": "Provide a first name and/or last name to search for"
         }
+    
+    result = call_gateway_action(
+        "search_patients",
+        first_name=first_name,
+        last_name=last_name,
+        page_size=page_size,
+        cursor=cursor
+    )
+    if result.get("status") != "success":
+        return result
+    
+    patients = result.get("patients", [])
+    return {
+        "status": "success",
+        "patients": patients,
+        "count": len(patients),
+        "next_cursor": result.get("next_cursor"),
+        "message": f"Found {len(patients)} patients matching search criteria"
+                   + (" (more available)" if result.get("next_cursor") else "")
+    }
+
+def get_diabetes_patients(
+    page_size: int = 25,
+    cursor: Optional[str] = None,
+    min_hba1c: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Get patients with a diabetes diagnosis (ICD-10 E08-E13), one page at a time
+    
+    Args:
+        page_size: Maximum patients to return (server caps at 100)
+        cursor: next_cursor from a previous page
+        min_hba1c: Only include patients whose latest HbA1c is at least this value
+    
+    Returns:
+        Dictionary containing one page of diabetes patients and next_cursor
+    """
+    result = call_gateway_action(
+        "get_diabetes_patients",
+        page_size=page_size,
+        cursor=cursor,
+        min_hba1c=min_hba1c
+    )
+    if result.get("status") != "success":
+        return result
+    
+    patients = result.get("patients", [])
+    return {
+        "status": "success",
+        "patients": patients,
+        "count": len(patients),
+        "next_cursor": result.get("next_cursor"),
+        "message": f"Found {len(patients)} patients with diabetes diagnosis"
+                   + (" (more available)" if result.get("next_cursor") else "")
+    }
 
 def format_patient_summary(patient: Dict[str, Any]) -> str:
     """
@@ -210,6 +311,9 @@ def format_patient_summary(patient: Dict[str, Any]) -> str:
         if patient.get('diagnosis_date'):
             summary += f"- Diagnosis Date: {patient.get('diagnosis_date')}\n"
             
+        if patient.get('latest_hba1c') is not None:
+            summary += f"- Latest HbA1c: {patient.get('latest_hba1c')}% ({patient.get('latest_hba1c_date', 'N/A')})\n"
+            
         if patient.get('current_medications'):
             summary += f"- Current Medications: {patient.get('current_medications')}\n"
             
@@ -1,6 +1,7 @@
 import asyncio
 import os
 import json
+import uuid
 import boto3
 from strands import Agent, tool
 from typing import Generator, Union, Any
@@ -13,7 +14,12 @@ from tools import (
     amd_specialist_tool,
     get_my_medications,
     check_my_medication,
+    check_my_drug_interactions,
+    get_my_glucose_metrics,
+    get_my_health_summary,
+    search_my_records,
     get_appointments,
+    find_available_appointments,
     create_appointment
 )
 
@@ -35,10 +41,15 @@ SYSTEM_PROMPT = """You are a medical assistant specializing in diabetes and eye
 **Personal Health (Privacy-Safe):**
 - `get_my_medications` - Show YOUR medications (uses auth automatically, NO patient ID needed)
 - `check_my_medication` - Check if YOU take specific medication (NO patient ID needed)
+- `check_my_drug_interactions` - Check YOUR active medications (or a new one) for interactions (NO patient ID needed)
+- `get_my_glucose_metrics` - YOUR CGM statistics: time in range, GMI, variability, lows (NO patient ID needed)
 
 **Appointments:**
+- `get_my_health_summary` - YOUR health overview: last visit, condition/medication/allergy counts, latest vitals (NO patient ID needed)
+- `search_my_records` - Search YOUR visit notes, results and letters by keyword; returns excerpts (NO patient ID needed)
 - `get_appointments` - View/list YOUR appointments (with filters)
-- `create_appointment` - Schedule new appointments
+- `find_available_appointments` - Find the earliest open slots by specialty, provider or location
+- `create_appointment` - Schedule new appointments (book a slot found above)
 
 **Research:**
 - `web_search` - Only when specialist tools lack info or current research needed
@@ -48,14 +59,19 @@ SYSTEM_PROMPT = """You are a medical assistant specializing in diabetes and eye
 **Personal Health Queries:**
 When user asks about THEIR health data:
 - "my medications", "what am I taking", "am I on X" → USE `get_my_medications` or `check_my_medication`
+- "drug interactions", "can I take X with my medications" → USE `check_my_drug_interactions`
+- "my glucose", "my time in range", "my sugar levels" → USE `get_my_glucose_metrics`
+- "my health summary", "my latest vitals", "overview of my health" → USE `get_my_health_summary`
+- "what did my doctor say about...", "find my ... results", "search my notes" → USE `search_my_records`
 - "my appointments", "show appointments" → USE `get_appointments`
+- "book/schedule an appointment", "next available" → USE `find_available_appointments`, then `create_appointment`
 - ✅ These tools use authentication automatically
 - ❌ NEVER ask for patient ID, MRN, or any identifier
 
 **Tool Priority:**
 1. Diabetes questions → `diabetes_specialist_tool` FIRST
 2. Vision/AMD questions → `amd_specialist_tool` FIRST
-3. Personal health data → `get_my_medications`, `check_my_medication`, `get_appointments`
+3. Personal health data → `get_my_medications`, `check_my_medication`, `check_my_drug_interactions`, `get_my_glucose_metrics`, `get_my_health_summary`, `search_my_records`, `get_appointments`
 4. Web search → ONLY if specialist tools insufficient
 
 **Response Quality:**
@@ -197,7 +213,12 @@ def create_agent_with_memory(memory_id: str, actor_id: str, session_id: str) ->
             # Personal health (privacy-safe - no patient ID needed)
             get_my_medications,
             check_my_medication,
+            check_my_drug_interactions,
+            get_my_glucose_metrics,
+            get_my_health_summary,
+            search_my_records,
             get_appointments,
+            find_available_appointments,
             create_appointment,
         ],
         system_prompt=SYSTEM_PROMPT,  # Using inline optimized prompt
@@ -227,6 +248,8 @@ async def strands_agent_bedrock(payload, context):
     # Set user context in environment for tools to access
     os.environ['AGENTCORE_USER_ID'] = actor_id
     os.environ['AGENTCORE_SESSION_ID'] = session_id
+    # One id per user turn; tools use it to scope idempotency keys
+    os.environ['AGENTCORE_TURN_ID'] = uuid.uuid4().hex
     print(f"✅ Set user context - User ID: {actor_id[:8]}..., Session: {session_id[:20]}...")
     
     # Create agent with memory configuration and patient database tools
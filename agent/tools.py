@@ -10,10 +10,19 @@ import boto3
 import json
 import os
 import asyncio
+import hashlib
 import re
+import uuid
+import numpy as np
 import requests
 from strands import Agent, tool
+from datetime import date, timedelta
 from typing import Optional, Dict, Any
+from glucose_analytics import compute_glucose_metrics
+from cgm_codec import decode_days, rows_from_response
+from drug_interactions import get_interaction_graph
+from kb_retrieval import (get_retrieval_backend, retrieve_pgvector, retrieve_snapshot, adaptive_retrieve,
+                          domain_search, format_results)
 from prompts import (
     DIABETES_CONSULTATION_FRAMEWORKS, 
     DIABETES_CLINICAL_RECOMMENDATIONS,
@@ -124,12 +133,53 @@ def get_patient_id_for_current_user() -> Optional[str]:
     return user_id
 
 
-def _query_knowledge_base_internal(query: str, kb_name: str = "diabetes-agent-kb"):
-    """Internal helper function to query the medical knowledge base"""
+def get_audit_context() -> Dict[str, Optional[str]]:
+    """Session and source fields the database handler records in its audit trail"""
+    return {
+        "session_id": os.environ.get('AGENTCORE_SESSION_ID'),
+        "source": "agent"
+    }
+
+
+def _query_knowledge_base_internal(query: str, kb_name: str = "diabetes-agent-kb", patient_id: Optional[str] = None,
+                                   domain: Optional[str] = None):
+    """Internal helper function to query the medical knowledge base
+
+    patient_id is only used by the pgvector backend, which ranks the patient's
+    own document chunks alongside the knowledge base in a single query.
+    domain restricts the search to chunks tagged with that metadata domain
+    (see kb_retrieval.domain_search).
+    """
     try:
         print(f"---KNOWLEDGE BASE QUERY---")
         print(f"Query: {query}")
         print(f"KB Name: {kb_name}")
+        print(f"Domain: {domain or 'all'}")
+
+        # Every backend goes through adaptive_retrieve: small k first, widened only for weak matches
+        backend = get_retrieval_backend()
+        if backend == 'snapshot':
+            results = adaptive_retrieve(
+                domain_search(lambda q, k, d: retrieve_snapshot(q, kb_name, k=k, domain=d), backend, kb_name, domain),
+                query, backend
+            )
+            print(f"Retrieved {len(results)} results from local snapshot")
+            return format_results(query, results)
+
+        if backend == 'pgvector':
+            lambda_url = get_lambda_url()
+            if not lambda_url:
+                return "Error: Lambda URL not configured for pgvector retrieval"
+            results = adaptive_retrieve(
+                domain_search(
+                    lambda q, k, d: retrieve_pgvector(q, kb_name, lambda_url, k=k, patient_id=patient_id,
+                                                      audit_context=get_audit_context(), domain=d),
+                    backend, kb_name, domain
+                ),
+                query, backend
+            )
+            print(f"Retrieved {len(results)} results from pgvector")
+            return format_results(query, results)
         
         session = boto3.Session()
         region_name = session.region_name or os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
@@ -182,33 +232,31 @@ def _query_knowledge_base_internal(query: str, kb_name: str = "diabetes-agent-kb
         print(f"Bedrock client endpoint: {bedrock_runtime._endpoint.host}")
         print(f"Attempting to retrieve from KB ID: {kb_id}")
         
-        response = bedrock_runtime.retrieve(
-            knowledgeBaseId=kb_id,
-            retrievalQuery={'text': query},
-            retrievalConfiguration={
-                'vectorSearchConfiguration': {'numberOfResults': 5}
+        def search(q: str, k: int, d: Optional[str]):
+            # HYBRID adds OpenSearch's BM25 pass over the text field to the knn pass
+            vector_search_configuration = {
+                'numberOfResults': k,
+                'overrideSearchType': 'HYBRID'
             }
-        )
-        
-        results = response['retrievalResults']
-        
-        if not results:
-            return f"No results found in knowledge base for query: {query}"
-        
-        formatted_results = f"Knowledge Base Results for: {query}\n\n"
-        
-        for i, result in enumerate(results, 1):
-            score = result['score']
-            content = result['content']['text']
-            source = ""
-            
-            if 'location' in result and 's3Location' in result['location']:
-                source = f"\nSource: {result['location']['s3Location']['uri']}"
-            
-            formatted_results += f"Result {i}:\nScore: {score:.4f}\nContent: {content}{source}\n\n"
-        
+            if d:
+                # Applied inside the knn/BM25 search, not to its results
+                vector_search_configuration['filter'] = {'equals': {'key': 'domain', 'value': d}}
+            response = bedrock_runtime.retrieve(
+                knowledgeBaseId=kb_id,
+                retrievalQuery={'text': q},
+                retrievalConfiguration={'vectorSearchConfiguration': vector_search_configuration}
+            )
+            return [{
+                'origin': 'kb',
+                'source': result.get('location', {}).get('s3Location', {}).get('uri'),
+                'document_id': None,
+                'content': result['content']['text'],
+                'score': result['score']
+            } for result in response['retrievalResults']]
+
+        results = adaptive_retrieve(domain_search(search, backend, kb_name, domain), query, backend)
         print(f"Retrieved {len(results)} results from knowledge base")
-        return formatted_results
+        return format_results(query, results)
         
     except Exception as e:
         error_msg = f"Error querying knowledge base: {str(e)}"
@@ -248,7 +296,9 @@ def diabetes_specialist_tool(patient_query: str, patient_context: str = ""):
         if patient_context:
             enhanced_query += f" {patient_context}"
         
-        kb_results = _query_knowledge_base_internal(enhanced_query, "diabetes-agent-kb")
+        kb_results = _query_knowledge_base_internal(enhanced_query, "diabetes-agent-kb",
+                                                    patient_id=get_patient_id_for_current_user(),
+                                                    domain="diabetes")
         
         consultation_type = get_consultation_type(patient_query, DIABETES_KEYWORDS)
         
@@ -306,7 +356,9 @@ def amd_specialist_tool(patient_query: str, patient_context: str = ""):
         if patient_context:
             enhanced_query += f" {patient_context}"
         
-        kb_results = _query_knowledge_base_internal(enhanced_query, "diabetes-agent-kb")
+        kb_results = _query_knowledge_base_internal(enhanced_query, "diabetes-agent-kb",
+                                                    patient_id=get_patient_id_for_current_user(),
+                                                    domain="amd")
         
         consultation_type = get_consultation_type(patient_query, AMD_KEYWORDS)
         
@@ -425,6 +477,7 @@ Please sign in to view your medications."""
         base_url = lambda_url.rstrip('/')
         medications_payload = {
             "action": "get_patient_medications",
+            **get_audit_context(),
             "patient_id": patient_id
         }
         
@@ -513,56 +566,493 @@ def check_my_medication(medication_name: str) -> str:
     """
     Check if YOU are currently taking a specific medication.
     
-    This tool checks your personal medication list to see if you're taking
-    a particular medication. No patient ID needed - uses your authenticated session.
+    This tool searches your personal medication list for a particular medication,
+    matching brand and generic names (e.g. Glucophage finds metformin) and tolerating
+    small misspellings. No patient ID needed - uses your authenticated session.
     
     Args:
-        medication_name: Name of the medication to check (e.g., "Metformin", "Lisinopril")
+        medication_name: Name of the medication to check (e.g., "Metformin", "Glucophage", "Lisinopril")
         
     Returns:
         Information about whether you're taking this medication and details if found
     """
     try:
-        medications_result = get_my_medications()
+        patient_id = get_patient_id_for_current_user()
+        
+        if not patient_id:
+            return """❌ **Authentication Required**
+
+I cannot access your medication information because you are not logged in.
+
+Please sign in to check your medications."""
+        
+        lambda_url = get_lambda_url()
+        if not lambda_url:
+            return "❌ Medication database is temporarily unavailable. Please try again later."
+        
+        base_url = lambda_url.rstrip('/')
+        search_payload = {
+            "action": "search_patient_medications",
+            **get_audit_context(),
+            "patient_id": patient_id,
+            "query": medication_name,
+            "limit": 3
+        }
+        
+        search_response = requests.post(base_url, json=search_payload, timeout=30)
+        
+        if search_response.status_code != 200:
+            return f"❌ Error accessing medication database (Status: {search_response.status_code})"
+        
+        search_data = search_response.json()
+        if search_data.get('status') != 'success':
+            return f"❌ Error checking your medications: {search_data.get('message', 'Unknown error')}"
+        
+        matches = search_data.get('matches', [])
+        active_matches = [m for m in matches if m.get('medication_status') == 'Active']
+        
+        if not matches:
+            return f"📋 **No, you are not currently taking {medication_name}.**\n\nThis medication (or its brand/generic equivalent) is not in your medication list."
+        
+        if active_matches:
+            result = f"✅ **Yes, you are taking {medication_name}**\n\n"
+        else:
+            result = f"📋 **You are not currently taking {medication_name}**, but it appears in your medication history:\n\n"
+        
+        for med in active_matches or matches:
+            result += f"**{med.get('medication_name', 'Unknown')}**"
+            if med.get('generic_name'):
+                result += f" ({med.get('generic_name')})"
+            result += "\n"
+            if med.get('matched_via_synonym'):
+                result += f"   - **Matched as:** {med.get('matched_term')} (brand/generic equivalent)\n"
+            result += f"   - **Status:** {med.get('medication_status', 'N/A')}\n"
+            result += f"   - **Dosage:** {med.get('dosage', 'N/A')}\n"
+            result += f"   - **How to take:** {med.get('frequency', 'N/A')}\n"
+            if med.get('instructions'):
+                result += f"   - **Instructions:** {med.get('instructions')}\n"
+            result += "\n"
+        
+        return result.rstrip() + "\n"
+        
+    except requests.exceptions.Timeout:
+        return "❌ Request timed out. Please try again."
+    except requests.exceptions.ConnectionError:
+        return "❌ Cannot connect to medication database. Please check your connection."
+    except Exception as e:
+        return f"❌ Error checking medication. Please try again later."
+
+
+def _load_drug_interaction_table() -> Dict[str, Any]:
+    """Fetch the drug interaction reference tables from the database Lambda"""
+    lambda_url = get_lambda_url()
+    if not lambda_url:
+        raise RuntimeError("Lambda URL not configured")
+    
+    response = requests.post(lambda_url.rstrip('/'), json={"action": "get_drug_interaction_table"}, timeout=30)
+    response.raise_for_status()
+    table = response.json()
+    if table.get('status') != 'success':
+        raise RuntimeError(table.get('message', 'Unknown error'))
+    return table
+
+
+@tool
+def check_my_drug_interactions(new_medication: str = "") -> str:
+    """
+    Check YOUR active medications for drug-drug interactions.
+    
+    Checks every pair of your active medications in one pass. If you name a
+    new medication, only interactions between it and your current medications
+    are reported. No patient ID needed - uses your authenticated session.
+    
+    Args:
+        new_medication: Optional medication you are considering (e.g., "ibuprofen", "Coumadin")
+    
+    Returns:
+        Interactions found, ordered by severity, with management advice
+    """
+    try:
+        patient_id = get_patient_id_for_current_user()
+        
+        if not patient_id:
+            return """❌ **Authentication Required**
+
+I cannot access your medication information because you are not logged in.
+
+Please sign in to check your medications for interactions."""
+        
+        lambda_url = get_lambda_url()
+        if not lambda_url:
+            return "❌ Medication database is temporarily unavailable. Please try again later."
+        
+        medications_payload = {
+            "action": "get_patient_medications",
+            **get_audit_context(),
+            "patient_id": patient_id,
+            "active_only": True
+        }
+        med_response = requests.post(lambda_url.rstrip('/'), json=medications_payload, timeout=30)
+        
+        if med_response.status_code != 200:
+            return f"❌ Error accessing medication database (Status: {med_response.status_code})"
+        
+        med_data = med_response.json()
+        if med_data.get('status') != 'success':
+            return f"❌ Error retrieving your medications: {med_data.get('message', 'Unknown error')}"
+        
+        medication_names = []
+        for med in med_data.get('medications', []):
+            name = med.get('medication_name', '')
+            if med.get('generic_name'):
+                name += f" ({med.get('generic_name')})"
+            medication_names.append(name)
+        
+        if not medication_names:
+            return "📋 **You have no active medications recorded**, so there is nothing to check for interactions."
+        
+        graph = get_interaction_graph(_load_drug_interaction_table)
+        
+        if new_medication and not graph.resolve(new_medication):
+            return f"⚠️ **{new_medication} is not in the interaction reference list.**\n\nPlease ask your pharmacist to check it against your {len(medication_names)} active medication(s)."
+        
+        conflicts = graph.check(medication_names, new_medication=new_medication or None)
+        
+        checked = f"{new_medication} against your {len(medication_names)} active medication(s)" if new_medication \
+            else f"your {len(medication_names)} active medication(s)"
+        
+        if not conflicts:
+            return f"✅ **No known interactions found** checking {checked}.\n\n⚠️ This check covers common interactions only. Always confirm with your pharmacist or healthcare provider."
+        
+        severity_icons = {'Contraindicated': '⛔', 'Major': '🔴', 'Moderate': '🟠', 'Minor': '🟡'}
+        summary = f"💊 **Drug Interaction Check** ({checked})\n\n"
+        summary += f"Found {len(conflicts)} interaction(s):\n\n"
+        for i, conflict in enumerate(conflicts, 1):
+            icon = severity_icons.get(conflict.severity, '⚠️')
+            summary += f"{i}. {icon} **{conflict.severity}:** {conflict.medication_a} + {conflict.medication_b}\n"
+            summary += f"   - **Why:** {conflict.description}\n"
+            if conflict.management:
+                summary += f"   - **What to do:** {conflict.management}\n"
+            summary += "\n"
+        
+        summary += "⚠️ **Important:** Do not stop or change any medication without talking to your healthcare provider."
+        return summary
+        
+    except requests.exceptions.Timeout:
+        return "❌ Request timed out. Please try again."
+    except requests.exceptions.ConnectionError:
+        return "❌ Cannot connect to medication database. Please check your connection."
+    except Exception as e:
+        return f"❌ Error checking drug interactions. Please try again later."
+
+
+# =============================================================================
+# PERSONAL GLUCOSE TOOLS (Privacy-Safe)
+# =============================================================================
+
+@tool
+def get_my_glucose_metrics(days: int = 14, utc_offset_hours: float = 0) -> str:
+    """
+    Get YOUR continuous glucose monitor (CGM) statistics.
+    
+    This tool analyzes the CGM readings for the currently logged-in user only.
+    No patient ID needed - uses your authenticated session automatically.
+    
+    Args:
+        days: Number of days to analyze (default: 14, maximum: 30)
+        utc_offset_hours: Your time zone offset from UTC, used for time-of-day patterns (optional)
+    
+    Returns:
+        Time in range, average glucose, GMI, glucose variability (CV, MAGE),
+        low glucose episodes, and your daily glucose profile
+    """
+    try:
+        patient_id = get_patient_id_for_current_user()
+        if not patient_id:
+            return """❌ **Authentication Required**
+
+I cannot access your glucose data because you are not logged in.
+
+Please sign in to view your glucose statistics."""
         
-        if "❌" in medications_result:
-            return medications_result
+        lambda_url = get_lambda_url()
+        if not lambda_url:
+            return "❌ Glucose database is temporarily unavailable. Please try again later."
+        
+        days = max(1, min(int(days), 30))
+        base_url = lambda_url.rstrip('/')
+        start_date = date.today() - timedelta(days=days)
         
-        if "No medications found" in medications_result:
-            return f"📋 You are not currently taking {medication_name}.\n\nYou have no medications recorded in the system."
+        # Completed days come from the compact per-day blobs (scripts/build_cgm_daily_series.py);
+        # raw readings are fetched only for the days after the last encoded one
+        series_payload = {
+            "action": "get_cgm_daily_series",
+            **get_audit_context(),
+            "patient_id": patient_id,
+            "start_date": start_date.isoformat()
+        }
+        series_response = requests.post(base_url, json=series_payload, timeout=30)
+        if series_response.status_code != 200:
+            return f"❌ Error accessing glucose database (Status: {series_response.status_code})"
+        series_data = series_response.json()
+        if series_data.get('status') != 'success':
+            return f"❌ Error retrieving your glucose data: {series_data.get('message', 'Unknown error')}"
         
-        search_term = medication_name.lower()
+        encoded_days = series_data.get('days') or []
+        timestamps, glucose_values = [], []
+        if encoded_days:
+            decoded = decode_days(rows_from_response(encoded_days))
+            timestamps, glucose_values = [decoded['timestamps']], [decoded['glucose']]
+            start_date = date.fromisoformat(encoded_days[-1]['series_date']) + timedelta(days=1)
         
-        if search_term in medications_result.lower():
-            lines = medications_result.split('\n')
-            result_lines = []
-            found = False
-            capture = False
+        if start_date <= date.today():
+            cgm_payload = {
+                "action": "get_cgm_readings",
+                **get_audit_context(),
+                "patient_id": patient_id,
+                "start_date": start_date.isoformat()
+            }
+            cgm_response = requests.post(base_url, json=cgm_payload, timeout=30)
             
-            for i, line in enumerate(lines):
-                if search_term in line.lower() and '**' in line:
-                    found = True
-                    capture = True
-                    result_lines.append(f"✅ **Yes, you are taking {medication_name}**\n")
-                
-                if capture:
-                    result_lines.append(line)
-                    if line.strip() == '' and len(result_lines) > 5:
-                        break
+            if cgm_response.status_code != 200:
+                return f"❌ Error accessing glucose database (Status: {cgm_response.status_code})"
             
-            if found:
-                return '\n'.join(result_lines)
+            cgm_data = cgm_response.json()
+            if cgm_data.get('status') != 'success':
+                return f"❌ Error retrieving your glucose data: {cgm_data.get('message', 'Unknown error')}"
+            timestamps.append(np.asarray(cgm_data.get('timestamps') or [], dtype=np.float64))
+            glucose_values.append(np.asarray(cgm_data.get('glucose_values') or [], dtype=np.float64))
+        
+        timestamps = np.concatenate(timestamps) if timestamps else np.zeros(0)
+        glucose_values = np.concatenate(glucose_values) if glucose_values else np.zeros(0)
+        if not np.any(~np.isnan(glucose_values)):
+            return f"📋 **No CGM readings found for the last {days} days.**\n\nIf you use a continuous glucose monitor, ask your care team to connect it to your record."
+        
+        metrics = compute_glucose_metrics(
+            timestamps,
+            glucose_values,
+            utc_offset_minutes=int(utc_offset_hours * 60),
+            agp_bin_minutes=60,
+            presorted=True
+        )
+        if metrics['status'] != 'success':
+            return f"📋 **Not enough valid CGM data in the last {days} days to calculate statistics.**"
+        
+        summary = f"📈 **Your Glucose Statistics (last {days} days)**\n\n"
+        summary += f"- **Sensor data available:** {metrics['sensor_active_percent']}% of the time\n"
+        summary += f"- **Average glucose:** {metrics['mean_glucose']} mg/dL\n"
+        summary += f"- **GMI (estimated A1C):** {metrics['gmi_percent']}%\n"
+        summary += f"- **Variability (CV):** {metrics['coefficient_of_variation_percent']}% (target ≤36%)\n"
+        if metrics.get('mage') is not None:
+            summary += f"- **Average swing size (MAGE):** {metrics['mage']} mg/dL\n"
+        
+        summary += "\n🎯 **Time in Ranges:**\n"
+        summary += f"- Very high (>250): {metrics['time_very_high_percent']}% (target <5%)\n"
+        summary += f"- High (181-250): {metrics['time_high_percent']}%\n"
+        summary += f"- **In range (70-180): {metrics['time_in_range_percent']}%** (target >70%)\n"
+        summary += f"- Low (54-69): {metrics['time_low_percent']}%\n"
+        summary += f"- Very low (<54): {metrics['time_very_low_percent']}% (target <1%)\n"
         
-        return f"📋 **No, you are not currently taking {medication_name}.**\n\nThis medication is not in your active medication list."
+        level_1 = metrics['hypo_episodes']['level_1']
+        level_2 = metrics['hypo_episodes']['level_2']
+        summary += "\n⚠️ **Low Glucose Episodes (15+ minutes):**\n"
+        summary += f"- Below 70 mg/dL: {level_1['count']} episode(s)"
+        if level_1['count']:
+            summary += f", longest {level_1['longest_duration_minutes']} minutes"
+        summary += "\n"
+        summary += f"- Below 54 mg/dL: {level_2['count']} episode(s)\n"
         
+        agp = metrics['agp']
+        summary += "\n🕒 **Daily Glucose Profile (median, typical range):**\n"
+        for i in range(0, len(agp['minute_of_day']), 3):
+            if agp['p50'][i] is None:
+                continue
+            hour = agp['minute_of_day'][i] // 60
+            summary += f"- {hour:02d}:00 — {agp['p50'][i]:.0f} mg/dL ({agp['p25'][i]:.0f}-{agp['p75'][i]:.0f})\n"
+        
+        summary += "\n⚠️ **Important:** Review these numbers with your healthcare provider before changing your treatment."
+        
+        return summary
+        
+    except requests.exceptions.Timeout:
+        return "❌ Request timed out. Please try again."
+    except requests.exceptions.ConnectionError:
+        return "❌ Cannot connect to glucose database. Please check your connection."
     except Exception as e:
-        return f"❌ Error checking medication. Please try again later."
+        return f"❌ Error analyzing glucose data. Please try again later."
 
 
 # =============================================================================
 # APPOINTMENT MANAGEMENT TOOLS
 # =============================================================================
 
+@tool
+def get_my_health_summary() -> str:
+    """
+    Get YOUR health summary: latest visit, active conditions, medications,
+    allergies and most recent vital signs.
+    
+    This tool shows the summary for the currently logged-in user only.
+    No patient ID needed - uses your authenticated session automatically.
+    
+    Returns:
+        Your health summary at a glance
+    """
+    try:
+        patient_id = get_patient_id_for_current_user()
+        if not patient_id:
+            return """❌ **Authentication Required**
+
+I cannot access your health summary because you are not logged in.
+
+Please sign in to view your health summary."""
+        
+        lambda_url = get_lambda_url()
+        if not lambda_url:
+            return "❌ Health records database is temporarily unavailable. Please try again later."
+        
+        summary_payload = {
+            "action": "get_patient_summary",
+            **get_audit_context(),
+            "patient_id": patient_id
+        }
+        
+        summary_response = requests.post(lambda_url.rstrip('/'), json=summary_payload, timeout=30)
+        
+        if summary_response.status_code == 404:
+            return "📋 No health summary is available for your account yet."
+        if summary_response.status_code != 200:
+            return f"❌ Error accessing health records (Status: {summary_response.status_code})"
+        
+        data = summary_response.json()
+        if data.get('status') != 'success':
+            return f"❌ Error retrieving your health summary: {data.get('message', 'Unknown error')}"
+        
+        s = data.get('summary', {})
+        summary = "🩺 **Your Health Summary**\n\n"
+        
+        if s.get('last_visit_date'):
+            summary += f"🏥 **Last Visit:** {str(s['last_visit_date'])[:10]}"
+            if s.get('last_visit_type'):
+                summary += f" ({s['last_visit_type']})"
+            if s.get('last_provider'):
+                summary += f" with {s['last_provider']}"
+            summary += "\n\n"
+        
+        summary += f"📋 **Active Conditions:** {s.get('active_conditions_count', 0)}\n"
+        summary += f"💊 **Active Medications:** {s.get('active_medications_count', 0)}\n"
+        summary += f"⚠️ **Known Allergies:** {s.get('known_allergies_count', 0)}\n\n"
+        
+        if s.get('last_vitals_date'):
+            summary += f"❤️ **Latest Vitals** ({str(s['last_vitals_date'])[:10]}):\n"
+            if s.get('systolic_bp') and s.get('diastolic_bp'):
+                summary += f"   - Blood Pressure: {s['systolic_bp']}/{s['diastolic_bp']} mmHg\n"
+            if s.get('heart_rate'):
+                summary += f"   - Heart Rate: {s['heart_rate']} bpm\n"
+            if s.get('temperature'):
+                summary += f"   - Temperature: {s['temperature']} °F\n"
+            if s.get('weight'):
+                summary += f"   - Weight: {s['weight']} lbs\n"
+            if s.get('bmi'):
+                summary += f"   - BMI: {s['bmi']}\n"
+            summary += "\n"
+        
+        summary += "💡 Ask about your medications or appointments for more detail."
+        return summary
+        
+    except requests.exceptions.Timeout:
+        return "❌ Request timed out. Please try again."
+    except requests.exceptions.ConnectionError:
+        return "❌ Cannot connect to health records database. Please check your connection."
+    except Exception as e:
+        return f"❌ Error retrieving health summary. Please try again later."
+
+
+@tool
+def search_my_records(query: str, document_type: Optional[str] = None, cursor: Optional[str] = None) -> str:
+    """
+    Search YOUR clinical documents (visit notes, results, letters) by keyword.
+    
+    Returns the best-matching documents with short highlighted excerpts, not
+    whole documents. No patient ID needed - uses your authenticated session.
+    
+    Args:
+        query: What to look for, e.g. "retinopathy", "\"eye exam\"", "insulin -pump"
+        document_type: Optional filter such as "Progress Note" or "Discharge Summary"
+        cursor: Page token from a previous search to see more results
+    
+    Returns:
+        Matching documents with dates and excerpts
+    """
+    try:
+        patient_id = get_patient_id_for_current_user()
+        if not patient_id:
+            return """❌ **Authentication Required**
+
+I cannot search your records because you are not logged in.
+
+Please sign in to search your records."""
+        
+        if not query or not query.strip():
+            return "❌ Please tell me what to search for in your records."
+        
+        lambda_url = get_lambda_url()
+        if not lambda_url:
+            return "❌ Health records database is temporarily unavailable. Please try again later."
+        
+        search_payload = {
+            "action": "search_clinical_documents",
+            **get_audit_context(),
+            "patient_id": patient_id,
+            "query": query.strip(),
+            "page_size": 5
+        }
+        if document_type:
+            search_payload['document_type'] = document_type
+        if cursor:
+            search_payload['cursor'] = cursor
+        
+        search_response = requests.post(lambda_url.rstrip('/'), json=search_payload, timeout=30)
+        
+        if search_response.status_code != 200:
+            return f"❌ Error accessing health records (Status: {search_response.status_code})"
+        
+        data = search_response.json()
+        if data.get('status') != 'success':
+            return f"❌ Error searching your records: {data.get('message', 'Unknown error')}"
+        
+        documents = data.get('documents', [])
+        if not documents:
+            if cursor:
+                return f"📄 No more documents match \"{query}\"."
+            return f"📄 No documents in your records match \"{query}\".\n\n💡 Try different or fewer words."
+        
+        summary = f"📄 **Your Records Matching \"{query}\"**\n\n"
+        for i, doc in enumerate(documents, 1):
+            title = doc.get('document_title') or doc.get('document_type') or 'Document'
+            summary += f"{i}. **{title}**"
+            if doc.get('document_date'):
+                summary += f" - {str(doc['document_date'])[:10]}"
+            summary += "\n"
+            if doc.get('document_title') and doc.get('document_type'):
+                summary += f"   - Type: {doc['document_type']}\n"
+            if doc.get('snippet'):
+                summary += f"   - \"…{doc['snippet']}…\"\n"
+            summary += "\n"
+        
+        if data.get('next_cursor'):
+            summary += f"💡 More results available (page token: `{data['next_cursor']}`)."
+        
+        return summary
+        
+    except requests.exceptions.Timeout:
+        return "❌ Request timed out. Please try again."
+    except requests.exceptions.ConnectionError:
+        return "❌ Cannot connect to health records database. Please check your connection."
+    except Exception as e:
+        return f"❌ Error searching your records. Please try again later."
+
+
 @tool
 def get_appointments(
     patient_id: Optional[str] = None,
@@ -604,6 +1094,7 @@ Please sign in to view your appointments."""
         base_url = lambda_url.rstrip('/')
         appointments_payload = {
             "action": "get_patient_appointments",
+            **get_audit_context(),
             "patient_id": patient_id
         }
         
@@ -628,7 +1119,7 @@ Please sign in to view your appointments."""
                 if not appointments:
                     summary += "📋 **No appointments found.**\n\n"
                     summary += "You currently have no scheduled appointments in the system.\n\n"
-                    summary += "💡 To schedule an appointment, please contact your healthcare provider."
+                    summary += "💡 To schedule an appointment, ask me to find an open time with your provider."
                     return summary
                 
                 # Group by status
@@ -675,7 +1166,7 @@ Please sign in to view your appointments."""
                         summary += f"{i}. **{appt.get('appointment_type')}** - {appt.get('scheduled_date')}\n"
                         summary += f"   - Status: {appt.get('appointment_status')}\n\n"
                 
-                summary += "\n💡 **Need to schedule?** Contact your healthcare provider to book an appointment."
+                summary += "\n💡 **Need to schedule?** Ask me to find the next available appointment."
                 
                 return summary
             else:
@@ -691,6 +1182,91 @@ Please sign in to view your appointments."""
         return f"❌ Error retrieving appointments. Please try again later."
 
 
+@tool
+def find_available_appointments(
+    specialty: Optional[str] = None,
+    provider_id: Optional[str] = None,
+    city: Optional[str] = None,
+    zip_code: Optional[str] = None,
+    start_date: Optional[str] = None,
+    duration_minutes: int = 30,
+    days_ahead: int = 14
+) -> str:
+    """
+    Find the earliest open appointment times.
+    
+    Searches provider calendars for free slots, e.g. "next free 30-minute slot
+    with an endocrinologist in Seattle". Use the provider ID, date and time from
+    the results with `create_appointment` to book.
+    
+    Args:
+        specialty: Provider specialty, e.g. "Endocrinology", "Ophthalmology" (optional)
+        provider_id: A specific provider UUID (optional)
+        city: City of the clinic (optional)
+        zip_code: ZIP code or first digits of it (optional)
+        start_date: Earliest date to consider YYYY-MM-DD (default: today)
+        duration_minutes: Length of appointment needed (default: 30)
+        days_ahead: How many days ahead to search (default: 14, maximum: 60)
+    
+    Returns:
+        The earliest available slots with provider and location details
+    """
+    try:
+        lambda_url = get_lambda_url()
+        if not lambda_url:
+            return "❌ Appointment database is temporarily unavailable. Please try again later."
+        
+        slots_payload = {
+            "action": "find_available_slots",
+            "duration_minutes": duration_minutes,
+            "horizon_days": days_ahead,
+            "limit": 5
+        }
+        for key, value in (("specialty", specialty), ("provider_id", provider_id), ("city", city),
+                           ("zip_code", zip_code), ("start_date", start_date)):
+            if value:
+                slots_payload[key] = value
+        
+        slots_response = requests.post(lambda_url.rstrip('/'), json=slots_payload, timeout=30)
+        
+        if slots_response.status_code != 200:
+            return f"❌ Error accessing appointment database (Status: {slots_response.status_code})"
+        
+        slots_data = slots_response.json()
+        if slots_data.get('status') != 'success':
+            return f"❌ Error searching appointments: {slots_data.get('message', 'Unknown error')}"
+        
+        slots = slots_data.get('slots', [])
+        if not slots:
+            return f"📋 **No open {duration_minutes}-minute appointments found in the next {days_ahead} days.**\n\n💡 Try a wider date range, another location, or a related specialty."
+        
+        summary = f"📅 **Earliest Available Appointments ({duration_minutes} minutes)**\n\n"
+        for i, slot in enumerate(slots, 1):
+            provider = slot.get('provider_name', 'Provider')
+            if slot.get('provider_title'):
+                provider += f", {slot.get('provider_title')}"
+            summary += f"{i}. **{slot.get('scheduled_date')} at {slot.get('scheduled_time')}** - {provider}"
+            if slot.get('provider_specialty'):
+                summary += f" ({slot.get('provider_specialty')})"
+            summary += "\n"
+            if slot.get('facility_name'):
+                summary += f"   - **Location:** {slot.get('facility_name')}"
+                if slot.get('facility_city'):
+                    summary += f", {slot.get('facility_city')}, {slot.get('facility_state')}"
+                summary += "\n"
+            summary += f"   - **Provider ID:** {slot.get('provider_id')}\n\n"
+        
+        summary += "💡 Tell me which time you'd like and I can book it for you."
+        return summary
+        
+    except requests.exceptions.Timeout:
+        return "❌ Request timed out. Please try again."
+    except requests.exceptions.ConnectionError:
+        return "❌ Cannot connect to appointment database. Please check your connection."
+    except Exception as e:
+        return f"❌ Error searching appointments. Please try again later."
+
+
 @tool
 def create_appointment(
     provider_id: str,
@@ -706,6 +1282,7 @@ def create_appointment(
     
     This tool creates an appointment for the currently logged-in user.
     No patient ID needed - uses your authenticated session automatically.
+    Use `find_available_appointments` first to pick an open slot.
     
     Args:
         provider_id: Provider UUID (required)
@@ -728,18 +1305,66 @@ I cannot schedule an appointment because you are not logged in.
 
 Please sign in to schedule appointments."""
         
-        # Note: Appointment creation is not yet implemented in the database handler
-        # This is a placeholder that will be implemented when appointment endpoints are added
-        return """📅 **Appointment Scheduling Coming Soon**
-
-The appointment scheduling feature is currently being developed and will be available soon.
-
-To schedule an appointment now, please:
-- Call your healthcare provider directly
-- Use the patient portal
-- Contact the front desk
-
-We apologize for the inconvenience and appreciate your patience."""
-            
+        match = re.match(r'^\s*(\d{4}-\d{2}-\d{2})[ T](\d{1,2}:\d{2})', appointment_date)
+        if not match:
+            return "❌ Please provide the appointment date and time as YYYY-MM-DD HH:MM."
+        scheduled_date, scheduled_time = match.groups()
+        # "9:00" and "09:00" are the same slot
+        hour, minute = scheduled_time.split(':')
+        scheduled_time = f"{int(hour):02d}:{minute}"
+        
+        lambda_url = get_lambda_url()
+        if not lambda_url:
+            return "❌ Appointment database is temporarily unavailable. Please try again later."
+        
+        # Scoped to the conversation turn: a retry within the turn returns the original
+        # booking, while asking again in a later turn (e.g. after cancelling) books anew
+        turn_id = os.environ.get('AGENTCORE_TURN_ID') or uuid.uuid4().hex
+        idempotency_key = hashlib.sha256(
+            f"{turn_id}|{patient_id}|{provider_id}|{scheduled_date}|{scheduled_time}".encode('utf-8')
+        ).hexdigest()[:40]
+        
+        booking_payload = {
+            "action": "book_appointment",
+            **get_audit_context(),
+            "patient_id": patient_id,
+            "provider_id": provider_id,
+            "scheduled_date": scheduled_date,
+            "scheduled_time": scheduled_time,
+            "appointment_type": appointment_type,
+            "appointment_reason": reason_for_visit,
+            "duration_minutes": duration_minutes,
+            "idempotency_key": idempotency_key
+        }
+        if facility_id:
+            booking_payload['facility_id'] = facility_id
+        if notes:
+            booking_payload['scheduling_notes'] = notes
+        
+        booking_response = requests.post(lambda_url.rstrip('/'), json=booking_payload, timeout=30)
+        booking_data = booking_response.json()
+        
+        if booking_response.status_code == 409:
+            return f"⚠️ **That time was just taken.**\n\n{scheduled_date} at {scheduled_time} is no longer available with this provider. Would you like me to find the next open slot?"
+        
+        if booking_response.status_code == 422:
+            return f"⚠️ **The provider is not available at {scheduled_date} {scheduled_time}.**\n\nUse `find_available_appointments` to see open times."
+        
+        if booking_response.status_code != 200 or booking_data.get('status') != 'success':
+            return f"❌ Error creating appointment: {booking_data.get('message', 'Unknown error')}"
+        
+        summary = "✅ **Appointment Booked**\n\n" if not booking_data.get('replayed') else "✅ **Appointment Already Booked**\n\n"
+        summary += f"- **Date:** {scheduled_date} at {scheduled_time}\n"
+        summary += f"- **Type:** {appointment_type}\n"
+        summary += f"- **Reason:** {reason_for_visit}\n"
+        summary += f"- **Duration:** {duration_minutes} minutes\n"
+        summary += f"- **Confirmation ID:** {booking_data.get('appointment_id')}\n\n"
+        summary += "💡 You will receive a reminder before your appointment."
+        return summary
+        
+    except requests.exceptions.Timeout:
+        return "❌ Request timed out. Your appointment may still have been booked - ask me to book it again and I will confirm without creating a duplicate."
+    except requests.exceptions.ConnectionError:
+        return "❌ Cannot connect to appointment database. Please check your connection."
     except Exception as e:
         return f"❌ Error creating appointment. Please try again later."
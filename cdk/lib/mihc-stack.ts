@@ -6,6 +6,8 @@ import {
   Duration,
   CfnOutput,
   aws_ec2 as ec2,
+  aws_events as events,
+  aws_events_targets as targets,
   aws_iam as iam,
   aws_kms as kms,
   aws_lambda as lambda,
@@ -30,6 +32,7 @@ export class MihcStack extends Stack {
   public readonly databaseSecurityGroup: ec2.SecurityGroup;
   public readonly databaseLambda: lambda.Function;
   public readonly bdaDataExtractionLambda: lambda.Function;
+  public readonly appointmentRemindersLambda: lambda.Function;
   public readonly lambdaSecurityGroup: ec2.SecurityGroup;
   public readonly databaseLambdaUrl: string;
 
@@ -243,17 +246,26 @@ export class MihcStack extends Stack {
       "Allow Lambda access to PostgreSQL"
     );
 
+    // Registers for SHUTDOWN so the database Lambda receives SIGTERM and can flush its audit queue
+    const auditShutdownExtension = new lambda.LayerVersion(this, "AuditShutdownExtension", {
+      code: lambda.Code.fromAsset("../lambda/audit-shutdown-extension"),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_11],
+      description: "External extension that enables SIGTERM on environment shutdown",
+    });
+
     // Create Lambda function for database operations
     this.databaseLambda = new lambda.Function(this, "DatabaseLambda", {
       runtime: lambda.Runtime.PYTHON_3_11,
       handler: "index.lambda_handler",
       code: lambda.Code.fromAsset("../lambda/database-handler"),
+      layers: [auditShutdownExtension],
       environment: {
         DB_HOST: this.auroraCluster.clusterEndpoint.hostname,
         DB_PORT: this.auroraCluster.clusterEndpoint.port.toString(),
         DB_NAME: "medical_records",
         DB_SECRET_ARN: this.auroraCluster.secret!.secretArn,
         DB_CLUSTER_ARN: this.auroraCluster.clusterArn,
+        CLINIC_TIME_ZONE: "America/New_York", // Facilities without their own time_zone
       },
       vpc: this.vpc,
       vpcSubnets: {
@@ -310,6 +322,85 @@ export class MihcStack extends Stack {
     // Store the database Lambda URL for use by other stacks
     this.databaseLambdaUrl = functionUrl.url;
 
+    // Nightly patient_access_daily rollup for yesterday (backfills any missed days);
+    // the same run pre-creates upcoming monthly audit partitions
+    new events.Rule(this, "AccessRollupSchedule", {
+      schedule: events.Schedule.cron({ minute: "15", hour: "0" }),
+      description: "Roll up patient access logs for the access summary",
+      targets: [
+        new targets.LambdaFunction(this.databaseLambda, {
+          event: events.RuleTargetInput.fromObject({ action: "rollup_patient_access" }),
+        }),
+      ],
+    });
+
+    // Evaluate CGM alert flags for newly ingested readings every minute
+    new events.Rule(this, "CgmAlertSweepSchedule", {
+      schedule: events.Schedule.rate(Duration.minutes(1)),
+      description: "Evaluate CGM alerts for readings ingested since the last sweep",
+      targets: [
+        new targets.LambdaFunction(this.databaseLambda, {
+          event: events.RuleTargetInput.fromObject({ action: "sweep_cgm_alerts" }),
+          retryAttempts: 0, // the next sweep picks up anything missed
+        }),
+      ],
+    });
+
+    // Create appointment reminder dispatcher (scheduled, no public URL)
+    this.appointmentRemindersLambda = new lambda.Function(this, "AppointmentRemindersLambda", {
+      runtime: lambda.Runtime.PYTHON_3_11,
+      handler: "index.lambda_handler",
+      code: lambda.Code.fromAsset("../lambda/appointment-reminders"),
+      environment: {
+        DB_NAME: "medical_records",
+        DB_SECRET_ARN: this.auroraCluster.secret!.secretArn,
+        DB_CLUSTER_ARN: this.auroraCluster.clusterArn,
+        REMINDER_NOTIFIER: "sns",
+        CLINIC_TIME_ZONE: "America/New_York", // Facilities without their own time_zone
+      },
+      vpc: this.vpc,
+      vpcSubnets: {
+        subnetType: ec2.SubnetType.PRIVATE_WITH_EGRESS,
+      },
+      securityGroups: [this.lambdaSecurityGroup],
+      timeout: Duration.minutes(10), // Claim lease (20 min) must exceed this
+      memorySize: 512,
+      description: "Scheduled batch dispatcher for appointment reminders",
+    });
+
+    this.auroraCluster.secret!.grantRead(this.appointmentRemindersLambda);
+    this.databaseKmsKey.grantDecrypt(this.appointmentRemindersLambda);
+
+    this.appointmentRemindersLambda.addToRolePolicy(
+      new iam.PolicyStatement({
+        effect: iam.Effect.ALLOW,
+        actions: ["rds-data:ExecuteStatement"],
+        resources: [this.auroraCluster.clusterArn]
+      })
+    );
+
+    // SMS publishing targets phone numbers, which have no ARN
+    this.appointmentRemindersLambda.addToRolePolicy(
+      new iam.PolicyStatement({
+        effect: iam.Effect.ALLOW,
+        actions: ["sns:Publish"],
+        resources: ["*"]
+      })
+    );
+
+    // Several workers per run; SKIP LOCKED claims keep their batches disjoint
+    const reminderSchedule = new events.Rule(this, "AppointmentReminderSchedule", {
+      schedule: events.Schedule.rate(Duration.minutes(15)),
+      description: "Dispatch due appointment reminders",
+    });
+    for (let worker = 0; worker < 4; worker++) {
+      reminderSchedule.addTarget(
+        new targets.LambdaFunction(this.appointmentRemindersLambda, {
+          event: events.RuleTargetInput.fromObject({ worker }),
+        })
+      );
+    }
+
     // Create boto3 Lambda layer
     const boto3Layer = new lambda.LayerVersion(this, "Boto3Layer", {
       code: lambda.Code.fromAsset("../lambda/lambda_layer/boto3_layer"),
@@ -475,6 +566,11 @@ export class MihcStack extends Stack {
       description: "HTTP endpoint URL for the database Lambda function",
     });
 
+    new CfnOutput(this, "AppointmentRemindersLambdaName", {
+      value: this.appointmentRemindersLambda.functionName,
+      description: "Name of the appointment reminder dispatcher Lambda function",
+    });
+
     // BDA Data Extraction Lambda outputs
     new CfnOutput(this, "BdaDataExtractionLambdaName", {
       value: this.bdaDataExtractionLambda.functionName,
@@ -4,6 +4,9 @@
 -- Enable necessary extensions
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+CREATE EXTENSION IF NOT EXISTS "btree_gist";
+CREATE EXTENSION IF NOT EXISTS "btree_gin";
 
 -- Audit trail function for HIPAA compliance
 CREATE OR REPLACE FUNCTION update_modified_column()
@@ -101,6 +104,9 @@ CREATE TABLE medical_facilities (
     city VARCHAR(100),
     state VARCHAR(50),
     zip_code VARCHAR(20),
+    -- IANA zone of the clinic's wall clock (appointments are stored in local time);
+    -- NULL falls back to the CLINIC_TIME_ZONE setting of the Lambdas
+    time_zone TEXT,
     
     -- Contact
     phone VARCHAR(20),
@@ -150,6 +156,9 @@ CREATE TRIGGER update_medical_encounters_modtime BEFORE UPDATE ON medical_encoun
 -- Indexes for performance
 CREATE INDEX idx_patients_mrn ON patients(medical_record_number);
 CREATE INDEX idx_patients_name ON patients(last_name, first_name);
+-- Fuzzy/substring name search (pg_trgm); queries must use lower(...) to match
+CREATE INDEX idx_patients_last_name_trgm ON patients USING GIN (lower(last_name) gin_trgm_ops);
+CREATE INDEX idx_patients_first_name_trgm ON patients USING GIN (lower(first_name) gin_trgm_ops);
 CREATE INDEX idx_patients_dob ON patients(date_of_birth);
 CREATE INDEX idx_providers_npi ON healthcare_providers(npi_number);
 CREATE INDEX idx_encounters_patient ON medical_encounters(patient_id);
@@ -65,6 +65,45 @@ CREATE TABLE medications (
     updated_by UUID
 );
 
+-- Brand <-> generic medication names used to expand medication searches
+CREATE TABLE medication_synonyms (
+    synonym_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    brand_name TEXT NOT NULL,
+    generic_name TEXT NOT NULL,
+    rxnorm_cui VARCHAR(20), -- RxNorm concept for the ingredient
+    
+    -- System fields
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Drug ingredients keyed by RxNorm ingredient CUI (local ids prefixed 'X-' where none exists)
+CREATE TABLE drug_ingredients (
+    ingredient_id VARCHAR(20) PRIMARY KEY,
+    ingredient_name TEXT NOT NULL,
+    drug_class TEXT,
+    
+    -- System fields
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Pairwise ingredient interactions, stored once per unordered pair (ingredient_a < ingredient_b)
+CREATE TABLE drug_interactions (
+    ingredient_a VARCHAR(20) NOT NULL REFERENCES drug_ingredients(ingredient_id),
+    ingredient_b VARCHAR(20) NOT NULL REFERENCES drug_ingredients(ingredient_id),
+    
+    -- Interaction Details
+    severity VARCHAR(20) NOT NULL CHECK (severity IN ('Contraindicated', 'Major', 'Moderate', 'Minor')),
+    description TEXT NOT NULL,
+    management TEXT,
+    
+    -- System fields
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (ingredient_a, ingredient_b),
+    CHECK (ingredient_a < ingredient_b)
+);
+
 -- Allergies and Adverse Reactions
 CREATE TABLE allergies (
     allergy_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -171,15 +210,148 @@ CREATE TRIGGER update_medications_modtime BEFORE UPDATE ON medications FOR EACH
 CREATE TRIGGER update_allergies_modtime BEFORE UPDATE ON allergies FOR EACH ROW EXECUTE FUNCTION update_modified_column();
 CREATE TRIGGER update_vital_signs_modtime BEFORE UPDATE ON vital_signs FOR EACH ROW EXECUTE FUNCTION update_modified_column();
 CREATE TRIGGER update_lab_results_modtime BEFORE UPDATE ON lab_results FOR EACH ROW EXECUTE FUNCTION update_modified_column();
+CREATE TRIGGER update_drug_interactions_modtime BEFORE UPDATE ON drug_interactions FOR EACH ROW EXECUTE FUNCTION update_modified_column();
 
 -- Indexes for performance
 CREATE INDEX idx_conditions_patient ON medical_conditions(patient_id);
 CREATE INDEX idx_conditions_icd10 ON medical_conditions(icd10_code);
+-- Diabetes cohort (ICD-10 E08-E13); queries must repeat this exact predicate
+CREATE INDEX idx_conditions_diabetes ON medical_conditions(patient_id, icd10_code) WHERE icd10_code >= 'E08' AND icd10_code < 'E14';
 CREATE INDEX idx_medications_patient ON medications(patient_id);
 CREATE INDEX idx_medications_status ON medications(medication_status);
+-- Fuzzy medication name search (pg_trgm); queries must use lower(...) to match
+CREATE INDEX idx_medications_name_trgm ON medications USING GIN (lower(medication_name) gin_trgm_ops);
+CREATE INDEX idx_medications_generic_trgm ON medications USING GIN (lower(generic_name) gin_trgm_ops);
+CREATE UNIQUE INDEX idx_medication_synonyms_pair ON medication_synonyms(lower(brand_name), lower(generic_name));
+CREATE INDEX idx_medication_synonyms_brand_trgm ON medication_synonyms USING GIN (lower(brand_name) gin_trgm_ops);
+CREATE INDEX idx_medication_synonyms_generic_trgm ON medication_synonyms USING GIN (lower(generic_name) gin_trgm_ops);
+CREATE UNIQUE INDEX idx_drug_ingredients_name ON drug_ingredients(lower(ingredient_name));
+-- Reverse lookups (the primary key covers ingredient_a)
+CREATE INDEX idx_drug_interactions_b ON drug_interactions(ingredient_b);
 CREATE INDEX idx_allergies_patient ON allergies(patient_id);
 CREATE INDEX idx_allergies_active ON allergies(active);
 CREATE INDEX idx_vitals_patient ON vital_signs(patient_id);
 CREATE INDEX idx_vitals_date ON vital_signs(measurement_date);
 CREATE INDEX idx_lab_results_patient ON lab_results(patient_id);
-CREATE INDEX idx_lab_results_date ON lab_results(result_date);
\ No newline at end of file
+CREATE INDEX idx_lab_results_date ON lab_results(result_date);
+
+-- Common brand/generic pairs
+INSERT INTO medication_synonyms (brand_name, generic_name, rxnorm_cui) VALUES
+('Glucophage', 'metformin', '6809'),
+('Glumetza', 'metformin', '6809'),
+('Fortamet', 'metformin', '6809'),
+('Januvia', 'sitagliptin', '593411'),
+('Janumet', 'sitagliptin and metformin', NULL),
+('Jardiance', 'empagliflozin', '1545653'),
+('Farxiga', 'dapagliflozin', '1488564'),
+('Invokana', 'canagliflozin', '1373458'),
+('Ozempic', 'semaglutide', '1991302'),
+('Rybelsus', 'semaglutide', '1991302'),
+('Victoza', 'liraglutide', '475968'),
+('Trulicity', 'dulaglutide', '1551291'),
+('Mounjaro', 'tirzepatide', NULL),
+('Glucotrol', 'glipizide', '4821'),
+('Amaryl', 'glimepiride', '25789'),
+('Actos', 'pioglitazone', '33738'),
+('Lantus', 'insulin glargine', '274783'),
+('Basaglar', 'insulin glargine', '274783'),
+('Toujeo', 'insulin glargine', '274783'),
+('Levemir', 'insulin detemir', '139825'),
+('Tresiba', 'insulin degludec', '1670007'),
+('Humalog', 'insulin lispro', '86009'),
+('Novolog', 'insulin aspart', '51428'),
+('Zestril', 'lisinopril', '29046'),
+('Prinivil', 'lisinopril', '29046'),
+('Lipitor', 'atorvastatin', '83367'),
+('Crestor', 'rosuvastatin', '301542'),
+('Zocor', 'simvastatin', '36567'),
+('Norvasc', 'amlodipine', '17767'),
+('Cozaar', 'losartan', '52175'),
+('Coumadin', 'warfarin', '11289'),
+('Eliquis', 'apixaban', '1364430'),
+('Plavix', 'clopidogrel', '32968'),
+('Synthroid', 'levothyroxine', '10582'),
+('Prilosec', 'omeprazole', '7646'),
+('Zoloft', 'sertraline', '36437'),
+('Neurontin', 'gabapentin', '25480'),
+('Amoxil', 'amoxicillin', '723'),
+('Eylea', 'aflibercept', '1232150'),
+('Lucentis', 'ranibizumab', '595060'),
+('Avastin', 'bevacizumab', '253337'),
+('Vabysmo', 'faricimab', NULL),
+('Syfovre', 'pegcetacoplan', NULL),
+('Izervay', 'avacincaptad pegol', NULL);
+
+-- Core ingredient reference set
+INSERT INTO drug_ingredients (ingredient_id, ingredient_name, drug_class) VALUES
+('6809', 'metformin', 'Biguanide'),
+('4821', 'glipizide', 'Sulfonylurea'),
+('25789', 'glimepiride', 'Sulfonylurea'),
+('33738', 'pioglitazone', 'Thiazolidinedione'),
+('274783', 'insulin glargine', 'Insulin'),
+('1545653', 'empagliflozin', 'SGLT2 inhibitor'),
+('1488564', 'dapagliflozin', 'SGLT2 inhibitor'),
+('1991302', 'semaglutide', 'GLP-1 receptor agonist'),
+('11289', 'warfarin', 'Anticoagulant'),
+('1364430', 'apixaban', 'Anticoagulant'),
+('32968', 'clopidogrel', 'Antiplatelet'),
+('1191', 'aspirin', 'NSAID / Antiplatelet'),
+('5640', 'ibuprofen', 'NSAID'),
+('7258', 'naproxen', 'NSAID'),
+('29046', 'lisinopril', 'ACE inhibitor'),
+('52175', 'losartan', 'ARB'),
+('9997', 'spironolactone', 'Potassium-sparing diuretic'),
+('4603', 'furosemide', 'Loop diuretic'),
+('8591', 'potassium chloride', 'Electrolyte'),
+('3407', 'digoxin', 'Cardiac glycoside'),
+('703', 'amiodarone', 'Antiarrhythmic'),
+('17767', 'amlodipine', 'Calcium channel blocker'),
+('36567', 'simvastatin', 'Statin'),
+('83367', 'atorvastatin', 'Statin'),
+('4719', 'gemfibrozil', 'Fibrate'),
+('21212', 'clarithromycin', 'Macrolide antibiotic'),
+('2551', 'ciprofloxacin', 'Fluoroquinolone antibiotic'),
+('10180', 'sulfamethoxazole', 'Sulfonamide antibiotic'),
+('10829', 'trimethoprim', 'Antibiotic'),
+('4450', 'fluconazole', 'Azole antifungal'),
+('36437', 'sertraline', 'SSRI'),
+('10689', 'tramadol', 'Opioid analgesic'),
+('10582', 'levothyroxine', 'Thyroid hormone'),
+('1897', 'calcium carbonate', 'Antacid / Calcium supplement'),
+('7646', 'omeprazole', 'Proton pump inhibitor'),
+('X-CONTRAST', 'iodinated contrast', 'Radiocontrast agent');
+
+-- Clinically significant pairs; LEAST/GREATEST keeps each pair in canonical order
+INSERT INTO drug_interactions (ingredient_a, ingredient_b, severity, description, management)
+SELECT LEAST(a, b), GREATEST(a, b), severity, description, management
+FROM (VALUES
+    ('11289', '1191', 'Major', 'Additive bleeding risk from anticoagulant plus antiplatelet/NSAID effect', 'Avoid unless specifically indicated; monitor for bleeding'),
+    ('11289', '5640', 'Major', 'NSAID increases bleeding risk and may raise INR', 'Prefer acetaminophen for pain; monitor INR'),
+    ('11289', '7258', 'Major', 'NSAID increases bleeding risk and may raise INR', 'Prefer acetaminophen for pain; monitor INR'),
+    ('11289', '4450', 'Major', 'Fluconazole inhibits warfarin metabolism and markedly raises INR', 'Reduce warfarin dose and monitor INR closely'),
+    ('11289', '10180', 'Major', 'Sulfamethoxazole inhibits warfarin metabolism and raises INR', 'Choose an alternative antibiotic or monitor INR closely'),
+    ('11289', '703', 'Major', 'Amiodarone inhibits warfarin metabolism; effect persists for months', 'Reduce warfarin dose and monitor INR'),
+    ('11289', '10582', 'Moderate', 'Thyroid hormone increases the anticoagulant effect of warfarin', 'Monitor INR when levothyroxine dose changes'),
+    ('1364430', '1191', 'Major', 'Additive bleeding risk', 'Avoid unless specifically indicated; monitor for bleeding'),
+    ('32968', '7646', 'Moderate', 'Omeprazole reduces activation of clopidogrel', 'Consider pantoprazole instead'),
+    ('32968', '1191', 'Moderate', 'Additive bleeding risk (often intended as dual antiplatelet therapy)', 'Confirm intended duration of dual therapy'),
+    ('6809', 'X-CONTRAST', 'Major', 'Iodinated contrast can impair renal function and lead to metformin-associated lactic acidosis', 'Hold metformin at the time of contrast and for 48 hours after; check renal function'),
+    ('29046', '9997', 'Major', 'Risk of hyperkalemia', 'Monitor potassium and renal function'),
+    ('29046', '8591', 'Major', 'Risk of hyperkalemia', 'Monitor potassium; avoid routine supplementation'),
+    ('29046', '52175', 'Major', 'Dual renin-angiotensin blockade increases hyperkalemia, hypotension and kidney injury', 'Avoid combination'),
+    ('29046', '5640', 'Moderate', 'NSAID reduces antihypertensive effect and increases kidney injury risk', 'Limit NSAID use; monitor blood pressure and renal function'),
+    ('52175', '9997', 'Major', 'Risk of hyperkalemia', 'Monitor potassium and renal function'),
+    ('10829', '9997', 'Major', 'Trimethoprim reduces potassium excretion; risk of hyperkalemia', 'Monitor potassium or choose another antibiotic'),
+    ('36567', '21212', 'Contraindicated', 'Clarithromycin greatly raises simvastatin levels; risk of rhabdomyolysis', 'Do not combine; suspend simvastatin during therapy'),
+    ('36567', '4719', 'Contraindicated', 'Increased risk of myopathy and rhabdomyolysis', 'Do not combine'),
+    ('36567', '703', 'Major', 'Amiodarone raises simvastatin levels; risk of myopathy', 'Do not exceed simvastatin 20 mg daily'),
+    ('83367', '21212', 'Major', 'Clarithromycin raises atorvastatin levels; risk of myopathy', 'Limit atorvastatin to 20 mg daily or suspend'),
+    ('3407', '703', 'Major', 'Amiodarone raises digoxin levels', 'Reduce digoxin dose and monitor levels'),
+    ('3407', '4603', 'Moderate', 'Loop diuretic-induced hypokalemia increases digoxin toxicity', 'Monitor potassium and magnesium'),
+    ('36437', '10689', 'Major', 'Risk of serotonin syndrome and seizures', 'Use an alternative analgesic or monitor closely'),
+    ('10582', '1897', 'Moderate', 'Calcium reduces levothyroxine absorption', 'Separate doses by at least 4 hours'),
+    ('4821', '4450', 'Moderate', 'Fluconazole raises sulfonylurea levels; risk of hypoglycemia', 'Monitor glucose closely'),
+    ('25789', '4450', 'Moderate', 'Fluconazole raises sulfonylurea levels; risk of hypoglycemia', 'Monitor glucose closely'),
+    ('4821', '2551', 'Moderate', 'Fluoroquinolones can cause severe hypo- or hyperglycemia', 'Monitor glucose closely'),
+    ('274783', '33738', 'Moderate', 'Increased risk of fluid retention and heart failure', 'Monitor for edema and weight gain')
+) AS v(a, b, severity, description, management);
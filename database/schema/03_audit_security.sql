@@ -79,14 +79,16 @@ CREATE TABLE user_roles (
 );
 
 -- HIPAA Audit Log - All data access must be logged
+-- Range-partitioned by month on action_timestamp (see create_audit_partitions)
 CREATE TABLE audit_log (
-    audit_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    audit_id UUID NOT NULL DEFAULT uuid_generate_v4(),
     
     -- User and Session Information
     user_id UUID REFERENCES users(user_id),
     session_id VARCHAR(255),
     ip_address INET,
     user_agent TEXT,
+    source VARCHAR(100), -- Calling component: agent, gateway, dashboard
     
     -- Action Details
     action_type VARCHAR(50) NOT NULL, -- CREATE, READ, UPDATE, DELETE, LOGIN, LOGOUT
@@ -108,19 +110,23 @@ CREATE TABLE audit_log (
     error_message TEXT,
     
     -- Timing
-    action_timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    action_timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     duration_ms INTEGER,
     
     -- Business Context
     business_justification TEXT, -- Why was this data accessed?
     
     -- System fields
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    
+    -- The partition key must be part of the primary key
+    PRIMARY KEY (audit_id, action_timestamp)
+) PARTITION BY RANGE (action_timestamp);
 
 -- Patient Access Log - Track who accessed which patient's data
+-- Range-partitioned by month on access_start (see create_audit_partitions)
 CREATE TABLE patient_access_log (
-    access_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    access_id UUID NOT NULL DEFAULT uuid_generate_v4(),
     patient_id UUID NOT NULL REFERENCES patients(patient_id),
     user_id UUID NOT NULL REFERENCES users(user_id),
     
@@ -134,14 +140,155 @@ CREATE TABLE patient_access_log (
     ip_address INET,
     
     -- Timing
-    access_start TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    access_start TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     access_end TIMESTAMP WITH TIME ZONE,
     duration_seconds INTEGER,
     
     -- System fields
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (access_id, access_start)
+) PARTITION BY RANGE (access_start);
+
+-- Catch-all partitions so a missing month never rejects an audit write
+CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT;
+CREATE TABLE patient_access_log_default PARTITION OF patient_access_log DEFAULT;
+
+-- Daily per-patient, per-user access counts (feeds patient_access_summary)
+CREATE TABLE patient_access_daily (
+    access_date DATE NOT NULL,
+    patient_id UUID NOT NULL REFERENCES patients(patient_id),
+    user_id UUID NOT NULL REFERENCES users(user_id),
+    
+    access_count INTEGER NOT NULL,
+    first_access TIMESTAMP WITH TIME ZONE NOT NULL,
+    last_access TIMESTAMP WITH TIME ZONE NOT NULL,
+    
+    -- System fields
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (access_date, patient_id, user_id)
+);
+
+-- Days whose rollup is complete; a day with no accesses has no patient_access_daily
+-- rows, so this marker is what tells the summary view the raw log can be skipped
+CREATE TABLE patient_access_rollup_days (
+    access_date DATE PRIMARY KEY,
+    rolled_up_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Create monthly partitions of both audit tables from the current month through p_months_ahead,
+-- plus any month that already has rows in the default partition. Those rows are moved into the
+-- new partition before it is attached, because a default partition holding rows for a range
+-- blocks CREATE TABLE ... PARTITION OF for that range. Run nightly (the database handler's
+-- rollup_patient_access action) and by the archival job; returns the number of partitions created.
+CREATE OR REPLACE FUNCTION create_audit_partitions(p_months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE;
+    month_end DATE;
+    partition_name TEXT;
+    parent TEXT;
+    partition_key TEXT;
+    default_partition TEXT;
+    has_default_rows BOOLEAN;
+    created INTEGER := 0;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['audit_log', 'patient_access_log'] LOOP
+        partition_key := CASE parent WHEN 'audit_log' THEN 'action_timestamp' ELSE 'access_start' END;
+        default_partition := parent || '_default';
+
+        FOR month_start IN EXECUTE format(
+            'SELECT (date_trunc(''month'', CURRENT_DATE) + make_interval(months => i))::DATE
+             FROM generate_series(0, %s) AS i
+             UNION
+             SELECT DISTINCT date_trunc(''month'', %I)::DATE FROM %I
+             ORDER BY 1',
+            p_months_ahead, partition_key, default_partition
+        ) LOOP
+            month_end := (month_start + INTERVAL '1 month')::DATE;
+            partition_name := format('%s_p%s', parent, to_char(month_start, 'YYYY_MM'));
+            IF to_regclass(partition_name) IS NOT NULL THEN
+                CONTINUE;
+            END IF;
+
+            EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE %I >= %L AND %I < %L)',
+                           default_partition, partition_key, month_start, partition_key, month_end)
+            INTO has_default_rows;
+
+            IF has_default_rows THEN
+                -- Hold off concurrent writes to the default partition until the new one is attached
+                EXECUTE format('LOCK TABLE %I IN EXCLUSIVE MODE', default_partition);
+                EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS)', partition_name, parent);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *)
+                     INSERT INTO %I SELECT * FROM moved',
+                    default_partition, partition_key, month_start, partition_key, month_end, partition_name
+                );
+                EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                               parent, partition_name, month_start, month_end);
+            ELSE
+                EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                               partition_name, parent, month_start, month_end);
+            END IF;
+            created := created + 1;
+        END LOOP;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_audit_partitions(3);
+
+-- Recompute the access rollup for one day (idempotent; run nightly for yesterday)
+CREATE OR REPLACE FUNCTION rollup_patient_access(p_day DATE DEFAULT CURRENT_DATE - 1)
+RETURNS INTEGER AS $$
+DECLARE
+    row_count INTEGER;
+BEGIN
+    DELETE FROM patient_access_daily WHERE access_date = p_day;
+    
+    -- Range predicate on the partition key prunes the scan to one partition
+    INSERT INTO patient_access_daily (access_date, patient_id, user_id, access_count, first_access, last_access)
+    SELECT p_day, patient_id, user_id, COUNT(*), MIN(access_start), MAX(access_start)
+    FROM patient_access_log
+    WHERE access_start >= p_day AND access_start < p_day + 1
+    GROUP BY patient_id, user_id;
+    
+    GET DIAGNOSTICS row_count = ROW_COUNT;
+    
+    -- Today is still receiving accesses, so it is never marked complete
+    IF p_day < CURRENT_DATE THEN
+        INSERT INTO patient_access_rollup_days (access_date) VALUES (p_day)
+        ON CONFLICT (access_date) DO UPDATE SET rolled_up_at = CURRENT_TIMESTAMP;
+    END IF;
+    RETURN row_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Roll up every past day in the last p_days that has not been rolled up yet.
+-- Scheduled nightly (database handler, rollup_patient_access action); the first
+-- run backfills the window. Returns the number of days rolled up.
+CREATE OR REPLACE FUNCTION rollup_pending_patient_access(p_days INTEGER DEFAULT 30)
+RETURNS INTEGER AS $$
+DECLARE
+    pending DATE;
+    rolled_up INTEGER := 0;
+BEGIN
+    FOR pending IN
+        SELECT d::DATE
+        FROM generate_series(CURRENT_DATE - p_days, CURRENT_DATE - 1, INTERVAL '1 day') AS d
+        WHERE NOT EXISTS (
+            SELECT 1 FROM patient_access_rollup_days r WHERE r.access_date = d::DATE
+        )
+    LOOP
+        PERFORM rollup_patient_access(pending);
+        rolled_up := rolled_up + 1;
+    END LOOP;
+    RETURN rolled_up;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Data Breach Incidents (HIPAA requirement)
 CREATE TABLE security_incidents (
     incident_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -188,13 +335,15 @@ CREATE TRIGGER update_security_incidents_modtime BEFORE UPDATE ON security_incid
 CREATE INDEX idx_users_username ON users(username);
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_users_active ON users(active);
-CREATE INDEX idx_audit_log_user ON audit_log(user_id);
-CREATE INDEX idx_audit_log_patient ON audit_log(patient_id);
-CREATE INDEX idx_audit_log_timestamp ON audit_log(action_timestamp);
+-- Partitioned indexes: created on every existing and future partition
+CREATE INDEX idx_audit_log_user ON audit_log(user_id, action_timestamp);
+CREATE INDEX idx_audit_log_patient ON audit_log(patient_id, action_timestamp);
+CREATE INDEX idx_audit_log_timestamp ON audit_log USING BRIN (action_timestamp);
 CREATE INDEX idx_audit_log_action ON audit_log(action_type);
-CREATE INDEX idx_patient_access_patient ON patient_access_log(patient_id);
-CREATE INDEX idx_patient_access_user ON patient_access_log(user_id);
-CREATE INDEX idx_patient_access_timestamp ON patient_access_log(access_start);
+CREATE INDEX idx_patient_access_patient ON patient_access_log(patient_id, access_start);
+CREATE INDEX idx_patient_access_user ON patient_access_log(user_id, access_start);
+CREATE INDEX idx_patient_access_timestamp ON patient_access_log USING BRIN (access_start);
+CREATE INDEX idx_patient_access_daily_patient ON patient_access_daily(patient_id, access_date);
 CREATE INDEX idx_security_incidents_date ON security_incidents(incident_date);
 CREATE INDEX idx_security_incidents_status ON security_incidents(status);
 
@@ -128,6 +128,12 @@ CREATE TABLE clinical_documents (
     -- Content
     document_content TEXT NOT NULL,
     template_used TEXT,
+    -- Full-text search vector: title weighted above type, type above body
+    document_tsv TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', COALESCE(document_title, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(document_type, '')), 'B') ||
+        setweight(to_tsvector('english', document_content), 'C')
+    ) STORED,
     
     -- Signatures and Authentication
     signed BOOLEAN DEFAULT FALSE,
@@ -165,7 +171,15 @@ CREATE TABLE appointments (
     -- Scheduling
     scheduled_date DATE NOT NULL,
     scheduled_time TIME NOT NULL,
-    duration_minutes INTEGER DEFAULT 30,
+    duration_minutes INTEGER DEFAULT 30 CHECK (duration_minutes > 0),
+    -- Clinic wall-clock slot as a range (wall time stored as UTC) for overlap checks
+    appointment_period TSTZRANGE GENERATED ALWAYS AS (
+        tstzrange(
+            timezone('UTC', scheduled_date + scheduled_time),
+            timezone('UTC', scheduled_date + scheduled_time + make_interval(mins => COALESCE(duration_minutes, 30))),
+            '[)'
+        )
+    ) STORED,
     
     -- Status
     appointment_status VARCHAR(50) DEFAULT 'Scheduled', -- Scheduled, Confirmed, Checked In, Completed, Cancelled, No Show
@@ -181,12 +195,49 @@ CREATE TABLE appointments (
     -- Reminders
     reminder_sent BOOLEAN DEFAULT FALSE,
     reminder_sent_date TIMESTAMP WITH TIME ZONE,
+    -- Dispatcher lease: the worker holding reminder_claim_token sends the reminder
+    reminder_claim_token UUID,
+    reminder_claimed_at TIMESTAMP WITH TIME ZONE,
+    reminder_attempts INTEGER DEFAULT 0,
+    
+    -- Client-supplied key so retried booking requests create one appointment
+    idempotency_key VARCHAR(100) UNIQUE,
     
     -- System fields
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     created_by UUID NOT NULL,
-    updated_by UUID
+    updated_by UUID,
+    
+    -- A provider can never be double booked; the backing GiST index also serves availability probes
+    CONSTRAINT appointments_no_provider_overlap EXCLUDE USING gist (
+        provider_id WITH =,
+        appointment_period WITH &&
+    ) WHERE (appointment_status IN ('Scheduled', 'Confirmed', 'Checked In'))
+);
+
+-- Recurring weekly availability per provider and facility
+CREATE TABLE provider_schedules (
+    schedule_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    provider_id UUID NOT NULL REFERENCES healthcare_providers(provider_id),
+    facility_id UUID REFERENCES medical_facilities(facility_id),
+    
+    -- Weekly Hours
+    day_of_week SMALLINT NOT NULL CHECK (day_of_week BETWEEN 0 AND 6), -- 0 = Sunday
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL,
+    slot_minutes INTEGER NOT NULL DEFAULT 30 CHECK (slot_minutes > 0),
+    
+    -- Validity
+    effective_from DATE NOT NULL DEFAULT CURRENT_DATE,
+    effective_to DATE,
+    
+    -- System fields
+    active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    
+    CHECK (end_time > start_time)
 );
 
 -- Create triggers for updated_at timestamps
@@ -194,6 +245,7 @@ CREATE TRIGGER update_medical_procedures_modtime BEFORE UPDATE ON medical_proced
 CREATE TRIGGER update_imaging_studies_modtime BEFORE UPDATE ON imaging_studies FOR EACH ROW EXECUTE FUNCTION update_modified_column();
 CREATE TRIGGER update_clinical_documents_modtime BEFORE UPDATE ON clinical_documents FOR EACH ROW EXECUTE FUNCTION update_modified_column();
 CREATE TRIGGER update_appointments_modtime BEFORE UPDATE ON appointments FOR EACH ROW EXECUTE FUNCTION update_modified_column();
+CREATE TRIGGER update_provider_schedules_modtime BEFORE UPDATE ON provider_schedules FOR EACH ROW EXECUTE FUNCTION update_modified_column();
 
 -- Indexes for performance
 CREATE INDEX idx_procedures_patient ON medical_procedures(patient_id);
@@ -211,8 +263,16 @@ CREATE INDEX idx_documents_patient ON clinical_documents(patient_id);
 CREATE INDEX idx_documents_provider ON clinical_documents(created_by_provider);
 CREATE INDEX idx_documents_type ON clinical_documents(document_type);
 CREATE INDEX idx_documents_status ON clinical_documents(document_status);
+-- Patient-scoped full-text search: (patient_id, document_tsv) in one GIN index via btree_gin
+CREATE INDEX idx_documents_patient_fts ON clinical_documents USING GIN (patient_id, document_tsv);
 
 CREATE INDEX idx_appointments_patient ON appointments(patient_id);
 CREATE INDEX idx_appointments_provider ON appointments(provider_id);
 CREATE INDEX idx_appointments_date ON appointments(scheduled_date);
-CREATE INDEX idx_appointments_status ON appointments(appointment_status);
\ No newline at end of file
+CREATE INDEX idx_appointments_status ON appointments(appointment_status);
+-- Due-reminder scan: only unsent upcoming appointments, in dispatch order
+CREATE INDEX idx_appointments_reminder_due ON appointments(scheduled_date, scheduled_time)
+    WHERE reminder_sent IS NOT TRUE AND appointment_status IN ('Scheduled', 'Confirmed');
+
+CREATE INDEX idx_provider_schedules_provider ON provider_schedules(provider_id, day_of_week) WHERE active;
+CREATE INDEX idx_providers_specialty_trgm ON healthcare_providers USING GIN (lower(specialty) gin_trgm_ops);
\ No newline at end of file
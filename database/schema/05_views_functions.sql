@@ -1,7 +1,152 @@
 -- Views and Functions for Medical Data Model
 -- Commonly used views and utility functions
 
+-- Patient Summary Cache - derived clinical summary per patient, maintained by
+-- statement-level triggers on the source tables (see refresh_patient_summary_cache)
+CREATE TABLE patient_summary_cache (
+    patient_id UUID PRIMARY KEY REFERENCES patients(patient_id) ON DELETE CASCADE,
+    
+    -- Latest encounter
+    last_visit_date TIMESTAMP WITH TIME ZONE,
+    last_visit_type VARCHAR(50),
+    last_provider_id UUID,
+    
+    -- Counts
+    active_conditions_count INTEGER NOT NULL DEFAULT 0,
+    active_medications_count INTEGER NOT NULL DEFAULT 0,
+    known_allergies_count INTEGER NOT NULL DEFAULT 0,
+    
+    -- Latest vital signs
+    last_vitals_date TIMESTAMP WITH TIME ZONE,
+    systolic_bp INTEGER,
+    diastolic_bp INTEGER,
+    heart_rate INTEGER,
+    temperature DECIMAL(4,1),
+    weight DECIMAL(5,2),
+    bmi DECIMAL(4,1),
+    
+    -- System fields
+    refreshed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Recompute the cache for the given patients (all patients when NULL)
+CREATE OR REPLACE FUNCTION reconcile_patient_summaries(p_patient_ids UUID[] DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    row_count INTEGER;
+BEGIN
+    -- Serialize refreshes per patient: a concurrent writer waits here, and the
+    -- recompute below then runs on a fresh snapshot that includes its changes
+    IF p_patient_ids IS NOT NULL THEN
+        PERFORM pg_advisory_xact_lock(hashtextextended(id::text, 0))
+        FROM (SELECT DISTINCT unnest(p_patient_ids) AS id ORDER BY 1) ids;
+    END IF;
+    
+    INSERT INTO patient_summary_cache (
+        patient_id, last_visit_date, last_visit_type, last_provider_id,
+        active_conditions_count, active_medications_count, known_allergies_count,
+        last_vitals_date, systolic_bp, diastolic_bp, heart_rate, temperature, weight, bmi,
+        refreshed_at
+    )
+    SELECT 
+        p.patient_id,
+        le.encounter_date,
+        le.encounter_type,
+        le.provider_id,
+        (SELECT COUNT(*) FROM medical_conditions mc 
+         WHERE mc.patient_id = p.patient_id AND mc.condition_status = 'Active'),
+        (SELECT COUNT(*) FROM medications m 
+         WHERE m.patient_id = p.patient_id AND m.medication_status = 'Active'),
+        (SELECT COUNT(*) FROM allergies a 
+         WHERE a.patient_id = p.patient_id AND a.active = TRUE),
+        vs.measurement_date,
+        vs.systolic_bp,
+        vs.diastolic_bp,
+        vs.heart_rate,
+        vs.temperature,
+        vs.weight,
+        vs.bmi,
+        CURRENT_TIMESTAMP
+    FROM patients p
+    LEFT JOIN LATERAL (
+        SELECT encounter_date, encounter_type, provider_id
+        FROM medical_encounters me
+        WHERE me.patient_id = p.patient_id
+        ORDER BY encounter_date DESC
+        LIMIT 1
+    ) le ON true
+    LEFT JOIN LATERAL (
+        SELECT measurement_date, systolic_bp, diastolic_bp, heart_rate, temperature, weight, bmi
+        FROM vital_signs vs
+        WHERE vs.patient_id = p.patient_id
+        ORDER BY measurement_date DESC
+        LIMIT 1
+    ) vs ON true
+    WHERE p_patient_ids IS NULL OR p.patient_id = ANY(p_patient_ids)
+    ON CONFLICT (patient_id) DO UPDATE SET
+        last_visit_date = EXCLUDED.last_visit_date,
+        last_visit_type = EXCLUDED.last_visit_type,
+        last_provider_id = EXCLUDED.last_provider_id,
+        active_conditions_count = EXCLUDED.active_conditions_count,
+        active_medications_count = EXCLUDED.active_medications_count,
+        known_allergies_count = EXCLUDED.known_allergies_count,
+        last_vitals_date = EXCLUDED.last_vitals_date,
+        systolic_bp = EXCLUDED.systolic_bp,
+        diastolic_bp = EXCLUDED.diastolic_bp,
+        heart_rate = EXCLUDED.heart_rate,
+        temperature = EXCLUDED.temperature,
+        weight = EXCLUDED.weight,
+        bmi = EXCLUDED.bmi,
+        refreshed_at = EXCLUDED.refreshed_at;
+    
+    GET DIAGNOSTICS row_count = ROW_COUNT;
+    RETURN row_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rebuild one patient on demand
+CREATE OR REPLACE FUNCTION reconcile_patient_summary(p_patient_id UUID)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM reconcile_patient_summaries(ARRAY[p_patient_id]);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level trigger: one set-based refresh per statement for the distinct patients it touched
+CREATE OR REPLACE FUNCTION refresh_patient_summary_cache()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM reconcile_patient_summaries(ARRAY(SELECT DISTINCT patient_id FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM reconcile_patient_summaries(ARRAY(
+            SELECT patient_id FROM new_rows UNION SELECT patient_id FROM old_rows
+        ));
+    ELSE
+        PERFORM reconcile_patient_summaries(ARRAY(SELECT DISTINCT patient_id FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER medical_encounters_summary_ins AFTER INSERT ON medical_encounters REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER medical_encounters_summary_upd AFTER UPDATE ON medical_encounters REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER medical_encounters_summary_del AFTER DELETE ON medical_encounters REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER medical_conditions_summary_ins AFTER INSERT ON medical_conditions REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER medical_conditions_summary_upd AFTER UPDATE ON medical_conditions REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER medical_conditions_summary_del AFTER DELETE ON medical_conditions REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER medications_summary_ins AFTER INSERT ON medications REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER medications_summary_upd AFTER UPDATE ON medications REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER medications_summary_del AFTER DELETE ON medications REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER allergies_summary_ins AFTER INSERT ON allergies REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER allergies_summary_upd AFTER UPDATE ON allergies REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER allergies_summary_del AFTER DELETE ON allergies REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER vital_signs_summary_ins AFTER INSERT ON vital_signs REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER vital_signs_summary_upd AFTER UPDATE ON vital_signs REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+CREATE TRIGGER vital_signs_summary_del AFTER DELETE ON vital_signs REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION refresh_patient_summary_cache();
+
 -- Patient Summary View - Comprehensive patient overview
+-- Primary-key lookups on patients and the cache; age and provider name resolve at read time
 CREATE VIEW patient_summary AS
 SELECT 
     p.patient_id,
@@ -16,47 +161,28 @@ SELECT
     p.insurance_provider,
     
     -- Latest encounter
-    le.encounter_date as last_visit_date,
-    le.encounter_type as last_visit_type,
+    psc.last_visit_date,
+    psc.last_visit_type,
     hp.first_name || ' ' || hp.last_name as last_provider,
     
-    -- Active conditions count
-    (SELECT COUNT(*) FROM medical_conditions mc 
-     WHERE mc.patient_id = p.patient_id AND mc.condition_status = 'Active') as active_conditions_count,
-    
-    -- Active medications count
-    (SELECT COUNT(*) FROM medications m 
-     WHERE m.patient_id = p.patient_id AND m.medication_status = 'Active') as active_medications_count,
-    
-    -- Known allergies count
-    (SELECT COUNT(*) FROM allergies a 
-     WHERE a.patient_id = p.patient_id AND a.active = TRUE) as known_allergies_count,
+    -- Counts
+    COALESCE(psc.active_conditions_count, 0) as active_conditions_count,
+    COALESCE(psc.active_medications_count, 0) as active_medications_count,
+    COALESCE(psc.known_allergies_count, 0) as known_allergies_count,
     
     -- Latest vital signs
-    vs.measurement_date as last_vitals_date,
-    vs.systolic_bp,
-    vs.diastolic_bp,
-    vs.heart_rate,
-    vs.temperature,
-    vs.weight,
-    vs.bmi
+    psc.last_vitals_date,
+    psc.systolic_bp,
+    psc.diastolic_bp,
+    psc.heart_rate,
+    psc.temperature,
+    psc.weight,
+    psc.bmi,
+    psc.refreshed_at
 
 FROM patients p
-LEFT JOIN LATERAL (
-    SELECT encounter_date, encounter_type, provider_id
-    FROM medical_encounters me
-    WHERE me.patient_id = p.patient_id
-    ORDER BY encounter_date DESC
-    LIMIT 1
-) le ON true
-LEFT JOIN healthcare_providers hp ON le.provider_id = hp.provider_id
-LEFT JOIN LATERAL (
-    SELECT measurement_date, systolic_bp, diastolic_bp, heart_rate, temperature, weight, bmi
-    FROM vital_signs vs
-    WHERE vs.patient_id = p.patient_id
-    ORDER BY measurement_date DESC
-    LIMIT 1
-) vs ON true
+LEFT JOIN patient_summary_cache psc ON psc.patient_id = p.patient_id
+LEFT JOIN healthcare_providers hp ON psc.last_provider_id = hp.provider_id
 WHERE p.active = TRUE;
 
 -- Active Medications View
@@ -132,21 +258,40 @@ WHERE a.scheduled_date >= CURRENT_DATE
 ORDER BY a.scheduled_date, a.scheduled_time;
 
 -- Patient Access Summary for HIPAA Compliance
+-- Rolled-up past days come from patient_access_daily; today and any past day
+-- without a completed rollup (patient_access_rollup_days) are read from the raw log
 CREATE VIEW patient_access_summary AS
+WITH rolled_up AS (
+    SELECT access_date
+    FROM patient_access_rollup_days
+    WHERE access_date >= CURRENT_DATE - 30 AND access_date < CURRENT_DATE
+),
+daily AS (
+    SELECT d.patient_id, d.user_id, d.access_count, d.first_access, d.last_access
+    FROM patient_access_daily d
+    JOIN rolled_up r ON r.access_date = d.access_date
+    UNION ALL
+    -- One range probe per pending day, so rolled-up days never touch the raw log
+    SELECT l.patient_id, l.user_id, COUNT(*), MIN(l.access_start), MAX(l.access_start)
+    FROM generate_series(CURRENT_DATE - 30, CURRENT_DATE, INTERVAL '1 day') AS g(day)
+    JOIN patient_access_log l
+      ON l.access_start >= g.day::DATE AND l.access_start < g.day::DATE + 1
+    WHERE NOT EXISTS (SELECT 1 FROM rolled_up r WHERE r.access_date = g.day::DATE)
+    GROUP BY l.patient_id, l.user_id
+)
 SELECT 
-    pal.patient_id,
+    d.patient_id,
     p.medical_record_number,
     p.first_name || ' ' || p.last_name as patient_name,
-    COUNT(*) as total_accesses,
-    COUNT(DISTINCT pal.user_id) as unique_users,
-    MIN(pal.access_start) as first_access,
-    MAX(pal.access_start) as last_access,
+    SUM(d.access_count) as total_accesses,
+    COUNT(DISTINCT d.user_id) as unique_users,
+    MIN(d.first_access) as first_access,
+    MAX(d.last_access) as last_access,
     array_agg(DISTINCT u.first_name || ' ' || u.last_name) as accessing_users
-FROM patient_access_log pal
-JOIN patients p ON pal.patient_id = p.patient_id
-JOIN users u ON pal.user_id = u.user_id
-WHERE pal.access_start >= CURRENT_DATE - INTERVAL '30 days'
-GROUP BY pal.patient_id, p.medical_record_number, p.first_name, p.last_name
+FROM daily d
+JOIN patients p ON d.patient_id = p.patient_id
+JOIN users u ON d.user_id = u.user_id
+GROUP BY d.patient_id, p.medical_record_number, p.first_name, p.last_name
 ORDER BY total_accesses DESC;
 
 -- Function to calculate BMI
@@ -174,7 +319,21 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Function to check for drug interactions (simplified)
+-- Resolve a medication name (brand, generic or salt form) to drug ingredients
+CREATE OR REPLACE FUNCTION resolve_drug_ingredients(drug_name TEXT)
+RETURNS TABLE(ingredient_id VARCHAR) AS $$
+    SELECT DISTINCT i.ingredient_id
+    FROM drug_ingredients i
+    WHERE lower(drug_name) ~ ('\m' || lower(i.ingredient_name) || '\M')
+       OR EXISTS (
+           SELECT 1
+           FROM medication_synonyms s
+           WHERE lower(s.generic_name) ~ ('\m' || lower(i.ingredient_name) || '\M')
+             AND lower(drug_name) ~ ('\m' || lower(s.brand_name) || '\M')
+       );
+$$ LANGUAGE sql STABLE;
+
+-- Function to check a new medication against a patient's active medications
 CREATE OR REPLACE FUNCTION check_drug_interactions(patient_uuid UUID, new_medication VARCHAR)
 RETURNS TABLE(
     interaction_severity VARCHAR,
@@ -182,20 +341,22 @@ RETURNS TABLE(
     interaction_description TEXT
 ) AS $$
 BEGIN
-    -- This is a simplified example - in practice, you'd have a comprehensive drug interaction database
     RETURN QUERY
-    SELECT 
-        'MODERATE'::VARCHAR as interaction_severity,
-        m.medication_name as interacting_medication,
-        'Potential interaction detected - consult pharmacist'::TEXT as interaction_description
+    WITH incoming AS (
+        SELECT r.ingredient_id FROM resolve_drug_ingredients(new_medication) r
+    )
+    SELECT DISTINCT
+        di.severity,
+        m.medication_name::VARCHAR,
+        di.description
     FROM medications m
+    CROSS JOIN LATERAL resolve_drug_ingredients(m.medication_name || ' ' || COALESCE(m.generic_name, '')) existing
+    CROSS JOIN incoming
+    JOIN drug_interactions di
+      ON di.ingredient_a = LEAST(existing.ingredient_id, incoming.ingredient_id)
+     AND di.ingredient_b = GREATEST(existing.ingredient_id, incoming.ingredient_id)
     WHERE m.patient_id = patient_uuid
-      AND m.medication_status = 'Active'
-      AND (
-          (LOWER(m.medication_name) LIKE '%warfarin%' AND LOWER(new_medication) LIKE '%aspirin%') OR
-          (LOWER(m.medication_name) LIKE '%aspirin%' AND LOWER(new_medication) LIKE '%warfarin%') OR
-          (LOWER(m.medication_name) LIKE '%metformin%' AND LOWER(new_medication) LIKE '%contrast%')
-      );
+      AND m.medication_status = 'Active';
 END;
 $$ LANGUAGE plpgsql;
 
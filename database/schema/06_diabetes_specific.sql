@@ -79,6 +79,51 @@ CREATE TABLE cgm_readings (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Compact CGM storage: one row per patient-day on a 5-minute UTC grid (288 slots)
+-- Encoded/decoded by agent/cgm_codec.py; ~0.5 KB per day versus ~40 KB as cgm_readings rows
+-- Written nightly for completed days by scripts/build_cgm_daily_series.py; the current day is read raw
+CREATE TABLE cgm_daily_series (
+    patient_id UUID NOT NULL REFERENCES patients(patient_id),
+    series_date DATE NOT NULL,
+    
+    -- Encoding
+    codec_version SMALLINT NOT NULL DEFAULT 1,
+    grid_minutes SMALLINT NOT NULL DEFAULT 5,
+    valid_count SMALLINT NOT NULL CHECK (valid_count BETWEEN 0 AND 288),
+    validity_bitmap BYTEA NOT NULL, -- 1 bit per slot, 36 bytes
+    glucose_deltas BYTEA NOT NULL, -- zigzag varint deltas of valid readings (mg/dL)
+    trend_codes BYTEA, -- 1 byte per valid reading, 0 = no trend
+    
+    -- Device Information
+    device_type TEXT,
+    
+    -- Day summary for filtering without decoding
+    min_glucose SMALLINT,
+    max_glucose SMALLINT,
+    mean_glucose DECIMAL(5,1),
+    
+    -- System fields
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (patient_id, series_date)
+);
+
+-- Streaming CGM alert evaluator checkpoint (one row per patient)
+CREATE TABLE cgm_alert_state (
+    patient_id UUID PRIMARY KEY REFERENCES patients(patient_id),
+    
+    -- Rolling trend/alert state serialized by the alert engine
+    engine_state JSONB NOT NULL,
+    
+    -- Ingestion watermark: last (created_at, reading_timestamp) evaluated
+    watermark_created_at TIMESTAMP WITH TIME ZONE,
+    watermark_reading_at TIMESTAMP WITH TIME ZONE,
+    
+    -- System fields
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Insulin Administration Records
 CREATE TABLE insulin_administrations (
     administration_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -306,6 +351,8 @@ CREATE TRIGGER update_carb_intake_modtime BEFORE UPDATE ON carb_intake FOR EACH
 CREATE TRIGGER update_diabetes_lab_results_modtime BEFORE UPDATE ON diabetes_lab_results FOR EACH ROW EXECUTE FUNCTION update_modified_column();
 CREATE TRIGGER update_diabetes_complications_modtime BEFORE UPDATE ON diabetes_complications FOR EACH ROW EXECUTE FUNCTION update_modified_column();
 CREATE TRIGGER update_diabetes_education_modtime BEFORE UPDATE ON diabetes_education FOR EACH ROW EXECUTE FUNCTION update_modified_column();
+CREATE TRIGGER update_cgm_daily_series_modtime BEFORE UPDATE ON cgm_daily_series FOR EACH ROW EXECUTE FUNCTION update_modified_column();
+CREATE TRIGGER update_cgm_alert_state_modtime BEFORE UPDATE ON cgm_alert_state FOR EACH ROW EXECUTE FUNCTION update_modified_column();
 
 -- Indexes for performance
 CREATE INDEX idx_glucose_readings_patient ON blood_glucose_readings(patient_id);
@@ -316,6 +363,12 @@ CREATE INDEX idx_glucose_readings_value ON blood_glucose_readings(glucose_value)
 CREATE INDEX idx_cgm_readings_patient ON cgm_readings(patient_id);
 CREATE INDEX idx_cgm_readings_timestamp ON cgm_readings(reading_timestamp);
 CREATE INDEX idx_cgm_readings_device ON cgm_readings(device_type);
+-- Per-patient time range scans for glucose analytics
+CREATE INDEX idx_cgm_readings_patient_time ON cgm_readings(patient_id, reading_timestamp);
+-- Incremental alert evaluation scans readings by ingestion order
+CREATE INDEX idx_cgm_readings_patient_ingest ON cgm_readings(patient_id, created_at, reading_timestamp);
+-- The scheduled alert sweep finds recently ingested readings across all patients
+CREATE INDEX idx_cgm_readings_created ON cgm_readings USING BRIN (created_at);
 
 CREATE INDEX idx_insulin_admin_patient ON insulin_administrations(patient_id);
 CREATE INDEX idx_insulin_admin_date ON insulin_administrations(administration_date);
@@ -329,6 +382,8 @@ CREATE INDEX idx_diabetes_labs_patient ON diabetes_lab_results(patient_id);
 CREATE INDEX idx_diabetes_labs_date ON diabetes_lab_results(test_date);
 CREATE INDEX idx_diabetes_labs_type ON diabetes_lab_results(test_type);
 CREATE INDEX idx_diabetes_labs_hba1c ON diabetes_lab_results(hba1c_percentage);
+-- Latest HbA1c per patient
+CREATE INDEX idx_diabetes_labs_latest_hba1c ON diabetes_lab_results(patient_id, test_date DESC) WHERE hba1c_percentage IS NOT NULL;
 
 CREATE INDEX idx_complications_patient ON diabetes_complications(patient_id);
 CREATE INDEX idx_complications_type ON diabetes_complications(complication_type);
@@ -0,0 +1,67 @@
+-- Vector Retrieval Tables
+-- Knowledge base chunk embeddings (pgvector) as an in-database alternative to the OpenSearch KB
+
+CREATE EXTENSION IF NOT EXISTS "vector";
+
+-- Knowledge base chunks; embeddings from amazon.titan-embed-text-v2:0 (1024 dimensions, normalized)
+CREATE TABLE kb_chunks (
+    chunk_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    kb_name VARCHAR(100) NOT NULL,
+
+    -- Source
+    source_uri TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+
+    -- Content
+    content TEXT NOT NULL,
+    content_hash VARCHAR(64) NOT NULL, -- SHA-256 of content; unchanged chunks are not re-embedded
+    metadata JSONB DEFAULT '{}'::jsonb,
+    embedding vector(1024) NOT NULL,
+
+    -- Lexical pass of hybrid retrieval (mixed letter/digit tokens such as AREDS2 or HbA1c are not stemmed)
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+
+    -- System fields
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+
+    UNIQUE (kb_name, source_uri, chunk_index)
+);
+
+-- Patient document chunks, so personal records and KB content can be ranked in one query
+CREATE TABLE clinical_document_chunks (
+    document_id UUID NOT NULL REFERENCES clinical_documents(document_id) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    patient_id UUID NOT NULL REFERENCES patients(patient_id),
+
+    content TEXT NOT NULL,
+    content_hash VARCHAR(64) NOT NULL,
+    embedding vector(1024) NOT NULL,
+
+    -- System fields
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (document_id, chunk_index)
+);
+
+-- Create triggers for updated_at timestamps
+CREATE TRIGGER update_kb_chunks_modtime BEFORE UPDATE ON kb_chunks FOR EACH ROW EXECUTE FUNCTION update_modified_column();
+CREATE TRIGGER update_clinical_document_chunks_modtime BEFORE UPDATE ON clinical_document_chunks FOR EACH ROW EXECUTE FUNCTION update_modified_column();
+
+-- Indexes for performance
+-- Approximate nearest neighbour over the whole KB (cosine distance, <=> operator)
+CREATE INDEX idx_kb_chunks_embedding_hnsw ON kb_chunks USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+-- kb_name and domain are applied to the HNSW output, so with a single ef_search (40)
+-- candidate list a minority KB or domain could return fewer rows than requested.
+-- Iterative scans (pgvector >= 0.8) keep walking the graph until enough rows pass
+-- the filter; relaxed_order is safe because vector_search_kb re-ranks by distance.
+DO $$
+BEGIN
+    EXECUTE format('ALTER DATABASE %I SET hnsw.iterative_scan = relaxed_order', current_database());
+END
+$$;
+CREATE INDEX idx_kb_chunks_source ON kb_chunks(kb_name, source_uri);
+CREATE INDEX idx_kb_chunks_fts ON kb_chunks USING GIN (kb_name, content_tsv);
+-- A patient's chunks are few; exact search after the patient_id filter beats an ANN index
+CREATE INDEX idx_clinical_document_chunks_patient ON clinical_document_chunks(patient_id);
@@ -1,7 +1,10 @@
+import os
 import time
 import boto3
 import logging
 from utils.knowledge_base import BedrockKnowledgeBase
+from utils.ingestion_controller import wait_until
+from utils.orchestration import load_state
 
 # Setup logging
 logging.basicConfig(
@@ -14,6 +17,10 @@ logger = logging.getLogger(__name__)
 knowledge_base_name = "diabetes-agent-kb"
 knowledge_base_description = "Diabetes Agent Knowledge Base for medical information"
 s3_bucket_name = 'mihc-diabetes-kb'
+# NONE when the bucket holds pre-chunked output of prepare_corpus.py (one chunk per file)
+chunking_strategy = os.environ.get("KB_CHUNKING_STRATEGY", "FIXED_SIZE")
+# Setup progress; an interrupted run resumes from here with the same resource suffix
+setup_state_path = f".kb-setup-{knowledge_base_name}.json"
 
 # Web scrape URLs for additional data sources
 WEB_SCRAPE_URLS = [
@@ -158,10 +165,14 @@ def main():
     else:
         print(f"✗ Knowledge base does not exist. Creating new one...")
         
-        # Generate suffix for unique resource names
-        current_time = time.time()
-        timestamp_str = time.strftime("%Y%m%d%H%M%S", time.localtime(current_time))[-7:]
-        suffix = f"{timestamp_str}"
+        # Generate suffix for unique resource names, reusing the one of an interrupted setup
+        suffix = load_state(setup_state_path)['context'].get('suffix')
+        if suffix:
+            print(f"Resuming interrupted setup (suffix {suffix}) from {setup_state_path}")
+        else:
+            current_time = time.time()
+            timestamp_str = time.strftime("%Y%m%d%H%M%S", time.localtime(current_time))[-7:]
+            suffix = f"{timestamp_str}"
         
         # Create Knowledge Base
         print("\nCreating Knowledge Base...")
@@ -169,13 +180,20 @@ def main():
             kb_name=knowledge_base_name,
             kb_description=knowledge_base_description,
             s3_bucket_name=s3_bucket_name,
-            chunking_strategy="FIXED_SIZE",
-            suffix=suffix
+            chunking_strategy=chunking_strategy,
+            suffix=suffix,
+            setup_state_path=setup_state_path
         )
         
-        # Wait for resources to be ready
+        # Wait for the Knowledge Base to finish creating
         print("\nWaiting for resources to be ready...")
-        time.sleep(60)
+        wait_until(
+            lambda: knowledge_base.bedrock_agent_client.get_knowledge_base(
+                knowledgeBaseId=knowledge_base.get_knowledge_base_id()
+            )['knowledgeBase']['status'] == 'ACTIVE',
+            timeout=600,
+            description=f"knowledge base {knowledge_base_name}"
+        )
         
         # Start data ingestion for S3 data source
         print("\nStarting data ingestion for S3 data source...")
@@ -191,10 +209,6 @@ def main():
         saved_kb_id = knowledge_base.get_kb_id_from_parameter_store()
         if saved_kb_id == kb_id:
             print("  ✓ Knowledge Base ID saved to Parameter Store")
-        
-        # Wait a bit before adding web scrape source
-        print("\nWaiting before adding web scrape data source...")
-        time.sleep(30)
     
     # Add web scrape data source
     print("\n" + "="*70)
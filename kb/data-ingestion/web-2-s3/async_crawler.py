@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Concurrent HTTP fetching for the weekly scraper
+Pooled httpx connections, bounded concurrency, a token-bucket politeness limit
+per host and retry with jittered exponential backoff
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Politeness budget per host: sustained requests per second and burst size
+REQUESTS_PER_SECOND = 1.0
+BURST = 3
+
+# Requests in flight across all hosts
+MAX_CONCURRENCY = 8
+
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+REQUEST_TIMEOUT = 15.0
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, at most `capacity` saved up"""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait for one token; waiters are served in arrival order"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Spend the next `seconds` of budget, e.g. when the host sends Retry-After"""
+        now = time.monotonic()
+        self.tokens = min(0, self.tokens + (now - self.updated) * self.rate) - seconds * self.rate
+        self.updated = now
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncCrawler:
+    """
+    Shared HTTP client for one crawl; use as `async with AsyncCrawler() as crawler`
+
+    Every request takes a token from its host's bucket, so the run time of a crawl
+    against one host is bounded by requests / REQUESTS_PER_SECOND rather than by
+    serial latency.
+    """
+    def __init__(self, requests_per_second: float = REQUESTS_PER_SECOND, burst: float = BURST,
+                 max_concurrency: int = MAX_CONCURRENCY, max_attempts: int = MAX_ATTEMPTS,
+                 timeout: float = REQUEST_TIMEOUT):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.requests_sent = 0
+        self.client = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+        return self.buckets[host]
+
+    async def get(self, url: str, params: Optional[dict] = None,
+                  headers: Optional[dict] = None) -> httpx.Response:
+        """
+        GET with politeness limit and retries; raises httpx.HTTPError once attempts are exhausted
+        Retries transport errors and RETRY_STATUS_CODES (honouring Retry-After); other
+        responses are returned as they are
+        """
+        bucket = self.bucket(url)
+        for attempt in range(self.max_attempts):
+            await bucket.acquire()
+            try:
+                async with self._semaphore:
+                    self.requests_sent += 1
+                    response = await self.client.get(url, params=params, headers=headers)
+            except httpx.TransportError:
+                if attempt == self.max_attempts - 1:
+                    raise
+                delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt + 1)))
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_attempts - 1:
+                    return response
+                retry_after = _retry_after(response)
+                if retry_after is not None:
+                    # The whole host is throttled, not just this URL
+                    bucket.pause(min(retry_after, RETRY_MAX_DELAY))
+                    delay = 0
+                else:
+                    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt + 1)))
+            print(f"Retrying {url} (attempt {attempt + 2}/{self.max_attempts})")
+            await asyncio.sleep(delay)
@@ -46,7 +46,8 @@ def create_lambda_deployment_package():
         # Files to include in the package
         files_to_include = [
             'lambda_diabetes_scraper.py',
-            'diabetes_scraper_scheduler_lambda.py'
+            'diabetes_scraper_scheduler_lambda.py',
+            'async_crawler.py'
         ]
         
         # Create zip file
@@ -2,33 +2,79 @@
 """
 Lambda-compatible Weekly Diabetes WebMD Scraper with Incremental Updates
 Tracks existing content and only scrapes new/updated articles
+Pages are fetched concurrently (async_crawler.py) within a per-host politeness budget
+Known articles are revalidated with conditional GETs (ETag / Last-Modified), so an
+unchanged page costs a 304 with no body
 """
 
+import asyncio
 import json
 import boto3
 import requests
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Set, Optional
 from urllib.parse import urlparse
 import hashlib
 import time
 import os
 from bs4 import BeautifulSoup
+from async_crawler import AsyncCrawler, HEADERS, REQUESTS_PER_SECOND, MAX_CONCURRENCY
+
+SEARCH_URL = "https://www.webmd.com/search/search_results/default.aspx"
+
+# Known articles checked more recently than this are not revalidated again
+REVALIDATE_AFTER = timedelta(hours=24)
+
+
 class ContentTracker:
-    """Model for tracking scraped content"""
-    def __init__(self, url_hashes=None, content_hashes=None, last_run=None, total_documents=0):
+    """Model for tracking scraped content
+    url_records maps a URL hash to {url, etag, last_modified, content_hash, last_checked, s3_key};
+    trackers written before records existed only have the hash sets
+    """
+    def __init__(self, url_hashes=None, content_hashes=None, last_run=None, total_documents=0, url_records=None):
         self.url_hashes = url_hashes or set()
         self.content_hashes = content_hashes or set()
         self.last_run = last_run
         self.total_documents = total_documents
+        self.url_records = url_records or {}
     
     def dict(self):
         return {
             'url_hashes': self.url_hashes,
             'content_hashes': self.content_hashes,
             'last_run': self.last_run,
-            'total_documents': self.total_documents
+            'total_documents': self.total_documents,
+            'url_records': self.url_records
         }
+    
+    def record_check(self, url: str, validators: Dict[str, Optional[str]], content_hash: Optional[str] = None,
+                     s3_key: Optional[str] = None):
+        """Store the validators of a fetch or revalidation; missing values keep the previous ones"""
+        record = self.url_records.setdefault(get_url_hash(url), {'url': url})
+        for key, value in dict(validators, content_hash=content_hash, s3_key=s3_key).items():
+            if value:
+                record[key] = value
+        record['last_checked'] = datetime.now().isoformat()
+    
+    def request_headers(self, url: str, force_update: bool = False) -> Optional[Dict[str, str]]:
+        """
+        Headers to fetch url with, or None to leave it alone
+        New URLs, legacy entries without a record and forced updates get a plain GET; known URLs
+        get a conditional GET once REVALIDATE_AFTER has passed since their last check
+        """
+        url_hash = get_url_hash(url)
+        record = self.url_records.get(url_hash)
+        if force_update or url_hash not in self.url_hashes or record is None:
+            return {}
+        last_checked = record.get('last_checked')
+        if last_checked and datetime.now() - datetime.fromisoformat(last_checked) < REVALIDATE_AFTER:
+            return None
+        headers = {}
+        if record.get('etag'):
+            headers['If-None-Match'] = record['etag']
+        if record.get('last_modified'):
+            headers['If-Modified-Since'] = record['last_modified']
+        return headers
 
 
 class IncrementalScrapingResult:
@@ -60,128 +106,200 @@ class IncrementalScrapingResult:
 s3_client = boto3.client('s3')
 
 
-def search_webmd_diabetes(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
-    """Search WebMD for diabetes-related content"""
-    
-    search_url = "https://www.webmd.com/search/search_results/default.aspx"
-    params = {
+def search_params(query: str) -> Dict[str, str]:
+    """Query string of a WebMD search"""
+    return {
         'query': f"{query} diabetes",
         'sourceType': 'undefined'
     }
+
+
+def parse_search_results(html: bytes, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+    """Diabetes article links from a WebMD search results page"""
+    soup = BeautifulSoup(html, 'html.parser')
+    results = []
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    # Find search result links
+    search_results = soup.find_all('a', class_='search-result-link') or soup.find_all('a', href=True)
+    
+    for link in search_results[:max_results]:
+        href = link.get('href', '')
+        if href and 'webmd.com' in href and '/diabetes' in href.lower():
+            title = link.get_text(strip=True) or 'No title'
+            
+            # Make URL absolute
+            if href.startswith('/'):
+                href = f"https://www.webmd.com{href}"
+            
+            results.append({
+                'title': title,
+                'url': href,
+                'source': 'WebMD',
+                'search_query': query
+            })
     
+    return results
+
+
+def search_webmd_diabetes(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+    """Search WebMD for diabetes-related content"""
     try:
-        response = requests.get(search_url, params=params, headers=headers, timeout=10)
+        response = requests.get(SEARCH_URL, params=search_params(query), headers=HEADERS, timeout=10)
         response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        results = []
-        
-        # Find search result links
-        search_results = soup.find_all('a', class_='search-result-link') or soup.find_all('a', href=True)
-        
-        for link in search_results[:max_results]:
-            href = link.get('href', '')
-            if href and 'webmd.com' in href and '/diabetes' in href.lower():
-                title = link.get_text(strip=True) or 'No title'
-                
-                # Make URL absolute
-                if href.startswith('/'):
-                    href = f"https://www.webmd.com{href}"
-                
-                results.append({
-                    'title': title,
-                    'url': href,
-                    'source': 'WebMD',
-                    'search_query': query
-                })
-        
-        return results
+        return parse_search_results(response.content, query, max_results)
         
     except Exception as e:
         print(f"Error searching WebMD for '{query}': {str(e)}")
         return []
 
 
+def scrape_error(url: str, error: Exception) -> Dict[str, Any]:
+    """Record returned for an article that could not be scraped"""
+    return {
+        'title': 'Error',
+        'content': f"Failed to scrape: {str(error)}",
+        'url': url,
+        'scraped_at': datetime.now().isoformat(),
+        'source': 'WebMD',
+        'error': str(error)
+    }
+
+
 def scrape_webmd_article(url: str) -> Dict[str, Any]:
     """Scrape content from a WebMD article"""
+    try:
+        response = requests.get(url, headers=HEADERS, timeout=15)
+        response.raise_for_status()
+        return parse_webmd_article(response.content, url)
+        
+    except Exception as e:
+        print(f"Error scraping {url}: {str(e)}")
+        return scrape_error(url, e)
+
+
+def parse_webmd_article(html: bytes, url: str) -> Dict[str, Any]:
+    """Article record (title, text, markup, published date) from a WebMD article page"""
+    soup = BeautifulSoup(html, 'html.parser')
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    # Extract title
+    title = soup.find('h1') or soup.find('title')
+    title_text = title.get_text(strip=True) if title else 'No title'
+    
+    # Extract main content
+    content_selectors = [
+        '.article-content',
+        '.content-body',
+        '.main-content',
+        'article',
+        '.article-body'
+    ]
+    
+    content_text = ""
+    content_html = ""
+    for selector in content_selectors:
+        content_div = soup.select_one(selector)
+        if content_div:
+            # Remove script and style elements
+            for script in content_div(["script", "style"]):
+                script.decompose()
+            content_text = content_div.get_text(strip=True)
+            # Markup keeps the headings/lists/tables that kb/preprocess_corpus.py turns into Markdown
+            content_html = str(content_div)
+            break
+    
+    if not content_text:
+        # Fallback: get all paragraph text
+        paragraphs = soup.find_all('p')
+        content_text = ' '.join([p.get_text(strip=True) for p in paragraphs])
+    
+    # Extract metadata
+    published_date = None
+    date_selectors = [
+        'meta[name="publish-date"]',
+        'meta[property="article:published_time"]',
+        '.publish-date',
+        '.date'
+    ]
     
+    for selector in date_selectors:
+        date_elem = soup.select_one(selector)
+        if date_elem:
+            published_date = date_elem.get('content') or date_elem.get_text(strip=True)
+            break
+    
+    return {
+        'title': title_text,
+        'content': content_text,
+        'html': content_html,
+        'url': url,
+        'published_date': published_date,
+        'scraped_at': datetime.now().isoformat(),
+        'source': 'WebMD',
+        'content_length': len(content_text)
+    }
+
+
+async def search_webmd_diabetes_async(crawler: AsyncCrawler, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+    """search_webmd_diabetes on a shared crawler"""
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        response = await crawler.get(SEARCH_URL, params=search_params(query))
         response.raise_for_status()
+        return parse_search_results(response.content, query, max_results)
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extract title
-        title = soup.find('h1') or soup.find('title')
-        title_text = title.get_text(strip=True) if title else 'No title'
-        
-        # Extract main content
-        content_selectors = [
-            '.article-content',
-            '.content-body',
-            '.main-content',
-            'article',
-            '.article-body'
-        ]
-        
-        content_text = ""
-        for selector in content_selectors:
-            content_div = soup.select_one(selector)
-            if content_div:
-                # Remove script and style elements
-                for script in content_div(["script", "style"]):
-                    script.decompose()
-                content_text = content_div.get_text(strip=True)
-                break
-        
-        if not content_text:
-            # Fallback: get all paragraph text
-            paragraphs = soup.find_all('p')
-            content_text = ' '.join([p.get_text(strip=True) for p in paragraphs])
-        
-        # Extract metadata
-        published_date = None
-        date_selectors = [
-            'meta[name="publish-date"]',
-            'meta[property="article:published_time"]',
-            '.publish-date',
-            '.date'
-        ]
-        
-        for selector in date_selectors:
-            date_elem = soup.select_one(selector)
-            if date_elem:
-                published_date = date_elem.get('content') or date_elem.get_text(strip=True)
-                break
-        
-        return {
-            'title': title_text,
-            'content': content_text,
-            'url': url,
-            'published_date': published_date,
-            'scraped_at': datetime.now().isoformat(),
-            'source': 'WebMD',
-            'content_length': len(content_text)
-        }
+    except Exception as e:
+        print(f"Error searching WebMD for '{query}': {str(e)}")
+        return []
+
+
+async def scrape_webmd_article_async(crawler: AsyncCrawler, url: str,
+                                     headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    scrape_webmd_article on a shared crawler, conditional when headers carry validators
+    Returns {'article': record or None for a 304, 'validators': {etag, last_modified}}
+    """
+    try:
+        response = await crawler.get(url, headers=headers)
+        validators = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+        if response.status_code == 304:
+            return {'article': None, 'validators': validators}
+        response.raise_for_status()
+        return {'article': parse_webmd_article(response.content, url), 'validators': validators}
         
     except Exception as e:
         print(f"Error scraping {url}: {str(e)}")
-        return {
-            'title': 'Error',
-            'content': f"Failed to scrape: {str(e)}",
-            'url': url,
-            'scraped_at': datetime.now().isoformat(),
-            'source': 'WebMD',
-            'error': str(e)
-        }
+        return {'article': scrape_error(url, e), 'validators': {}}
+
+
+async def crawl_webmd(
+    search_queries: List[str],
+    max_results_per_query: int,
+    request_headers,
+    requests_per_second: float = REQUESTS_PER_SECOND,
+    max_concurrency: int = MAX_CONCURRENCY
+):
+    """
+    Run all searches, then fetch every unique article for which request_headers(url) is not None
+    Returns (unique articles by URL in discovery order, scrape_webmd_article_async results by URL)
+    """
+    start = time.monotonic()
+    async with AsyncCrawler(requests_per_second=requests_per_second, max_concurrency=max_concurrency) as crawler:
+        searches = await asyncio.gather(*(
+            search_webmd_diabetes_async(crawler, query, max_results_per_query) for query in search_queries
+        ))
+        
+        # Remove duplicates based on URL
+        unique_articles = {}
+        for articles in searches:
+            for article in articles:
+                unique_articles[article['url']] = article
+        
+        headers = {url: request_headers(url) for url in unique_articles}
+        urls = [url for url in unique_articles if headers[url] is not None]
+        pages = await asyncio.gather(*(scrape_webmd_article_async(crawler, url, headers[url]) for url in urls))
+    
+    print(f"Sent {crawler.requests_sent} requests in {time.monotonic() - start:.1f}s "
+          f"({requests_per_second} requests/s per host, {max_concurrency} concurrent)")
+    return unique_articles, dict(zip(urls, pages))
 
 
 def get_content_hash(content: str) -> str:
@@ -209,7 +327,8 @@ def load_content_tracker(bucket_name: str, tracker_key: str = "diabetes-scraper/
             url_hashes=set(tracker_data.get('url_hashes', [])),
             content_hashes=set(tracker_data.get('content_hashes', [])),
             last_run=tracker_data.get('last_run'),
-            total_documents=tracker_data.get('total_documents', 0)
+            total_documents=tracker_data.get('total_documents', 0),
+            url_records=tracker_data.get('url_records', {})
         )
         
     except s3_client.exceptions.NoSuchKey:
@@ -251,7 +370,9 @@ def incremental_scrape_diabetes_webmd(
     search_queries: List[str],
     max_results_per_query: int = 10,
     s3_prefix: str = "diabetes-webmd-weekly",
-    force_update: bool = False
+    force_update: bool = False,
+    requests_per_second: float = REQUESTS_PER_SECOND,
+    max_concurrency: int = MAX_CONCURRENCY
 ) -> IncrementalScrapingResult:
     """Perform incremental scraping of diabetes content from WebMD"""
     
@@ -273,35 +394,37 @@ def incremental_scrape_diabetes_webmd(
     result.next_run_scheduled = (datetime.now() + timedelta(days=7)).isoformat()
     
     try:
-        # Search for articles
-        all_articles = []
-        for query in search_queries:
-            print(f"Searching for: {query}")
-            articles = search_webmd_diabetes(query, max_results_per_query)
-            all_articles.extend(articles)
-            time.sleep(1)  # Be respectful to the server
-        
-        # Remove duplicates based on URL
-        unique_articles = {}
-        for article in all_articles:
-            unique_articles[article['url']] = article
+        # Search and scrape concurrently; known URLs are revalidated with conditional GETs
+        unique_articles, fetched = asyncio.run(crawl_webmd(
+            search_queries,
+            max_results_per_query,
+            request_headers=lambda url: tracker.request_headers(url, force_update),
+            requests_per_second=requests_per_second,
+            max_concurrency=max_concurrency
+        ))
         
         result.new_documents_found = len(unique_articles)
         print(f"Found {len(unique_articles)} unique articles")
         
         # Process each article
+        not_modified = 0
         for url, article_info in unique_articles.items():
             url_hash = get_url_hash(url)
             
-            # Check if we've already processed this URL
-            if url_hash in tracker.url_hashes and not force_update:
+            # Checked recently enough to leave alone
+            if url not in fetched:
                 result.skipped_existing += 1
                 continue
             
-            print(f"Scraping: {url}")
+            scraped_content = fetched[url]['article']
+            validators = fetched[url]['validators']
             
-            # Scrape the article
-            scraped_content = scrape_webmd_article(url)
+            # 304: unchanged since the last fetch, no body transferred
+            if scraped_content is None:
+                tracker.record_check(url, validators)
+                result.skipped_existing += 1
+                not_modified += 1
+                continue
             
             if 'error' in scraped_content:
                 result.errors.append(f"Failed to scrape {url}: {scraped_content['error']}")
@@ -311,6 +434,13 @@ def incremental_scrape_diabetes_webmd(
             content_hash = get_content_hash(scraped_content['content'])
             is_new_content = content_hash not in tracker.content_hashes
             
+            if not (is_new_content or force_update):
+                # Refetched (no validators, or the server ignored them) but the text is unchanged
+                tracker.record_check(url, validators, content_hash)
+                if url_hash in tracker.url_hashes:
+                    result.skipped_existing += 1
+                continue
+            
             if is_new_content or force_update:
                 # Save to S3
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -332,9 +462,11 @@ def incremental_scrape_diabetes_webmd(
                         result.s3_objects_created.append(s3_key)
                     
                     # Update tracker
+                    previous_key = tracker.url_records.get(url_hash, {}).get('s3_key')
                     tracker.url_hashes.add(url_hash)
                     tracker.content_hashes.add(content_hash)
                     tracker.total_documents += 1
+                    tracker.record_check(url, validators, content_hash, s3_key)
                     
                     print(f"Saved to S3: {s3_key}")
                     
@@ -342,8 +474,17 @@ def incremental_scrape_diabetes_webmd(
                     error_msg = f"Failed to save {url} to S3: {str(e)}"
                     result.errors.append(error_msg)
                     print(f"Error: {error_msg}")
-            
-            time.sleep(2)  # Be respectful to the server
+                    continue
+                
+                # The new object supersedes the old version, which would otherwise stay in the KB
+                if previous_key and previous_key != s3_key:
+                    try:
+                        s3_client.delete_object(Bucket=bucket_name, Key=previous_key)
+                        print(f"Deleted superseded S3 object: {previous_key}")
+                    except Exception as e:
+                        error_msg = f"Failed to delete superseded {previous_key}: {str(e)}"
+                        result.errors.append(error_msg)
+                        print(f"Error: {error_msg}")
         
         # Update tracker with current run time
         tracker.last_run = datetime.now().isoformat()
@@ -354,7 +495,7 @@ def incremental_scrape_diabetes_webmd(
         print(f"Scraping completed:")
         print(f"  New documents: {result.new_documents_scraped}")
         print(f"  Updated documents: {result.updated_documents}")
-        print(f"  Skipped existing: {result.skipped_existing}")
+        print(f"  Skipped existing: {result.skipped_existing} ({not_modified} revalidated as not modified)")
         print(f"  Errors: {len(result.errors)}")
         
         return result
@@ -6,6 +6,7 @@ AWS Lambda function for weekly diabetes scraper
 import json
 import os
 from diabetes_scraper_scheduler_lambda import incremental_scrape_diabetes_webmd
+from async_crawler import REQUESTS_PER_SECOND, MAX_CONCURRENCY
 
 
 def lambda_handler(event, context):
@@ -38,6 +39,11 @@ def lambda_handler(event, context):
         max_results_per_query = event.get('max_results_per_query', 5)  # Reduced for development
         s3_prefix = event.get('s3_prefix', 'diabetes-webmd-weekly')
         force_update = event.get('force_update', False)
+        # Politeness budget per host; run time is roughly pages fetched / requests_per_second
+        requests_per_second = float(event.get('requests_per_second')
+                                    or os.environ.get('SCRAPER_REQUESTS_PER_SECOND', REQUESTS_PER_SECOND))
+        max_concurrency = int(event.get('max_concurrency')
+                              or os.environ.get('SCRAPER_MAX_CONCURRENCY', MAX_CONCURRENCY))
         
         print(f"Starting incremental scrape for bucket: {bucket_name}")
         print(f"Search queries: {len(search_queries)}")
@@ -49,7 +55,9 @@ def lambda_handler(event, context):
             search_queries=search_queries,
             max_results_per_query=max_results_per_query,
             s3_prefix=s3_prefix,
-            force_update=force_update
+            force_update=force_update,
+            requests_per_second=requests_per_second,
+            max_concurrency=max_concurrency
         )
         
         # Prepare response
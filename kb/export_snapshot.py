@@ -0,0 +1,251 @@
+"""
+Export the knowledge base to a compact on-disk snapshot for in-process retrieval
+
+Reads every chunk (text, embedding, source) from the KB's OpenSearch Serverless
+index or from the pgvector kb_chunks table and writes a versioned snapshot:
+
+    <root>/<version>/manifest.json    kb name, model, dimensions, count, checksum, partitions
+    <root>/<version>/embeddings.npy   float16 matrix (count x dimensions), unit rows
+    <root>/<version>/texts.bin        UTF-8 chunk texts back to back
+    <root>/<version>/offsets.npy      int64 byte offsets into texts.bin (count + 1)
+    <root>/<version>/metadata.jsonl   one JSON object per chunk (source uri, domain, ...)
+    <root>/CURRENT                    name of the live version
+
+The root is a local directory or s3://bucket/prefix. CURRENT is written last, so
+readers (agent/local_vector_index.py) only ever see complete snapshots.
+
+Rows are grouped by their domain metadata attribute and the manifest records
+each domain's [start, end) row range, so a domain-filtered search scans only
+that slice of the matrix.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import boto3
+import numpy as np
+
+logging.basicConfig(
+    format='[%(asctime)s] %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"
+SNAPSHOT_FILES = ('manifest.json', 'embeddings.npy', 'texts.bin', 'offsets.npy', 'metadata.jsonl')
+
+# OpenSearch from/size paging stops at index.max_result_window (10,000 by default)
+OPENSEARCH_PAGE_SIZE = 500
+OPENSEARCH_MAX_RESULTS = 10000
+
+
+def read_opensearch_chunks(kb_name):
+    """Yield (text, embedding, metadata) from the Bedrock KB's OpenSearch Serverless index"""
+    from opensearchpy import OpenSearch, RequestsHttpConnection, AWSV4SignerAuth
+    from utils.knowledge_base import BedrockKnowledgeBase
+
+    session = boto3.session.Session()
+    kb_id = BedrockKnowledgeBase.get_kb_id_by_name(kb_name, session.region_name)
+    if not kb_id:
+        raise ValueError(f"No knowledge base ID in Parameter Store for '{kb_name}'")
+
+    storage = boto3.client('bedrock-agent').get_knowledge_base(
+        knowledgeBaseId=kb_id
+    )['knowledgeBase']['storageConfiguration']['opensearchServerlessConfiguration']
+    fields = storage['fieldMapping']
+    collection_id = storage['collectionArn'].split('/')[-1]
+    host = f"{collection_id}.{session.region_name}.aoss.amazonaws.com"
+
+    client = OpenSearch(
+        hosts=[{'host': host, 'port': 443}],
+        http_auth=AWSV4SignerAuth(session.get_credentials(), session.region_name, 'aoss'),
+        use_ssl=True,
+        verify_certs=True,
+        connection_class=RequestsHttpConnection,
+        timeout=300
+    )
+
+    for start in range(0, OPENSEARCH_MAX_RESULTS, OPENSEARCH_PAGE_SIZE):
+        hits = client.search(index=storage['vectorIndexName'], body={
+            'from': start,
+            'size': OPENSEARCH_PAGE_SIZE,
+            'query': {'match_all': {}}
+        })['hits']['hits']
+        for hit in hits:
+            doc = hit['_source']
+            # Custom metadata attributes are stored as top-level fields of the document
+            metadata = {'source_uri': doc.get('x-amz-bedrock-kb-source-uri'), 'domain': doc.get('domain')}
+            raw_metadata = doc.get(fields['metadataField'])
+            if raw_metadata:
+                try:
+                    parsed = json.loads(raw_metadata)
+                    metadata['source_uri'] = metadata['source_uri'] or parsed.get('source')
+                    metadata['domain'] = metadata['domain'] or parsed.get('domain')
+                except (TypeError, ValueError):
+                    pass
+            yield doc[fields['textField']], doc[fields['vectorField']], metadata
+        if len(hits) < OPENSEARCH_PAGE_SIZE:
+            return
+    logger.warning(f"Stopped at {OPENSEARCH_MAX_RESULTS} chunks (OpenSearch result window)")
+
+
+def read_pgvector_chunks(kb_name, cluster_arn, secret_arn, database, page_size=500):
+    """Yield (text, embedding, metadata) from kb_chunks with keyset pagination"""
+    client = boto3.client('rds-data')
+    after_id = None
+    while True:
+        response = client.execute_statement(
+            resourceArn=cluster_arn,
+            secretArn=secret_arn,
+            database=database,
+            sql="""
+                SELECT chunk_id::text AS chunk_id, source_uri, content, metadata::text AS metadata,
+                       embedding::text AS embedding
+                FROM kb_chunks
+                WHERE kb_name = :kb_name
+                  AND (CAST(:after_id AS UUID) IS NULL OR chunk_id > CAST(:after_id AS UUID))
+                ORDER BY chunk_id
+                LIMIT :page_size
+            """,
+            parameters=[
+                {'name': 'kb_name', 'value': {'stringValue': kb_name}},
+                {'name': 'after_id', 'value': {'stringValue': after_id} if after_id else {'isNull': True}},
+                {'name': 'page_size', 'value': {'longValue': page_size}},
+            ],
+            formatRecordsAs='JSON'
+        )
+        rows = json.loads(response.get('formattedRecords') or '[]')
+        for row in rows:
+            metadata = json.loads(row['metadata'] or '{}')
+            metadata['source_uri'] = row['source_uri']
+            yield row['content'], json.loads(row['embedding']), metadata
+        if len(rows) < page_size:
+            return
+        after_id = rows[-1]['chunk_id']
+
+
+def write_snapshot(chunks, directory, kb_name, source):
+    """Write one snapshot version into directory; returns the manifest"""
+    texts, vectors, metadata = [], [], []
+    # Grouped by domain so each domain is one contiguous row range
+    for text, embedding, meta in sorted(chunks, key=lambda chunk: chunk[2].get('domain') or ''):
+        texts.append(text.encode('utf-8'))
+        vectors.append(embedding)
+        metadata.append(meta)
+    if not vectors:
+        raise ValueError("Knowledge base has no chunks to export")
+
+    partitions = {}
+    for row, meta in enumerate(metadata):
+        if meta.get('domain'):
+            partitions.setdefault(meta['domain'], [row, row])[1] = row + 1
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = (matrix / np.where(norms == 0, 1, norms)).astype(np.float16)
+    np.save(os.path.join(directory, 'embeddings.npy'), matrix)
+
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(t) for t in texts])
+    np.save(os.path.join(directory, 'offsets.npy'), offsets)
+    with open(os.path.join(directory, 'texts.bin'), 'wb') as f:
+        for text in texts:
+            f.write(text)
+
+    with open(os.path.join(directory, 'metadata.jsonl'), 'w') as f:
+        for meta in metadata:
+            f.write(json.dumps(meta) + '\n')
+
+    digest = hashlib.sha256()
+    for name in SNAPSHOT_FILES[1:]:
+        with open(os.path.join(directory, name), 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+
+    manifest = {
+        'kb_name': kb_name,
+        'source': source,
+        'embedding_model': EMBEDDING_MODEL_ID,
+        'dimensions': int(matrix.shape[1]),
+        'count': int(matrix.shape[0]),
+        'partitions': partitions,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'sha256': digest.hexdigest()
+    }
+    with open(os.path.join(directory, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def publish_snapshot(local_dir, root, version, keep_versions):
+    """Copy a finished snapshot under root, then point CURRENT at it and prune old versions"""
+    if root.startswith('s3://'):
+        bucket, _, prefix = root[len('s3://'):].partition('/')
+        prefix = prefix.strip('/')
+        key = lambda *parts: '/'.join(p for p in (prefix,) + parts if p)
+        s3 = boto3.client('s3')
+        for name in SNAPSHOT_FILES:
+            s3.upload_file(os.path.join(local_dir, name), bucket, key(version, name))
+        s3.put_object(Bucket=bucket, Key=key('CURRENT'), Body=version.encode('utf-8'))
+
+        listed = s3.list_objects_v2(Bucket=bucket, Prefix=key('') + ('/' if prefix else ''), Delimiter='/')
+        versions = sorted(p['Prefix'].rstrip('/').split('/')[-1] for p in listed.get('CommonPrefixes', []))
+        for old in versions[:-keep_versions]:
+            for name in SNAPSHOT_FILES:
+                s3.delete_object(Bucket=bucket, Key=key(old, name))
+        return f"s3://{bucket}/{key(version)}"
+
+    os.makedirs(root, exist_ok=True)
+    target = os.path.join(root, version)
+    shutil.copytree(local_dir, target)
+    pointer = os.path.join(root, 'CURRENT.tmp')
+    with open(pointer, 'w') as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(root, 'CURRENT'))
+
+    # Readers that still map an old version keep working; the files are unlinked, not truncated
+    versions = sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))
+    for old in versions[:-keep_versions]:
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+    return target
+
+
+def main():
+    """Export the knowledge base to a new snapshot version"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--kb-name', default='diabetes-agent-kb', help='Knowledge base name')
+    parser.add_argument('--source', choices=('opensearch', 'pgvector'), default='opensearch',
+                        help='Where chunks and embeddings are read from')
+    parser.add_argument('--destination', required=True, help='Local directory or s3://bucket/prefix')
+    parser.add_argument('--keep-versions', type=int, default=3, help='Snapshot versions to retain')
+    parser.add_argument('--cluster-arn', default=os.environ.get('DB_CLUSTER_ARN'), help='Aurora cluster ARN (pgvector)')
+    parser.add_argument('--secret-arn', default=os.environ.get('DB_SECRET_ARN'), help='Database secret ARN (pgvector)')
+    parser.add_argument('--database', default='medical_records', help='Database name (pgvector)')
+    args = parser.parse_args()
+
+    if args.source == 'pgvector':
+        if not args.cluster_arn or not args.secret_arn:
+            parser.error('--cluster-arn and --secret-arn are required for --source pgvector')
+        chunks = read_pgvector_chunks(args.kb_name, args.cluster_arn, args.secret_arn, args.database)
+    else:
+        chunks = read_opensearch_chunks(args.kb_name)
+
+    version = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+    staging = tempfile.mkdtemp(prefix='kb-snapshot-')
+    try:
+        manifest = write_snapshot(chunks, staging, args.kb_name, args.source)
+        location = publish_snapshot(staging, args.destination, version, max(1, args.keep_versions))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    size_mb = manifest['count'] * manifest['dimensions'] * 2 / 1e6
+    logger.info(f"✓ Snapshot {version}: {manifest['count']:,} chunks, {size_mb:.1f} MB of embeddings -> {location}")
+
+
+if __name__ == "__main__":
+    main()
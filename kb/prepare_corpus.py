@@ -0,0 +1,136 @@
+"""
+Prepare a pre-chunked, de-duplicated corpus for the knowledge base
+
+Reads source documents (scraper JSON with title/content/url, or .md/.txt such
+as the output of preprocess_corpus.py, with optional sidecars) from a local directory or s3://bucket/prefix, chunks them along their structure
+(utils/chunking.py), drops near-duplicate chunks across the whole corpus
+(utils/dedup.py) and writes one file per chunk with a Bedrock metadata sidecar:
+
+    <destination>/<doc id>/<chunk>.txt
+    <destination>/<doc id>/<chunk>.txt.metadata.json   {"metadataAttributes": {...}}
+
+Metadata attributes: source_uri, title, source, domain, section_path, chunk_index
+(plus the published/scraped dates and language carried by preprocess_corpus.py
+sidecars). The agent's specialist tools filter retrieval on domain.
+Point the KB's S3 data source at the destination with chunking strategy NONE
+(create_kb.py: KB_CHUNKING_STRATEGY=NONE) so each file is ingested as one chunk.
+Unchanged files are not rewritten and files for chunks that no longer exist are
+deleted, so the next ingestion job only processes what changed.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from utils.chunking import chunk_document, DEFAULT_MAX_TOKENS
+from utils.dedup import NearDuplicateFilter, DEFAULT_THRESHOLD
+from utils.corpus_io import read_files, sync_files, METADATA_SUFFIX
+from utils.preprocessing import detect_domain
+
+logging.basicConfig(
+    format='[%(asctime)s] %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+SOURCE_SUFFIXES = ('.json', '.md', '.txt')
+
+
+def _parse_document(name, body, sidecar=None):
+    """(text, attributes) from one source file, or None if it has no usable content"""
+    if name.endswith('.json'):
+        try:
+            doc = json.loads(body)
+        except ValueError:
+            return None
+        if not isinstance(doc, dict) or doc.get('error') or not (doc.get('content') or '').strip():
+            return None
+        return doc['content'], {
+            'source_uri': doc.get('url') or name,
+            'title': doc.get('title') or '',
+            'source': doc.get('source') or '',
+            'published_date': doc.get('published_date') or '',
+            'domain': detect_domain(doc['content'], doc.get('title'), doc.get('url'))
+        }
+    if not body.strip():
+        return None
+    attributes = {'source_uri': name, 'title': os.path.splitext(os.path.basename(name))[0], 'source': ''}
+    # Sidecars written by preprocess_corpus.py carry the original URL, title and source
+    if sidecar:
+        attributes.update((sidecar.get('metadataAttributes') or {}))
+    if not attributes.get('domain'):
+        attributes['domain'] = detect_domain(body, attributes['title'], attributes['source_uri'])
+    return body, attributes
+
+
+def read_documents(location):
+    """Yield (text, attributes) for every source document, in name order"""
+    files = dict(read_files(location, SOURCE_SUFFIXES))
+    for name in sorted(files):
+        if name.endswith(METADATA_SUFFIX):
+            continue
+        sidecar = files.get(name + METADATA_SUFFIX)
+        parsed = _parse_document(
+            f"{location.rstrip('/')}/{name}",
+            files[name].decode('utf-8', errors='ignore'),
+            json.loads(sidecar) if sidecar else None
+        )
+        if parsed:
+            yield parsed
+
+
+def build_chunks(documents, max_tokens=DEFAULT_MAX_TOKENS, threshold=DEFAULT_THRESHOLD):
+    """
+    Structure-chunk every document and drop near-duplicates
+    Returns:
+        (files, stats): files maps relative path -> bytes for chunk texts and sidecars
+    """
+    dedup = NearDuplicateFilter(threshold=threshold)
+    files = {}
+    stats = {'documents': 0, 'chunks': 0, 'duplicates': 0}
+    for text, attributes in documents:
+        stats['documents'] += 1
+        doc_id = hashlib.sha256(attributes['source_uri'].encode('utf-8')).hexdigest()[:16]
+        kept = 0
+        for chunk in chunk_document(text, title=attributes['title'] or None, max_tokens=max_tokens):
+            stats['chunks'] += 1
+            key = f"{doc_id}/{kept:04d}.txt"
+            if dedup.add(key, chunk['content']) is not None:
+                stats['duplicates'] += 1
+                continue
+            section_path = ' > '.join(chunk['section_path'])
+            # The section path is part of the text so it also contributes to the embedding
+            content = f"{section_path}\n\n{chunk['content']}" if section_path else chunk['content']
+            files[key] = content.encode('utf-8')
+            metadata = {k: v for k, v in attributes.items() if v}
+            metadata.update(section_path=section_path, chunk_index=kept)
+            files[key + METADATA_SUFFIX] = json.dumps({'metadataAttributes': metadata}, indent=2).encode('utf-8')
+            kept += 1
+    return files, stats
+
+
+def main():
+    """Chunk, de-duplicate and publish the KB corpus"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--source', required=True, help='Local directory or s3://bucket/prefix of source documents')
+    parser.add_argument('--destination', required=True,
+                        help='Local directory or s3://bucket/prefix for chunk files (the KB data source)')
+    parser.add_argument('--max-tokens', type=int, default=DEFAULT_MAX_TOKENS, help='Token budget per chunk')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Estimated Jaccard similarity above which a chunk is a near-duplicate')
+    args = parser.parse_args()
+
+    if args.destination.rstrip('/') == args.source.rstrip('/'):
+        parser.error('--destination must differ from --source')
+
+    files, stats = build_chunks(read_documents(args.source), args.max_tokens, args.threshold)
+    written, unchanged, deleted = sync_files(files, args.destination)
+    kept = stats['chunks'] - stats['duplicates']
+    logger.info(f"✓ {stats['documents']:,} documents -> {stats['chunks']:,} chunks, "
+                f"{stats['duplicates']:,} near-duplicates dropped ({kept:,} kept)")
+    logger.info(f"✓ {args.destination}: {written:,} files written, {unchanged:,} unchanged, {deleted:,} deleted")
+
+
+if __name__ == "__main__":
+    main()
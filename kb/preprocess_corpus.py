@@ -0,0 +1,135 @@
+"""
+Preprocess scraped pages into clean Markdown for the knowledge base
+
+Reads raw .html/.htm pages and scraper .json records from a local directory or
+s3://bucket/prefix and cleans them on a process pool (utils/preprocessing.py):
+readable structure as Markdown, navigation and page chrome removed, whitespace
+and clinical units normalised, language detected. Paragraphs repeated across
+many pages of the same site (disclaimers, sign-up blurbs) are then removed, and
+each document is written as Markdown with a Bedrock metadata sidecar:
+
+    <destination>/<name>.md
+    <destination>/<name>.md.metadata.json   {"metadataAttributes": {...}}
+
+The output is the input of prepare_corpus.py (chunking and de-duplication), or
+can be ingested directly. Parsing is CPU-bound and documents are independent,
+so throughput scales with --workers.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+from utils.preprocessing import preprocess_document
+from utils.corpus_io import read_files, sync_files, METADATA_SUFFIX
+
+logging.basicConfig(
+    format='[%(asctime)s] %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+INPUT_SUFFIXES = ('.html', '.htm', '.json')
+
+# A paragraph is site boilerplate when it appears in at least this many pages of
+# one host and in at least this share of that host's pages
+BOILERPLATE_MIN_PAGES = 5
+BOILERPLATE_MIN_SHARE = 0.3
+
+# Documents sent to a worker per task; amortises pickling overhead
+POOL_CHUNKSIZE = 16
+
+
+def _paragraph_key(paragraph):
+    return hashlib.sha1(re.sub(r"\W+", ' ', paragraph.lower()).strip().encode('utf-8')).hexdigest()
+
+
+def _is_prose(paragraph):
+    """Headings, lists and tables are structure, not boilerplate candidates"""
+    return not re.match(r"^(#|\||\s*(?:-|\d+\.)\s)", paragraph)
+
+
+def strip_repeated_paragraphs(documents):
+    """Remove prose paragraphs repeated across a host's pages; returns paragraphs removed"""
+    by_host = defaultdict(list)
+    for doc in documents:
+        by_host[urlparse(doc['metadata']['source_uri']).netloc or 'local'].append(doc)
+
+    removed = 0
+    for pages in by_host.values():
+        counts = Counter()
+        for doc in pages:
+            counts.update({_paragraph_key(p) for p in doc['markdown'].split('\n\n') if _is_prose(p)})
+        limit = max(BOILERPLATE_MIN_PAGES, BOILERPLATE_MIN_SHARE * len(pages))
+        repeated = {key for key, count in counts.items() if count >= limit}
+        if not repeated:
+            continue
+        for doc in pages:
+            paragraphs = doc['markdown'].split('\n\n')
+            kept = [p for p in paragraphs if not _is_prose(p) or _paragraph_key(p) not in repeated]
+            removed += len(paragraphs) - len(kept)
+            doc['markdown'] = '\n\n'.join(kept)
+            doc['metadata']['word_count'] = len(doc['markdown'].split())
+    return removed
+
+
+def main():
+    """Clean scraped pages into Markdown documents with metadata sidecars"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--source', required=True, help='Local directory or s3://bucket/prefix of scraped pages')
+    parser.add_argument('--destination', required=True, help='Local directory or s3://bucket/prefix for Markdown')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--languages', default=None,
+                        help='Comma-separated ISO 639-1 codes to keep (default: keep all, tagged)')
+    args = parser.parse_args()
+
+    if args.destination.rstrip('/') == args.source.rstrip('/'):
+        parser.error('--destination must differ from --source')
+    languages = set(args.languages.split(',')) if args.languages else None
+
+    start = time.perf_counter()
+    names, bodies = [], []
+    for name, body in read_files(args.source, INPUT_SUFFIXES):
+        if not name.endswith(METADATA_SUFFIX):
+            names.append(name)
+            bodies.append(body)
+    logger.info(f"Read {len(names):,} files from {args.source} in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        results = list(pool.map(preprocess_document, names, bodies, chunksize=POOL_CHUNKSIZE))
+    documents = [doc for doc in results if doc]
+    elapsed = time.perf_counter() - start
+    logger.info(f"Cleaned {len(documents):,} documents on {args.workers} workers in {elapsed:.1f} s "
+                f"({len(names) / max(elapsed, 1e-9):,.0f} files/s, {len(names) - len(documents):,} empty or errored)")
+
+    by_language = Counter(doc['metadata']['language'] for doc in documents)
+    if languages:
+        documents = [doc for doc in documents if doc['metadata']['language'] in languages]
+    removed = strip_repeated_paragraphs(documents)
+
+    files = {}
+    for doc in documents:
+        if not doc['markdown'].strip():
+            continue
+        target = os.path.splitext(doc['name'])[0] + '.md'
+        files[target] = doc['markdown'].encode('utf-8')
+        files[target + METADATA_SUFFIX] = json.dumps(
+            {'metadataAttributes': doc['metadata']}, indent=2
+        ).encode('utf-8')
+
+    written, unchanged, deleted = sync_files(files, args.destination)
+    logger.info(f"✓ Languages: {', '.join(f'{code} {count:,}' for code, count in by_language.most_common())}"
+                f"{' (kept ' + ','.join(sorted(languages)) + ')' if languages else ''}")
+    logger.info(f"✓ Removed {removed:,} repeated boilerplate paragraphs")
+    logger.info(f"✓ {args.destination}: {written:,} files written, {unchanged:,} unchanged, {deleted:,} deleted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Incrementally sync a prepared corpus into the knowledge base
+
+Publishes a local document directory (typically prepare_corpus.py output: chunk
+files plus .metadata.json sidecars) to the KB's S3 data source through
+utils/ingestion_controller.py: only new and changed files are uploaded, removed
+ones are deleted, and an ingestion job runs only when something changed. The
+per-document ingestion status is kept in the manifest in S3; documents that
+failed are retried on the next run.
+"""
+
+import argparse
+import logging
+import sys
+import boto3
+from utils.knowledge_base import BedrockKnowledgeBase
+from utils.corpus_io import read_files
+from utils.ingestion_controller import IngestionController, INGESTION_TIMEOUT
+
+logging.basicConfig(
+    format='[%(asctime)s] %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+DOCUMENT_SUFFIXES = ('.txt', '.md', '.html', '.csv', '.pdf', '.doc', '.docx', '.metadata.json')
+
+
+def find_s3_data_source(kb_id):
+    """(data source id, bucket, first inclusion prefix) of the KB's S3 data source"""
+    bedrock_agent = boto3.client('bedrock-agent')
+    sources = bedrock_agent.list_data_sources(knowledgeBaseId=kb_id, maxResults=100)['dataSourceSummaries']
+    for source in sources:
+        details = bedrock_agent.get_data_source(knowledgeBaseId=kb_id, dataSourceId=source['dataSourceId'])
+        config = details['dataSource']['dataSourceConfiguration']
+        if config.get('type') == 'S3':
+            s3_config = config['s3Configuration']
+            prefixes = s3_config.get('inclusionPrefixes') or ['']
+            return source['dataSourceId'], s3_config['bucketArn'].split(':::')[-1], prefixes[0]
+    raise ValueError(f"Knowledge base {kb_id} has no S3 data source")
+
+
+def main():
+    """Upload what changed and ingest it"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--source', required=True, help='Local directory of documents to publish')
+    parser.add_argument('--kb-name', default='diabetes-agent-kb', help='Knowledge base name')
+    parser.add_argument('--prefix', default=None,
+                        help="Key prefix in the data source bucket (default: the data source's inclusion prefix)")
+    parser.add_argument('--manifest-key', default=None,
+                        help='S3 key of the ingestion manifest (default: _ingestion/<data source id>/manifest.json)')
+    parser.add_argument('--timeout', type=int, default=INGESTION_TIMEOUT, help='Seconds to wait for ingestion')
+    args = parser.parse_args()
+
+    kb_id = BedrockKnowledgeBase.get_kb_id_by_name(args.kb_name)
+    if not kb_id:
+        parser.error(f"No knowledge base ID in Parameter Store for '{args.kb_name}'")
+    data_source_id, bucket, prefix = find_s3_data_source(kb_id)
+    if args.prefix is not None:
+        prefix = args.prefix
+
+    files = dict(read_files(args.source, DOCUMENT_SUFFIXES))
+    logger.info(f"{len(files):,} files under {args.source} -> s3://{bucket}/{prefix}")
+
+    controller = IngestionController(kb_id, data_source_id, bucket, prefix, args.manifest_key)
+    result = controller.sync(files, args.timeout)
+
+    job = result['job']
+    if job:
+        stats = job.get('statistics', {})
+        logger.info(f"✓ Ingestion {job['status']}: {stats.get('numberOfNewDocumentsIndexed', 0)} new, "
+                    f"{stats.get('numberOfModifiedDocumentsIndexed', 0)} modified, "
+                    f"{stats.get('numberOfDocumentsDeleted', 0)} deleted, "
+                    f"{stats.get('numberOfDocumentsFailed', 0)} failed")
+    for name in result['failed']:
+        entry = controller.manifest[name]
+        logger.warning(f"✗ {name}: {entry['status']} {entry.get('status_reason') or ''}")
+    if job and job['status'] != 'COMPLETE':
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Behaviour checks for the MinHash near-duplicate filter (utils/dedup.py)
+Run from kb/: python test_dedup.py (or with pytest)
+"""
+
+import numpy as np
+from utils.dedup import MinHasher, NearDuplicateFilter, shingles, _PRIME
+
+BASE = (
+    "Metformin is usually the first medicine prescribed for type 2 diabetes. It lowers the amount of "
+    "glucose released by the liver and helps the body respond better to insulin. Common side effects "
+    "include nausea, diarrhoea and stomach upset, which often settle after a few weeks. Taking the tablet "
+    "with food and starting at a low dose reduces these effects. People with severe kidney disease should "
+    "not take metformin, and it is usually paused before surgery or scans that use contrast dye."
+)
+NEAR_DUPLICATE = BASE.replace("a few weeks", "several weeks")
+UNRELATED = (
+    "Age-related macular degeneration affects the central part of the retina. Dry AMD progresses slowly as "
+    "drusen build up under the macula, while wet AMD is caused by abnormal blood vessels that leak fluid. "
+    "Anti-VEGF injections can stabilise vision in wet AMD, and AREDS2 supplements may slow the dry form. "
+    "An Amsler grid at home helps patients notice distortion early and seek an urgent eye examination."
+)
+
+
+def jaccard(a, b):
+    sa, sb = set(shingles(a).tolist()), set(shingles(b).tolist())
+    return len(sa & sb) / len(sa | sb)
+
+
+def test_signature_estimates_jaccard():
+    """Signature agreement tracks the true shingle Jaccard; a degenerate family would give 0 or 1"""
+    hasher = MinHasher()
+    estimate = np.mean(hasher.signature(BASE) == hasher.signature(NEAR_DUPLICATE))
+    assert abs(estimate - jaccard(BASE, NEAR_DUPLICATE)) < 0.12, estimate
+
+
+def test_signature_slots_are_independent():
+    """Each permutation picks its own minimum shingle, not the same one for every slot"""
+    hasher = MinHasher()
+    hashes = shingles(BASE)
+    permuted = (np.outer(hashes, hasher.a) + hasher.b) % _PRIME
+    assert len(set(permuted.argmin(axis=0).tolist())) > 10
+
+
+def test_near_duplicate_is_caught():
+    dedup = NearDuplicateFilter()
+    assert dedup.add('base', BASE) is None
+    assert dedup.add('copy', NEAR_DUPLICATE) == 'base'
+
+
+def test_unrelated_chunk_is_kept():
+    dedup = NearDuplicateFilter()
+    assert dedup.add('base', BASE) is None
+    assert dedup.add('amd', UNRELATED) is None
+    assert len(dedup) == 2
+
+
+def test_exact_duplicate_is_caught():
+    dedup = NearDuplicateFilter()
+    dedup.add('base', BASE)
+    assert dedup.add('again', BASE.upper()) == 'base'
+
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith('test_'):
+            check()
+            print(f"✓ {name}")
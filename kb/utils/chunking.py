@@ -0,0 +1,168 @@
+"""
+Structure-aware chunking for knowledge base documents
+
+Splits markdown-like text (what the scrapers and kb/prepare_corpus.py produce)
+on its structure instead of fixed token windows:
+
+    headings    "#"-style and underlined headings open a section; every chunk
+                carries its section path ("Diabetes > Type 2 > Treatment")
+    lists       consecutive list items stay together; an oversized list is
+                split between items, never inside one
+    tables      "|"-delimited rows stay together; an oversized table is split
+                between rows and each part repeats the header row
+    paragraphs  packed up to the token budget; an oversized paragraph is split
+                at sentence boundaries
+
+Chunks never cross a section boundary. Token counts are estimated from words
+(English prose averages ~0.75 words per token, as in the FIXED_SIZE config).
+"""
+
+import re
+
+DEFAULT_MAX_TOKENS = 300
+WORDS_PER_TOKEN = 0.75
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+SETEXT_PATTERN = re.compile(r"^(=+|-+)\s*$")
+LIST_ITEM_PATTERN = re.compile(r"^\s*(?:[-*+•]|\d+[.)]|[a-zA-Z][.)])\s+")
+TABLE_ROW_PATTERN = re.compile(r"^\s*\|.*\|\s*$")
+TABLE_RULE_PATTERN = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+
+
+def estimate_tokens(text):
+    return int(len(text.split()) / WORDS_PER_TOKEN)
+
+
+def parse_blocks(text):
+    """
+    Split text into structural blocks
+    Returns:
+        List of (kind, level, text): kind is heading, list, table or paragraph;
+        level is the heading depth (0 for other blocks)
+    """
+    blocks = []
+    lines = text.replace('\r\n', '\n').split('\n')
+    current_kind, current = None, []
+
+    def flush():
+        nonlocal current_kind, current
+        if current:
+            blocks.append((current_kind, 0, '\n'.join(current).strip()))
+        current_kind, current = None, []
+
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            # Blank lines end paragraphs; lists and tables may continue after one
+            if current_kind == 'paragraph':
+                flush()
+            continue
+
+        heading = HEADING_PATTERN.match(stripped)
+        if heading:
+            flush()
+            blocks.append(('heading', len(heading.group(1)), heading.group(2)))
+            continue
+        # Underlined heading: a single text line followed by === or ---
+        if (current_kind == 'paragraph' and len(current) == 1 and SETEXT_PATTERN.match(stripped)
+                and not LIST_ITEM_PATTERN.match(current[0])):
+            title = current[0].strip()
+            current_kind, current = None, []
+            blocks.append(('heading', 1 if stripped[0] == '=' else 2, title))
+            continue
+
+        if TABLE_ROW_PATTERN.match(line) or (current_kind == 'table' and TABLE_RULE_PATTERN.match(line)):
+            kind = 'table'
+        elif LIST_ITEM_PATTERN.match(line):
+            kind = 'list'
+        elif current_kind == 'list' and line[:1].isspace():
+            kind = 'list'  # indented continuation of a list item
+        else:
+            kind = 'paragraph'
+
+        if kind != current_kind:
+            flush()
+            current_kind = kind
+        current.append(line.rstrip())
+    flush()
+    return blocks
+
+
+def _split_oversized(kind, text, max_tokens):
+    """Split one block that alone exceeds max_tokens at its natural boundaries"""
+    if kind == 'table':
+        rows = text.split('\n')
+        header = rows[:2] if len(rows) > 1 and TABLE_RULE_PATTERN.match(rows[1]) else rows[:1]
+        units, prefix = rows[len(header):], header
+    elif kind == 'list':
+        units, prefix = [], []
+        for line in text.split('\n'):
+            if LIST_ITEM_PATTERN.match(line) or not units:
+                units.append(line)
+            else:
+                units[-1] += '\n' + line
+    else:
+        units, prefix = SENTENCE_END.split(text), []
+
+    parts, current = [], []
+    budget = max_tokens - estimate_tokens('\n'.join(prefix))
+    for unit in units:
+        if current and estimate_tokens('\n'.join(current + [unit])) > budget:
+            parts.append('\n'.join(prefix + current))
+            current = []
+        if estimate_tokens(unit) > budget:
+            # A single sentence or row longer than the budget: fall back to word windows
+            words = unit.split()
+            size = max(1, int(budget * WORDS_PER_TOKEN))
+            parts.extend('\n'.join(prefix + [' '.join(words[i:i + size])]) for i in range(0, len(words), size))
+            continue
+        current.append(unit)
+    if current:
+        parts.append('\n'.join(prefix + current))
+    return parts
+
+
+def chunk_document(text, title=None, max_tokens=DEFAULT_MAX_TOKENS):
+    """
+    Chunk a document along its structure
+    Args:
+        text(str): Markdown-like document text
+        title(str): Document title, used as the root of every section path
+        max_tokens(int): Token budget per chunk (estimated)
+    Returns:
+        List of dicts with content, section_path (list of headings) and kinds
+        (block kinds the chunk contains), in document order
+    """
+    chunks = []
+    path = [title] if title else []
+    levels = [0] if title else []
+    pending, kinds = [], []
+
+    def emit():
+        nonlocal pending, kinds
+        if pending:
+            chunks.append({'content': '\n\n'.join(pending), 'section_path': list(path), 'kinds': sorted(set(kinds))})
+        pending, kinds = [], []
+
+    for kind, level, block in parse_blocks(text):
+        if kind == 'heading':
+            emit()
+            # Pop back to the parent of this heading, keeping the document title as the root
+            while levels and levels[-1] >= level and levels[-1] > 0:
+                path.pop()
+                levels.pop()
+            if title and not chunks and not path[1:] and block.strip().lower() == title.strip().lower():
+                continue  # the page's own H1 repeats the title
+            path.append(block)
+            levels.append(level)
+            continue
+
+        pieces = [block] if estimate_tokens(block) <= max_tokens else _split_oversized(kind, block, max_tokens)
+        for piece in pieces:
+            if pending and estimate_tokens('\n\n'.join(pending + [piece])) > max_tokens:
+                emit()
+            pending.append(piece)
+            kinds.append(kind)
+    emit()
+    return chunks
@@ -0,0 +1,94 @@
+"""
+Reading and publishing KB corpus files on a local directory or s3://bucket/prefix
+
+Shared by the ingestion stages (preprocess_corpus.py, prepare_corpus.py). Names
+are paths relative to the location, with '/' separators.
+"""
+
+import hashlib
+import os
+import boto3
+
+METADATA_SUFFIX = '.metadata.json'
+
+
+def split_s3_uri(uri):
+    bucket, _, prefix = uri[len('s3://'):].partition('/')
+    return bucket, prefix.strip('/')
+
+
+def read_files(location, suffixes):
+    """Yield (name, bytes) for files under location ending in one of suffixes, in name order"""
+    if location.startswith('s3://'):
+        bucket, prefix = split_s3_uri(location)
+        base = f"{prefix}/" if prefix else ''
+        s3 = boto3.client('s3')
+        keys = []
+        for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=base):
+            keys.extend(obj['Key'] for obj in page.get('Contents', []))
+        for key in sorted(keys):
+            if key.endswith(suffixes):
+                yield key[len(base):], s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+        return
+
+    names = []
+    for root, _, files in os.walk(location):
+        names.extend(os.path.relpath(os.path.join(root, n), location).replace(os.sep, '/') for n in files)
+    for name in sorted(names):
+        if name.endswith(suffixes):
+            with open(os.path.join(location, *name.split('/')), 'rb') as f:
+                yield name, f.read()
+
+
+def sync_files(files, destination):
+    """
+    Make destination hold exactly files (name -> bytes)
+    Unchanged files are not rewritten and files not in the mapping are deleted.
+    Returns:
+        (written, unchanged, deleted)
+    """
+    written = unchanged = deleted = 0
+    if destination.startswith('s3://'):
+        bucket, prefix = split_s3_uri(destination)
+        base = f"{prefix}/" if prefix else ''
+        s3 = boto3.client('s3')
+        existing = {}
+        for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=base):
+            for obj in page.get('Contents', []):
+                existing[obj['Key'][len(base):]] = obj['ETag'].strip('"')
+        for name, body in files.items():
+            # Single-part uploads have the MD5 of the body as their ETag
+            if existing.get(name) == hashlib.md5(body).hexdigest():
+                unchanged += 1
+                continue
+            if name.endswith(METADATA_SUFFIX):
+                content_type = 'application/json'
+            elif name.endswith('.md'):
+                content_type = 'text/markdown'
+            else:
+                content_type = 'text/plain'
+            s3.put_object(Bucket=bucket, Key=base + name, Body=body, ContentType=content_type)
+            written += 1
+        for name in set(existing) - set(files):
+            s3.delete_object(Bucket=bucket, Key=base + name)
+            deleted += 1
+        return written, unchanged, deleted
+
+    existing = set()
+    for root, _, names in os.walk(destination):
+        existing.update(os.path.relpath(os.path.join(root, n), destination).replace(os.sep, '/') for n in names)
+    for name, body in files.items():
+        path = os.path.join(destination, *name.split('/'))
+        if name in existing:
+            with open(path, 'rb') as f:
+                if f.read() == body:
+                    unchanged += 1
+                    continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+        written += 1
+    for name in existing - set(files):
+        os.remove(os.path.join(destination, *name.split('/')))
+        deleted += 1
+    return written, unchanged, deleted
@@ -0,0 +1,118 @@
+"""
+Near-duplicate detection for knowledge base chunks (MinHash + LSH)
+
+Each chunk is reduced to a set of word shingles and summarised by a MinHash
+signature; the fraction of equal signature slots estimates the Jaccard
+similarity of two shingle sets. Signatures are split into bands for
+locality-sensitive hashing, so only chunks that share a band are compared
+instead of every pair. The first chunk seen wins, so feed sources in order of
+preference.
+"""
+
+import hashlib
+import re
+from collections import defaultdict
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.85
+SHINGLE_WORDS = 5
+NUM_PERMUTATIONS = 128
+# 16 bands x 8 rows: a pair at 0.85 Jaccard shares at least one band >99% of the time
+LSH_BANDS = 16
+
+# Smallest prime above 2^32, the modulus of the universal hash family (a * x + b) mod p
+_PRIME = 4294967311
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """32-bit hashes of the normalised word n-grams of text"""
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        grams = [' '.join(words)] if words else []
+    else:
+        grams = [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.array(
+        sorted({int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=4).digest(), 'little') for g in grams}),
+        dtype=np.uint64
+    )
+
+
+class MinHasher:
+    """MinHash signatures over shingle hashes with a fixed random permutation family"""
+
+    def __init__(self, num_permutations=NUM_PERMUTATIONS, seed=1):
+        rng = np.random.default_rng(seed)
+        # a, b < 2^31 keep a * x + b (x < 2^32) inside uint64; the product wraps p many times
+        self.a = rng.integers(1, 1 << 31, num_permutations, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, num_permutations, dtype=np.uint64)
+
+    def signature(self, text):
+        hashes = shingles(text)
+        if not len(hashes):
+            return np.full(len(self.a), _PRIME, dtype=np.uint64)
+        return ((np.outer(hashes, self.a) + self.b) % _PRIME).min(axis=0)
+
+
+class NearDuplicateFilter:
+    """
+    Streaming near-duplicate filter
+    Args:
+        threshold(float): Estimated Jaccard similarity at or above which a chunk is a duplicate
+        bands(int): LSH bands; must divide num_permutations
+        num_permutations(int): MinHash signature length
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, bands=LSH_BANDS, num_permutations=NUM_PERMUTATIONS):
+        if num_permutations % bands:
+            raise ValueError("num_permutations must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.hasher = MinHasher(num_permutations)
+        self.signatures = []
+        self.keys = []
+        self.buckets = defaultdict(list)
+        self.exact = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _fingerprint(self, text):
+        digest = hashlib.sha256(' '.join(_WORD.findall(text.lower())).encode('utf-8')).hexdigest()
+        signature = self.hasher.signature(text)
+        rows = len(signature) // self.bands
+        band_keys = [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+        return digest, signature, band_keys
+
+    def _match(self, digest, signature, band_keys):
+        if digest in self.exact:
+            return self.keys[self.exact[digest]]
+        candidates = {i for key in band_keys for i in self.buckets.get(key, ())}
+        for i in sorted(candidates):
+            if np.mean(self.signatures[i] == signature) >= self.threshold:
+                return self.keys[i]
+        return None
+
+    def check(self, text):
+        """Key of the kept chunk text duplicates, or None if it is new"""
+        return self._match(*self._fingerprint(text))
+
+    def add(self, key, text):
+        """
+        Keep text under key unless it duplicates a chunk already kept
+        Returns:
+            None if kept, else the key of the chunk it duplicates
+        """
+        digest, signature, band_keys = self._fingerprint(text)
+        duplicate_of = self._match(digest, signature, band_keys)
+        if duplicate_of is not None:
+            return duplicate_of
+
+        index = len(self.keys)
+        for band_key in band_keys:
+            self.buckets[band_key].append(index)
+        self.signatures.append(signature)
+        self.keys.append(key)
+        self.exact[digest] = index
+        return None
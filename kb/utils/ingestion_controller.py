@@ -0,0 +1,247 @@
+"""
+Incremental ingestion for the knowledge base's S3 data source
+
+IngestionController keeps a manifest of the documents it has published
+(content hash, size, per-document ingestion status) next to the data in S3.
+A sync uploads only new or changed files, deletes files that disappeared from
+the corpus, and starts an ingestion job only when something changed, so a
+weekly refresh costs time in proportion to the change set. Documents that the
+last job did not index (failed, or still PENDING because the job failed, was
+stopped or timed out) count as changed and are retried on the next sync. Job completion is
+polled with exponential backoff and full jitter instead of fixed sleeps, and
+the per-document outcome reported by Bedrock is written back to the manifest.
+
+wait_until/backoff_delay are also used by BedrockKnowledgeBase for its
+resource-readiness waits.
+"""
+
+import hashlib
+import json
+import random
+import time
+from datetime import datetime, timezone
+import boto3
+from botocore.exceptions import ClientError
+
+# One manifest per data source, outside its document prefix
+MANIFEST_KEY_TEMPLATE = "_ingestion/{data_source_id}/manifest.json"
+
+# Job and resource polling: 2 s, 4 s, 8 s ... capped at 60 s, each with full jitter
+POLL_BASE_DELAY = 2.0
+POLL_MAX_DELAY = 60.0
+INGESTION_TIMEOUT = 3 * 60 * 60
+
+# GetKnowledgeBaseDocuments accepts at most 10 identifiers per call
+DOCUMENT_STATUS_BATCH = 10
+
+TERMINAL_JOB_STATUSES = ("COMPLETE", "FAILED", "STOPPED")
+FAILED_DOCUMENT_STATUSES = ("FAILED", "PARTIALLY_INDEXED", "METADATA_UPDATE_FAILED")
+# Any other status (PENDING after a failed, stopped or timed-out job, NOT_FOUND, ...) is re-ingested
+INDEXED_DOCUMENT_STATUS = "INDEXED"
+
+# Bedrock metadata sidecars are ingested with their document and have no status of their own
+METADATA_SUFFIX = ".metadata.json"
+
+
+def backoff_delay(attempt, base_delay=POLL_BASE_DELAY, max_delay=POLL_MAX_DELAY):
+    """Full-jitter exponential backoff: uniform in [0, min(max_delay, base * 2^attempt)]"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def wait_until(check, timeout, description="resource", base_delay=POLL_BASE_DELAY, max_delay=POLL_MAX_DELAY):
+    """
+    Poll check() with exponential backoff and jitter until it returns a truthy value
+    Args:
+        check(callable): Returns a truthy result when done, falsy to keep waiting
+        timeout(float): Seconds before giving up
+        description(str): What is being waited for, for progress output
+    Returns:
+        The first truthy result of check()
+    """
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
+        result = check()
+        if result:
+            return result
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Timed out after {timeout:.0f}s waiting for {description}")
+        # Floor at half the base delay so a near-zero draw does not turn into a busy poll
+        delay = min(remaining, max(base_delay / 2, backoff_delay(attempt, base_delay, max_delay)))
+        print(f"Waiting for {description}... next check in {delay:.0f}s")
+        time.sleep(delay)
+        attempt += 1
+
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class IngestionController:
+    """
+    Manifest-based incremental sync of a document set into a KB S3 data source
+    Args:
+        kb_id(str): Knowledge base ID
+        data_source_id(str): S3 data source ID
+        bucket(str): Data source bucket
+        prefix(str): Key prefix the documents live under ('' for the bucket root)
+        manifest_key(str): S3 key of the manifest (default MANIFEST_KEY_TEMPLATE)
+    """
+
+    def __init__(self, kb_id, data_source_id, bucket, prefix="", manifest_key=None, region_name=None):
+        session = boto3.session.Session(region_name=region_name)
+        self.s3_client = session.client('s3')
+        self.bedrock_agent_client = session.client('bedrock-agent')
+        self.kb_id = kb_id
+        self.data_source_id = data_source_id
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.manifest_key = manifest_key or MANIFEST_KEY_TEMPLATE.format(data_source_id=data_source_id)
+        self.manifest = self.load_manifest()
+
+    def _key(self, name):
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def load_manifest(self):
+        """name -> {sha256, size, uploaded_at, status, status_reason, status_at}"""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self.manifest_key)
+            return json.loads(response['Body'].read()).get('documents', {})
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return {}
+            raise
+
+    def save_manifest(self):
+        body = json.dumps({'updated_at': _now(), 'documents': self.manifest}, indent=2, sort_keys=True)
+        self.s3_client.put_object(
+            Bucket=self.bucket, Key=self.manifest_key, Body=body.encode('utf-8'), ContentType='application/json'
+        )
+
+    @staticmethod
+    def _needs_ingestion(name, entry):
+        """True unless the last job indexed the document (sidecars have no status of their own)"""
+        return not name.endswith(METADATA_SUFFIX) and entry.get('status') != INDEXED_DOCUMENT_STATUS
+
+    def plan(self, files):
+        """
+        Compare a document set with the manifest
+        Args:
+            files(dict): name -> bytes, names relative to the prefix
+        Returns:
+            dict with new, changed, removed and unchanged name lists
+        """
+        plan = {'new': [], 'changed': [], 'removed': [], 'unchanged': []}
+        for name, body in files.items():
+            entry = self.manifest.get(name)
+            if entry is None:
+                plan['new'].append(name)
+            elif entry['sha256'] != content_hash(body) or self._needs_ingestion(name, entry):
+                # Failed or never-indexed documents are re-uploaded so the next job retries them
+                plan['changed'].append(name)
+            else:
+                plan['unchanged'].append(name)
+        plan['removed'] = sorted(set(self.manifest) - set(files))
+        return plan
+
+    def apply(self, files, plan):
+        """Upload new/changed files and delete removed ones; the manifest is saved after the writes"""
+        for name in plan['new'] + plan['changed']:
+            body = files[name]
+            self.s3_client.put_object(Bucket=self.bucket, Key=self._key(name), Body=body)
+            self.manifest[name] = {
+                'sha256': content_hash(body), 'size': len(body), 'uploaded_at': _now(),
+                'status': None if name.endswith(METADATA_SUFFIX) else 'PENDING',
+                'status_reason': None, 'status_at': _now()
+            }
+        for name in plan['removed']:
+            self.s3_client.delete_object(Bucket=self.bucket, Key=self._key(name))
+            self.manifest.pop(name, None)
+        self.save_manifest()
+
+    def start_ingestion(self, timeout=INGESTION_TIMEOUT):
+        """Start an ingestion job (after any job already running) and wait for it to finish"""
+        def start():
+            try:
+                return self.bedrock_agent_client.start_ingestion_job(
+                    knowledgeBaseId=self.kb_id, dataSourceId=self.data_source_id
+                )['ingestionJob']
+            except self.bedrock_agent_client.exceptions.ConflictException:
+                return None  # another job is running on this data source
+
+        job = wait_until(start, timeout, "the running ingestion job to finish before starting a new one")
+        print(f"Started ingestion job: {job['ingestionJobId']}")
+
+        def finished():
+            current = self.bedrock_agent_client.get_ingestion_job(
+                knowledgeBaseId=self.kb_id, dataSourceId=self.data_source_id, ingestionJobId=job['ingestionJobId']
+            )['ingestionJob']
+            return current if current['status'] in TERMINAL_JOB_STATUSES else None
+
+        job = wait_until(finished, timeout, f"ingestion job {job['ingestionJobId']}")
+        print(f"Ingestion job completed with status: {job['status']}")
+        if job['status'] == 'FAILED':
+            print(f"Failure reason: {job.get('failureReasons', 'Unknown')}")
+        return job
+
+    def record_document_status(self, names, job):
+        """
+        Store Bedrock's per-document ingestion status for names in the manifest
+        Args:
+            names(list): Documents uploaded for the job
+            job(dict): The finished ingestion job; used as the status when per-document status is unavailable
+        """
+        names = [n for n in names if n in self.manifest and not n.endswith(METADATA_SUFFIX)]
+        get_documents = getattr(self.bedrock_agent_client, 'get_knowledge_base_documents', None)
+        if get_documents is None:
+            print("⚠ Warning: boto3 is too old for per-document status (get_knowledge_base_documents)")
+            # Without per-document status only a complete job marks its documents indexed
+            status = INDEXED_DOCUMENT_STATUS if job['status'] == 'COMPLETE' else 'PENDING'
+            for name in names:
+                self.manifest[name].update(status=status, status_reason=f"job {job['status']}", status_at=_now())
+            self.save_manifest()
+            return
+        by_uri = {f"s3://{self.bucket}/{self._key(n)}": n for n in names}
+        uris = list(by_uri)
+        for start in range(0, len(uris), DOCUMENT_STATUS_BATCH):
+            response = get_documents(
+                knowledgeBaseId=self.kb_id,
+                dataSourceId=self.data_source_id,
+                documentIdentifiers=[{'dataSourceType': 'S3', 's3': {'uri': uri}}
+                                     for uri in uris[start:start + DOCUMENT_STATUS_BATCH]]
+            )
+            for detail in response.get('documentDetails', []):
+                name = by_uri.get(detail['identifier'].get('s3', {}).get('uri'))
+                if name:
+                    self.manifest[name].update(
+                        status=detail['status'], status_reason=detail.get('statusReason'), status_at=_now()
+                    )
+        self.save_manifest()
+
+    def sync(self, files, timeout=INGESTION_TIMEOUT):
+        """
+        Publish a document set and ingest only what changed
+        Args:
+            files(dict): The complete document set, name -> bytes (metadata sidecars included)
+        Returns:
+            dict with the plan counts, the ingestion job (None if nothing changed) and failed documents
+        """
+        plan = self.plan(files)
+        print(f"Manifest diff: {len(plan['new'])} new, {len(plan['changed'])} changed, "
+              f"{len(plan['removed'])} removed, {len(plan['unchanged'])} unchanged")
+        summary = {key: len(names) for key, names in plan.items()}
+        if not (plan['new'] or plan['changed'] or plan['removed']):
+            print("Nothing to ingest")
+            return dict(summary, job=None, failed=[])
+
+        self.apply(files, plan)
+        job = self.start_ingestion(timeout)
+        self.record_document_status(plan['new'] + plan['changed'], job)
+        failed = sorted(n for n in plan['new'] + plan['changed']
+                        if self.manifest[n]['status'] in FAILED_DOCUMENT_STATUSES)
+        return dict(summary, job=job, failed=failed)
@@ -3,6 +3,9 @@ import boto3
 import time
 from botocore.exceptions import ClientError
 from opensearchpy import OpenSearch, RequestsHttpConnection, AWSV4SignerAuth, RequestError
+from utils.vector_quantization import vector_field_mapping, QUANTIZATION_MODES
+from utils.ingestion_controller import wait_until, backoff_delay, TERMINAL_JOB_STATUSES
+from utils.orchestration import Orchestrator, Step
 import pprint
 import warnings
 warnings.filterwarnings('ignore')
@@ -13,12 +16,13 @@ embedding_context_dimensions = {
 
 pp = pprint.PrettyPrinter(indent=2)
 
-def interactive_sleep(seconds: int):
-    """Simple sleep with progress indicator"""
-    for i in range(seconds):
-        print(f"Waiting... {i+1}/{seconds}", end='\r')
-        time.sleep(1)
-    print()
+# Readiness polls (seconds); see utils/ingestion_controller.wait_until
+COLLECTION_TIMEOUT = 600
+ACCESS_POLICY_TIMEOUT = 300
+INDEX_READY_TIMEOUT = 120
+INGESTION_TIMEOUT = 3 * 60 * 60
+# Base of the jittered exponential backoff between retries of failed calls
+RETRY_BASE_DELAY = 15
 
 class BedrockKnowledgeBase:
     """
@@ -31,7 +35,9 @@ class BedrockKnowledgeBase:
             s3_bucket_name,
             embedding_model="amazon.titan-embed-text-v2:0",
             chunking_strategy="FIXED_SIZE",
-            suffix=None
+            suffix=None,
+            vector_quantization="fp32",
+            setup_state_path=None
     ):
         """
         Initialize simplified Knowledge Base
@@ -42,7 +48,13 @@ class BedrockKnowledgeBase:
             embedding_model(str): The embedding model to use
             chunking_strategy(str): The chunking strategy
             suffix(str): A suffix for naming resources
+            vector_quantization(str): Vector storage in the index - fp32, fp16, int8 or binary
+                (see utils/vector_quantization.py; index memory, and so OCU cost, drops 2x/4x/32x)
+            setup_state_path(str): Optional file recording setup progress; rerunning with the
+                same file and suffix resumes a partially completed setup
         """
+        if vector_quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"vector_quantization must be one of {QUANTIZATION_MODES}")
         boto3_session = boto3.session.Session()
         self.region_name = boto3_session.region_name
         self.iam_client = boto3_session.client('iam')
@@ -61,6 +73,8 @@ class BedrockKnowledgeBase:
         self.s3_bucket_name = s3_bucket_name
         self.embedding_model = embedding_model
         self.chunking_strategy = chunking_strategy
+        self.vector_quantization = vector_quantization
+        self.setup_state_path = setup_state_path
         
         # Resource names
         self.encryption_policy_name = f"bedrock-kb-sp-{self.suffix}"
@@ -80,29 +94,50 @@ class BedrockKnowledgeBase:
         self._setup_resources()
 
     def _setup_resources(self):
+        """
+        Create all resources as a dependency graph: the IAM role and the collection
+        (the slow part) are created concurrently, and each step starts as soon as
+        what it needs is ready. IAM propagation has no status to poll; it overlaps
+        collection creation, and Knowledge Base creation retries with backoff if the
+        role is still not visible to Bedrock.
+        """
         print("Setting up Knowledge Base resources...")
-        
-        print("Step 1 - Creating IAM execution role and policies")
-        self.bedrock_kb_execution_role = self.create_execution_role()
-        
-        # Wait for IAM role to propagate
-        print("Waiting for IAM role to propagate...")
-        interactive_sleep(30)
-        
-        print("Step 2 - Creating OpenSearch Serverless policies")
-        self.encryption_policy, self.network_policy, self.access_policy = self.create_oss_policies()
-        
-        print("Step 3 - Creating OpenSearch Serverless collection")
-        self.host, self.collection, self.collection_id, self.collection_arn = self.create_oss_collection()
-        
-        print("Step 4 - Creating vector index")
-        self.create_vector_index()
-        
-        print("Step 5 - Verifying setup and creating Knowledge Base")
-        self.verify_permissions()
-        self.verify_index_ready()
-        self.knowledge_base, self.data_source = self.create_knowledge_base()
-        
+
+        def create_role():
+            self.bedrock_kb_execution_role = self.create_execution_role()
+
+        def create_security_policies():
+            self.encryption_policy, self.network_policy = self.create_oss_security_policies()
+
+        def create_access_policy():
+            self.access_policy = self.create_oss_access_policy()
+
+        def create_collection():
+            self.host, self.collection, self.collection_id, self.collection_arn = self.create_oss_collection()
+
+        def create_kb():
+            self.verify_permissions()
+            self.verify_index_ready()
+            self.knowledge_base, self.data_source = self.create_knowledge_base()
+
+        steps = [
+            Step("iam_role", create_role),
+            Step("oss_security_policies", create_security_policies),
+            Step("oss_access_policy", create_access_policy, after=("iam_role",)),
+            Step("oss_collection", create_collection, after=("oss_security_policies",),
+                 ready=self.collection_active, ready_timeout=COLLECTION_TIMEOUT),
+            Step("oss_execution_policy", lambda: self.create_oss_execution_policy(self.collection_id),
+                 after=("iam_role", "oss_collection")),
+            Step("oss_connection", self.connect_oss, after=("oss_collection", "oss_access_policy")),
+            Step("vector_index", self.create_vector_index, after=("oss_connection",)),
+            Step("knowledge_base", create_kb, after=("vector_index", "oss_execution_policy")),
+        ]
+        Orchestrator(
+            steps,
+            state_path=self.setup_state_path,
+            context={'kb_name': self.kb_name, 'suffix': self.suffix}
+        ).run()
+
         print("Knowledge Base setup complete!")
         
     def verify_s3_bucket(self):
@@ -192,7 +227,12 @@ class BedrockKnowledgeBase:
         return role_response
 
     def create_oss_policies(self):
-        """Create OpenSearch Serverless security policies"""
+        """Create OpenSearch Serverless security and data access policies"""
+        encryption_policy, network_policy = self.create_oss_security_policies()
+        return encryption_policy, network_policy, self.create_oss_access_policy()
+
+    def create_oss_security_policies(self):
+        """Create the encryption and network policies (required before the collection)"""
         try:
             encryption_policy = self.aoss_client.create_security_policy(
                 name=self.encryption_policy_name,
@@ -221,6 +261,10 @@ class BedrockKnowledgeBase:
             network_policy = self.aoss_client.get_security_policy(
                 name=self.network_policy_name, type='network')
 
+        return encryption_policy, network_policy
+
+    def create_oss_access_policy(self):
+        """Create the data access policy for the caller and the execution role"""
         try:
             # Create access policy with comprehensive permissions
             access_policy_document = [{
@@ -263,7 +307,7 @@ class BedrockKnowledgeBase:
                 name=self.access_policy_name, type='data')
             print(f"Using existing access policy: {self.access_policy_name}")
 
-        return encryption_policy, network_policy, access_policy
+        return access_policy
 
     def create_oss_collection(self):
         """Create OpenSearch Serverless collection"""
@@ -282,36 +326,22 @@ class BedrockKnowledgeBase:
             print(f"Using existing collection: {self.vector_store_name}")
 
         host = f"{collection_id}.{self.region_name}.aoss.amazonaws.com"
+        return host, collection, collection_id, collection_arn
 
-        # Wait for collection to be active
-        max_attempts = 10
-        attempt = 0
-        while attempt < max_attempts:
-            response = self.aoss_client.batch_get_collection(names=[self.vector_store_name])
-            status = response['collectionDetails'][0]['status']
-            if status == 'ACTIVE':
-                print(f"Collection is now active: {self.vector_store_name}")
-                break
-            elif status == 'FAILED':
-                raise Exception(f"Collection creation failed: {self.vector_store_name}")
-            
-            attempt += 1
-            print(f"Collection status: {status}, waiting... (attempt {attempt}/{max_attempts})")
-            interactive_sleep(30)
-        
-        if attempt >= max_attempts:
-            raise Exception(f"Collection did not become active within expected time: {self.vector_store_name}")
-
-        # Create OSS policy for Bedrock execution role
-        self.create_oss_execution_policy(collection_id)
-        
-        # Wait for policies to propagate
-        print("Waiting for access policies to propagate...")
-        interactive_sleep(60)
-        
-        # Initialize OpenSearch client
+    def collection_active(self):
+        """Readiness check: True once the collection is ACTIVE"""
+        response = self.aoss_client.batch_get_collection(names=[self.vector_store_name])
+        status = response['collectionDetails'][0]['status']
+        if status == 'FAILED':
+            raise Exception(f"Collection creation failed: {self.vector_store_name}")
+        if status == 'ACTIVE':
+            print(f"Collection is now active: {self.vector_store_name}")
+        return status == 'ACTIVE'
+
+    def connect_oss(self):
+        """Create the OpenSearch client and wait until the data access policy applies"""
         self.oss_client = OpenSearch(
-            hosts=[{'host': host, 'port': 443}],
+            hosts=[{'host': self.host, 'port': 443}],
             http_auth=self.awsauth,
             use_ssl=True,
             verify_certs=True,
@@ -319,11 +349,9 @@ class BedrockKnowledgeBase:
             timeout=300
         )
         
-        # Verify collection is accessible
+        # Access policies propagate in the background; verify_oss_access polls until they apply
         self.verify_oss_access()
 
-        return host, collection, collection_id, collection_arn
-
     def create_oss_execution_policy(self, collection_id):
         """Create and attach OpenSearch Serverless policy to execution role"""
         oss_policy_document = {
@@ -355,22 +383,24 @@ class BedrockKnowledgeBase:
 
     def verify_oss_access(self):
         """Verify OpenSearch Serverless collection is accessible"""
-        max_attempts = 5
-        for attempt in range(max_attempts):
+        errors = []
+
+        def accessible():
             try:
                 # Try to get cluster info
-                response = self.oss_client.info()
-                print(f"✓ OpenSearch collection is accessible: {response.get('version', {}).get('number', 'unknown')}")
-                return True
+                return self.oss_client.info()
             except Exception as e:
-                if attempt < max_attempts - 1:
-                    print(f"Collection access attempt {attempt + 1}/{max_attempts} failed, retrying...")
-                    interactive_sleep(30)
-                else:
-                    print(f"⚠ Collection access verification failed after {max_attempts} attempts: {e}")
-                    print("Proceeding anyway - this may cause issues during Knowledge Base creation")
-                    return False
-        return False
+                errors.append(e)
+                return None
+
+        try:
+            response = wait_until(accessible, ACCESS_POLICY_TIMEOUT, "collection access policies to propagate")
+        except TimeoutError:
+            print(f"⚠ Collection access verification failed after {len(errors)} attempts: {errors[-1]}")
+            print("Proceeding anyway - this may cause issues during Knowledge Base creation")
+            return False
+        print(f"✓ OpenSearch collection is accessible: {response.get('version', {}).get('number', 'unknown')}")
+        return True
 
     def verify_permissions(self):
         """Verify that all necessary permissions are in place"""
@@ -423,7 +453,7 @@ class BedrockKnowledgeBase:
 
     def create_vector_index(self):
         """Create OpenSearch Serverless vector index with proper verification"""
-        print(f"Creating vector index: {self.index_name}")
+        print(f"Creating vector index: {self.index_name} ({self.vector_quantization} vectors)")
         
         # First check if index already exists
         if self.verify_index_exists():
@@ -439,15 +469,11 @@ class BedrockKnowledgeBase:
             },
             "mappings": {
                 "properties": {
-                    "vector": {
-                        "type": "knn_vector",
-                        "dimension": embedding_context_dimensions[self.embedding_model],
-                        "method": {
-                            "name": "hnsw",
-                            "engine": "faiss",
-                            "space_type": "l2"
-                        },
-                    },
+                    "vector": vector_field_mapping(
+                        embedding_context_dimensions[self.embedding_model],
+                        self.vector_quantization,
+                        space_type="l2"
+                    ),
                     "text": {"type": "text"},
                     "text-metadata": {"type": "text"}
                 }
@@ -463,18 +489,15 @@ class BedrockKnowledgeBase:
                 )
                 print(f"✓ Created vector index: {self.index_name}")
                 
-                # Wait for index to be ready
-                print("Waiting for index to be ready...")
-                interactive_sleep(30)
-                
                 # Verify index was created successfully
-                if self.verify_index_exists():
+                try:
+                    wait_until(self.verify_index_exists, INDEX_READY_TIMEOUT, f"index {self.index_name}")
                     print("✓ Vector index verified successfully")
                     return True
-                else:
+                except TimeoutError:
                     print("⚠ Index creation may not be complete, retrying...")
                     if attempt < max_attempts - 1:
-                        interactive_sleep(30)
+                        time.sleep(backoff_delay(attempt, RETRY_BASE_DELAY))
                         continue
                     
             except RequestError as e:
@@ -485,7 +508,7 @@ class BedrockKnowledgeBase:
                 elif 'security_exception' in error_str or '403' in error_str:
                     if attempt < max_attempts - 1:
                         print(f"Access denied creating index (attempt {attempt + 1}/{max_attempts}), waiting for permissions...")
-                        interactive_sleep(60)
+                        time.sleep(backoff_delay(attempt + 1, RETRY_BASE_DELAY))
                         continue
                     else:
                         print(f"✗ Failed to create index after {max_attempts} attempts due to permissions")
@@ -494,7 +517,7 @@ class BedrockKnowledgeBase:
                     print(f'✗ Error creating index: {e}')
                     if attempt < max_attempts - 1:
                         print(f"Retrying index creation (attempt {attempt + 2}/{max_attempts})...")
-                        interactive_sleep(30)
+                        time.sleep(backoff_delay(attempt, RETRY_BASE_DELAY))
                         continue
                     else:
                         raise e
@@ -502,7 +525,7 @@ class BedrockKnowledgeBase:
                 print(f'✗ Unexpected error creating index: {e}')
                 if attempt < max_attempts - 1:
                     print(f"Retrying index creation (attempt {attempt + 2}/{max_attempts})...")
-                    interactive_sleep(30)
+                    time.sleep(backoff_delay(attempt, RETRY_BASE_DELAY))
                     continue
                 else:
                     raise e
@@ -566,7 +589,7 @@ class BedrockKnowledgeBase:
         }
 
         # Create Knowledge Base with retry logic
-        max_attempts = 3
+        max_attempts = 5
         for attempt in range(max_attempts):
             try:
                 create_kb_response = self.bedrock_agent_client.create_knowledge_base(
@@ -595,7 +618,7 @@ class BedrockKnowledgeBase:
                 if "security_exception" in str(e) or "403" in str(e):
                     if attempt < max_attempts - 1:
                         print(f"Access denied (attempt {attempt + 1}/{max_attempts}). Waiting for permissions to propagate...")
-                        interactive_sleep(60)
+                        time.sleep(backoff_delay(attempt + 1, RETRY_BASE_DELAY))
                         continue
                     else:
                         print(f"Failed to create Knowledge Base after {max_attempts} attempts due to access issues.")
@@ -604,6 +627,13 @@ class BedrockKnowledgeBase:
                         print("2. IAM role permissions are insufficient")
                         print("3. Collection is not properly accessible")
                         raise e
+                elif "ValidationException" in str(e) and ("role" in str(e).lower() or "assume" in str(e).lower()):
+                    # A just-created execution role may not be assumable by Bedrock yet
+                    if attempt < max_attempts - 1:
+                        print(f"Execution role not usable yet (attempt {attempt + 1}/{max_attempts}). Waiting for IAM to propagate...")
+                        time.sleep(backoff_delay(attempt + 1, RETRY_BASE_DELAY))
+                        continue
+                    raise e
                 elif "no such index" in str(e).lower():
                     print(f"✗ Vector index {self.index_name} not found!")
                     print("This usually means:")
@@ -616,7 +646,6 @@ class BedrockKnowledgeBase:
                         try:
                             self.create_vector_index()
                             print("Index recreated, retrying Knowledge Base creation...")
-                            interactive_sleep(30)
                             continue
                         except Exception as index_error:
                             print(f"Failed to recreate index: {index_error}")
@@ -689,16 +718,15 @@ class BedrockKnowledgeBase:
             print(f"Started ingestion job: {job['ingestionJobId']}")
             
             # Wait for job completion
-            while job['status'] not in ["COMPLETE", "FAILED", "STOPPED"]:
-                print(f"Ingestion job status: {job['status']}")
-                interactive_sleep(30)
-                
-                get_job_response = self.bedrock_agent_client.get_ingestion_job(
+            def finished():
+                current = self.bedrock_agent_client.get_ingestion_job(
                     knowledgeBaseId=self.knowledge_base['knowledgeBaseId'],
                     dataSourceId=self.data_source["dataSourceId"],
                     ingestionJobId=job["ingestionJobId"]
-                )
-                job = get_job_response["ingestionJob"]
+                )["ingestionJob"]
+                return current if current['status'] in TERMINAL_JOB_STATUSES else None
+
+            job = wait_until(finished, INGESTION_TIMEOUT, f"ingestion job {job['ingestionJobId']}")
             
             print(f"Ingestion job completed with status: {job['status']}")
             if job['status'] == 'FAILED':
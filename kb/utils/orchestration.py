@@ -0,0 +1,154 @@
+"""
+Dependency-graph execution for multi-resource setup
+
+Steps declare the steps they depend on; every step whose dependencies are done
+runs immediately on a thread pool, so independent resources (the IAM role and
+the OpenSearch collection, for example) are created concurrently. A step may
+have a readiness check, polled with jittered exponential backoff
+(ingestion_controller.wait_until), and dependents start as soon as it passes
+rather than after a fixed sleep.
+
+Progress is saved to an optional JSON state file. A rerun with the same file
+resumes: steps must be idempotent (create-or-get), and steps whose readiness
+was already confirmed skip their readiness polling. The file is removed once
+every step has completed.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from utils.ingestion_controller import wait_until
+
+DEFAULT_READY_TIMEOUT = 600
+DEFAULT_MAX_WORKERS = 4
+
+
+class Step:
+    """
+    One unit of setup work
+    Args:
+        name(str): Unique step name
+        run(callable): Creates (or finds) the resource; must be safe to call again
+        after(tuple): Names of steps that must complete first
+        ready(callable): Optional readiness check, truthy once dependents may start
+        ready_timeout(float): Seconds to poll ready before failing
+    """
+
+    def __init__(self, name, run, after=(), ready=None, ready_timeout=DEFAULT_READY_TIMEOUT):
+        self.name = name
+        self.run = run
+        self.after = tuple(after)
+        self.ready = ready
+        self.ready_timeout = ready_timeout
+
+
+def load_state(path):
+    """Saved progress ({'context': ..., 'completed': [...]}), or an empty state"""
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {'context': {}, 'completed': []}
+
+
+class Orchestrator:
+    """
+    Runs steps in dependency order with maximum concurrency
+    Args:
+        steps(list): Step objects
+        state_path(str): Optional progress file for resuming a partial run
+        context(dict): Identifies the run (e.g. resource suffix); a state file
+            with a different context is ignored
+        max_workers(int): Steps running at once
+    """
+
+    def __init__(self, steps, state_path=None, context=None, max_workers=DEFAULT_MAX_WORKERS):
+        self.steps = {step.name: step for step in steps}
+        if len(self.steps) != len(steps):
+            raise ValueError("Step names must be unique")
+        for step in steps:
+            missing = [d for d in step.after if d not in self.steps]
+            if missing:
+                raise ValueError(f"Step {step.name} depends on unknown steps: {missing}")
+        self._check_acyclic()
+        self.state_path = state_path
+        self.context = context or {}
+        state = load_state(state_path)
+        self.completed = set(state['completed']) if state.get('context') == self.context else set()
+        self.max_workers = max_workers
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def _check_acyclic(self):
+        visiting, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through step {name}")
+            visiting.add(name)
+            for dependency in self.steps[name].after:
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.steps:
+            visit(name)
+
+    def _save(self):
+        if not self.state_path:
+            return
+        with self._lock:
+            state = {'context': self.context, 'completed': sorted(self.completed)}
+            tmp = f"{self.state_path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp, self.state_path)
+
+    def _execute(self, step):
+        start = time.monotonic()
+        step.run()
+        # Readiness already confirmed by a previous run need not be polled again
+        if step.ready and step.name not in self.completed:
+            wait_until(step.ready, step.ready_timeout, f"{step.name} to be ready")
+        return time.monotonic() - start
+
+    def run(self):
+        """Run every step; raises the first step failure after in-flight steps finish"""
+        if self.completed:
+            print(f"Resuming setup: {', '.join(sorted(self.completed))} already completed")
+        done, running, failure = set(), {}, None
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                if failure is None:
+                    for name, step in self.steps.items():
+                        if name not in done and name not in running.values() and set(step.after) <= done:
+                            print(f"▶ {name}")
+                            running[pool.submit(self._execute, step)] = name
+                if not running:
+                    break
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        self.timings[name] = future.result()
+                    except Exception as e:
+                        print(f"✗ {name} failed: {e}")
+                        failure = failure or e
+                        continue
+                    print(f"✓ {name} ({self.timings[name]:.0f}s)")
+                    done.add(name)
+                    self.completed.add(name)
+                    self._save()
+
+        if failure is not None:
+            if self.state_path:
+                print(f"Setup stopped; progress saved to {self.state_path}, rerun to resume")
+            raise failure
+        print(f"All {len(done)} setup steps completed in {time.monotonic() - started:.0f}s")
+        if self.state_path and os.path.exists(self.state_path):
+            os.remove(self.state_path)
+        return self.timings
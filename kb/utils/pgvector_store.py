@@ -0,0 +1,188 @@
+import hashlib
+import json
+import boto3
+
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"
+EMBEDDING_DIMENSIONS = 1024
+
+# Rows per Data API batch_execute_statement call (request size stays well under the 4 MB limit)
+UPSERT_BATCH_SIZE = 50
+
+
+def chunk_text(text, max_words=300, overlap_words=60):
+    """Fixed-size word windows with overlap, mirroring the KB's FIXED_SIZE strategy"""
+    words = text.split()
+    if not words:
+        return []
+    step = max(1, max_words - overlap_words)
+    return [' '.join(words[i:i + max_words]) for i in range(0, max(1, len(words) - overlap_words), step)]
+
+
+def vector_literal(embedding):
+    """pgvector text form: '[x1,x2,...]'"""
+    return '[' + ','.join(repr(float(x)) for x in embedding) + ']'
+
+
+class PgVectorStore:
+    """
+    Knowledge base chunks in Aurora PostgreSQL (kb_chunks, pgvector)
+    Writes go through the RDS Data API, the same path the database handler uses
+    """
+    def __init__(self, cluster_arn, secret_arn, database="medical_records", kb_name="diabetes-agent-kb"):
+        """
+        Args:
+            cluster_arn(str): Aurora cluster ARN
+            secret_arn(str): Database secret ARN
+            database(str): Database name
+            kb_name(str): Knowledge base the chunks belong to
+        """
+        self.rds_data_client = boto3.client('rds-data')
+        self.bedrock_runtime = boto3.client('bedrock-runtime')
+        self.db_args = {'resourceArn': cluster_arn, 'secretArn': secret_arn, 'database': database}
+        self.kb_name = kb_name
+
+    def embed(self, text):
+        """Normalized Titan v2 embedding"""
+        response = self.bedrock_runtime.invoke_model(
+            modelId=EMBEDDING_MODEL_ID,
+            body=json.dumps({"inputText": text, "dimensions": EMBEDDING_DIMENSIONS, "normalize": True})
+        )
+        return json.loads(response['body'].read())['embedding']
+
+    def _rows(self, sql, parameters=None):
+        response = self.rds_data_client.execute_statement(
+            sql=sql, parameters=parameters or [], formatRecordsAs='JSON', **self.db_args
+        )
+        return json.loads(response.get('formattedRecords') or '[]')
+
+    def existing_hashes(self, source_uri):
+        """chunk_index -> content_hash for one source document"""
+        rows = self._rows(
+            "SELECT chunk_index, content_hash FROM kb_chunks WHERE kb_name = :kb_name AND source_uri = :source_uri",
+            [{'name': 'kb_name', 'value': {'stringValue': self.kb_name}},
+             {'name': 'source_uri', 'value': {'stringValue': source_uri}}]
+        )
+        return {row['chunk_index']: row['content_hash'] for row in rows}
+
+    def upsert_chunks(self, chunks):
+        """
+        Insert or update chunks
+        Args:
+            chunks(list): dicts with source_uri, chunk_index, content, embedding and optional metadata
+        Returns:
+            Number of rows written
+        """
+        sql = """
+            INSERT INTO kb_chunks (kb_name, source_uri, chunk_index, content, content_hash, metadata, embedding)
+            VALUES (:kb_name, :source_uri, :chunk_index, :content, :content_hash,
+                    CAST(:metadata AS JSONB), CAST(:embedding AS vector))
+            ON CONFLICT (kb_name, source_uri, chunk_index) DO UPDATE
+            SET content = EXCLUDED.content,
+                content_hash = EXCLUDED.content_hash,
+                metadata = EXCLUDED.metadata,
+                embedding = EXCLUDED.embedding
+        """
+        written = 0
+        for start in range(0, len(chunks), UPSERT_BATCH_SIZE):
+            batch = chunks[start:start + UPSERT_BATCH_SIZE]
+            parameter_sets = [[
+                {'name': 'kb_name', 'value': {'stringValue': self.kb_name}},
+                {'name': 'source_uri', 'value': {'stringValue': chunk['source_uri']}},
+                {'name': 'chunk_index', 'value': {'longValue': chunk['chunk_index']}},
+                {'name': 'content', 'value': {'stringValue': chunk['content']}},
+                {'name': 'content_hash', 'value': {'stringValue': hashlib.sha256(chunk['content'].encode('utf-8')).hexdigest()}},
+                {'name': 'metadata', 'value': {'stringValue': json.dumps(chunk.get('metadata') or {})}},
+                {'name': 'embedding', 'value': {'stringValue': vector_literal(chunk['embedding'])}},
+            ] for chunk in batch]
+            self.rds_data_client.batch_execute_statement(sql=sql, parameterSets=parameter_sets, **self.db_args)
+            written += len(batch)
+        return written
+
+    def delete_source(self, source_uri=None):
+        """Delete one source's chunks, or every chunk of this KB when source_uri is None"""
+        self.rds_data_client.execute_statement(
+            sql="""
+                DELETE FROM kb_chunks
+                WHERE kb_name = :kb_name AND (CAST(:source_uri AS TEXT) IS NULL OR source_uri = :source_uri)
+            """,
+            parameters=[
+                {'name': 'kb_name', 'value': {'stringValue': self.kb_name}},
+                {'name': 'source_uri', 'value': {'stringValue': source_uri} if source_uri else {'isNull': True}},
+            ],
+            **self.db_args
+        )
+
+    def index_document(self, source_uri, text, metadata=None):
+        """
+        Chunk, embed and store one document; chunks whose content is unchanged are not re-embedded
+        Returns:
+            (chunks written, chunks unchanged)
+        """
+        chunks = chunk_text(text)
+        current = self.existing_hashes(source_uri)
+        changed = []
+        for index, content in enumerate(chunks):
+            if current.get(index) == hashlib.sha256(content.encode('utf-8')).hexdigest():
+                continue
+            changed.append({
+                'source_uri': source_uri,
+                'chunk_index': index,
+                'content': content,
+                'metadata': metadata,
+                'embedding': self.embed(content)
+            })
+        written = self.upsert_chunks(changed)
+
+        # Drop trailing chunks left over from a longer previous version
+        if any(index >= len(chunks) for index in current):
+            self.rds_data_client.execute_statement(
+                sql="DELETE FROM kb_chunks WHERE kb_name = :kb_name AND source_uri = :source_uri AND chunk_index >= :n",
+                parameters=[
+                    {'name': 'kb_name', 'value': {'stringValue': self.kb_name}},
+                    {'name': 'source_uri', 'value': {'stringValue': source_uri}},
+                    {'name': 'n', 'value': {'longValue': len(chunks)}},
+                ],
+                **self.db_args
+            )
+        return written, len(chunks) - len(changed)
+
+    def search(self, embedding, k=5, ef_search=None):
+        """
+        Nearest chunks by cosine distance
+        Args:
+            embedding(list): Query embedding
+            k(int): Number of results
+            ef_search(int): HNSW candidate list size for this query (default: server setting)
+        Returns:
+            List of dicts with chunk_id, source_uri, content and score
+        """
+        sql = """
+            SELECT chunk_id::text, source_uri, content,
+                   (1 - (embedding <=> CAST(:embedding AS vector)))::float8 AS score
+            FROM kb_chunks
+            WHERE kb_name = :kb_name
+            ORDER BY embedding <=> CAST(:embedding AS vector)
+            LIMIT :k
+        """
+        parameters = [
+            {'name': 'embedding', 'value': {'stringValue': vector_literal(embedding)}},
+            {'name': 'kb_name', 'value': {'stringValue': self.kb_name}},
+            {'name': 'k', 'value': {'longValue': k}},
+        ]
+        if ef_search is None:
+            return self._rows(sql, parameters)
+
+        # SET LOCAL only lasts for the transaction, so run both statements in one
+        transaction_id = self.rds_data_client.begin_transaction(**self.db_args)['transactionId']
+        try:
+            self.rds_data_client.execute_statement(
+                sql=f"SET LOCAL hnsw.ef_search = {int(ef_search)}", transactionId=transaction_id, **self.db_args
+            )
+            response = self.rds_data_client.execute_statement(
+                sql=sql, parameters=parameters, formatRecordsAs='JSON', transactionId=transaction_id, **self.db_args
+            )
+            return json.loads(response.get('formattedRecords') or '[]')
+        finally:
+            self.rds_data_client.commit_transaction(
+                resourceArn=self.db_args['resourceArn'], secretArn=self.db_args['secretArn'], transactionId=transaction_id
+            )
@@ -0,0 +1,372 @@
+"""
+Clean scraped pages into KB-ready Markdown
+
+    extract_markdown     HTML -> Markdown headings, paragraphs, lists and tables,
+                         skipping scripts, navigation, headers/footers, cookie
+                         banners, share widgets and similar boilerplate; the
+                         <main>/<article> region is used when the page has one
+    repair_flattened     re-splits scraper text saved with get_text(strip=True),
+                         where element boundaries were joined without spaces
+    normalize_text       Unicode, whitespace and dash normalisation
+    normalize_units      one spelling per clinical unit (mg/dL, mmol/L, mcg, ...)
+    detect_language      stopword-profile language guess (en, es, fr, de, pt)
+    detect_domain        clinical domain tag (diabetes, amd, general) that the
+                         agent's specialist tools filter retrieval on
+
+preprocess_document() combines them for one input file and is what the
+process pool in kb/preprocess_corpus.py runs; it only uses the standard
+library so workers start quickly.
+"""
+
+import json
+import re
+import unicodedata
+from html import unescape
+from html.parser import HTMLParser
+
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe', 'form', 'button', 'select',
+             'nav', 'header', 'footer', 'aside', 'head'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+BLOCK_TAGS = {'p', 'div', 'section', 'blockquote', 'dd', 'dt', 'figcaption', 'caption', 'pre', 'main', 'article'}
+MAIN_TAGS = {'main', 'article'}
+SKIP_ROLES = {'navigation', 'banner', 'contentinfo', 'search', 'complementary', 'dialog', 'menu'}
+# class/id fragments of page chrome that is not part of the article
+BOILERPLATE_PATTERN = re.compile(
+    r"(^|[-_ ])(nav|navbar|menu|breadcrumbs?|footer|header|sidebar|cookie|consent|banner|subscribe|newsletter|"
+    r"share|social|promo|advert|ads?|sponsor|related|recommend|skip|popup|modal|toolbar|pagination)([-_ ]|$)",
+    re.IGNORECASE
+)
+SITE_SUFFIX = re.compile(r"\s+[|\u2013-]\s+[^|\u2013-]{1,40}$")
+# Main regions shorter than this fall back to the whole-page extraction
+MIN_MAIN_WORDS = 50
+
+UNIT_PATTERNS = [
+    # "500mg" -> "500 mg", before the unit spellings below so they see a word boundary
+    (re.compile(r"(\d)(?=(?:mg|mmol|mcg|µg|μg|ug|kg|g|ml|mL|IU|units?|mmHg|mmhg)(?:\b|/))"), r"\1 "),
+    (re.compile(r"\bmg\s*/\s*dl\b", re.IGNORECASE), "mg/dL"),
+    (re.compile(r"\bmmol\s*/\s*l\b", re.IGNORECASE), "mmol/L"),
+    (re.compile(r"\bmmol\s*/\s*mol\b", re.IGNORECASE), "mmol/mol"),
+    (re.compile(r"\bmm\s*hg\b", re.IGNORECASE), "mmHg"),
+    (re.compile(r"(?<![A-Za-z])(?:µg|μg|ug)\b"), "mcg"),
+    (re.compile(r"\bkg\s*/\s*m\s*(?:2|²|\^2)", re.IGNORECASE), "kg/m²"),
+    (re.compile(r"°\s+([CF])\b"), r"°\1"),
+    (re.compile(r"(\d)\s+%"), r"\1%"),
+    # A1c spellings
+    (re.compile(r"\b(?:hba1c|hb\s*a1c|hemoglobin a1c)\b", re.IGNORECASE), "HbA1c"),
+]
+
+LANGUAGE_STOPWORDS = {
+    'en': set("the and of to in is for that with are on as be or it this by can your you have from".split()),
+    'es': set("el la de que y en los las del se por con para una un es su al lo como más".split()),
+    'fr': set("le la les de des et en du un une est pour que qui dans par sur au avec vous".split()),
+    'de': set("der die das und ist nicht mit zu den von für ein eine sie auf dem des im sich".split()),
+    'pt': set("o a os as de do da que e em para com um uma é se não por mais no na".split()),
+}
+# Fraction of words that must be stopwords of the best language to trust the guess
+MIN_LANGUAGE_SCORE = 0.08
+
+_WORD = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+# Terms that mark a document as belonging to a specialist tool's domain
+DOMAIN_TERMS = {
+    'diabetes': {'diabetes', 'diabetic', 'insulin', 'glucose', 'hba1c', 'a1c', 'glycemic', 'hyperglycemia',
+                 'hypoglycemia', 'prediabetes', 'metformin', 'ketoacidosis', 'glp-1', 'sglt2'},
+    'amd': {'macular', 'macula', 'amd', 'drusen', 'retina', 'retinal', 'anti-vegf', 'areds', 'areds2',
+            'ranibizumab', 'aflibercept', 'bevacizumab', 'faricimab', 'amsler', 'geographic'},
+}
+DEFAULT_DOMAIN = 'general'
+# Term hits a document needs before it is assigned to a domain
+MIN_DOMAIN_HITS = 3
+# A term in the title or URL counts like this many hits in the body
+DOMAIN_HINT_WEIGHT = 5
+
+_TERM = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+class _MarkdownExtractor(HTMLParser):
+    """Collects Markdown blocks for the whole page and for its main region"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []          # (in_main, markdown)
+        self.title = None
+        self.meta = {}
+        self.skip_depth = 0
+        self.main_depth = 0
+        self.stack = []           # open tags: (tag, skipped, main)
+        self.text = []
+        self.kind = None          # heading level (int), 'li', 'cell' or None
+        self.lists = []           # 'ul' / 'ol' counters
+        self.rows, self.row = None, None
+        self.in_title = False
+
+    def _skipped(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            return True
+        attrs = dict(attrs)
+        if attrs.get('role') in SKIP_ROLES or attrs.get('aria-hidden') == 'true' or 'hidden' in attrs:
+            return True
+        marker = f"{attrs.get('class') or ''} {attrs.get('id') or ''}"
+        return bool(BOILERPLATE_PATTERN.search(marker))
+
+    def _flush(self):
+        text = re.sub(r"\s+", ' ', ''.join(self.text)).strip()
+        self.text = []
+        if not text:
+            return
+        if isinstance(self.kind, int):
+            text = f"{'#' * self.kind} {text}"
+        elif self.kind == 'li':
+            depth = max(0, len(self.lists) - 1)
+            marker = '-'
+            if self.lists and self.lists[-1][0] == 'ol':
+                self.lists[-1][1] += 1
+                marker = f"{self.lists[-1][1]}."
+            text = f"{'  ' * depth}{marker} {text}"
+        self.blocks.append((self.main_depth > 0, text))
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title' and self.title is None:
+            self.in_title = True
+        if tag == 'meta':
+            attrs = dict(attrs)
+            key = attrs.get('name') or attrs.get('property')
+            if key and attrs.get('content'):
+                self.meta[key.lower()] = attrs['content']
+        if tag in VOID_TAGS:
+            if tag == 'br' and not self.skip_depth:
+                self.text.append('\n' if self.kind is None else ' ')
+            return
+
+        skipped = self.skip_depth > 0 or self._skipped(tag, attrs)
+        main = tag in MAIN_TAGS and not skipped
+        self.stack.append((tag, skipped, main))
+        if skipped:
+            self.skip_depth += 1
+            return
+        if main:
+            self.main_depth += 1
+
+        if re.fullmatch(r"h[1-6]", tag):
+            self._flush()
+            self.kind = int(tag[1])
+        elif tag in ('ul', 'ol'):
+            self._flush()
+            self.lists.append([tag, 0])
+        elif tag == 'li':
+            self._flush()
+            self.kind = 'li'
+        elif tag == 'table':
+            self._flush()
+            self.rows = []
+        elif tag == 'tr' and self.rows is not None:
+            self.row = []
+        elif tag in ('td', 'th') and self.row is not None:
+            self.text = []
+            self.kind = 'cell'
+        elif tag in BLOCK_TAGS and self.kind != 'cell':
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self.in_title = False
+        if tag in VOID_TAGS or not any(open_tag == tag for open_tag, _, _ in self.stack):
+            return
+        # Close implicitly-closed children (<p>, <li> without end tags) along with tag
+        while self.stack:
+            open_tag, skipped, main = self.stack.pop()
+            if skipped:
+                self.skip_depth -= 1
+            else:
+                self._close(open_tag)
+                if main:
+                    self.main_depth -= 1
+            if open_tag == tag:
+                break
+
+    def _close(self, tag):
+        if re.fullmatch(r"h[1-6]", tag) or tag == 'li':
+            self._flush()
+            self.kind = None
+        elif tag in ('ul', 'ol'):
+            self._flush()
+            if self.lists:
+                self.lists.pop()
+        elif tag in ('td', 'th') and self.row is not None:
+            self.row.append(re.sub(r"\s+", ' ', ''.join(self.text)).strip().replace('|', '/'))
+            self.text = []
+            self.kind = None
+        elif tag == 'tr' and self.rows is not None and self.row is not None:
+            if any(self.row):
+                self.rows.append(self.row)
+            self.row = None
+        elif tag == 'table' and self.rows is not None:
+            self._table()
+        elif tag in BLOCK_TAGS and self.kind != 'cell':
+            self._flush()
+
+    def _table(self):
+        rows, self.rows = self.rows, None
+        if not rows:
+            return
+        width = max(len(r) for r in rows)
+        rows = [r + [''] * (width - len(r)) for r in rows]
+        lines = ['| ' + ' | '.join(rows[0]) + ' |', '|' + '---|' * width]
+        lines.extend('| ' + ' | '.join(r) + ' |' for r in rows[1:])
+        self.blocks.append((self.main_depth > 0, '\n'.join(lines)))
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title = (self.title or '') + data
+            return
+        if not self.skip_depth:
+            self.text.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def extract_markdown(html):
+    """
+    Readable Markdown from an HTML page
+    Returns:
+        (markdown, info): info has title and description/published date from meta tags when present
+    """
+    parser = _MarkdownExtractor()
+    parser.feed(html)
+    parser.close()
+
+    main_blocks = [text for in_main, text in parser.blocks if in_main]
+    if len(' '.join(main_blocks).split()) >= MIN_MAIN_WORDS:
+        blocks = main_blocks
+    else:
+        blocks = [text for _, text in parser.blocks]
+
+    # Lists and table rows are separated by single newlines, everything else by blank lines
+    parts = []
+    for text in blocks:
+        if parts and _is_list_item(text) and _is_list_item(parts[-1].rsplit('\n', 1)[-1]):
+            parts[-1] += '\n' + text
+        else:
+            parts.append(text)
+
+    meta = parser.meta
+    info = {
+        # "Diabetes Basics | CDC" -> "Diabetes Basics"
+        'title': SITE_SUFFIX.sub('', (parser.title or meta.get('og:title') or '').strip()),
+        'description': meta.get('description') or meta.get('og:description') or '',
+        'published_date': meta.get('article:published_time') or meta.get('publish-date') or '',
+    }
+    return '\n\n'.join(parts), info
+
+
+def _is_list_item(line):
+    return bool(re.match(r"^\s*(?:-|\d+\.)\s", line))
+
+
+def repair_flattened(text):
+    """
+    Re-insert element boundaries lost by BeautifulSoup get_text(strip=True)
+    "...blood sugar.Symptoms include" -> "...blood sugar. Symptoms include"
+    "Type 2 DiabetesType 2 diabetes is" -> "Type 2 Diabetes\\n\\nType 2 diabetes is"
+    """
+    text = re.sub(r"([.!?:;])(?=[A-Z][a-z])", r"\1 ", text)
+    return re.sub(r"(?<=[a-z)])(?=[A-Z][a-z]{2,})", "\n\n", text)
+
+
+def normalize_text(text):
+    """NFKC, non-breaking spaces, typographic dashes and quotes, collapsed whitespace"""
+    text = unicodedata.normalize('NFKC', unescape(text))
+    text = text.replace('\u00ad', '').replace('\u200b', '')
+    text = re.sub(r"[\u2010-\u2015\u2212]", '-', text)
+    text = re.sub(r"[\u2018\u2019]", "'", text)
+    text = re.sub(r"[\u201c\u201d]", '"', text)
+    lines = [re.sub(r"[ \t\f\v]+", ' ', line).rstrip() for line in text.split('\n')]
+    text = '\n'.join(line if _is_indented_list_item(line) else line.lstrip() for line in lines)
+    return re.sub(r"\n{3,}", '\n\n', text).strip()
+
+
+def _is_indented_list_item(line):
+    return bool(re.match(r"^ +(?:-|\d+\.)\s", line))
+
+
+def normalize_units(text):
+    """One spelling per clinical unit so lexical search and dedup see the same tokens"""
+    for pattern, replacement in UNIT_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def detect_language(text):
+    """
+    ISO 639-1 code of the best-matching stopword profile
+    Returns:
+        (code, score): 'und' when no profile covers MIN_LANGUAGE_SCORE of the words
+    """
+    words = [w.lower() for w in _WORD.findall(text[:20000])]
+    if not words:
+        return 'und', 0.0
+    scores = {code: sum(w in stopwords for w in words) / len(words) for code, stopwords in LANGUAGE_STOPWORDS.items()}
+    code = max(scores, key=scores.get)
+    return (code if scores[code] >= MIN_LANGUAGE_SCORE else 'und'), round(scores[code], 3)
+
+
+def detect_domain(text, title='', source_uri=''):
+    """
+    Domain with the most term hits, DEFAULT_DOMAIN below MIN_DOMAIN_HITS
+    Args:
+        text(str): Document text
+        title(str): Document title; its terms weigh DOMAIN_HINT_WEIGHT
+        source_uri(str): Source URL; its terms weigh DOMAIN_HINT_WEIGHT
+    """
+    counts = {}
+    for term in _TERM.findall(text[:20000].lower()):
+        counts[term] = counts.get(term, 0) + 1
+    hints = set(_TERM.findall(f"{title or ''} {source_uri or ''}".lower()))
+    scores = {
+        domain: sum(counts.get(t, 0) for t in terms) + DOMAIN_HINT_WEIGHT * len(hints & terms)
+        for domain, terms in DOMAIN_TERMS.items()
+    }
+    domain = max(scores, key=scores.get)
+    return domain if scores[domain] >= MIN_DOMAIN_HITS else DEFAULT_DOMAIN
+
+
+def preprocess_document(name, body):
+    """
+    Clean one scraped file (.html/.htm page or scraper .json record)
+    Args:
+        name(str): File name relative to the input location
+        body(bytes): File contents
+    Returns:
+        dict with name, markdown and metadata, or None if the file has no usable content
+    """
+    raw = body.decode('utf-8', errors='ignore')
+    metadata = {'source_uri': name}
+    if name.endswith('.json'):
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            return None
+        if not isinstance(record, dict) or record.get('error'):
+            return None
+        for key in ('url', 'title', 'source', 'published_date', 'scraped_at'):
+            if record.get(key):
+                metadata['source_uri' if key == 'url' else key] = record[key]
+        if record.get('html'):
+            markdown, info = extract_markdown(record['html'])
+        else:
+            markdown, info = repair_flattened(record.get('content') or ''), {}
+    else:
+        markdown, info = extract_markdown(raw)
+    for key, value in info.items():
+        if value and not metadata.get(key):
+            metadata[key] = value.strip()
+
+    markdown = normalize_units(normalize_text(markdown))
+    if not markdown:
+        return None
+    language, confidence = detect_language(markdown)
+    metadata.update(language=language, language_confidence=confidence, word_count=len(markdown.split()),
+                    domain=detect_domain(markdown, metadata.get('title'), metadata.get('source_uri')))
+    return {'name': name, 'markdown': markdown, 'metadata': metadata}
@@ -0,0 +1,201 @@
+"""
+Vector quantization modes for the knowledge base index
+
+Index side: knn_vector field mappings for OpenSearch Serverless per mode.
+    fp32    full-precision faiss HNSW (the original mapping)
+    fp16    faiss HNSW with the fp16 scalar-quantization encoder (2x smaller)
+    int8    lucene HNSW with the int8 scalar-quantization encoder (4x smaller)
+    binary  faiss HNSW in on_disk mode with 32x compression: 1-bit vectors in
+            memory, full-precision vectors on disk used to rescore the
+            oversampled candidates
+
+Local side: quantizers with the same storage formats plus oversampled
+rescoring, used to measure recall, latency and memory per mode offline
+(scripts/benchmark_vector_quantization.py) and to pick the oversampling factor
+that keeps recall within tolerance.
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+QUANTIZATION_MODES = ("fp32", "fp16", "int8", "binary")
+
+# OpenSearch's default first-pass oversampling for 32x on_disk vectors
+DEFAULT_BINARY_OVERSAMPLE = 3.0
+
+# 8-bit popcount table for Hamming distances over packed bits
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def vector_field_mapping(dimension, mode="fp32", space_type="l2"):
+    """
+    knn_vector field mapping for a quantization mode
+    Args:
+        dimension(int): Embedding dimension
+        mode(str): One of QUANTIZATION_MODES
+        space_type(str): Distance space (l2 or innerproduct)
+    """
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown vector quantization mode: {mode}")
+
+    field = {"type": "knn_vector", "dimension": dimension}
+    if mode == "fp32":
+        field["method"] = {"name": "hnsw", "engine": "faiss", "space_type": space_type}
+    elif mode == "fp16":
+        field["method"] = {
+            "name": "hnsw", "engine": "faiss", "space_type": space_type,
+            # clip: out-of-range components are clamped instead of rejected
+            "parameters": {"encoder": {"name": "sq", "parameters": {"type": "fp16", "clip": True}}}
+        }
+    elif mode == "int8":
+        field["method"] = {
+            "name": "hnsw", "engine": "lucene", "space_type": space_type,
+            "parameters": {"encoder": {"name": "sq"}}
+        }
+    else:
+        field["mode"] = "on_disk"
+        field["compression_level"] = "32x"
+        field["method"] = {"name": "hnsw", "engine": "faiss", "space_type": space_type}
+    return field
+
+
+class Quantizer(ABC):
+    """Base class: fit on the corpus, encode vectors, score codes against a float query"""
+    mode = None
+
+    def fit(self, vectors):
+        return self
+
+    @abstractmethod
+    def encode(self, vectors):
+        """Codes in this mode's storage format"""
+
+    @abstractmethod
+    def scores(self, codes, query):
+        """Approximate similarity (higher is better) of every code with the query"""
+
+    @abstractmethod
+    def bytes_per_vector(self, dimension):
+        """Storage size of one encoded vector"""
+
+
+class FP32Quantizer(Quantizer):
+    mode = "fp32"
+
+    def encode(self, vectors):
+        return np.asarray(vectors, dtype=np.float32)
+
+    def scores(self, codes, query):
+        return codes @ query
+
+    def bytes_per_vector(self, dimension):
+        return 4 * dimension
+
+
+class FP16Quantizer(Quantizer):
+    mode = "fp16"
+
+    def encode(self, vectors):
+        return np.asarray(vectors, dtype=np.float16)
+
+    def scores(self, codes, query):
+        return codes.astype(np.float32) @ query
+
+    def bytes_per_vector(self, dimension):
+        return 2 * dimension
+
+
+class Int8Quantizer(Quantizer):
+    """Per-dimension min/max scalar quantization to 256 levels"""
+    mode = "int8"
+
+    def fit(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.low = vectors.min(axis=0)
+        self.scale = np.maximum(vectors.max(axis=0) - self.low, 1e-12) / 255.0
+        return self
+
+    def encode(self, vectors):
+        codes = np.rint((np.asarray(vectors, dtype=np.float32) - self.low) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def scores(self, codes, query):
+        # q . (low + scale * code) without materialising the dequantized matrix
+        return codes.astype(np.float32) @ (query * self.scale) + float(query @ self.low)
+
+    def bytes_per_vector(self, dimension):
+        return dimension
+
+
+class BinaryQuantizer(Quantizer):
+    """Sign bits packed 8 per byte; similarity is the negated Hamming distance"""
+    mode = "binary"
+
+    def encode(self, vectors):
+        return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+    def scores(self, codes, query):
+        packed_query = np.packbits(query > 0)
+        return -_POPCOUNT[np.bitwise_xor(codes, packed_query)].sum(axis=1, dtype=np.int32).astype(np.float32)
+
+    def bytes_per_vector(self, dimension):
+        return (dimension + 7) // 8
+
+
+QUANTIZERS = {q.mode: q for q in (FP32Quantizer, FP16Quantizer, Int8Quantizer, BinaryQuantizer)}
+
+
+def get_quantizer(mode):
+    if mode not in QUANTIZERS:
+        raise ValueError(f"Unknown vector quantization mode: {mode}")
+    return QUANTIZERS[mode]()
+
+
+def _top(scores, n):
+    n = min(n, len(scores))
+    top = np.argpartition(-scores, n - 1)[:n]
+    return top[np.argsort(-scores[top])]
+
+
+def search_with_rescoring(quantizer, codes, full_vectors, query, k, oversample=1.0):
+    """
+    Top-k ids: first pass over the quantized codes, then exact rescoring of the candidates
+    Args:
+        quantizer(Quantizer): Fitted quantizer that produced codes
+        codes: Encoded corpus
+        full_vectors: Full-precision corpus (memory-mapped in practice), read only for candidates
+        query: Unit-length float32 query
+        k(int): Results to return
+        oversample(float): Candidates per result taken from the first pass; 1.0 disables rescoring
+    """
+    candidates = _top(quantizer.scores(codes, query), max(k, int(np.ceil(k * oversample))))
+    if oversample <= 1.0:
+        return candidates[:k]
+    candidates = np.sort(candidates)  # ascending ids keep reads from a memory map sequential
+    exact = np.asarray(full_vectors[candidates], dtype=np.float32) @ query
+    return candidates[_top(exact, k)]
+
+
+def recall_at_k(quantizer, codes, full_vectors, queries, truth, k, oversample=1.0):
+    """Mean overlap of the rescored results with the exact top-k"""
+    hits = 0
+    for query, expected in zip(queries, truth):
+        found = search_with_rescoring(quantizer, codes, full_vectors, query, k, oversample)
+        hits += len(set(found.tolist()) & set(expected[:k].tolist()))
+    return hits / (len(queries) * k)
+
+
+def calibrate_oversample(quantizer, codes, full_vectors, queries, truth, k, tolerance=0.01,
+                         factors=(1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 10.0)):
+    """
+    Smallest oversampling factor whose recall@k is within tolerance of exact search
+    Returns:
+        (factor, recall); the largest factor tried if none meets the tolerance
+    """
+    recall = 0.0
+    for factor in factors:
+        recall = recall_at_k(quantizer, codes, full_vectors, queries, truth, k, factor)
+        if recall >= 1.0 - tolerance:
+            return factor, recall
+    return factors[-1], recall
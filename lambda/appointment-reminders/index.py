@@ -0,0 +1,255 @@
+"""
+Appointment Reminder Dispatcher Lambda Function
+Runs on a schedule, claims due reminders in batches and sends them through a pluggable notifier
+"""
+
+import json
+import boto3
+import logging
+import os
+import uuid
+from typing import Dict, Any, List
+
+from notifiers import Notifier, get_notifier
+
+# Configure logging - NEVER log PHI!
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Initialize AWS clients
+rds_data_client = boto3.client('rds-data')
+
+# Reminders claimed per round-trip; one Data API response stays well under its 1 MB limit
+DEFAULT_REMINDER_BATCH_SIZE = 500
+
+# Send reminders for appointments up to this many days ahead
+DEFAULT_REMINDER_LEAD_DAYS = 1
+
+# Clinic wall-clock zone for facilities without medical_facilities.time_zone;
+# scheduled_date/scheduled_time are local times, the database session runs in UTC
+CLINIC_TIME_ZONE = os.environ.get('CLINIC_TIME_ZONE', 'America/New_York')
+
+# A claim older than this is assumed abandoned by a crashed worker and may be retaken.
+# Must exceed the function timeout so a live worker never loses its lease mid-batch.
+DEFAULT_CLAIM_LEASE_SECONDS = 20 * 60
+
+# Stop retrying a reminder after this many failed deliveries
+MAX_REMINDER_ATTEMPTS = 3
+
+# Leave this much of the invocation for marking the last batch
+TIME_SAFETY_MARGIN_MS = 30 * 1000
+
+# Claim due appointments no other worker holds. SKIP LOCKED lets concurrent
+# workers take disjoint batches instead of queueing on the same rows, and the
+# claim token persists the lease after the statement commits. The WHERE clause
+# matches the idx_appointments_reminder_due predicate so the scan stays on it.
+CLAIM_REMINDERS_SQL = """
+    WITH due AS (
+        SELECT a.appointment_id
+        FROM appointments a
+        CROSS JOIN LATERAL (
+            SELECT now() AT TIME ZONE COALESCE(
+                (SELECT mf.time_zone FROM medical_facilities mf WHERE mf.facility_id = a.facility_id),
+                CAST(:clinic_tz AS TEXT)
+            ) AS local_now
+        ) clinic
+        WHERE a.reminder_sent IS NOT TRUE
+          AND a.appointment_status IN ('Scheduled', 'Confirmed')
+          -- UTC-date bounds a day wider on each side keep the scan on the index;
+          -- the clinic's local time decides what is actually due
+          AND a.scheduled_date BETWEEN CURRENT_DATE - 1 AND CURRENT_DATE + CAST(:lead_days AS INTEGER) + 1
+          AND a.scheduled_date + a.scheduled_time > clinic.local_now
+          AND a.scheduled_date <= CAST(clinic.local_now AS DATE) + CAST(:lead_days AS INTEGER)
+          AND (a.reminder_claim_token IS NULL
+               OR a.reminder_claimed_at < CURRENT_TIMESTAMP - make_interval(secs => :lease_seconds))
+          AND COALESCE(a.reminder_attempts, 0) < :max_attempts
+        ORDER BY a.scheduled_date, a.scheduled_time
+        LIMIT :batch_size
+        FOR UPDATE OF a SKIP LOCKED
+    ),
+    claimed AS (
+        UPDATE appointments a
+        SET reminder_claim_token = CAST(:claim_token AS UUID),
+            reminder_claimed_at = CURRENT_TIMESTAMP,
+            reminder_attempts = COALESCE(a.reminder_attempts, 0) + 1
+        FROM due
+        WHERE a.appointment_id = due.appointment_id
+        RETURNING a.appointment_id, a.patient_id, a.facility_id, a.scheduled_date, a.scheduled_time
+    )
+    SELECT
+        c.appointment_id::text,
+        c.scheduled_date::text,
+        c.scheduled_time::text,
+        p.phone_primary,
+        mf.facility_name
+    FROM claimed c
+    JOIN patients p ON c.patient_id = p.patient_id
+    LEFT JOIN medical_facilities mf ON c.facility_id = mf.facility_id
+"""
+
+# Only the worker still holding the claim may settle it
+MARK_SENT_SQL = """
+    UPDATE appointments
+    SET reminder_sent = TRUE,
+        reminder_sent_date = CURRENT_TIMESTAMP,
+        reminder_claim_token = NULL,
+        reminder_claimed_at = NULL
+    WHERE appointment_id = ANY(CAST(:appointment_ids AS UUID[]))
+      AND reminder_claim_token = CAST(:claim_token AS UUID)
+"""
+
+RELEASE_CLAIM_SQL = """
+    UPDATE appointments
+    SET reminder_claim_token = NULL,
+        reminder_claimed_at = NULL
+    WHERE appointment_id = ANY(CAST(:appointment_ids AS UUID[]))
+      AND reminder_claim_token = CAST(:claim_token AS UUID)
+"""
+
+
+def _db_args() -> Dict[str, str]:
+    return {
+        'resourceArn': os.environ.get('DB_CLUSTER_ARN'),
+        'secretArn': os.environ.get('DB_SECRET_ARN'),
+        'database': os.environ.get('DB_NAME', 'medical_records')
+    }
+
+
+def _uuid_array(ids: List[str]) -> str:
+    """Postgres array literal for a list of UUIDs (bound as one string parameter)"""
+    return '{' + ','.join(ids) + '}'
+
+
+def claim_reminders(claim_token: str, batch_size: int, lead_days: int, lease_seconds: int) -> List[Dict[str, Any]]:
+    """
+    Claim up to batch_size due reminders for this worker
+
+    Returns:
+        Reminder dicts with appointment_id, scheduled_date, scheduled_time,
+        phone_primary and facility_name
+    """
+    response = rds_data_client.execute_statement(
+        sql=CLAIM_REMINDERS_SQL,
+        parameters=[
+            {'name': 'claim_token', 'value': {'stringValue': claim_token}},
+            {'name': 'batch_size', 'value': {'longValue': batch_size}},
+            {'name': 'lead_days', 'value': {'longValue': lead_days}},
+            {'name': 'clinic_tz', 'value': {'stringValue': CLINIC_TIME_ZONE}},
+            {'name': 'lease_seconds', 'value': {'longValue': lease_seconds}},
+            {'name': 'max_attempts', 'value': {'longValue': MAX_REMINDER_ATTEMPTS}}
+        ],
+        **_db_args()
+    )
+
+    columns = ['appointment_id', 'scheduled_date', 'scheduled_time', 'phone_primary', 'facility_name']
+    return [
+        {column: None if value.get('isNull') else value.get('stringValue') for column, value in zip(columns, record)}
+        for record in response.get('records') or []
+    ]
+
+
+def settle_claims(sql: str, claim_token: str, appointment_ids: List[str]) -> int:
+    """Mark sent or release a set of claimed appointments in one statement"""
+    if not appointment_ids:
+        return 0
+    response = rds_data_client.execute_statement(
+        sql=sql,
+        parameters=[
+            {'name': 'appointment_ids', 'value': {'stringValue': _uuid_array(appointment_ids)}},
+            {'name': 'claim_token', 'value': {'stringValue': claim_token}}
+        ],
+        **_db_args()
+    )
+    return response.get('numberOfRecordsUpdated', 0)
+
+
+def dispatch_reminders(
+    notifier: Notifier,
+    batch_size: int = DEFAULT_REMINDER_BATCH_SIZE,
+    lead_days: int = DEFAULT_REMINDER_LEAD_DAYS,
+    lease_seconds: int = DEFAULT_CLAIM_LEASE_SECONDS,
+    max_batches: int = None,
+    remaining_time_ms=None
+) -> Dict[str, Any]:
+    """
+    Claim, send and settle reminders until none are due or time runs out
+
+    Safe to run in several workers at once: each batch is claimed under a fresh
+    token, so no appointment is handed to two live workers.
+
+    Args:
+        notifier: Delivery backend
+        batch_size: Reminders claimed per round-trip
+        lead_days: How many days ahead to remind
+        lease_seconds: Age after which an unsettled claim may be retaken
+        max_batches: Optional cap on batches for this run
+        remaining_time_ms: Callable returning the invocation's remaining time
+
+    Returns:
+        Counts of claimed, sent and failed reminders
+    """
+    totals = {'batches': 0, 'claimed': 0, 'sent': 0, 'failed': 0}
+
+    while max_batches is None or totals['batches'] < max_batches:
+        if remaining_time_ms is not None and remaining_time_ms() < TIME_SAFETY_MARGIN_MS:
+            logger.info("Stopping before timeout; remaining reminders go to the next run")
+            break
+
+        claim_token = str(uuid.uuid4())
+        reminders = claim_reminders(claim_token, batch_size, lead_days, lease_seconds)
+        if not reminders:
+            break
+
+        sent, failed = notifier.send_batch(reminders)
+        settle_claims(MARK_SENT_SQL, claim_token, sent)
+        # Failed reminders become claimable again, up to MAX_REMINDER_ATTEMPTS in total
+        settle_claims(RELEASE_CLAIM_SQL, claim_token, failed)
+
+        totals['batches'] += 1
+        totals['claimed'] += len(reminders)
+        totals['sent'] += len(sent)
+        totals['failed'] += len(failed)
+        logger.info(f"Reminder batch {totals['batches']}: {len(sent)} sent, {len(failed)} failed")
+
+        if len(reminders) < batch_size:
+            break
+
+    return totals
+
+
+def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    Scheduled entry point (EventBridge)
+
+    Optional event fields: batch_size, lead_days, max_batches, notifier.
+    Several scheduled targets may invoke this concurrently.
+    """
+    try:
+        if not os.environ.get('DB_CLUSTER_ARN') or not os.environ.get('DB_SECRET_ARN'):
+            return {
+                'statusCode': 500,
+                'body': json.dumps({'status': 'error', 'message': 'Missing required environment variables'})
+            }
+
+        notifier = get_notifier(event.get('notifier'))
+        totals = dispatch_reminders(
+            notifier,
+            batch_size=int(event.get('batch_size') or os.environ.get('REMINDER_BATCH_SIZE', DEFAULT_REMINDER_BATCH_SIZE)),
+            lead_days=int(event.get('lead_days') or os.environ.get('REMINDER_LEAD_DAYS', DEFAULT_REMINDER_LEAD_DAYS)),
+            lease_seconds=int(os.environ.get('REMINDER_CLAIM_LEASE_SECONDS', DEFAULT_CLAIM_LEASE_SECONDS)),
+            max_batches=int(event['max_batches']) if event.get('max_batches') else None,
+            remaining_time_ms=context.get_remaining_time_in_millis if context else None
+        )
+
+        logger.info(f"Reminder run complete: {json.dumps(totals)}")
+        return {
+            'statusCode': 200,
+            'body': json.dumps({'status': 'success', **totals})
+        }
+
+    except Exception as e:
+        logger.error(f"Reminder dispatch failed: {type(e).__name__}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'status': 'error', 'message': 'Reminder dispatch failed'})
+        }
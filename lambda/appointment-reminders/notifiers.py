@@ -0,0 +1,137 @@
+"""
+Notification backends for the appointment reminder dispatcher
+Each notifier sends a batch of reminders and reports which appointments were delivered
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
+
+logger = logging.getLogger()
+
+# Concurrent SNS publishes per batch; SMS publishing has no batch API
+DEFAULT_SEND_CONCURRENCY = 16
+
+
+def format_reminder_message(reminder: Dict[str, Any]) -> str:
+    """
+    Build the reminder text
+
+    Kept to the minimum needed to identify the visit: no diagnosis,
+    reason or provider notes ever leave the database in a reminder.
+    """
+    when = f"{reminder['scheduled_date']} at {str(reminder['scheduled_time'])[:5]}"
+    where = f" ({reminder['facility_name']})" if reminder.get('facility_name') else ""
+    return (
+        f"Reminder: you have an appointment on {when}{where}. "
+        "Please call the clinic if you need to reschedule."
+    )
+
+
+class Notifier(ABC):
+    """Base class: subclasses implement send()"""
+
+    @abstractmethod
+    def send(self, reminder: Dict[str, Any]) -> None:
+        """Deliver one reminder; raise on failure"""
+
+    def send_batch(self, reminders: List[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+        """
+        Deliver a batch of reminders
+
+        Returns:
+            (sent appointment ids, failed appointment ids)
+        """
+        sent, failed = [], []
+        for reminder in reminders:
+            if self._try_send(reminder):
+                sent.append(reminder['appointment_id'])
+            else:
+                failed.append(reminder['appointment_id'])
+        return sent, failed
+
+    def _try_send(self, reminder: Dict[str, Any]) -> bool:
+        try:
+            self.send(reminder)
+            return True
+        except Exception as e:
+            # Never log the phone number or message body
+            logger.warning(f"Reminder delivery failed for appointment {reminder['appointment_id'][:8]}...: {type(e).__name__}")
+            return False
+
+
+class SNSNotifier(Notifier):
+    """Sends reminders as SMS through Amazon SNS"""
+
+    def __init__(self, sns_client=None, concurrency: int = DEFAULT_SEND_CONCURRENCY, sender_id: str = None):
+        if sns_client is None:
+            import boto3
+            sns_client = boto3.client('sns')
+        self.sns_client = sns_client
+        self.concurrency = concurrency
+        self.sender_id = sender_id
+
+    def send(self, reminder: Dict[str, Any]) -> None:
+        phone = reminder.get('phone_primary')
+        if not phone:
+            raise ValueError("No phone number on file")
+
+        attributes = {
+            'AWS.SNS.SMS.SMSType': {'DataType': 'String', 'StringValue': 'Transactional'}
+        }
+        if self.sender_id:
+            attributes['AWS.SNS.SMS.SenderID'] = {'DataType': 'String', 'StringValue': self.sender_id}
+
+        self.sns_client.publish(
+            PhoneNumber=phone,
+            Message=format_reminder_message(reminder),
+            MessageAttributes=attributes
+        )
+
+    def send_batch(self, reminders: List[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+        # Publishing is network-bound; overlap the round-trips
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(self._try_send, reminders))
+
+        sent = [r['appointment_id'] for r, ok in zip(reminders, results) if ok]
+        failed = [r['appointment_id'] for r, ok in zip(reminders, results) if not ok]
+        return sent, failed
+
+
+class LogNotifier(Notifier):
+    """
+    Local stub: records reminders in memory instead of sending them
+
+    Used for tests and dry runs. Set fail_ids to simulate delivery failures.
+    """
+
+    def __init__(self, fail_ids=()):
+        self.delivered: List[Dict[str, Any]] = []
+        self.fail_ids = set(fail_ids)
+
+    def send(self, reminder: Dict[str, Any]) -> None:
+        if reminder['appointment_id'] in self.fail_ids:
+            raise RuntimeError("Simulated delivery failure")
+        self.delivered.append({
+            'appointment_id': reminder['appointment_id'],
+            'message': format_reminder_message(reminder)
+        })
+        logger.info(f"[LogNotifier] Reminder recorded for appointment {reminder['appointment_id'][:8]}...")
+
+
+NOTIFIERS = {
+    'sns': SNSNotifier,
+    'log': LogNotifier,
+}
+
+
+def get_notifier(name: str = None) -> Notifier:
+    """Notifier selected by name or the REMINDER_NOTIFIER environment variable (default 'sns')"""
+    name = (name or os.environ.get('REMINDER_NOTIFIER', 'sns')).lower()
+    if name not in NOTIFIERS:
+        raise ValueError(f"Unknown reminder notifier: {name}")
+    if name == 'sns':
+        return SNSNotifier(sender_id=os.environ.get('REMINDER_SMS_SENDER_ID'))
+    return NOTIFIERS[name]()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Local test script for the appointment reminder dispatcher.
+Runs the dispatcher against the configured database with the LogNotifier stub,
+so reminders are claimed and marked sent but no SMS leaves the machine.
+Requires DB_CLUSTER_ARN and DB_SECRET_ARN in the environment.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from index import lambda_handler, dispatch_reminders
+from notifiers import LogNotifier
+
+
+def test_single_run():
+    """Dispatch one small batch with the log notifier."""
+    event = {
+        'notifier': 'log',
+        'batch_size': 10,
+        'max_batches': 1
+    }
+
+    print("Testing single reminder run...")
+    response = lambda_handler(event, None)
+    print(f"Response: {json.dumps(response, indent=2)}")
+    return response
+
+
+def test_parallel_workers(workers=4):
+    """Run several dispatchers at once and check no appointment is sent twice."""
+    notifiers = [LogNotifier() for _ in range(workers)]
+
+    print(f"\nTesting {workers} parallel workers...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        totals = list(pool.map(lambda n: dispatch_reminders(n, batch_size=25), notifiers))
+
+    delivered = [d['appointment_id'] for n in notifiers for d in n.delivered]
+    duplicates = len(delivered) - len(set(delivered))
+    print(f"Per-worker totals: {json.dumps(totals)}")
+    print(f"Delivered: {len(delivered)}, duplicates: {duplicates}")
+    return duplicates == 0
+
+
+if __name__ == "__main__":
+    print("Starting local reminder dispatcher tests...")
+
+    test_single_run()
+    ok = test_parallel_workers()
+
+    print("\nLocal testing completed!" if ok else "\nDuplicate reminders detected!")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Minimal external Lambda extension that registers for SHUTDOWN
+
+Lambda only sends SIGTERM to the function runtime before reclaiming an
+execution environment when at least one extension is registered. The database
+handler relies on that signal to flush its audit queue (see audit.py), so this
+extension does nothing except register and wait for the SHUTDOWN event.
+"""
+
+import json
+import os
+import urllib.request
+
+EXTENSION_NAME = 'audit-shutdown'
+API = f"http://{os.environ['AWS_LAMBDA_RUNTIME_API']}/2020-01-01/extension"
+
+
+def register() -> str:
+    request = urllib.request.Request(
+        f"{API}/register",
+        data=json.dumps({'events': ['SHUTDOWN']}).encode(),
+        headers={'Lambda-Extension-Name': EXTENSION_NAME},
+        method='POST'
+    )
+    with urllib.request.urlopen(request) as response:
+        return response.headers['Lambda-Extension-Identifier']
+
+
+def main():
+    extension_id = register()
+    while True:
+        request = urllib.request.Request(f"{API}/event/next", headers={'Lambda-Extension-Identifier': extension_id})
+        with urllib.request.urlopen(request) as response:
+            event = json.load(response)
+        if event.get('eventType') == 'SHUTDOWN':
+            return
+
+
+if __name__ == '__main__':
+    main()
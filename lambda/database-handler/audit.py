@@ -0,0 +1,403 @@
+"""
+Asynchronous HIPAA audit logging
+
+Requests enqueue access events in memory; a background thread writes them to
+audit_log and patient_access_log with one batch_execute_statement per table
+once AUDIT_FLUSH_SIZE events are waiting or AUDIT_FLUSH_INTERVAL_SECONDS has
+passed, so most requests never wait on a database round-trip.
+
+Lambda freezes the environment as soon as the handler returns, and a frozen
+background thread does not run; queued events wait for the next invocation to
+thaw it. Requests never flush themselves, so audit writes stay off the request
+path. The audit-shutdown extension (lambda/audit-shutdown-extension) registers
+for SHUTDOWN so the runtime receives SIGTERM, and the handler below flushes what
+is left before the environment is reclaimed.
+
+Every queued event is also appended to a journal segment under /tmp. A segment
+is deleted only after its batch is committed; a failed write, a timeout kill or
+a runtime restart leaves it behind (the /tmp directory survives runtime restarts
+within an execution environment) and it is replayed on a later flush. Event
+ids are generated client-side and inserts use ON CONFLICT DO NOTHING, so replays
+never duplicate rows. A segment the database keeps rejecting (or that cannot
+be parsed) is renamed to .quarantined after MAX_SEGMENT_ATTEMPTS replays so it
+no longer holds back the segments behind it.
+"""
+
+import atexit
+import functools
+import glob
+import json
+import logging
+import os
+import signal
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger()
+
+AUDIT_FLUSH_SIZE = int(os.environ.get('AUDIT_FLUSH_SIZE', 100))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.environ.get('AUDIT_FLUSH_INTERVAL_SECONDS', 2.0))
+AUDIT_SPILL_DIR = os.environ.get('AUDIT_SPILL_DIR', '/tmp/audit-spill')
+
+# Segments replayed per flush, so a long outage backlog drains gradually
+MAX_REPLAY_SEGMENTS = 10
+
+# Rejected replays of one segment before it is set aside as .quarantined
+MAX_SEGMENT_ATTEMPTS = 3
+
+# Data API errors caused by the batch itself rather than database availability
+REJECTED_BATCH_ERRORS = ('BadRequestException', 'ValidationException')
+
+INSERT_AUDIT_LOG_SQL = """
+    INSERT INTO audit_log (
+        audit_id, user_id, session_id, source, action_type, table_name, patient_id,
+        endpoint, http_method, success, error_message, action_timestamp, duration_ms
+    )
+    VALUES (
+        CAST(:audit_id AS UUID),
+        (SELECT user_id FROM users WHERE user_id = CAST(:user_id AS UUID)),
+        :session_id, :source, :action_type, :table_name, CAST(:patient_id AS UUID),
+        :endpoint, :http_method, :success, :error_message,
+        CAST(:action_timestamp AS TIMESTAMPTZ), :duration_ms
+    )
+    ON CONFLICT DO NOTHING
+"""
+
+# patient_access_log requires a staff user; patient self-access is in audit_log only
+INSERT_PATIENT_ACCESS_SQL = """
+    INSERT INTO patient_access_log (
+        access_id, patient_id, user_id, access_type, data_accessed, access_reason,
+        session_id, access_start, duration_seconds
+    )
+    SELECT
+        CAST(:access_id AS UUID), p.patient_id, u.user_id, :access_type,
+        string_to_array(:data_accessed, ','), :access_reason, :session_id,
+        CAST(:action_timestamp AS TIMESTAMPTZ), :duration_seconds
+    FROM users u
+    JOIN patients p ON p.patient_id = CAST(:patient_id AS UUID)
+    WHERE u.user_id = CAST(:user_id AS UUID)
+    ON CONFLICT DO NOTHING
+"""
+
+
+def _string(value) -> Dict[str, Any]:
+    return {'stringValue': str(value)} if value not in (None, '') else {'isNull': True}
+
+
+def _uuid_or_none(value) -> Optional[str]:
+    """Drop malformed ids up front so one bad value cannot fail a whole batch"""
+    try:
+        return str(uuid.UUID(str(value))) if value else None
+    except ValueError:
+        return None
+
+
+def _long(value) -> Dict[str, Any]:
+    return {'longValue': int(value)} if value is not None else {'isNull': True}
+
+
+def _rejects_batch(error: Exception) -> bool:
+    """True when retrying the same segment cannot succeed (bad data, not an outage)"""
+    if isinstance(error, ValueError):
+        # Includes json.JSONDecodeError from a truncated or corrupt segment
+        return True
+    response = getattr(error, 'response', None) or {}
+    return response.get('Error', {}).get('Code') in REJECTED_BATCH_ERRORS
+
+
+def _parameter_sets(events: List[Dict[str, Any]]):
+    audit_sets, access_sets = [], []
+    for event in events:
+        audit_sets.append([
+            {'name': 'audit_id', 'value': _string(event['event_id'])},
+            {'name': 'user_id', 'value': _string(event.get('user_id'))},
+            {'name': 'session_id', 'value': _string(event.get('session_id'))},
+            {'name': 'source', 'value': _string(event.get('source'))},
+            {'name': 'action_type', 'value': _string(event['action_type'])},
+            {'name': 'table_name', 'value': _string(event.get('table_name'))},
+            {'name': 'patient_id', 'value': _string(event.get('patient_id'))},
+            {'name': 'endpoint', 'value': _string(event.get('endpoint'))},
+            {'name': 'http_method', 'value': _string(event.get('http_method'))},
+            {'name': 'success', 'value': {'booleanValue': bool(event['success'])}},
+            {'name': 'error_message', 'value': _string(event.get('error_message'))},
+            {'name': 'action_timestamp', 'value': _string(event['action_timestamp'])},
+            {'name': 'duration_ms', 'value': _long(event.get('duration_ms'))}
+        ])
+        if event.get('user_id') and event.get('patient_id'):
+            access_sets.append([
+                {'name': 'access_id', 'value': _string(event['event_id'])},
+                {'name': 'patient_id', 'value': _string(event['patient_id'])},
+                {'name': 'user_id', 'value': _string(event['user_id'])},
+                {'name': 'access_type', 'value': _string(event.get('access_type') or 'VIEW')},
+                {'name': 'data_accessed', 'value': _string(event.get('table_name'))},
+                {'name': 'access_reason', 'value': _string(event.get('access_reason'))},
+                {'name': 'session_id', 'value': _string(event.get('session_id'))},
+                {'name': 'action_timestamp', 'value': _string(event['action_timestamp'])},
+                {'name': 'duration_seconds', 'value': _long(round((event.get('duration_ms') or 0) / 1000))}
+            ])
+    return audit_sets, access_sets
+
+
+class AuditLogger:
+    """Batched, journaled writer for audit_log and patient_access_log"""
+
+    def __init__(
+        self,
+        rds_data_client,
+        flush_size: int = AUDIT_FLUSH_SIZE,
+        flush_interval: float = AUDIT_FLUSH_INTERVAL_SECONDS,
+        spill_dir: str = AUDIT_SPILL_DIR
+    ):
+        self.rds_data_client = rds_data_client
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.spill_dir = spill_dir
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._queue: List[Dict[str, Any]] = []
+        self._segment_path: Optional[str] = None
+        self._segment = None
+        self._thread: Optional[threading.Thread] = None
+        self._replay_failures: Dict[str, int] = {}
+
+        os.makedirs(self.spill_dir, exist_ok=True)
+        # Segments still open when a previous process died are now complete spills
+        for path in glob.glob(os.path.join(self.spill_dir, 'audit-*.open')):
+            os.replace(path, path[:-len('.open')] + '.jsonl')
+
+    def _db_args(self) -> Dict[str, str]:
+        return {
+            'resourceArn': os.environ.get('DB_CLUSTER_ARN'),
+            'secretArn': os.environ.get('DB_SECRET_ARN'),
+            'database': os.environ.get('DB_NAME', 'medical_records')
+        }
+
+    def _open_segment(self) -> None:
+        self._segment_path = os.path.join(self.spill_dir, f"audit-{time.time_ns()}-{uuid.uuid4().hex[:8]}.open")
+        self._segment = open(self._segment_path, 'a', buffering=1)
+
+    def record(
+        self,
+        action_type: str,
+        success: bool,
+        patient_id: Optional[str] = None,
+        table_name: Optional[str] = None,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        source: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        http_method: Optional[str] = None,
+        error_message: Optional[str] = None,
+        duration_ms: Optional[int] = None,
+        access_type: Optional[str] = None,
+        access_reason: Optional[str] = None
+    ) -> str:
+        """
+        Queue one access event; returns immediately
+
+        Args:
+            action_type: CREATE, READ, UPDATE, DELETE, ...
+            success: Whether the access succeeded
+            patient_id: Patient whose data was accessed
+            table_name: Primary table touched
+            user_id: Staff user id (also logs to patient_access_log)
+            session_id: Caller's session
+            source: Calling component (agent, gateway, ...)
+
+        Returns:
+            The event id used as the audit_id
+        """
+        event = {
+            'event_id': str(uuid.uuid4()),
+            'action_timestamp': datetime.now(timezone.utc).isoformat(),
+            'action_type': action_type,
+            'success': success,
+            'patient_id': _uuid_or_none(patient_id),
+            'table_name': table_name,
+            'user_id': _uuid_or_none(user_id),
+            'session_id': session_id,
+            'source': source,
+            'endpoint': endpoint,
+            'http_method': http_method,
+            'error_message': error_message,
+            'duration_ms': duration_ms,
+            'access_type': access_type,
+            'access_reason': access_reason
+        }
+
+        with self._lock:
+            if self._segment is None:
+                self._open_segment()
+            self._segment.write(json.dumps(event) + '\n')
+            self._queue.append(event)
+            queued = len(self._queue)
+
+        self._ensure_thread()
+        if queued >= self.flush_size:
+            self._wake.set()
+        return event['event_id']
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='audit-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Audit flush failed: {type(e).__name__}")
+
+    def _write(self, events: List[Dict[str, Any]]) -> None:
+        audit_sets, access_sets = _parameter_sets(events)
+        db_args = self._db_args()
+        if audit_sets:
+            self.rds_data_client.batch_execute_statement(sql=INSERT_AUDIT_LOG_SQL, parameterSets=audit_sets, **db_args)
+        if access_sets:
+            self.rds_data_client.batch_execute_statement(sql=INSERT_PATIENT_ACCESS_SQL, parameterSets=access_sets, **db_args)
+
+    def _replay_segments(self) -> int:
+        """Write back closed segments left by failed flushes or an earlier process"""
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, 'audit-*.jsonl')))[:MAX_REPLAY_SEGMENTS]:
+            try:
+                with open(path) as segment:
+                    events = [json.loads(line) for line in segment if line.strip()]
+                if events:
+                    self._write(events)
+            except Exception as e:
+                # Database unavailable: stop and retry the backlog in order later
+                if not _rejects_batch(e):
+                    raise
+                attempts = self._replay_failures.get(path, 0) + 1
+                if attempts < MAX_SEGMENT_ATTEMPTS:
+                    self._replay_failures[path] = attempts
+                    raise
+                self._replay_failures.pop(path, None)
+                os.replace(path, path[:-len('.jsonl')] + '.quarantined')
+                logger.error(f"Audit segment {os.path.basename(path)} quarantined after "
+                             f"{attempts} rejected replays: {type(e).__name__}")
+                continue
+            self._replay_failures.pop(path, None)
+            os.remove(path)
+            replayed += len(events)
+        return replayed
+
+    def flush(self) -> int:
+        """
+        Write all queued events now
+
+        Returns:
+            Number of events written (including replayed spill segments)
+        """
+        with self._flush_lock:
+            with self._lock:
+                events, path, segment = self._queue, self._segment_path, self._segment
+                self._queue, self._segment_path, self._segment = [], None, None
+            if segment is not None:
+                segment.close()
+                closed_path = path[:-len('.open')] + '.jsonl'
+                os.replace(path, closed_path)
+                path = closed_path
+
+            written = 0
+            if events:
+                try:
+                    self._write(events)
+                except Exception as e:
+                    # The closed segment is the spill; it is replayed on a later flush
+                    logger.warning(f"Audit write failed, {len(events)} event(s) spilled to disk: {type(e).__name__}")
+                    return 0
+                os.remove(path)
+                written = len(events)
+
+            try:
+                written += self._replay_segments()
+            except Exception as e:
+                logger.warning(f"Audit spill replay deferred: {type(e).__name__}")
+            return written
+
+    def shutdown(self) -> None:
+        """Final flush (atexit / SIGTERM); anything unwritten stays spilled"""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Audit shutdown flush failed: {type(e).__name__}")
+
+
+_audit_logger: Optional[AuditLogger] = None
+
+
+def get_audit_logger(rds_data_client) -> AuditLogger:
+    """Process-wide logger, with a final flush registered for shutdown"""
+    global _audit_logger
+    if _audit_logger is None:
+        _audit_logger = AuditLogger(rds_data_client)
+        atexit.register(_audit_logger.shutdown)
+
+        # Lambda sends SIGTERM before shutting down an environment only when an
+        # extension is registered; the audit-shutdown layer provides one
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def _on_sigterm(signum, frame):
+            _audit_logger.shutdown()
+            if callable(previous):
+                previous(signum, frame)
+
+        try:
+            signal.signal(signal.SIGTERM, _on_sigterm)
+        except ValueError:
+            # Not on the main thread (local tooling); atexit still covers normal exits
+            pass
+    return _audit_logger
+
+
+def audited(audit_logger: AuditLogger, actions: Dict[str, tuple]) -> Callable:
+    """
+    Decorate a Lambda handler so every call to a listed action is audit-logged
+
+    Args:
+        audit_logger: Destination logger
+        actions: action name -> (action_type, table_name)
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            start = time.perf_counter()
+            response = handler(event, context)
+
+            # The handler merges the request body into the event
+            params = event.get('queryStringParameters') or {}
+            action = params.get('action') or event.get('action')
+            if action in actions:
+                try:
+                    action_type, table_name = actions[action]
+                    status_code = response.get('statusCode', 500) if isinstance(response, dict) else 500
+                    audit_logger.record(
+                        action_type=action_type,
+                        success=status_code < 400,
+                        patient_id=params.get('patient_id') or event.get('patient_id'),
+                        table_name=table_name,
+                        user_id=event.get('user_id'),
+                        session_id=event.get('session_id'),
+                        source=event.get('source'),
+                        endpoint=action,
+                        http_method=event.get('httpMethod') or (event.get('requestContext') or {}).get('http', {}).get('method'),
+                        error_message=None if status_code < 400 else f"HTTP {status_code}",
+                        duration_ms=int((time.perf_counter() - start) * 1000),
+                        access_type='EDIT' if action_type in ('CREATE', 'UPDATE', 'DELETE') else 'VIEW'
+                    )
+                except Exception as e:
+                    # Audit failures must never fail the request
+                    logger.error(f"Audit enqueue failed: {type(e).__name__}")
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,222 @@
+"""
+Streaming CGM alert evaluation
+
+Keeps a small rolling state per patient and evaluates each reading in constant
+time: threshold alerts with hysteresis, an exponentially weighted glucose slope,
+a rate-of-change bucket (glucose_trend / trend_arrow) and a predicted-low alert
+projected from that slope. State is a plain dict so it can be checkpointed as JSON.
+"""
+
+import math
+from collections import deque, namedtuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Alert thresholds (mg/dL). An alert raises below/above the threshold and only
+# clears once the value moves back past threshold +/- HYSTERESIS_MG_DL.
+LOW_ALERT_THRESHOLD = 70
+HIGH_ALERT_THRESHOLD = 250
+PREDICTED_LOW_THRESHOLD = 55
+HYSTERESIS_MG_DL = 10
+
+# Trend estimation
+PREDICTION_HORIZON_MINUTES = 20
+SLOPE_TIME_CONSTANT_MINUTES = 10.0
+MAX_TREND_GAP_MINUTES = 15.0
+MIN_TREND_READINGS = 3
+HISTORY_SIZE = 12
+
+STATE_VERSION = 1
+
+# (lower bound mg/dL/min, glucose_trend, trend_arrow), checked from the top down
+RATE_OF_CHANGE_BUCKETS = (
+    (3.0, 'Rising Quickly', '↑↑'),
+    (2.0, 'Rising', '↑'),
+    (1.0, 'Rising Slowly', '↗'),
+    (-1.0, 'Stable', '→'),
+    (-2.0, 'Falling Slowly', '↘'),
+    (-3.0, 'Falling', '↓'),
+    (-math.inf, 'Falling Quickly', '↓↓'),
+)
+
+ALERT_LOW = 'low_glucose_alert'
+ALERT_HIGH = 'high_glucose_alert'
+ALERT_PREDICTED_LOW = 'predicted_low_alert'
+
+Evaluation = namedtuple(
+    'Evaluation',
+    ['low_glucose_alert', 'high_glucose_alert', 'predicted_low_alert',
+     'glucose_trend', 'trend_arrow', 'raised', 'late']
+)
+
+
+def rate_of_change_bucket(slope: Optional[float]) -> Tuple[Optional[str], Optional[str]]:
+    """Map a slope in mg/dL/min to its (glucose_trend, trend_arrow) bucket"""
+    if slope is None:
+        return None, None
+    for lower, trend, arrow in RATE_OF_CHANGE_BUCKETS:
+        if slope >= lower:
+            return trend, arrow
+    return None, None
+
+
+class PatientAlertState:
+    """Rolling alert state for one patient"""
+
+    __slots__ = ('history', 'last_ts', 'last_value', 'slope', 'trend_points',
+                 'low_active', 'high_active', 'predicted_low_active')
+
+    def __init__(self):
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self.last_ts = None
+        self.last_value = None
+        self.slope = None
+        self.trend_points = 0
+        self.low_active = False
+        self.high_active = False
+        self.predicted_low_active = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'history': [list(point) for point in self.history],
+            'last_ts': self.last_ts,
+            'last_value': self.last_value,
+            'slope': self.slope,
+            'trend_points': self.trend_points,
+            'low_active': self.low_active,
+            'high_active': self.high_active,
+            'predicted_low_active': self.predicted_low_active,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PatientAlertState':
+        state = cls()
+        state.history.extend((float(ts), value) for ts, value in data.get('history', []))
+        state.last_ts = data.get('last_ts')
+        state.last_value = data.get('last_value')
+        state.slope = data.get('slope')
+        state.trend_points = data.get('trend_points', 0)
+        state.low_active = data.get('low_active', False)
+        state.high_active = data.get('high_active', False)
+        state.predicted_low_active = data.get('predicted_low_active', False)
+        return state
+
+
+class CGMAlertEngine:
+    """
+    Per-patient streaming alert evaluator
+
+    Each reading is processed in O(1): in-order readings update the EWMA slope and
+    the alert state machines; readings older than the latest one are evaluated
+    against the fixed thresholds only, so a late upload never rewinds the trend.
+    Readings whose timestamp is already in the recent history are dropped as duplicates.
+    """
+
+    def __init__(self):
+        self.patients: Dict[str, PatientAlertState] = {}
+        self.duplicates = 0
+        self.late_readings = 0
+
+    def _state(self, patient_id: str) -> PatientAlertState:
+        state = self.patients.get(patient_id)
+        if state is None:
+            state = self.patients[patient_id] = PatientAlertState()
+        return state
+
+    def process(self, patient_id: str, timestamp: float, value: float) -> Optional[Evaluation]:
+        """
+        Evaluate one reading
+
+        Args:
+            patient_id: Patient's UUID
+            timestamp: Reading time in epoch seconds
+            value: Glucose value in mg/dL
+
+        Returns:
+            Evaluation with the alert flags and trend for this reading, and the
+            alerts it newly raised; None if the reading is a duplicate
+        """
+        state = self._state(patient_id)
+        last_ts = state.last_ts
+
+        if last_ts is not None and timestamp <= last_ts:
+            for seen_ts, _ in state.history:
+                if seen_ts == timestamp:
+                    self.duplicates += 1
+                    return None
+            self.late_readings += 1
+            return Evaluation(
+                value < LOW_ALERT_THRESHOLD, value > HIGH_ALERT_THRESHOLD, False,
+                None, None, (), True
+            )
+
+        # Trend: time-aware EWMA of the point-to-point slope, reset across sensor gaps
+        if last_ts is not None:
+            dt_minutes = (timestamp - last_ts) / 60.0
+            if dt_minutes > MAX_TREND_GAP_MINUTES:
+                state.slope = None
+                state.trend_points = 1
+            else:
+                instantaneous = (value - state.last_value) / dt_minutes
+                if state.slope is None:
+                    state.slope = instantaneous
+                else:
+                    alpha = 1.0 - math.exp(-dt_minutes / SLOPE_TIME_CONSTANT_MINUTES)
+                    state.slope += alpha * (instantaneous - state.slope)
+                state.trend_points += 1
+        else:
+            state.trend_points = 1
+
+        state.history.append((timestamp, value))
+        state.last_ts = timestamp
+        state.last_value = value
+
+        raised = []
+
+        if state.low_active:
+            state.low_active = value < LOW_ALERT_THRESHOLD + HYSTERESIS_MG_DL
+        elif value < LOW_ALERT_THRESHOLD:
+            state.low_active = True
+            raised.append(ALERT_LOW)
+
+        if state.high_active:
+            state.high_active = value > HIGH_ALERT_THRESHOLD - HYSTERESIS_MG_DL
+        elif value > HIGH_ALERT_THRESHOLD:
+            state.high_active = True
+            raised.append(ALERT_HIGH)
+
+        slope = state.slope if state.trend_points >= MIN_TREND_READINGS else None
+        if slope is None:
+            state.predicted_low_active = False
+        else:
+            projected = value + slope * PREDICTION_HORIZON_MINUTES
+            if state.predicted_low_active:
+                state.predicted_low_active = projected < PREDICTED_LOW_THRESHOLD + HYSTERESIS_MG_DL
+            elif projected < PREDICTED_LOW_THRESHOLD and not state.low_active:
+                state.predicted_low_active = True
+                raised.append(ALERT_PREDICTED_LOW)
+
+        trend, arrow = rate_of_change_bucket(slope)
+        return Evaluation(
+            state.low_active, state.high_active, state.predicted_low_active,
+            trend, arrow, tuple(raised), False
+        )
+
+    def process_many(
+        self,
+        patient_id: str,
+        readings: Iterable[Tuple[float, float]]
+    ) -> List[Optional[Evaluation]]:
+        """Evaluate (timestamp, value) readings for one patient in arrival order"""
+        process = self.process
+        return [process(patient_id, ts, value) for ts, value in readings]
+
+    def checkpoint(self, patient_id: str) -> Dict[str, Any]:
+        """JSON-serializable state for one patient"""
+        return {'version': STATE_VERSION, 'state': self._state(patient_id).to_dict()}
+
+    def restore(self, patient_id: str, checkpoint: Optional[Dict[str, Any]]) -> None:
+        """Resume a patient from a checkpoint; unknown versions start fresh"""
+        if checkpoint and checkpoint.get('version') == STATE_VERSION:
+            self.patients[patient_id] = PatientAlertState.from_dict(checkpoint['state'])
+        else:
+            self.patients[patient_id] = PatientAlertState()
@@ -1,9 +1,13 @@
 import json
+import base64
 import boto3
 import logging
 import os
+import time
 from typing import Dict, Any
 import re
+from cgm_alerts import CGMAlertEngine
+from audit import get_audit_logger, audited
 
 # Configure logging - NEVER log PHI!
 logger = logging.getLogger()
@@ -13,6 +17,93 @@ logger.setLevel(logging.INFO)
 secrets_client = boto3.client('secretsmanager')
 rds_data_client = boto3.client('rds-data')
 
+# Longest CGM window returned in one response (~8,600 readings at 5-minute sampling)
+MAX_CGM_WINDOW_DAYS = 30
+
+# Page size bounds for clinician-facing patient lists
+DEFAULT_PATIENT_PAGE_SIZE = 25
+MAX_PATIENT_PAGE_SIZE = 100
+
+# Availability search bounds
+MAX_AVAILABILITY_HORIZON_DAYS = 60
+MAX_AVAILABLE_SLOTS = 20
+
+# Clinic wall-clock zone for facilities without medical_facilities.time_zone;
+# scheduled_date/scheduled_time are local times, the database session runs in UTC
+CLINIC_TIME_ZONE = os.environ.get('CLINIC_TIME_ZONE', 'America/New_York')
+
+# Statuses that hold a slot (matches the appointments_no_provider_overlap predicate)
+ACTIVE_APPOINTMENT_STATUSES = ('Scheduled', 'Confirmed', 'Checked In')
+
+# Largest number of ranked matches returned by medication search
+MAX_MEDICATION_MATCHES = 10
+
+# Page size bounds for clinical document search
+DEFAULT_DOCUMENT_PAGE_SIZE = 10
+MAX_DOCUMENT_PAGE_SIZE = 25
+
+# Largest number of chunks returned by vector retrieval
+MAX_VECTOR_RESULTS = 20
+# Titan Text Embeddings v2 dimension used by kb_chunks / clinical_document_chunks
+EMBEDDING_DIMENSIONS = 1024
+# Hybrid retrieval: candidates per ranking and the reciprocal rank fusion constant
+HYBRID_CANDIDATES = 20
+RRF_K = 60
+
+# Readings evaluated per alert invocation and rows per Data API batch update
+CGM_ALERT_BATCH_LIMIT = 5000
+CGM_ALERT_UPDATE_CHUNK = 500
+
+# Scheduled alert sweep: patients with readings ingested in the lookback window are
+# evaluated until the time budget (kept under the one-minute schedule) runs out
+CGM_ALERT_SWEEP_LOOKBACK_HOURS = 24
+CGM_ALERT_SWEEP_BUDGET_SECONDS = 45
+
+# Days kept current in the patient_access_daily rollup (the patient_access_summary window)
+ACCESS_ROLLUP_DAYS = 30
+
+# Monthly audit_log / patient_access_log partitions kept created ahead of the current month
+AUDIT_PARTITION_MONTHS_AHEAD = 3
+
+# HIPAA audit trail: action -> (audit_log action_type, table accessed)
+AUDITED_ACTIONS = {
+    'get_patient_medications': ('READ', 'medications'),
+    'search_patient_medications': ('READ', 'medications'),
+    'get_patient_appointments': ('READ', 'appointments'),
+    'get_patient_summary': ('READ', 'patient_summary_cache'),
+    'search_clinical_documents': ('READ', 'clinical_documents'),
+    'vector_search_kb': ('READ', 'clinical_document_chunks'),
+    'book_appointment': ('CREATE', 'appointments'),
+    'get_cgm_readings': ('READ', 'cgm_readings'),
+    'get_cgm_daily_series': ('READ', 'cgm_daily_series'),
+    'evaluate_cgm_alerts': ('UPDATE', 'cgm_readings'),
+    'sweep_cgm_alerts': ('UPDATE', 'cgm_readings'),
+    'search_patients': ('READ', 'patients'),
+    'get_diabetes_patients': ('READ', 'patients'),
+}
+
+# AgentCore Gateway tools (api_spec.json) -> handler actions; the gateway sends only
+# the tool arguments as the event and names the tool in the client context
+GATEWAY_TOOL_ACTIONS = {
+    'get_diabetes_patients_list': 'get_diabetes_patients',
+    'search_patients_by_name': 'search_patients',
+}
+
+# All-patient actions: served only through the JWT-authenticated gateway, never the
+# public function URL (only a direct IAM invoke can set the gateway client context)
+GATEWAY_ONLY_ACTIONS = set(GATEWAY_TOOL_ACTIONS.values())
+
+# Access events are queued and written in batches off the request path
+audit_logger = get_audit_logger(rds_data_client)
+
+def gateway_action(context) -> str:
+    """Handler action for a gateway tool invocation, or None for other callers."""
+    custom = getattr(getattr(context, 'client_context', None), 'custom', None) or {}
+    tool_name = custom.get('bedrockAgentCoreToolName', '')
+    # Gateway prefixes the tool with its target: "<target>___<tool>"
+    return GATEWAY_TOOL_ACTIONS.get(tool_name.split('___')[-1])
+
+
 # PHI-safe logging helper
 def sanitize_for_logging(data: Any) -> str:
     """
@@ -108,6 +199,270 @@ def test_database_connection():
         }
 
 
+def encode_page_cursor(values: list) -> str:
+    """Opaque keyset cursor for the next page (last row's sort key)."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_page_cursor(cursor: str, size: int) -> list:
+    """Decode a keyset cursor; a missing or malformed cursor starts from the first page."""
+    if not cursor:
+        return [None] * size
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if isinstance(values, list) and len(values) == size:
+            return values
+    except (ValueError, TypeError):
+        pass
+    logger.warning("Ignoring malformed page cursor")
+    return [None] * size
+
+
+def _patient_page(records: list, fields: list, page_size: int):
+    """Convert Data API records to dicts and split off the look-ahead row."""
+    patients = []
+    for record in records[:page_size]:
+        patient = {}
+        for field, value in zip(fields, record):
+            if 'stringValue' in value:
+                patient[field] = value['stringValue']
+            elif 'longValue' in value:
+                patient[field] = value['longValue']
+            elif 'doubleValue' in value:
+                patient[field] = value['doubleValue']
+            elif 'booleanValue' in value:
+                patient[field] = value['booleanValue']
+            else:
+                patient[field] = None
+        patients.append(patient)
+
+    next_cursor = None
+    if len(records) > page_size and patients:
+        last = patients[-1]
+        next_cursor = encode_page_cursor([last['last_name'], last['first_name'], last['patient_id']])
+    return patients, next_cursor
+
+
+def search_patients(first_name: str = None, last_name: str = None, page_size: int = DEFAULT_PATIENT_PAGE_SIZE, cursor: str = None):
+    """Search patients by name in SQL, one page at a time.
+
+    Names match on case-insensitive substring or trigram word similarity (typos),
+    both served by the GIN trigram indexes on lower(first_name)/lower(last_name).
+    Results are ordered by (last_name, first_name, patient_id) and paginated by
+    keyset, so each response is bounded by page_size.
+
+    Args:
+        first_name: Optional first name fragment
+        last_name: Optional last name fragment
+        page_size: Patients per page (capped at MAX_PATIENT_PAGE_SIZE)
+        cursor: next_cursor from the previous page
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        # Log access without PHI (search terms are names)
+        logger.info("Searching patients by name")
+
+        page_size = max(1, min(int(page_size), MAX_PATIENT_PAGE_SIZE))
+        after_last, after_first, after_id = decode_page_cursor(cursor, 3)
+
+        sql_query = """
+            SELECT patient_id::text, medical_record_number, first_name, last_name,
+                   date_of_birth::text, gender
+            FROM patients
+            WHERE active IS NOT FALSE
+              AND (:last_name::text IS NULL
+                   OR lower(last_name) LIKE '%' || lower(:last_name) || '%'
+                   OR lower(:last_name) <% lower(last_name))
+              AND (:first_name::text IS NULL
+                   OR lower(first_name) LIKE '%' || lower(:first_name) || '%'
+                   OR lower(:first_name) <% lower(first_name))
+              AND (:after_id::uuid IS NULL
+                   OR (last_name, first_name, patient_id) > (:after_last, :after_first, :after_id::uuid))
+            ORDER BY last_name, first_name, patient_id
+            LIMIT :fetch_size
+        """
+
+        def text_param(name, value):
+            return {'name': name, 'value': {'stringValue': value} if value else {'isNull': True}}
+
+        parameters = [
+            text_param('first_name', first_name),
+            text_param('last_name', last_name),
+            text_param('after_last', after_last),
+            text_param('after_first', after_first),
+            text_param('after_id', after_id),
+            {'name': 'fetch_size', 'value': {'longValue': page_size + 1}}
+        ]
+
+        response = rds_data_client.execute_statement(
+            resourceArn=db_cluster_arn,
+            secretArn=secret_arn,
+            database=database_name,
+            sql=sql_query,
+            parameters=parameters
+        )
+
+        fields = ['patient_id', 'medical_record_number', 'first_name', 'last_name', 'date_of_birth', 'gender']
+        patients, next_cursor = _patient_page(response.get('records') or [], fields, page_size)
+
+        logger.info(f"Patient search returned {len(patients)} patient(s)")
+
+        return {
+            'status': 'success',
+            'message': f'Found {len(patients)} patient(s) on this page',
+            'patients': patients,
+            'count': len(patients),
+            'next_cursor': next_cursor
+        }
+
+    except Exception as e:
+        logger.error(f"Error searching patients: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error searching patients',
+            'error_type': type(e).__name__
+        }
+
+
+def get_diabetes_patients(page_size: int = DEFAULT_PATIENT_PAGE_SIZE, cursor: str = None, min_hba1c: float = None):
+    """List the diabetes cohort in SQL, one page at a time.
+
+    The cohort is every active patient with an ICD-10 E08-E13 condition: a
+    semi-join over the partial idx_conditions_diabetes index drives the scan,
+    then the keyset order picks the page. Only the rows on the page look up
+    their diagnosis and latest HbA1c (the HbA1c probe runs for every cohort
+    patient only when min_hba1c filters on it).
+
+    Args:
+        page_size: Patients per page (capped at MAX_PATIENT_PAGE_SIZE)
+        cursor: next_cursor from the previous page
+        min_hba1c: Optional filter on the latest HbA1c percentage
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        logger.info("Retrieving diabetes cohort")
+
+        page_size = max(1, min(int(page_size), MAX_PATIENT_PAGE_SIZE))
+        after_last, after_first, after_id = decode_page_cursor(cursor, 3)
+
+        # The page is chosen first, driven by the diabetes conditions; only its rows
+        # then look up their first diagnosis and latest HbA1c
+        sql_query = """
+            WITH page AS (
+                SELECT p.patient_id, p.medical_record_number, p.first_name, p.last_name,
+                       p.date_of_birth, p.gender
+                FROM patients p
+                WHERE p.patient_id IN (
+                        SELECT mc.patient_id
+                        FROM medical_conditions mc
+                        WHERE mc.icd10_code >= 'E08' AND mc.icd10_code < 'E14'
+                    )
+                  AND p.active IS NOT FALSE
+                  AND (:after_id::uuid IS NULL
+                       OR (p.last_name, p.first_name, p.patient_id) > (:after_last, :after_first, :after_id::uuid))
+                  AND (:min_hba1c::float8 IS NULL OR (
+                        SELECT d.hba1c_percentage
+                        FROM diabetes_lab_results d
+                        WHERE d.patient_id = p.patient_id
+                          AND d.hba1c_percentage IS NOT NULL
+                        ORDER BY d.test_date DESC
+                        LIMIT 1
+                      ) >= :min_hba1c::float8)
+                ORDER BY p.last_name, p.first_name, p.patient_id
+                LIMIT :fetch_size
+            )
+            SELECT p.patient_id::text, p.medical_record_number, p.first_name, p.last_name,
+                   p.date_of_birth::text, p.gender,
+                   CASE
+                       WHEN dx.icd10_code LIKE 'E10%' THEN 'Type 1'
+                       WHEN dx.icd10_code LIKE 'E11%' THEN 'Type 2'
+                       WHEN dx.icd10_code LIKE 'E13%' THEN 'Other specified'
+                       ELSE 'Secondary'
+                   END AS diabetes_type,
+                   dx.icd10_code, dx.onset_date::text,
+                   a1c.hba1c_percentage::float8, a1c.test_date::text
+            FROM page p
+            CROSS JOIN LATERAL (
+                SELECT mc.icd10_code, mc.onset_date
+                FROM medical_conditions mc
+                WHERE mc.patient_id = p.patient_id
+                  AND mc.icd10_code >= 'E08' AND mc.icd10_code < 'E14'
+                ORDER BY mc.onset_date NULLS LAST
+                LIMIT 1
+            ) dx
+            LEFT JOIN LATERAL (
+                SELECT d.hba1c_percentage, d.test_date
+                FROM diabetes_lab_results d
+                WHERE d.patient_id = p.patient_id
+                  AND d.hba1c_percentage IS NOT NULL
+                ORDER BY d.test_date DESC
+                LIMIT 1
+            ) a1c ON TRUE
+            ORDER BY p.last_name, p.first_name, p.patient_id
+        """
+
+        def text_param(name, value):
+            return {'name': name, 'value': {'stringValue': value} if value else {'isNull': True}}
+
+        parameters = [
+            text_param('after_last', after_last),
+            text_param('after_first', after_first),
+            text_param('after_id', after_id),
+            {'name': 'min_hba1c', 'value': {'doubleValue': float(min_hba1c)} if min_hba1c is not None else {'isNull': True}},
+            {'name': 'fetch_size', 'value': {'longValue': page_size + 1}}
+        ]
+
+        response = rds_data_client.execute_statement(
+            resourceArn=db_cluster_arn,
+            secretArn=secret_arn,
+            database=database_name,
+            sql=sql_query,
+            parameters=parameters
+        )
+
+        fields = [
+            'patient_id', 'medical_record_number', 'first_name', 'last_name', 'date_of_birth', 'gender',
+            'diabetes_type', 'icd10_code', 'diagnosis_date', 'latest_hba1c', 'latest_hba1c_date'
+        ]
+        patients, next_cursor = _patient_page(response.get('records') or [], fields, page_size)
+
+        logger.info(f"Diabetes cohort page returned {len(patients)} patient(s)")
+
+        return {
+            'status': 'success',
+            'message': f'Found {len(patients)} diabetes patient(s) on this page',
+            'patients': patients,
+            'count': len(patients),
+            'next_cursor': next_cursor
+        }
+
+    except Exception as e:
+        logger.error(f"Error retrieving diabetes cohort: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error retrieving diabetes cohort',
+            'error_type': type(e).__name__
+        }
+
+
 def get_patient_medications(patient_id: str, active_only: bool = False):
     """Retrieve medications for a specific patient.
 
@@ -203,6 +558,186 @@ def get_patient_medications(patient_id: str, active_only: bool = False):
         }
 
 
+def search_patient_medications(patient_id: str, query: str, active_only: bool = False, limit: int = 5):
+    """Search a patient's medications by name with trigram and brand/generic matching.
+
+    The query is expanded through medication_synonyms (e.g. Glucophage -> metformin)
+    and each medication is scored by pg_trgm word similarity against its brand and
+    generic names. Active medications rank first; within each group direct name
+    matches rank ahead of synonym matches.
+
+    Args:
+        patient_id: Patient's UUID (Cognito ID)
+        query: Medication name as typed by the user
+        active_only: If True, only match active medications
+        limit: Maximum number of ranked matches to return
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        # Log access without PHI (the search term may reveal a condition)
+        logger.info(f"Searching patient medications (active_only={active_only})")
+
+        sql_query = """
+            WITH search_terms AS (
+                SELECT lower(:query) AS term, FALSE AS via_synonym
+                UNION
+                SELECT lower(s.generic_name), TRUE
+                FROM medication_synonyms s
+                WHERE lower(:query) <% lower(s.brand_name)
+                UNION
+                SELECT lower(s.brand_name), TRUE
+                FROM medication_synonyms s
+                WHERE lower(:query) <% lower(s.generic_name)
+            ),
+            scored AS (
+                SELECT DISTINCT ON (m.medication_id)
+                    m.medication_id, m.medication_name, m.generic_name, m.dosage, m.frequency,
+                    m.route, m.medication_status, m.instructions, m.prescription_date,
+                    t.term AS matched_term, t.via_synonym,
+                    GREATEST(
+                        word_similarity(t.term, lower(m.medication_name)),
+                        word_similarity(t.term, lower(m.generic_name))
+                    ) AS score
+                FROM medications m
+                JOIN search_terms t
+                  ON t.term <% lower(m.medication_name)
+                  OR t.term <% lower(m.generic_name)
+                WHERE m.patient_id = :patient_id::uuid
+                  AND (:active_only = FALSE OR m.medication_status = 'Active')
+                ORDER BY m.medication_id, t.via_synonym, score DESC
+            )
+            SELECT medication_id, medication_name, generic_name, dosage, frequency,
+                   route, medication_status, instructions, prescription_date,
+                   matched_term, via_synonym, round(score::numeric, 3)::float8
+            FROM scored
+            -- Active medications first, so a short list is not filled by discontinued ones
+            ORDER BY medication_status IS DISTINCT FROM 'Active', via_synonym, score DESC, prescription_date DESC
+            LIMIT :limit
+        """
+
+        parameters = [
+            {'name': 'patient_id', 'value': {'stringValue': patient_id}},
+            {'name': 'query', 'value': {'stringValue': query.strip()}},
+            {'name': 'active_only', 'value': {'booleanValue': active_only}},
+            {'name': 'limit', 'value': {'longValue': max(1, min(int(limit), MAX_MEDICATION_MATCHES))}}
+        ]
+
+        response = rds_data_client.execute_statement(
+            resourceArn=db_cluster_arn,
+            secretArn=secret_arn,
+            database=database_name,
+            sql=sql_query,
+            parameters=parameters
+        )
+
+        fields = [
+            'medication_id', 'medication_name', 'generic_name', 'dosage', 'frequency',
+            'route', 'medication_status', 'instructions', 'prescription_date',
+            'matched_term', 'matched_via_synonym', 'match_score'
+        ]
+
+        matches = []
+        for record in response.get('records') or []:
+            match = {}
+            for field, value in zip(fields, record):
+                if 'stringValue' in value:
+                    match[field] = value['stringValue']
+                elif 'doubleValue' in value:
+                    match[field] = value['doubleValue']
+                elif 'booleanValue' in value:
+                    match[field] = value['booleanValue']
+                elif 'longValue' in value:
+                    match[field] = value['longValue']
+                else:
+                    match[field] = None
+            matches.append(match)
+
+        logger.info(f"Medication search returned {len(matches)} match(es)")
+
+        return {
+            'status': 'success',
+            'message': f'Found {len(matches)} matching medication(s)',
+            'matches': matches,
+            'count': len(matches),
+            'active_only': active_only
+        }
+
+    except Exception as e:
+        logger.error(f"Error searching medications: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error searching medications',
+            'error_type': type(e).__name__
+        }
+
+
+def get_drug_interaction_table():
+    """Return the drug interaction reference tables for in-process checking.
+
+    The agent loads this once and caches it, so medication lists are checked
+    against an in-memory graph instead of one query per medication. Contains no PHI.
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        logger.info("Retrieving drug interaction table")
+
+        db_args = {
+            'resourceArn': db_cluster_arn,
+            'secretArn': secret_arn,
+            'database': database_name
+        }
+        queries = {
+            'ingredients': "SELECT ingredient_id, ingredient_name, drug_class FROM drug_ingredients",
+            'interactions': """
+                SELECT ingredient_a, ingredient_b, severity, description, management
+                FROM drug_interactions
+            """,
+            'synonyms': "SELECT brand_name, generic_name FROM medication_synonyms"
+        }
+
+        table = {}
+        for key, sql_query in queries.items():
+            response = rds_data_client.execute_statement(sql=sql_query, **db_args)
+            table[key] = [
+                [None if value.get('isNull') else value.get('stringValue') for value in record]
+                for record in response.get('records') or []
+            ]
+
+        logger.info(f"Retrieved {len(table['interactions'])} drug interaction(s)")
+
+        return {
+            'status': 'success',
+            'message': f"Loaded {len(table['interactions'])} drug interaction(s)",
+            **table
+        }
+
+    except Exception as e:
+        logger.error(f"Error retrieving drug interactions: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error retrieving drug interactions',
+            'error_type': type(e).__name__
+        }
+
+
 def get_patient_appointments(patient_id: str, status: str = None, start_date: str = None, end_date: str = None):
     """Retrieve appointments for a specific patient with optional filters."""
     try:
@@ -313,66 +848,1227 @@ def get_patient_appointments(patient_id: str, status: str = None, start_date: st
         }
 
 
-def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
+def get_patient_summary(patient_id: str):
     """
-    Patient-Facing Database Handler with PHI-Safe Logging
-    
-    Available Actions:
-    - health_check: Check Lambda function health
-    - test_db_connection: Test database connectivity
-    - get_patient_medications: Get medications for authenticated patient
+    Retrieve the patient's health summary (single-row lookup on patient_summary_cache).
     
-    Security:
-    - PHI-safe logging (no patient data in logs)
-    - Patient-facing only (admin functions removed)
-    - Requires patient_id from authenticated context
+    The cache is kept current by triggers on the clinical tables; if a patient
+    has no cached row yet the view reports zero counts and no latest values.
     """
-    
     try:
-
-        # Parse body for Lambda Function URL requests
-        if event.get('body'):
-            try:
-                body_data = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
-                event.update(body_data)
-            except (json.JSONDecodeError, TypeError):
-                logger.warning("Could not parse request body")
-        # Extract parameters from queryStringParameters (Lambda Function URL) or direct event (API Gateway)
-        params = event.get('queryStringParameters') or {}
-        action = params.get('action') or event.get('action', 'unknown')
-
-        # Log request without PHI
-        logger.info(f"Request received - action: {action}")
-        
-        headers = {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-        }
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
         
-        if event.get('httpMethod') == 'OPTIONS':
+        if not db_cluster_arn or not secret_arn:
             return {
-                'statusCode': 200,
-                'headers': headers,
-                'body': json.dumps({'message': 'CORS preflight'})
+                'status': 'error',
+                'message': 'Missing required environment variables'
             }
         
-        # Health check and database connection test
-        if action == 'test_db_connection':
-            db_test_result = test_database_connection()
+        logger.info("Retrieving patient summary")
+        
+        sql_query = """
+            SELECT 
+                patient_id, first_name, age::int, gender,
+                last_visit_date, last_visit_type, last_provider,
+                active_conditions_count, active_medications_count, known_allergies_count,
+                last_vitals_date, systolic_bp, diastolic_bp, heart_rate,
+                temperature::float, weight::float, bmi::float,
+                refreshed_at
+            FROM patient_summary
+            WHERE patient_id = :patient_id::uuid
+        """
+        
+        response = rds_data_client.execute_statement(
+            resourceArn=db_cluster_arn,
+            secretArn=secret_arn,
+            database=database_name,
+            sql=sql_query,
+            parameters=[{'name': 'patient_id', 'value': {'stringValue': patient_id}}]
+        )
+        
+        records = response.get('records') or []
+        if not records:
             return {
-                'statusCode': 200 if db_test_result['status'] != 'error' else 500,
-                'headers': headers,
-                'body': json.dumps(db_test_result)
+                'status': 'not_found',
+                'message': 'No active patient record found'
             }
         
-        # Patient-facing: Get medications for authenticated user
-        if action == 'get_patient_medications':
-            patient_id = params.get('patient_id') or event.get('patient_id')
-            active_only_str = params.get('active_only') or event.get('active_only', 'false')
-            # Convert string to boolean (Lambda Function URL sends query params as strings)
-            active_only = active_only_str in ['true', 'True', '1', True] if isinstance(active_only_str, (str, bool)) else False
+        fields = [
+            'patient_id', 'first_name', 'age', 'gender',
+            'last_visit_date', 'last_visit_type', 'last_provider',
+            'active_conditions_count', 'active_medications_count', 'known_allergies_count',
+            'last_vitals_date', 'systolic_bp', 'diastolic_bp', 'heart_rate',
+            'temperature', 'weight', 'bmi',
+            'refreshed_at'
+        ]
+        summary = {}
+        for field, value in zip(fields, records[0]):
+            if value.get('isNull'):
+                summary[field] = None
+            else:
+                summary[field] = next(iter(value.values()))
+        
+        return {
+            'status': 'success',
+            'message': 'Patient summary retrieved',
+            'summary': summary
+        }
+        
+    except Exception as e:
+        logger.error(f"Error retrieving patient summary: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error retrieving patient summary',
+            'error_type': type(e).__name__
+        }
+
+def search_clinical_documents(patient_id: str, query: str, document_type: str = None,
+                              page_size: int = DEFAULT_DOCUMENT_PAGE_SIZE, cursor: str = None):
+    """Ranked full-text search over the patient's own clinical documents.
+
+    Matches come from the (patient_id, document_tsv) GIN index; only the rows on
+    the returned page are passed through ts_headline, and only snippets (never
+    whole documents) are returned. Drafts, deleted and non-Normal confidentiality
+    documents are excluded. Results are ordered by ts_rank_cd and paginated by
+    keyset on (score, document_id).
+
+    Args:
+        patient_id: Authenticated patient's ID
+        query: Web-search style query ("quoted phrase", or, -exclude)
+        document_type: Optional exact document type filter
+        page_size: Documents per page (capped at MAX_DOCUMENT_PAGE_SIZE)
+        cursor: next_cursor from the previous page
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        # Log access without PHI (query text may contain clinical terms)
+        logger.info("Searching clinical documents")
+
+        page_size = max(1, min(int(page_size), MAX_DOCUMENT_PAGE_SIZE))
+        after_score, after_id = decode_page_cursor(cursor, 2)
+
+        sql_query = """
+            WITH q AS (
+                SELECT websearch_to_tsquery('english', :query) AS query
+            ),
+            ranked AS (
+                SELECT d.document_id, d.document_type, d.document_title, d.created_at,
+                       d.document_content, ts_rank_cd(d.document_tsv, q.query, 32)::float8 AS score
+                FROM clinical_documents d, q
+                WHERE d.patient_id = :patient_id::uuid
+                  AND d.document_tsv @@ q.query
+                  AND d.document_status IN ('Final', 'Amended')
+                  AND COALESCE(d.confidentiality_level, 'Normal') = 'Normal'
+                  AND (:document_type::text IS NULL OR d.document_type = :document_type)
+            ),
+            page AS (
+                SELECT *
+                FROM ranked
+                WHERE :after_id::uuid IS NULL
+                   OR (score, document_id) < (:after_score::float8, :after_id::uuid)
+                ORDER BY score DESC, document_id DESC
+                LIMIT :fetch_size
+            )
+            SELECT page.document_id::text, page.document_type, page.document_title,
+                   page.created_at::text, page.score,
+                   ts_headline('english', page.document_content, q.query,
+                               'MaxFragments=2, MinWords=8, MaxWords=25, FragmentDelimiter=" … ", StartSel=**, StopSel=**')
+            FROM page, q
+            ORDER BY page.score DESC, page.document_id DESC
+        """
+
+        def text_param(name, value):
+            return {'name': name, 'value': {'stringValue': value} if value else {'isNull': True}}
+
+        parameters = [
+            {'name': 'patient_id', 'value': {'stringValue': patient_id}},
+            {'name': 'query', 'value': {'stringValue': query}},
+            text_param('document_type', document_type),
+            {'name': 'after_score', 'value': {'doubleValue': float(after_score)} if after_score is not None else {'isNull': True}},
+            text_param('after_id', after_id),
+            {'name': 'fetch_size', 'value': {'longValue': page_size + 1}}
+        ]
+
+        response = rds_data_client.execute_statement(
+            resourceArn=db_cluster_arn,
+            secretArn=secret_arn,
+            database=database_name,
+            sql=sql_query,
+            parameters=parameters
+        )
+
+        records = response.get('records') or []
+        fields = ['document_id', 'document_type', 'document_title', 'document_date', 'score', 'snippet']
+        documents = []
+        for record in records[:page_size]:
+            document = {}
+            for field, value in zip(fields, record):
+                document[field] = None if value.get('isNull') else next(iter(value.values()))
+            documents.append(document)
+
+        next_cursor = None
+        if len(records) > page_size and documents:
+            last = documents[-1]
+            next_cursor = encode_page_cursor([last['score'], last['document_id']])
+
+        logger.info(f"Document search returned {len(documents)} document(s)")
+
+        return {
+            'status': 'success',
+            'message': f'Found {len(documents)} matching document(s) on this page',
+            'documents': documents,
+            'count': len(documents),
+            'next_cursor': next_cursor
+        }
+
+    except Exception as e:
+        logger.error(f"Error searching clinical documents: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error searching clinical documents',
+            'error_type': type(e).__name__
+        }
+
+def vector_search_kb(query_embedding: list, kb_name: str, k: int = 5, patient_id: str = None,
+                     query_text: str = None, domain: str = None):
+    """Hybrid (vector + full-text) search over knowledge base chunks stored in pgvector.
+
+    Vector candidates come from the HNSW index on kb_chunks (cosine distance) and
+    lexical candidates from the content_tsv GIN index, where query terms are ORed
+    so a single exact hit (an ICD code, AREDS2, HbA1c) is enough. The two rankings
+    are merged with reciprocal rank fusion. When a patient_id is given, the
+    patient's own document chunks are ranked in the same statement, so general
+    guidance and personal records come back as one list without a second service
+    call. Document chunks follow the same visibility rules as
+    search_clinical_documents (Final/Amended, Normal confidentiality). A domain
+    restricts the KB side to chunks whose metadata domain matches, using the
+    (kb_name, domain) index so a small domain is scanned instead of the whole KB.
+
+    Args:
+        query_embedding: Normalized query embedding (EMBEDDING_DIMENSIONS floats)
+        kb_name: Knowledge base to search
+        k: Number of chunks to return (capped at MAX_VECTOR_RESULTS)
+        patient_id: Optional authenticated patient whose documents are included
+        query_text: Optional query text for the lexical pass; vector-only when omitted
+        domain: Optional metadata domain (e.g. 'diabetes', 'amd') the KB chunks must carry
+
+    Each result carries the fused score and the chunk's cosine similarity.
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        if not isinstance(query_embedding, list) or len(query_embedding) != EMBEDDING_DIMENSIONS:
+            return {
+                'status': 'error',
+                'message': f'query_embedding must be a list of {EMBEDDING_DIMENSIONS} floats'
+            }
+
+        logger.info(f"Vector search - hybrid: {bool(query_text)}, include_patient_documents: {bool(patient_id)}, "
+                    f"domain: {domain or 'all'}")
+
+        k = max(1, min(int(k), MAX_VECTOR_RESULTS))
+        embedding = '[' + ','.join(repr(float(x)) for x in query_embedding) + ']'
+
+        # ORDER BY must compare the column with the bound vector directly for the
+        # planner to pick the HNSW index. The kb_name/domain filters rely on the
+        # database's hnsw.iterative_scan setting (08_vector_retrieval.sql) to fill
+        # the candidate list; relaxed order is fine since vector_ranked re-sorts by
+        # distance. A patient's chunks are few, so they are scored exactly
+        # (tsvector computed on the fly).
+        sql_query = """
+            WITH q AS (
+                SELECT CASE WHEN CAST(:query_text AS TEXT) IS NULL THEN NULL
+                            ELSE replace(plainto_tsquery('english', :query_text)::text, '&', '|')::tsquery
+                       END AS query
+            ),
+            kb_vector AS (
+                SELECT c.chunk_id::text AS id, c.source_uri AS source, NULL::text AS document_id, c.content,
+                       c.embedding <=> CAST(:embedding AS vector) AS distance
+                FROM kb_chunks c
+                WHERE c.kb_name = :kb_name
+                  AND (CAST(:domain AS TEXT) IS NULL OR c.metadata->>'domain' = :domain)
+                ORDER BY c.embedding <=> CAST(:embedding AS vector)
+                LIMIT :candidates
+            ),
+            kb_lexical AS (
+                SELECT c.chunk_id::text AS id, c.source_uri AS source, NULL::text AS document_id, c.content,
+                       c.embedding <=> CAST(:embedding AS vector) AS distance,
+                       ts_rank_cd(c.content_tsv, q.query) AS lexical_score
+                FROM kb_chunks c, q
+                WHERE c.kb_name = :kb_name
+                  AND (CAST(:domain AS TEXT) IS NULL OR c.metadata->>'domain' = :domain)
+                  AND c.content_tsv @@ q.query
+                ORDER BY lexical_score DESC
+                LIMIT :candidates
+            ),
+            doc_chunks AS (
+                SELECT dc.document_id::text || ':' || dc.chunk_index AS id,
+                       d.document_type || ': ' || COALESCE(d.document_title, '') AS source,
+                       d.document_id::text AS document_id, dc.content,
+                       dc.embedding <=> CAST(:embedding AS vector) AS distance,
+                       ts_rank_cd(to_tsvector('english', dc.content), q.query) AS lexical_score,
+                       to_tsvector('english', dc.content) @@ q.query AS lexical_match
+                FROM clinical_document_chunks dc
+                JOIN clinical_documents d ON d.document_id = dc.document_id
+                CROSS JOIN q
+                WHERE :patient_id::uuid IS NOT NULL
+                  AND dc.patient_id = :patient_id::uuid
+                  AND d.document_status IN ('Final', 'Amended')
+                  AND COALESCE(d.confidentiality_level, 'Normal') = 'Normal'
+            ),
+            vector_ranked AS (
+                SELECT origin, id, source, document_id, content, distance,
+                       ROW_NUMBER() OVER (ORDER BY distance) AS rank
+                FROM (SELECT 'kb'::text AS origin, id, source, document_id, content, distance FROM kb_vector
+                      UNION ALL
+                      SELECT 'patient_document', id, source, document_id, content, distance FROM doc_chunks) v
+            ),
+            lexical_ranked AS (
+                SELECT origin, id, source, document_id, content, distance,
+                       ROW_NUMBER() OVER (ORDER BY lexical_score DESC) AS rank
+                FROM (SELECT 'kb'::text AS origin, id, source, document_id, content, distance, lexical_score
+                      FROM kb_lexical
+                      UNION ALL
+                      SELECT 'patient_document', id, source, document_id, content, distance, lexical_score
+                      FROM doc_chunks WHERE lexical_match) l
+            )
+            SELECT origin, source, document_id, content, SUM(1.0 / (:rrf_k + rank))::float8 AS score,
+                   (1 - MIN(distance))::float8 AS similarity
+            FROM (SELECT * FROM vector_ranked WHERE rank <= :candidates
+                  UNION ALL
+                  SELECT * FROM lexical_ranked WHERE rank <= :candidates) fused
+            GROUP BY origin, id, source, document_id, content
+            ORDER BY score DESC
+            LIMIT :k
+        """
+
+        parameters = [
+            {'name': 'embedding', 'value': {'stringValue': embedding}},
+            {'name': 'kb_name', 'value': {'stringValue': kb_name}},
+            {'name': 'patient_id', 'value': {'stringValue': patient_id} if patient_id else {'isNull': True}},
+            {'name': 'query_text', 'value': {'stringValue': query_text} if query_text else {'isNull': True}},
+            {'name': 'domain', 'value': {'stringValue': domain} if domain else {'isNull': True}},
+            {'name': 'candidates', 'value': {'longValue': HYBRID_CANDIDATES}},
+            {'name': 'rrf_k', 'value': {'longValue': RRF_K}},
+            {'name': 'k', 'value': {'longValue': k}}
+        ]
+
+        response = rds_data_client.execute_statement(
+            resourceArn=db_cluster_arn,
+            secretArn=secret_arn,
+            database=database_name,
+            sql=sql_query,
+            parameters=parameters
+        )
+
+        fields = ['origin', 'source', 'document_id', 'content', 'score', 'similarity']
+        results = []
+        for record in response.get('records') or []:
+            result = {}
+            for field, value in zip(fields, record):
+                result[field] = None if value.get('isNull') else next(iter(value.values()))
+            results.append(result)
+
+        logger.info(f"Vector search returned {len(results)} chunk(s)")
+
+        return {
+            'status': 'success',
+            'message': f'Found {len(results)} matching chunk(s)',
+            'results': results,
+            'count': len(results)
+        }
+
+    except Exception as e:
+        logger.error(f"Error in vector search: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error in vector search',
+            'error_type': type(e).__name__
+        }
+
+def find_available_slots(
+    specialty: str = None,
+    provider_id: str = None,
+    city: str = None,
+    zip_code: str = None,
+    start_date: str = None,
+    horizon_days: int = 14,
+    duration_minutes: int = 30,
+    limit: int = 5
+):
+    """Find the earliest free appointment slots.
+
+    Candidate slots are generated from provider_schedules for matching providers
+    only, then each is probed against the GiST index behind the
+    appointments_no_provider_overlap constraint. Cost scales with the candidate
+    slots examined, not with the size of the appointments table.
+
+    Args:
+        specialty: Provider specialty, fuzzy matched (e.g. "endocrinology")
+        provider_id: Restrict to one provider
+        city: Facility city
+        zip_code: Facility ZIP code or prefix
+        start_date: First date to search YYYY-MM-DD (defaults to today)
+        horizon_days: Days to search ahead (capped at MAX_AVAILABILITY_HORIZON_DAYS)
+        duration_minutes: Required free time
+        limit: Number of slots to return (capped at MAX_AVAILABLE_SLOTS)
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        logger.info("Searching available appointment slots")
+
+        sql_query = """
+            WITH days AS (
+                SELECT d::date AS slot_date
+                FROM generate_series(
+                    -- From yesterday's UTC date: clinics west of UTC may still be on it;
+                    -- past slots are removed against each clinic's local time below
+                    GREATEST(COALESCE(:start_date::date, CURRENT_DATE - 1), CURRENT_DATE - 1),
+                    GREATEST(COALESCE(:start_date::date, CURRENT_DATE), CURRENT_DATE) + :horizon_days,
+                    interval '1 day'
+                ) d
+            ),
+            candidates AS (
+                SELECT s.provider_id, s.facility_id, slot_start
+                FROM provider_schedules s
+                JOIN healthcare_providers hp ON hp.provider_id = s.provider_id
+                LEFT JOIN medical_facilities mf ON mf.facility_id = s.facility_id
+                JOIN days ON EXTRACT(DOW FROM days.slot_date) = s.day_of_week
+                CROSS JOIN LATERAL generate_series(
+                    days.slot_date + s.start_time,
+                    days.slot_date + s.end_time - make_interval(mins => :duration),
+                    make_interval(mins => s.slot_minutes)
+                ) slot_start
+                WHERE s.active
+                  AND hp.active IS NOT FALSE
+                  AND days.slot_date >= s.effective_from
+                  AND (s.effective_to IS NULL OR days.slot_date <= s.effective_to)
+                  AND slot_start > now() AT TIME ZONE COALESCE(mf.time_zone, :clinic_tz)
+                  AND (:provider_id::uuid IS NULL OR s.provider_id = :provider_id::uuid)
+                  AND (:specialty::text IS NULL
+                       OR lower(hp.specialty) LIKE '%' || lower(:specialty) || '%'
+                       OR lower(:specialty) <% lower(hp.specialty))
+                  AND (:city::text IS NULL OR lower(mf.city) = lower(:city))
+                  AND (:zip_code::text IS NULL OR mf.zip_code LIKE :zip_code || '%')
+            )
+            SELECT c.provider_id::text,
+                   hp.first_name || ' ' || hp.last_name,
+                   hp.title, hp.specialty,
+                   c.facility_id::text, mf.facility_name, mf.city, mf.state,
+                   c.slot_start::date::text,
+                   to_char(c.slot_start, 'HH24:MI')
+            FROM candidates c
+            JOIN healthcare_providers hp ON hp.provider_id = c.provider_id
+            LEFT JOIN medical_facilities mf ON mf.facility_id = c.facility_id
+            -- Status list must match appointments_no_provider_overlap so its GiST index is used
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM appointments a
+                WHERE a.provider_id = c.provider_id
+                  AND a.appointment_status IN ('Scheduled', 'Confirmed', 'Checked In')
+                  AND a.appointment_period && tstzrange(
+                      timezone('UTC', c.slot_start),
+                      timezone('UTC', c.slot_start) + make_interval(mins => :duration),
+                      '[)'
+                  )
+            )
+            ORDER BY c.slot_start, hp.last_name
+            LIMIT :limit
+        """
+
+        def text_param(name, value):
+            return {'name': name, 'value': {'stringValue': str(value)} if value else {'isNull': True}}
+
+        parameters = [
+            text_param('specialty', specialty),
+            text_param('provider_id', provider_id),
+            text_param('city', city),
+            text_param('zip_code', zip_code),
+            text_param('start_date', start_date),
+            text_param('clinic_tz', CLINIC_TIME_ZONE),
+            {'name': 'horizon_days', 'value': {'longValue': max(1, min(int(horizon_days), MAX_AVAILABILITY_HORIZON_DAYS))}},
+            {'name': 'duration', 'value': {'longValue': max(5, int(duration_minutes))}},
+            {'name': 'limit', 'value': {'longValue': max(1, min(int(limit), MAX_AVAILABLE_SLOTS))}}
+        ]
+
+        response = rds_data_client.execute_statement(
+            resourceArn=db_cluster_arn,
+            secretArn=secret_arn,
+            database=database_name,
+            sql=sql_query,
+            parameters=parameters
+        )
+
+        fields = [
+            'provider_id', 'provider_name', 'provider_title', 'provider_specialty',
+            'facility_id', 'facility_name', 'facility_city', 'facility_state',
+            'scheduled_date', 'scheduled_time'
+        ]
+        slots = [
+            {field: value.get('stringValue') for field, value in zip(fields, record)}
+            for record in response.get('records') or []
+        ]
+
+        logger.info(f"Found {len(slots)} available slot(s)")
+
+        return {
+            'status': 'success',
+            'message': f'Found {len(slots)} available slot(s)',
+            'slots': slots,
+            'count': len(slots),
+            'duration_minutes': int(duration_minutes)
+        }
+
+    except Exception as e:
+        logger.error(f"Error searching availability: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error searching available appointments',
+            'error_type': type(e).__name__
+        }
+
+
+def book_appointment(
+    patient_id: str,
+    provider_id: str,
+    scheduled_date: str,
+    scheduled_time: str,
+    appointment_type: str,
+    idempotency_key: str,
+    appointment_reason: str = None,
+    facility_id: str = None,
+    duration_minutes: int = 30,
+    scheduling_notes: str = None
+):
+    """Book an appointment idempotently and without double booking.
+
+    Retries with the same idempotency_key return the original appointment while
+    it is still active; a key left on a cancelled or completed appointment is
+    released and a new appointment is booked.
+    Overlaps are rejected by the appointments_no_provider_overlap exclusion
+    constraint, so concurrent requests for the same slot cannot both succeed
+    regardless of isolation level. The slot must fall inside the provider's schedule.
+
+    Returns:
+        status 'success' (new or replayed), 'conflict' (slot taken),
+        'unavailable' (outside provider schedule) or 'error'
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        logger.info("Booking appointment")
+
+        db_args = {
+            'resourceArn': db_cluster_arn,
+            'secretArn': secret_arn,
+            'database': database_name
+        }
+
+        def text_param(name, value):
+            return {'name': name, 'value': {'stringValue': str(value)} if value else {'isNull': True}}
+
+        parameters = [
+            text_param('patient_id', patient_id),
+            text_param('provider_id', provider_id),
+            text_param('facility_id', facility_id),
+            text_param('scheduled_date', scheduled_date),
+            text_param('scheduled_time', scheduled_time),
+            text_param('appointment_type', appointment_type),
+            text_param('appointment_reason', appointment_reason),
+            text_param('scheduling_notes', scheduling_notes),
+            text_param('idempotency_key', idempotency_key),
+            text_param('clinic_tz', CLINIC_TIME_ZONE),
+            {'name': 'duration', 'value': {'longValue': int(duration_minutes)}}
+        ]
+
+        insert_sql = """
+            INSERT INTO appointments (
+                patient_id, provider_id, facility_id, appointment_type, appointment_reason,
+                scheduled_date, scheduled_time, duration_minutes, appointment_status,
+                scheduling_notes, idempotency_key, created_by
+            )
+            SELECT :patient_id::uuid, :provider_id::uuid, COALESCE(:facility_id::uuid, s.facility_id),
+                   :appointment_type, :appointment_reason,
+                   :scheduled_date::date, :scheduled_time::time, :duration, 'Scheduled',
+                   :scheduling_notes, :idempotency_key, :patient_id::uuid
+            FROM provider_schedules s
+            WHERE s.provider_id = :provider_id::uuid
+              AND s.active
+              AND s.day_of_week = EXTRACT(DOW FROM :scheduled_date::date)
+              AND :scheduled_date::date >= s.effective_from
+              AND (s.effective_to IS NULL OR :scheduled_date::date <= s.effective_to)
+              AND :scheduled_time::time >= s.start_time
+              AND :scheduled_time::time + make_interval(mins => :duration) <= s.end_time
+              AND :scheduled_date::date + :scheduled_time::time > now() AT TIME ZONE COALESCE(
+                  (SELECT mf.time_zone FROM medical_facilities mf
+                   WHERE mf.facility_id = COALESCE(:facility_id::uuid, s.facility_id)),
+                  :clinic_tz)
+            LIMIT 1
+            ON CONFLICT (idempotency_key) DO NOTHING
+            RETURNING appointment_id::text
+        """
+
+        for attempt in range(2):
+            try:
+                response = rds_data_client.execute_statement(sql=insert_sql, parameters=parameters, **db_args)
+            except rds_data_client.exceptions.BadRequestException as e:
+                # 23P01 exclusion_violation: someone else holds an overlapping slot
+                if 'appointments_no_provider_overlap' in str(e) or '23P01' in str(e):
+                    logger.info("Booking rejected: slot already taken")
+                    return {
+                        'status': 'conflict',
+                        'message': 'That time is no longer available with this provider'
+                    }
+                raise
+
+            records = response.get('records') or []
+            if records:
+                logger.info("Appointment booked")
+                return {
+                    'status': 'success',
+                    'message': 'Appointment booked',
+                    'appointment_id': records[0][0]['stringValue'],
+                    'replayed': False
+                }
+
+            # Nothing inserted: either a replay of an earlier request or a slot outside the schedule
+            existing = rds_data_client.execute_statement(
+                sql="""
+                    SELECT appointment_id::text, appointment_status
+                    FROM appointments
+                    WHERE idempotency_key = :idempotency_key
+                      AND patient_id = :patient_id::uuid
+                """,
+                parameters=[text_param('idempotency_key', idempotency_key), text_param('patient_id', patient_id)],
+                **db_args
+            )
+            existing_records = existing.get('records') or []
+            if not existing_records:
+                break
+
+            appointment_id = existing_records[0][0]['stringValue']
+            appointment_status = existing_records[0][1].get('stringValue')
+            if appointment_status in ACTIVE_APPOINTMENT_STATUSES:
+                logger.info("Idempotent replay of earlier booking")
+                return {
+                    'status': 'success',
+                    'message': 'Appointment already booked',
+                    'appointment_id': appointment_id,
+                    'appointment_status': appointment_status,
+                    'replayed': True
+                }
+
+            # The key belongs to a cancelled or finished visit; free it and book a new row
+            logger.info("Idempotency key held by an inactive appointment, booking anew")
+            rds_data_client.execute_statement(
+                sql="""
+                    UPDATE appointments
+                    SET idempotency_key = NULL, updated_at = CURRENT_TIMESTAMP
+                    WHERE appointment_id = :appointment_id::uuid
+                """,
+                parameters=[text_param('appointment_id', appointment_id)],
+                **db_args
+            )
+
+        return {
+            'status': 'unavailable',
+            'message': 'The provider does not have office hours at that time'
+        }
+
+    except Exception as e:
+        logger.error(f"Error booking appointment: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error booking appointment',
+            'error_type': type(e).__name__
+        }
+
+
+def get_cgm_readings(patient_id: str, start_date: str = None, end_date: str = None):
+    """Retrieve CGM readings for a patient as columnar arrays.
+
+    Returns parallel lists of epoch-second timestamps and mg/dL values, which the
+    agent's glucose analytics consume directly without per-row dictionaries.
+
+    Args:
+        patient_id: Patient's UUID (Cognito ID)
+        start_date: Inclusive start date YYYY-MM-DD (defaults to 14 days ago)
+        end_date: Inclusive end date YYYY-MM-DD (defaults to today)
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        # Log access without PHI
+        logger.info("Retrieving CGM readings")
+
+        # Window is capped so the response stays well under the Data API 1 MB limit
+        sql_query = """
+            SELECT EXTRACT(EPOCH FROM reading_timestamp)::bigint, glucose_value
+            FROM cgm_readings
+            WHERE patient_id = :patient_id::uuid
+              AND reading_timestamp >= GREATEST(
+                  COALESCE(:start_date::date, CURRENT_DATE - 14),
+                  COALESCE(:end_date::date, CURRENT_DATE) - :max_days
+              )
+              AND reading_timestamp < COALESCE(:end_date::date, CURRENT_DATE) + 1
+              AND sensor_error IS NOT TRUE
+            ORDER BY reading_timestamp
+        """
+
+        parameters = [
+            {'name': 'patient_id', 'value': {'stringValue': patient_id}},
+            {'name': 'start_date', 'value': {'stringValue': start_date} if start_date else {'isNull': True}},
+            {'name': 'end_date', 'value': {'stringValue': end_date} if end_date else {'isNull': True}},
+            {'name': 'max_days', 'value': {'longValue': MAX_CGM_WINDOW_DAYS}}
+        ]
+
+        response = rds_data_client.execute_statement(
+            resourceArn=db_cluster_arn,
+            secretArn=secret_arn,
+            database=database_name,
+            sql=sql_query,
+            parameters=parameters
+        )
+
+        records = response.get('records') or []
+        timestamps = [record[0]['longValue'] for record in records]
+        glucose_values = [record[1]['longValue'] for record in records]
+
+        logger.info(f"Retrieved {len(timestamps)} CGM readings")
+
+        return {
+            'status': 'success',
+            'message': f'Found {len(timestamps)} CGM reading(s)',
+            'timestamps': timestamps,
+            'glucose_values': glucose_values,
+            'count': len(timestamps)
+        }
+
+    except Exception as e:
+        logger.error(f"Error retrieving CGM readings: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error retrieving CGM readings',
+            'error_type': type(e).__name__
+        }
+
+
+def get_cgm_daily_series(patient_id: str, start_date: str = None, end_date: str = None):
+    """Retrieve compact per-day CGM blobs for a patient.
+
+    Blobs are returned base64-encoded exactly as stored; the agent decodes them
+    with cgm_codec.decode_days. A day is about 0.5 KB, so a full 30-day window
+    is a small fraction of the equivalent row-per-reading response.
+
+    Args:
+        patient_id: Patient's UUID (Cognito ID)
+        start_date: Inclusive start date YYYY-MM-DD (defaults to 14 days ago)
+        end_date: Inclusive end date YYYY-MM-DD (defaults to today)
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        # Log access without PHI
+        logger.info("Retrieving CGM daily series")
+
+        sql_query = """
+            SELECT series_date::text, codec_version, valid_count,
+                   validity_bitmap, glucose_deltas, trend_codes
+            FROM cgm_daily_series
+            WHERE patient_id = :patient_id::uuid
+              AND series_date >= GREATEST(
+                  COALESCE(:start_date::date, CURRENT_DATE - 14),
+                  COALESCE(:end_date::date, CURRENT_DATE) - :max_days
+              )
+              AND series_date <= COALESCE(:end_date::date, CURRENT_DATE)
+            ORDER BY series_date
+        """
+
+        parameters = [
+            {'name': 'patient_id', 'value': {'stringValue': patient_id}},
+            {'name': 'start_date', 'value': {'stringValue': start_date} if start_date else {'isNull': True}},
+            {'name': 'end_date', 'value': {'stringValue': end_date} if end_date else {'isNull': True}},
+            {'name': 'max_days', 'value': {'longValue': MAX_CGM_WINDOW_DAYS}}
+        ]
+
+        response = rds_data_client.execute_statement(
+            resourceArn=db_cluster_arn,
+            secretArn=secret_arn,
+            database=database_name,
+            sql=sql_query,
+            parameters=parameters
+        )
+
+        days = []
+        for record in response.get('records') or []:
+            days.append({
+                'series_date': record[0]['stringValue'],
+                'codec_version': record[1]['longValue'],
+                'valid_count': record[2]['longValue'],
+                'validity_bitmap': base64.b64encode(record[3]['blobValue']).decode('ascii'),
+                'glucose_deltas': base64.b64encode(record[4]['blobValue']).decode('ascii'),
+                'trend_codes': base64.b64encode(record[5]['blobValue']).decode('ascii') if 'blobValue' in record[5] else None
+            })
+
+        logger.info(f"Retrieved {len(days)} CGM day(s)")
+
+        return {
+            'status': 'success',
+            'message': f'Found {len(days)} day(s) of CGM data',
+            'days': days,
+            'count': len(days)
+        }
+
+    except Exception as e:
+        logger.error(f"Error retrieving CGM daily series: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error retrieving CGM daily series',
+            'error_type': type(e).__name__
+        }
+
+
+def evaluate_cgm_alerts(patient_id: str):
+    """Evaluate alert flags for CGM readings ingested since the last run.
+
+    Resumes the patient's streaming alert state from cgm_alert_state, feeds it the
+    readings past the ingestion watermark, writes the alert flags and trend back to
+    cgm_readings in batches and checkpoints the state.
+
+    Args:
+        patient_id: Patient's UUID (Cognito ID)
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        # Log access without PHI
+        logger.info("Evaluating CGM alerts")
+
+        db_args = {
+            'resourceArn': db_cluster_arn,
+            'secretArn': secret_arn,
+            'database': database_name
+        }
+        patient_param = {'name': 'patient_id', 'value': {'stringValue': patient_id}}
+
+        state_response = rds_data_client.execute_statement(
+            sql="""
+                SELECT engine_state::text,
+                       EXTRACT(EPOCH FROM watermark_created_at)::float8,
+                       EXTRACT(EPOCH FROM watermark_reading_at)::float8
+                FROM cgm_alert_state
+                WHERE patient_id = :patient_id::uuid
+            """,
+            parameters=[patient_param],
+            **db_args
+        )
+
+        engine = CGMAlertEngine()
+        watermark_created = None
+        watermark_reading = None
+        state_records = state_response.get('records') or []
+        if state_records:
+            row = state_records[0]
+            engine.restore(patient_id, json.loads(row[0]['stringValue']))
+            watermark_created = row[1].get('doubleValue')
+            watermark_reading = row[2].get('doubleValue')
+
+        # Keyset scan in ingestion order so late uploads are picked up exactly once
+        readings_response = rds_data_client.execute_statement(
+            sql="""
+                SELECT cgm_reading_id::text,
+                       EXTRACT(EPOCH FROM reading_timestamp)::float8,
+                       glucose_value,
+                       EXTRACT(EPOCH FROM created_at)::float8
+                FROM cgm_readings
+                WHERE patient_id = :patient_id::uuid
+                  AND sensor_error IS NOT TRUE
+                  AND (:wm_created::float8 IS NULL
+                       OR (created_at, reading_timestamp) > (to_timestamp(:wm_created::float8), to_timestamp(:wm_reading::float8)))
+                ORDER BY created_at, reading_timestamp
+                LIMIT :batch_limit
+            """,
+            parameters=[
+                patient_param,
+                {'name': 'wm_created', 'value': {'doubleValue': watermark_created} if watermark_created is not None else {'isNull': True}},
+                {'name': 'wm_reading', 'value': {'doubleValue': watermark_reading} if watermark_reading is not None else {'isNull': True}},
+                {'name': 'batch_limit', 'value': {'longValue': CGM_ALERT_BATCH_LIMIT}}
+            ],
+            **db_args
+        )
+
+        records = readings_response.get('records') or []
+        if not records:
+            return {
+                'status': 'success',
+                'message': 'No new CGM readings to evaluate',
+                'evaluated': 0,
+                'alerts_raised': {}
+            }
+
+        update_sets = []
+        alerts_raised = {}
+        for record in records:
+            evaluation = engine.process(patient_id, record[1]['doubleValue'], record[2]['longValue'])
+            if evaluation is None:
+                continue
+            for alert in evaluation.raised:
+                alerts_raised[alert] = alerts_raised.get(alert, 0) + 1
+            update_sets.append([
+                {'name': 'reading_id', 'value': {'stringValue': record[0]['stringValue']}},
+                {'name': 'low_alert', 'value': {'booleanValue': evaluation.low_glucose_alert}},
+                {'name': 'high_alert', 'value': {'booleanValue': evaluation.high_glucose_alert}},
+                {'name': 'predicted_low', 'value': {'booleanValue': evaluation.predicted_low_alert}},
+                {'name': 'trend', 'value': {'stringValue': evaluation.glucose_trend} if evaluation.glucose_trend else {'isNull': True}},
+                {'name': 'arrow', 'value': {'stringValue': evaluation.trend_arrow} if evaluation.trend_arrow else {'isNull': True}}
+            ])
+
+        # Late readings keep whatever trend they already had
+        update_sql = """
+            UPDATE cgm_readings
+            SET low_glucose_alert = :low_alert,
+                high_glucose_alert = :high_alert,
+                predicted_low_alert = :predicted_low,
+                glucose_trend = COALESCE(:trend, glucose_trend),
+                trend_arrow = COALESCE(:arrow, trend_arrow)
+            WHERE cgm_reading_id = :reading_id::uuid
+        """
+        for start in range(0, len(update_sets), CGM_ALERT_UPDATE_CHUNK):
+            rds_data_client.batch_execute_statement(
+                sql=update_sql,
+                parameterSets=update_sets[start:start + CGM_ALERT_UPDATE_CHUNK],
+                **db_args
+            )
+
+        last_record = records[-1]
+        rds_data_client.execute_statement(
+            sql="""
+                INSERT INTO cgm_alert_state (patient_id, engine_state, watermark_created_at, watermark_reading_at)
+                VALUES (:patient_id::uuid, :engine_state::jsonb, to_timestamp(:wm_created), to_timestamp(:wm_reading))
+                ON CONFLICT (patient_id) DO UPDATE
+                SET engine_state = EXCLUDED.engine_state,
+                    watermark_created_at = EXCLUDED.watermark_created_at,
+                    watermark_reading_at = EXCLUDED.watermark_reading_at
+            """,
+            parameters=[
+                patient_param,
+                {'name': 'engine_state', 'value': {'stringValue': json.dumps(engine.checkpoint(patient_id))}},
+                {'name': 'wm_created', 'value': {'doubleValue': last_record[3]['doubleValue']}},
+                {'name': 'wm_reading', 'value': {'doubleValue': last_record[1]['doubleValue']}}
+            ],
+            **db_args
+        )
+
+        logger.info(f"Evaluated {len(update_sets)} CGM readings, skipped {engine.duplicates} duplicate(s)")
+
+        return {
+            'status': 'success',
+            'message': f'Evaluated {len(update_sets)} CGM reading(s)',
+            'evaluated': len(update_sets),
+            'duplicates': engine.duplicates,
+            'late_readings': engine.late_readings,
+            'alerts_raised': alerts_raised,
+            'more_pending': len(records) == CGM_ALERT_BATCH_LIMIT
+        }
+
+    except Exception as e:
+        logger.error(f"Error evaluating CGM alerts: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error evaluating CGM alerts',
+            'error_type': type(e).__name__
+        }
+
+
+def sweep_cgm_alerts(context=None):
+    """Evaluate CGM alerts for every patient with readings past their alert watermark.
+
+    Invoked every minute by the CgmAlertSweepSchedule rule, so new readings are
+    flagged shortly after ingestion whatever path loaded them. Patients are taken
+    oldest pending ingestion first; a patient with more than one batch pending is
+    re-evaluated until caught up or the time budget runs out, and the rest wait
+    for the next sweep.
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        deadline = time.monotonic() + CGM_ALERT_SWEEP_BUDGET_SECONDS
+        if context is not None:
+            # Leave time to respond even when the function timeout is shorter than the budget
+            deadline = min(deadline, time.monotonic() + context.get_remaining_time_in_millis() / 1000 - 10)
+
+        response = rds_data_client.execute_statement(
+            resourceArn=db_cluster_arn,
+            secretArn=secret_arn,
+            database=database_name,
+            sql="""
+                SELECT r.patient_id::text
+                FROM cgm_readings r
+                LEFT JOIN cgm_alert_state s ON s.patient_id = r.patient_id
+                WHERE r.created_at > CURRENT_TIMESTAMP - make_interval(hours => :lookback_hours)
+                  AND r.sensor_error IS NOT TRUE
+                  AND (s.watermark_created_at IS NULL
+                       OR (r.created_at, r.reading_timestamp) > (s.watermark_created_at, s.watermark_reading_at))
+                GROUP BY r.patient_id
+                ORDER BY MIN(r.created_at)
+            """,
+            parameters=[{'name': 'lookback_hours', 'value': {'longValue': CGM_ALERT_SWEEP_LOOKBACK_HOURS}}]
+        )
+        patient_ids = [record[0]['stringValue'] for record in response.get('records') or []]
+
+        evaluated = 0
+        patients_done = 0
+        alerts_raised = {}
+        for patient_id in patient_ids:
+            while time.monotonic() < deadline:
+                result = evaluate_cgm_alerts(patient_id)
+                if result['status'] == 'error':
+                    break
+                evaluated += result['evaluated']
+                for alert, count in result['alerts_raised'].items():
+                    alerts_raised[alert] = alerts_raised.get(alert, 0) + count
+                if not result.get('more_pending'):
+                    patients_done += 1
+                    break
+            if time.monotonic() >= deadline:
+                break
+
+        logger.info(f"CGM alert sweep: {patients_done}/{len(patient_ids)} patient(s) caught up, {evaluated} reading(s)")
+
+        return {
+            'status': 'success',
+            'message': f'Evaluated {evaluated} CGM reading(s) for {patients_done} patient(s)',
+            'patients_pending': len(patient_ids),
+            'patients_caught_up': patients_done,
+            'evaluated': evaluated,
+            'alerts_raised': alerts_raised
+        }
+
+    except Exception as e:
+        logger.error(f"Error sweeping CGM alerts: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error sweeping CGM alerts',
+            'error_type': type(e).__name__
+        }
+
+
+def rollup_patient_access(days: int = ACCESS_ROLLUP_DAYS):
+    """Roll up past days of patient_access_log that are not in patient_access_daily yet.
+
+    Invoked nightly by the AccessRollupSchedule rule; the first run (or a run after
+    missed nights) backfills the whole window. It also keeps the monthly audit
+    partitions created ahead, so new rows never pile up in the default partitions.
+    """
+    try:
+        db_cluster_arn = os.environ.get('DB_CLUSTER_ARN')
+        secret_arn = os.environ.get('DB_SECRET_ARN')
+        database_name = os.environ.get('DB_NAME', 'medical_records')
+
+        if not db_cluster_arn or not secret_arn:
+            return {
+                'status': 'error',
+                'message': 'Missing required environment variables'
+            }
+
+        response = rds_data_client.execute_statement(
+            resourceArn=db_cluster_arn,
+            secretArn=secret_arn,
+            database=database_name,
+            sql="SELECT create_audit_partitions(:months)",
+            parameters=[{'name': 'months', 'value': {'longValue': AUDIT_PARTITION_MONTHS_AHEAD}}]
+        )
+        partitions_created = response['records'][0][0]['longValue']
+        logger.info(f"Created {partitions_created} audit partition(s)")
+
+        response = rds_data_client.execute_statement(
+            resourceArn=db_cluster_arn,
+            secretArn=secret_arn,
+            database=database_name,
+            sql="SELECT rollup_pending_patient_access(:days)",
+            parameters=[{'name': 'days', 'value': {'longValue': int(days)}}]
+        )
+        rolled_up = response['records'][0][0]['longValue']
+        logger.info(f"Rolled up patient access for {rolled_up} day(s)")
+
+        return {
+            'status': 'success',
+            'message': f'Rolled up {rolled_up} day(s)',
+            'days_rolled_up': rolled_up,
+            'partitions_created': partitions_created
+        }
+
+    except Exception as e:
+        logger.error(f"Error rolling up patient access: {type(e).__name__}")
+        return {
+            'status': 'error',
+            'message': 'Error rolling up patient access',
+            'error_type': type(e).__name__
+        }
+
+
+@audited(audit_logger, AUDITED_ACTIONS)
+def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    Patient-Facing Database Handler with PHI-Safe Logging
+    
+    Available Actions:
+    - health_check: Check Lambda function health
+    - test_db_connection: Test database connectivity
+    - get_patient_medications: Get medications for authenticated patient
+    - search_patient_medications: Ranked brand/generic-aware search of the patient's medications
+    - get_drug_interaction_table: Drug interaction reference data (no PHI) for in-process checks
+    - get_patient_appointments: Get appointments for authenticated patient
+    - get_patient_summary: Cached health summary for authenticated patient
+    - search_clinical_documents: Ranked full-text search with snippets over the patient's documents
+    - vector_search_kb: Hybrid pgvector + full-text search over KB chunks (+ patient's document chunks)
+    - find_available_slots: Earliest free slots by specialty/provider/location
+    - book_appointment: Idempotent, overlap-safe booking for authenticated patient
+    - get_cgm_readings: Get CGM readings as columnar arrays for glucose analytics
+    - get_cgm_daily_series: Get compact per-day CGM blobs (decoded by the agent)
+    - evaluate_cgm_alerts: Compute CGM alert flags for newly ingested readings
+    - sweep_cgm_alerts: Per-minute alert evaluation for all patients with new readings (scheduled invocations only)
+    - rollup_patient_access: Nightly access-summary rollup (scheduled invocations only)
+    - search_patients: Paginated name search (clinician gateway tool only)
+    - get_diabetes_patients: Paginated diabetes cohort with latest HbA1c (clinician gateway tool only)
+    
+    Security:
+    - PHI-safe logging (no patient data in logs)
+    - Patient data access is audit-logged asynchronously (audit.py); callers may
+      pass session_id, source and a staff user_id for the audit trail
+    - Patient-facing only (admin functions removed); all-patient actions are
+      refused unless invoked as an authenticated gateway tool
+    - Requires patient_id from authenticated context
+    """
+    
+    try:
+
+        # Parse body for Lambda Function URL requests
+        if event.get('body'):
+            try:
+                body_data = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
+                event.update(body_data)
+            except (json.JSONDecodeError, TypeError):
+                logger.warning("Could not parse request body")
+        # Gateway tool calls carry no action; the audit wrapper reads it back from the event
+        tool_action = gateway_action(context)
+        if tool_action:
+            event['action'] = tool_action
+            event.setdefault('source', 'clinician_gateway')
+        # Extract parameters from queryStringParameters (Lambda Function URL) or direct event (API Gateway)
+        params = event.get('queryStringParameters') or {}
+        action = params.get('action') or event.get('action', 'unknown')
+
+        # Log request without PHI
+        logger.info(f"Request received - action: {action}")
+        
+        headers = {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+        }
+
+        if action in GATEWAY_ONLY_ACTIONS and not tool_action:
+            return {
+                'statusCode': 403,
+                'headers': headers,
+                'body': json.dumps({
+                    'status': 'error',
+                    'message': f'{action} is only available through the clinician gateway'
+                })
+            }
+        
+        if event.get('httpMethod') == 'OPTIONS':
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': json.dumps({'message': 'CORS preflight'})
+            }
+        
+        # Health check and database connection test
+        if action == 'test_db_connection':
+            db_test_result = test_database_connection()
+            return {
+                'statusCode': 200 if db_test_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(db_test_result)
+            }
+        
+        # Patient-facing: Get medications for authenticated user
+        if action == 'get_patient_medications':
+            patient_id = params.get('patient_id') or event.get('patient_id')
+            active_only_str = params.get('active_only') or event.get('active_only', 'false')
+            # Convert string to boolean (Lambda Function URL sends query params as strings)
+            active_only = active_only_str in ['true', 'True', '1', True] if isinstance(active_only_str, (str, bool)) else False
 
             if not patient_id:
                 return {
@@ -391,6 +2087,40 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
                 'body': json.dumps(medications_result)
             }
         
+        # Patient-facing: Search medications for authenticated user
+        if action == 'search_patient_medications':
+            patient_id = params.get('patient_id') or event.get('patient_id')
+            query = params.get('query') or event.get('query')
+            active_only_str = params.get('active_only') or event.get('active_only', 'false')
+            active_only = active_only_str in ['true', 'True', '1', True] if isinstance(active_only_str, (str, bool)) else False
+            limit = params.get('limit') or event.get('limit', 5)
+
+            if not patient_id or not query:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'status': 'error',
+                        'message': 'Missing required parameters: patient_id and query'
+                    })
+                }
+
+            search_result = search_patient_medications(patient_id, query, active_only, limit)
+            return {
+                'statusCode': 200 if search_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(search_result)
+            }
+        
+        # Reference data: drug interaction graph source
+        if action == 'get_drug_interaction_table':
+            table_result = get_drug_interaction_table()
+            return {
+                'statusCode': 200 if table_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(table_result)
+            }
+        
         # Patient-facing: Get appointments for authenticated user
         if event.get('action') == 'get_patient_appointments':
             patient_id = event.get('patient_id')
@@ -417,6 +2147,284 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
                 'body': json.dumps(appointments_result)
             }
         
+        # Patient-facing: Health summary (cached per patient)
+        if action == 'get_patient_summary':
+            patient_id = params.get('patient_id') or event.get('patient_id')
+
+            if not patient_id:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'status': 'error',
+                        'message': 'Missing required parameter: patient_id'
+                    })
+                }
+
+            summary_result = get_patient_summary(patient_id)
+            status_codes = {'success': 200, 'not_found': 404}
+            return {
+                'statusCode': status_codes.get(summary_result['status'], 500),
+                'headers': headers,
+                'body': json.dumps(summary_result)
+            }
+
+        # Patient-facing: Full-text search of the patient's own documents
+        if action == 'search_clinical_documents':
+            patient_id = params.get('patient_id') or event.get('patient_id')
+            query = params.get('query') or event.get('query')
+
+            if not patient_id or not query:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'status': 'error',
+                        'message': 'Missing required parameters: patient_id and query'
+                    })
+                }
+
+            documents_result = search_clinical_documents(
+                patient_id,
+                query,
+                document_type=event.get('document_type'),
+                page_size=event.get('page_size') or DEFAULT_DOCUMENT_PAGE_SIZE,
+                cursor=event.get('cursor')
+            )
+            return {
+                'statusCode': 200 if documents_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(documents_result)
+            }
+
+        # Knowledge base retrieval (pgvector + full-text), optionally with the patient's own documents
+        if action == 'vector_search_kb':
+            query_embedding = event.get('query_embedding')
+            kb_name = event.get('kb_name')
+
+            if not query_embedding or not kb_name:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'status': 'error',
+                        'message': 'Missing required parameters: query_embedding and kb_name'
+                    })
+                }
+
+            vector_result = vector_search_kb(
+                query_embedding,
+                kb_name,
+                k=event.get('k') or 5,
+                patient_id=params.get('patient_id') or event.get('patient_id'),
+                query_text=event.get('query_text'),
+                domain=event.get('domain')
+            )
+            return {
+                'statusCode': 200 if vector_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(vector_result)
+            }
+
+        # Availability search (no patient data)
+        if action == 'find_available_slots':
+            slots_result = find_available_slots(
+                specialty=event.get('specialty'),
+                provider_id=event.get('provider_id'),
+                city=event.get('city'),
+                zip_code=event.get('zip_code'),
+                start_date=event.get('start_date'),
+                horizon_days=event.get('horizon_days', 14),
+                duration_minutes=event.get('duration_minutes', 30),
+                limit=event.get('limit', 5)
+            )
+            return {
+                'statusCode': 200 if slots_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(slots_result)
+            }
+        
+        # Patient-facing: Book an appointment for authenticated user
+        if action == 'book_appointment':
+            required = ['patient_id', 'provider_id', 'scheduled_date', 'scheduled_time', 'appointment_type', 'idempotency_key']
+            missing = [name for name in required if not event.get(name)]
+
+            if missing:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'status': 'error',
+                        'message': f"Missing required parameter(s): {', '.join(missing)}"
+                    })
+                }
+
+            booking_result = book_appointment(
+                patient_id=event['patient_id'],
+                provider_id=event['provider_id'],
+                scheduled_date=event['scheduled_date'],
+                scheduled_time=event['scheduled_time'],
+                appointment_type=event['appointment_type'],
+                idempotency_key=event['idempotency_key'],
+                appointment_reason=event.get('appointment_reason'),
+                facility_id=event.get('facility_id'),
+                duration_minutes=event.get('duration_minutes', 30),
+                scheduling_notes=event.get('scheduling_notes')
+            )
+            status_codes = {'success': 200, 'conflict': 409, 'unavailable': 422}
+            return {
+                'statusCode': status_codes.get(booking_result['status'], 500),
+                'headers': headers,
+                'body': json.dumps(booking_result)
+            }
+        
+        # Patient-facing: CGM readings for glucose analytics
+        if action == 'get_cgm_readings':
+            patient_id = params.get('patient_id') or event.get('patient_id')
+
+            if not patient_id:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'status': 'error',
+                        'message': 'Missing required parameter: patient_id'
+                    })
+                }
+
+            start_date = params.get('start_date') or event.get('start_date')
+            end_date = params.get('end_date') or event.get('end_date')
+
+            cgm_result = get_cgm_readings(patient_id, start_date, end_date)
+            return {
+                'statusCode': 200 if cgm_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(cgm_result)
+            }
+        
+        # Patient-facing: compact per-day CGM storage
+        if action == 'get_cgm_daily_series':
+            patient_id = params.get('patient_id') or event.get('patient_id')
+
+            if not patient_id:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'status': 'error',
+                        'message': 'Missing required parameter: patient_id'
+                    })
+                }
+
+            start_date = params.get('start_date') or event.get('start_date')
+            end_date = params.get('end_date') or event.get('end_date')
+
+            series_result = get_cgm_daily_series(patient_id, start_date, end_date)
+            return {
+                'statusCode': 200 if series_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(series_result)
+            }
+        
+        # CGM alert evaluation for newly ingested readings
+        if action == 'evaluate_cgm_alerts':
+            patient_id = params.get('patient_id') or event.get('patient_id')
+
+            if not patient_id:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'status': 'error',
+                        'message': 'Missing required parameter: patient_id'
+                    })
+                }
+
+            alerts_result = evaluate_cgm_alerts(patient_id)
+            return {
+                'statusCode': 200 if alerts_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(alerts_result)
+            }
+        
+        # Per-minute CGM alert sweep; only the EventBridge schedule may run it, not the function URL
+        if action == 'sweep_cgm_alerts':
+            if event.get('requestContext'):
+                return {
+                    'statusCode': 403,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'status': 'error',
+                        'message': 'sweep_cgm_alerts is only available to scheduled invocations'
+                    })
+                }
+
+            sweep_result = sweep_cgm_alerts(context)
+            return {
+                'statusCode': 200 if sweep_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(sweep_result)
+            }
+        
+        # Nightly access rollup; only the EventBridge schedule may run it, not the function URL
+        if action == 'rollup_patient_access':
+            if event.get('requestContext'):
+                return {
+                    'statusCode': 403,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'status': 'error',
+                        'message': 'rollup_patient_access is only available to scheduled invocations'
+                    })
+                }
+
+            rollup_result = rollup_patient_access(event.get('days', ACCESS_ROLLUP_DAYS))
+            return {
+                'statusCode': 200 if rollup_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(rollup_result)
+            }
+        
+        # Clinician gateway: paginated patient name search
+        if action == 'search_patients':
+            first_name = params.get('first_name') or event.get('first_name')
+            last_name = params.get('last_name') or event.get('last_name')
+
+            if not first_name and not last_name:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'status': 'error',
+                        'message': 'Provide first_name and/or last_name'
+                    })
+                }
+
+            page_size = params.get('page_size') or event.get('page_size', DEFAULT_PATIENT_PAGE_SIZE)
+            cursor = params.get('cursor') or event.get('cursor')
+
+            search_result = search_patients(first_name, last_name, page_size, cursor)
+            return {
+                'statusCode': 200 if search_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(search_result)
+            }
+        
+        # Clinician gateway: paginated diabetes cohort
+        if action == 'get_diabetes_patients':
+            page_size = params.get('page_size') or event.get('page_size', DEFAULT_PATIENT_PAGE_SIZE)
+            cursor = params.get('cursor') or event.get('cursor')
+            min_hba1c = params.get('min_hba1c')
+            if min_hba1c is None:
+                min_hba1c = event.get('min_hba1c')
+
+            cohort_result = get_diabetes_patients(page_size, cursor, min_hba1c)
+            return {
+                'statusCode': 200 if cohort_result['status'] != 'error' else 500,
+                'headers': headers,
+                'body': json.dumps(cohort_result)
+            }
+        
         if event.get('action') == 'health_check':
             return {
                 'statusCode': 200,
@@ -437,7 +2445,17 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
                     'health_check',
                     'test_db_connection',
                     'get_patient_medications',
-                    'get_patient_appointments'
+                    'search_patient_medications',
+                    'get_drug_interaction_table',
+                    'get_patient_appointments',
+                    'get_patient_summary',
+                    'search_clinical_documents',
+                    'vector_search_kb',
+                    'find_available_slots',
+                    'book_appointment',
+                    'get_cgm_readings',
+                    'get_cgm_daily_series',
+                    'evaluate_cgm_alerts'
                 ],
                 'note': 'This is a patient-facing API. Admin functions have been removed for security.'
             })
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Archive cold monthly partitions of audit_log and patient_access_log.
+Creates upcoming partitions (moving any rows that landed in the default
+partitions into their month's partition), refreshes the patient_access_daily
+rollup for each archived month, exports every cold partition to a zstd-compressed Parquet file
+(local directory or S3 / S3-compatible storage), verifies the row count and then
+detaches and drops the partition.
+"""
+
+import os
+import re
+import sys
+import shutil
+import json
+import tempfile
+import boto3
+import click
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import date, timedelta
+
+PARTITION_NAME = re.compile(r'^(audit_log|patient_access_log)_p(\d{4})_(\d{2})$')
+
+TIMESTAMP_US = pa.timestamp('us', tz='UTC')
+
+# (column, SELECT expression, Parquet type) per table; timestamps travel as epoch microseconds
+ARCHIVE_COLUMNS = {
+    'audit_log': [
+        ('audit_id', 'audit_id::text', pa.string()),
+        ('user_id', 'user_id::text', pa.string()),
+        ('session_id', 'session_id', pa.string()),
+        ('source', 'source', pa.string()),
+        ('ip_address', 'host(ip_address)', pa.string()),
+        ('user_agent', 'user_agent', pa.string()),
+        ('action_type', 'action_type', pa.string()),
+        ('table_name', 'table_name', pa.string()),
+        ('record_id', 'record_id::text', pa.string()),
+        ('patient_id', 'patient_id::text', pa.string()),
+        ('old_values', 'old_values::text', pa.string()),
+        ('new_values', 'new_values::text', pa.string()),
+        ('endpoint', 'endpoint', pa.string()),
+        ('http_method', 'http_method', pa.string()),
+        ('request_body', 'request_body', pa.string()),
+        ('success', 'success', pa.bool_()),
+        ('error_message', 'error_message', pa.string()),
+        ('action_timestamp', '(EXTRACT(EPOCH FROM action_timestamp) * 1000000)::BIGINT', TIMESTAMP_US),
+        ('duration_ms', 'duration_ms', pa.int32()),
+        ('business_justification', 'business_justification', pa.string()),
+        ('created_at', '(EXTRACT(EPOCH FROM created_at) * 1000000)::BIGINT', TIMESTAMP_US),
+    ],
+    'patient_access_log': [
+        ('access_id', 'access_id::text', pa.string()),
+        ('patient_id', 'patient_id::text', pa.string()),
+        ('user_id', 'user_id::text', pa.string()),
+        ('access_type', 'access_type', pa.string()),
+        ('data_accessed', 'to_json(data_accessed)::text', pa.list_(pa.string())),
+        ('access_reason', 'access_reason', pa.string()),
+        ('session_id', 'session_id', pa.string()),
+        ('ip_address', 'host(ip_address)', pa.string()),
+        ('access_start', '(EXTRACT(EPOCH FROM access_start) * 1000000)::BIGINT', TIMESTAMP_US),
+        ('access_end', '(EXTRACT(EPOCH FROM access_end) * 1000000)::BIGINT', TIMESTAMP_US),
+        ('duration_seconds', 'duration_seconds', pa.int32()),
+        ('created_at', '(EXTRACT(EPOCH FROM created_at) * 1000000)::BIGINT', TIMESTAMP_US),
+    ],
+}
+
+# Keyset order for paging: (partition key, primary key id)
+DEFAULT_PARTITIONS = ('audit_log_default', 'patient_access_log_default')
+
+KEYSET_COLUMNS = {
+    'audit_log': ('action_timestamp', 'audit_id'),
+    'patient_access_log': ('access_start', 'access_id'),
+}
+
+
+class DataApi:
+    """Thin RDS Data API wrapper"""
+
+    def __init__(self, cluster_arn: str, secret_arn: str, database: str):
+        self.client = boto3.client('rds-data')
+        self.args = {'resourceArn': cluster_arn, 'secretArn': secret_arn, 'database': database}
+
+    def rows(self, sql: str, parameters=None):
+        response = self.client.execute_statement(
+            sql=sql, parameters=parameters or [], formatRecordsAs='JSON', **self.args
+        )
+        return json.loads(response.get('formattedRecords') or '[]')
+
+    def execute(self, sql: str, parameters=None):
+        return self.client.execute_statement(sql=sql, parameters=parameters or [], **self.args)
+
+
+def list_partitions(db: DataApi):
+    """(parent, partition, month_start) for every monthly partition"""
+    rows = db.rows("""
+        SELECT c.relname AS partition_name
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        WHERE parent.relname IN ('audit_log', 'patient_access_log')
+    """)
+    partitions = []
+    for row in rows:
+        match = PARTITION_NAME.match(row['partition_name'])
+        if match:
+            parent, year, month = match.groups()
+            partitions.append((parent, row['partition_name'], date(int(year), int(month), 1)))
+    return sorted(partitions, key=lambda p: (p[2], p[0]))
+
+
+def count_default_rows(db: DataApi) -> int:
+    """Rows currently held by the catch-all default partitions"""
+    return sum(db.rows(f"SELECT COUNT(*) AS n FROM {partition}")[0]['n'] for partition in DEFAULT_PARTITIONS)
+
+
+def month_end(month_start: date) -> date:
+    return (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _column_array(values, arrow_type):
+    if arrow_type == TIMESTAMP_US:
+        return pa.array(values, type=pa.int64()).cast(TIMESTAMP_US)
+    if pa.types.is_list(arrow_type):
+        return pa.array([json.loads(v) if v else None for v in values], type=arrow_type)
+    return pa.array(values, type=arrow_type)
+
+
+def export_partition(db: DataApi, parent: str, partition: str, path: str, page_size: int) -> int:
+    """Stream one partition to a Parquet file page by page; returns rows written"""
+    columns = ARCHIVE_COLUMNS[parent]
+    schema = pa.schema([(name, arrow_type) for name, _, arrow_type in columns])
+    ts_column, id_column = KEYSET_COLUMNS[parent]
+    select_list = ', '.join(f"{expr} AS {name}" for name, expr, _ in columns)
+
+    # Keyset pagination on the raw columns; the cursor is carried as text
+    sql = f"""
+        SELECT {select_list}, {ts_column}::text AS _cursor_ts
+        FROM {partition}
+        WHERE (CAST(:after_ts AS TIMESTAMPTZ) IS NULL
+               OR ({ts_column}, {id_column}) > (CAST(:after_ts AS TIMESTAMPTZ), CAST(:after_id AS UUID)))
+        ORDER BY {ts_column}, {id_column}
+        LIMIT :page_size
+    """
+
+    written = 0
+    after_ts, after_id = None, None
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        while True:
+            page = db.rows(sql, [
+                {'name': 'after_ts', 'value': {'stringValue': after_ts} if after_ts else {'isNull': True}},
+                {'name': 'after_id', 'value': {'stringValue': after_id} if after_id else {'isNull': True}},
+                {'name': 'page_size', 'value': {'longValue': page_size}},
+            ])
+            if not page:
+                break
+            writer.write_table(pa.Table.from_arrays(
+                [_column_array([row.get(name) for row in page], arrow_type) for name, _, arrow_type in columns],
+                schema=schema
+            ))
+            written += len(page)
+            after_ts, after_id = page[-1]['_cursor_ts'], page[-1][id_column]
+            if len(page) < page_size:
+                break
+    return written
+
+
+def store(local_path: str, destination: str, relative_key: str, s3_endpoint_url: str = None) -> str:
+    """Copy the Parquet file to a local directory or s3://bucket/prefix"""
+    if destination.startswith('s3://'):
+        bucket, _, prefix = destination[len('s3://'):].partition('/')
+        key = f"{prefix.rstrip('/')}/{relative_key}" if prefix else relative_key
+        boto3.client('s3', endpoint_url=s3_endpoint_url).upload_file(local_path, bucket, key)
+        return f"s3://{bucket}/{key}"
+
+    target = os.path.join(destination, relative_key)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.move(local_path, target)
+    return target
+
+
+@click.command()
+@click.option('--cluster-arn', envvar='DB_CLUSTER_ARN', required=True, help='Aurora cluster ARN')
+@click.option('--secret-arn', envvar='DB_SECRET_ARN', required=True, help='Database secret ARN')
+@click.option('--database', default='medical_records', help='Database name')
+@click.option('--destination', required=True, help='Local directory or s3://bucket/prefix')
+@click.option('--s3-endpoint-url', default=None, help='Endpoint for S3-compatible storage')
+@click.option('--hot-months', default=13, help='Months (including the current one) kept in the database')
+@click.option('--months-ahead', default=3, help='Future monthly partitions to pre-create')
+@click.option('--page-size', default=2000, help='Rows per Data API page')
+@click.option('--keep-partitions', is_flag=True, help='Export only; do not detach and drop')
+@click.option('--dry-run', is_flag=True, help='List cold partitions without exporting')
+def main(cluster_arn, secret_arn, database, destination, s3_endpoint_url, hot_months,
+         months_ahead, page_size, keep_partitions, dry_run):
+    """Export cold audit partitions to Parquet, then detach and drop them."""
+    db = DataApi(cluster_arn, secret_arn, database)
+
+    # create_audit_partitions also moves default-partition rows into their month's
+    # partition, so those months are archived like any other below
+    stray = count_default_rows(db)
+    created = db.rows("SELECT create_audit_partitions(:months) AS created",
+                      [{'name': 'months', 'value': {'longValue': months_ahead}}])[0]['created']
+    click.echo(f"📅 Created {created} partition(s)")
+    remaining = count_default_rows(db)
+    if stray:
+        click.echo(f"   ↪️  Moved {stray - remaining:,} row(s) out of the default partitions")
+    if remaining:
+        click.echo(f"⚠️  {remaining:,} row(s) still in the default partitions", err=True)
+
+    current_month = date.today().replace(day=1)
+    cutoff = current_month
+    for _ in range(hot_months - 1):
+        cutoff = (cutoff - timedelta(days=1)).replace(day=1)
+
+    cold = [p for p in list_partitions(db) if month_end(p[2]) <= cutoff]
+    if not cold:
+        click.echo(f"✅ No partitions older than {cutoff}")
+        return
+
+    for parent, partition, month_start in cold:
+        click.echo(f"📦 {partition} ({month_start:%Y-%m})")
+        if dry_run:
+            continue
+
+        # The summary rollup must cover a month before its raw rows leave the database
+        if parent == 'patient_access_log':
+            day = month_start
+            while day < month_end(month_start):
+                db.execute("SELECT rollup_patient_access(CAST(:day AS DATE))",
+                           [{'name': 'day', 'value': {'stringValue': day.isoformat()}}])
+                day += timedelta(days=1)
+
+        expected = db.rows(f"SELECT COUNT(*) AS n FROM {partition}")[0]['n']
+        handle, local_path = tempfile.mkstemp(suffix='.parquet')
+        os.close(handle)
+        try:
+            written = export_partition(db, parent, partition, local_path, page_size)
+            if written != expected or pq.ParquetFile(local_path).metadata.num_rows != expected:
+                click.echo(f"❌ Row count mismatch for {partition}: {written} exported, {expected} in table", err=True)
+                sys.exit(1)
+            relative_key = f"{parent}/year={month_start:%Y}/month={month_start:%m}/{partition}.parquet"
+            location = store(local_path, destination, relative_key, s3_endpoint_url)
+        finally:
+            if os.path.exists(local_path):
+                os.remove(local_path)
+        click.echo(f"   ✅ {written:,} rows -> {location}")
+
+        if keep_partitions:
+            continue
+        db.execute(f"ALTER TABLE {parent} DETACH PARTITION {partition}")
+        db.execute(f"DROP TABLE {partition}")
+        click.echo(f"   🗑️  Detached and dropped {partition}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the streaming CGM alert engine in lambda/database-handler/cgm_alerts.py.
+Replays synthetic 5-minute CGM streams (with duplicates and late readings mixed in)
+and reports single-core throughput, then verifies a checkpoint/restore round trip.
+"""
+
+import sys
+import json
+import math
+import random
+import time
+import click
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "lambda" / "database-handler"))
+from cgm_alerts import CGMAlertEngine
+
+
+def synthetic_stream(patients: int, readings_per_patient: int, seed: int = 0):
+    """Interleaved (patient_id, timestamp, value) tuples with ~1% duplicates and ~1% late readings"""
+    rng = random.Random(seed)
+    stream = []
+    for p in range(patients):
+        patient_id = f"patient-{p}"
+        ts = 1_700_000_000.0
+        phase = rng.random() * 2 * math.pi
+        for i in range(readings_per_patient):
+            ts += 300
+            value = 130 + 80 * math.sin(i / 40 + phase) + rng.gauss(0, 8)
+            stream.append((ts, patient_id, ts, value))
+            roll = rng.random()
+            if roll < 0.01:
+                stream.append((ts, patient_id, ts, value))
+            elif roll < 0.02 and i > 3:
+                stream.append((ts, patient_id, ts - 450, value))
+    # Order by arrival time; late readings arrive after newer ones
+    stream.sort(key=lambda row: row[0])
+    return [row[1:] for row in stream]
+
+
+@click.command()
+@click.option('--patients', default=100, help='Number of patient streams')
+@click.option('--readings', default=2000, help='Readings per patient')
+def main(patients, readings):
+    """Measure alert evaluation throughput on synthetic CGM streams."""
+    stream = synthetic_stream(patients, readings)
+    engine = CGMAlertEngine()
+    process = engine.process
+
+    raised = 0
+    start = time.perf_counter()
+    for patient_id, ts, value in stream:
+        evaluation = process(patient_id, ts, value)
+        if evaluation is not None:
+            raised += len(evaluation.raised)
+    elapsed = time.perf_counter() - start
+
+    click.echo(f"📊 {len(stream):,} readings across {patients} patients in {elapsed:.2f}s")
+    click.echo(f"   {len(stream) / elapsed:,.0f} readings/sec, {raised:,} alerts raised")
+    click.echo(f"   {engine.duplicates:,} duplicates skipped, {engine.late_readings:,} late readings")
+
+    # Checkpoint/restore must resume with identical results
+    patient_id = "patient-0"
+    tail = [(ts, value + 5) for ts, value in ((1_800_000_000.0 + 300 * i, 60 + i) for i in range(20))]
+    restored = CGMAlertEngine()
+    restored.restore(patient_id, json.loads(json.dumps(engine.checkpoint(patient_id))))
+    assert engine.process_many(patient_id, tail) == restored.process_many(patient_id, tail)
+    click.echo("✅ Checkpoint round trip resumes identically")
+
+
+if __name__ == "__main__":
+    main()
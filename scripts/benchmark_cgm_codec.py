@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Size and client-side decode benchmark: row-per-reading cgm_readings vs per-day cgm_daily_series blobs.
+Sizes are estimates computed from the PostgreSQL tuple layout, not measured in a database.
+The timing is client-side only: converting Data API-shaped records (Python dicts) into arrays
+versus decoding the per-day blobs via agent/cgm_codec.py. Query, transfer and JSON parsing
+time are not included; measure those against a real cluster with get_cgm_readings and
+get_cgm_daily_series.
+"""
+
+import sys
+import time
+import click
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+from cgm_codec import readings_to_days, decode_days, TREND_NAMES, SLOTS_PER_DAY
+
+# Heap tuple header (23 B, aligned to 24) plus 4 B line pointer
+TUPLE_OVERHEAD = 28
+# cgm_readings: 2 UUIDs, device/serial text, timestamptz, int, trend varchars,
+# signal int, 5 booleans, created_at, plus alignment padding
+CGM_READING_ROW_BYTES = TUPLE_OVERHEAD + 16 + 16 + 10 + 13 + 13 + 8 + 4 + 8 + 5 + 4 + 5 + 8 + 6
+# B-tree entries (8 B index tuple header + key + 4 B line pointer) for the six cgm_readings indexes
+CGM_READING_INDEX_BYTES = (12 + 16) + (12 + 16) + (12 + 8) + (12 + 10) + (12 + 24) + (12 + 32)
+# cgm_daily_series fixed part: uuid, date, 3 smallints, device text, summary, 2 timestamps
+DAILY_FIXED_BYTES = TUPLE_OVERHEAD + 16 + 4 + 6 + 10 + 4 + 8 + 16
+# Primary key entry (uuid, date)
+DAILY_INDEX_BYTES = 12 + 20
+
+
+def synthetic_readings(days: int, seed: int = 0):
+    """5-minute readings with jitter, a random walk glucose trace and ~5% dropouts"""
+    rng = np.random.default_rng(seed)
+    n = days * SLOTS_PER_DAY
+    timestamps = 1_700_006_400 + np.arange(n) * 300.0 + rng.integers(-40, 40, n)
+    glucose = np.clip(140 + np.cumsum(rng.normal(0, 3, n)) * 0.3 + 40 * np.sin(np.arange(n) / 50), 40, 400)
+    trends = rng.integers(1, len(TREND_NAMES), n)
+    keep = rng.random(n) > 0.05
+    return timestamps[keep], np.rint(glucose[keep]), trends[keep]
+
+
+def as_data_api_records(timestamps, values, trends):
+    """Records shaped like an RDS Data API execute_statement response"""
+    return [
+        [{'doubleValue': float(ts)}, {'longValue': int(v)}, {'stringValue': TREND_NAMES[t]}]
+        for ts, v, t in zip(timestamps, values, trends)
+    ]
+
+
+@click.command()
+@click.option('--days', default=90, help='Days of CGM data for one patient')
+@click.option('--repeat', default=5, help='Timing repetitions')
+def main(days, repeat):
+    """Compare estimated storage size and client-side decode time of the two CGM layouts."""
+    timestamps, values, trends = synthetic_readings(days)
+    encoded = readings_to_days(timestamps, values, trends)
+    rows = [dict(series_date=day, **columns) for day, columns in encoded.items()]
+
+    row_bytes = len(values) * (CGM_READING_ROW_BYTES + CGM_READING_INDEX_BYTES)
+    blob_payload = sum(
+        len(r['validity_bitmap']) + len(r['glucose_deltas']) + len(r['trend_codes'] or b'') + 3
+        for r in rows
+    )
+    blob_bytes = blob_payload + len(rows) * (DAILY_FIXED_BYTES + DAILY_INDEX_BYTES)
+
+    click.echo(f"📦 {len(values):,} readings over {len(rows)} days (estimated sizes, not measured)")
+    click.echo(f"   Row-per-reading: {row_bytes / 1024:,.0f} KB ({row_bytes / len(values):.0f} B/reading incl. indexes)")
+    click.echo(f"   Per-day blobs:   {blob_bytes / 1024:,.0f} KB ({blob_bytes / len(values):.1f} B/reading incl. index)")
+    click.echo(f"   Estimated reduction: {row_bytes / blob_bytes:.0f}x")
+
+    records = as_data_api_records(timestamps, values, trends)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ts = np.fromiter((r[0]['doubleValue'] for r in records), dtype=np.float64, count=len(records))
+        vals = np.fromiter((r[1]['longValue'] for r in records), dtype=np.float64, count=len(records))
+    row_scan = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decoded = decode_days(rows)
+    blob_scan = (time.perf_counter() - start) / repeat
+
+    valid = ~np.isnan(decoded['glucose'])
+    click.echo("⏱️  Client-side only (excludes query, transfer and JSON parsing):")
+    click.echo(f"   Data API records -> arrays: {row_scan * 1000:.1f} ms")
+    click.echo(f"   Blob decode:                {blob_scan * 1000:.1f} ms ({row_scan / blob_scan:.0f}x faster)")
+    click.echo(f"   Decoded {int(valid.sum()):,} valid slots, mean {decoded['glucose'][valid].mean():.1f} mg/dL "
+               f"(source mean {vals.mean():.1f})")
+
+
+if __name__ == "__main__":
+    main()
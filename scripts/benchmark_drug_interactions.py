@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the in-memory drug interaction graph in agent/drug_interactions.py.
+Builds a synthetic reference set the size of a commercial interaction database and
+times whole-list checks of a typical polypharmacy medication list.
+"""
+
+import sys
+import random
+import time
+import click
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+from drug_interactions import InteractionGraph
+
+SEVERITIES = ('Contraindicated', 'Major', 'Moderate', 'Minor')
+
+
+@click.command()
+@click.option('--ingredients', default=3000, help='Number of ingredients in the reference set')
+@click.option('--interactions', default=100000, help='Number of interacting pairs')
+@click.option('--medications', default=15, help='Active medications per check')
+@click.option('--checks', default=2000, help='Number of medication lists to check')
+def main(ingredients, interactions, medications, checks):
+    """Time pairwise interaction checks against a synthetic reference set."""
+    rng = random.Random(0)
+    ingredient_rows = [(str(1000 + i), f"ingredient{i}") for i in range(ingredients)]
+    synonym_rows = [(f"Brand{i}", f"ingredient{i}") for i in range(0, ingredients, 3)]
+
+    pairs = set()
+    while len(pairs) < interactions:
+        a, b = rng.sample(range(ingredients), 2)
+        pairs.add((str(1000 + min(a, b)), str(1000 + max(a, b))))
+    interaction_rows = [(a, b, rng.choice(SEVERITIES), 'Synthetic interaction', None) for a, b in pairs]
+
+    start = time.perf_counter()
+    graph = InteractionGraph(ingredient_rows, interaction_rows, synonym_rows)
+    click.echo(f"📦 Built graph: {ingredients:,} ingredients, {interactions:,} pairs "
+               f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Realistic names: mix of brands, generics and salt/dose suffixes
+    def medication_name():
+        i = rng.randrange(ingredients)
+        if i % 3 == 0 and rng.random() < 0.5:
+            return f"Brand{i} {rng.choice((5, 10, 20, 500))}mg"
+        return f"Ingredient{i} Hydrochloride"
+
+    lists = [[medication_name() for _ in range(medications)] for _ in range(checks)]
+
+    found = 0
+    start = time.perf_counter()
+    for meds in lists:
+        found += len(graph.check(meds))
+    cold = (time.perf_counter() - start) / checks
+
+    start = time.perf_counter()
+    for meds in lists:
+        graph.check(meds)
+    warm = (time.perf_counter() - start) / checks
+
+    click.echo(f"⏱️  {medications} medications ({medications * (medications - 1) // 2} pairs) per check")
+    click.echo(f"   First check (names unresolved): {cold * 1e6:.0f} µs")
+    click.echo(f"   Repeat check (names memoized):  {warm * 1e6:.0f} µs")
+    click.echo(f"   {found / checks:.2f} interactions found per list on average")
+
+
+if __name__ == "__main__":
+    main()
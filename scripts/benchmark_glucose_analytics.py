@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the vectorized CGM analytics in agent/glucose_analytics.py.
+Generates a synthetic year of 5-minute CGM readings per patient and times
+single-patient and batch metric computation.
+"""
+
+import sys
+import time
+import click
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+from glucose_analytics import compute_glucose_metrics, compute_glucose_metrics_batch
+
+READING_INTERVAL_SECONDS = 300
+
+
+def synthetic_cgm(days: int, seed: int, dropout: float = 0.05):
+    """Build a realistic-looking CGM trace with meals, noise and sensor dropouts"""
+    rng = np.random.default_rng(seed)
+    n = days * 24 * 3600 // READING_INTERVAL_SECONDS
+    timestamps = 1_700_000_000 + np.arange(n, dtype=np.int64) * READING_INTERVAL_SECONDS
+    timestamps += rng.integers(-20, 20, size=n)
+
+    hours = (timestamps % 86400) / 3600.0
+    meals = sum(60 * np.exp(-((hours - h) ** 2) / 0.8) for h in (7.5, 12.5, 19.0))
+    glucose = 120 + meals + 20 * np.sin(hours / 24 * 2 * np.pi) + rng.normal(0, 15, size=n)
+    glucose = np.clip(glucose, 40, 400)
+
+    keep = rng.random(n) > dropout
+    return timestamps[keep], glucose[keep]
+
+
+@click.command()
+@click.option('--days', default=365, help='Days of CGM data per patient')
+@click.option('--patients', default=20, help='Number of patients for the batch run')
+@click.option('--repeat', default=5, help='Timing repetitions for the single-patient run')
+def main(days, patients, repeat):
+    """Time glucose metric computation on synthetic CGM data."""
+    timestamps, values = synthetic_cgm(days, seed=0)
+    click.echo(f"📊 Single patient: {len(values):,} readings over {days} days")
+
+    compute_glucose_metrics(timestamps, values)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        metrics = compute_glucose_metrics(timestamps, values)
+    elapsed = (time.perf_counter() - start) / repeat
+    click.echo(f"   {elapsed * 1000:.1f} ms per patient "
+               f"(TIR {metrics['time_in_range_percent']}%, GMI {metrics['gmi_percent']}%)")
+
+    ids, all_ts, all_vals = [], [], []
+    for p in range(patients):
+        ts, vals = synthetic_cgm(days, seed=p + 1)
+        ids.append(np.full(ts.size, p))
+        all_ts.append(ts)
+        all_vals.append(vals)
+    ids = np.concatenate(ids)
+    all_ts = np.concatenate(all_ts)
+    all_vals = np.concatenate(all_vals)
+
+    click.echo(f"📊 Batch: {patients} patients, {all_vals.size:,} readings")
+    start = time.perf_counter()
+    results = compute_glucose_metrics_batch(ids, all_ts, all_vals)
+    elapsed = time.perf_counter() - start
+    click.echo(f"   {elapsed * 1000:.1f} ms total, {elapsed * 1000 / len(results):.1f} ms per patient")
+
+
+if __name__ == "__main__":
+    main()
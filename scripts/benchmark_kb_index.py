@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Offline recall/latency/memory harness for the knowledge base vector index settings.
+Chunks a local copy of the KB corpus at each candidate chunk size, embeds it once
+(embeddings are cached on disk by content hash), and builds HNSW indexes across
+M, ef_construction, ef_search and l2/cosine with faiss (the OpenSearch engine) and
+hnswlib when installed. Every configuration is scored against exact brute-force
+search over the same vectors: recall@k, p50/p95 query latency, build time and
+index size.
+
+Corpus files: scraper JSON (uses the 'content' field), .txt or .md.
+"""
+
+import sys
+import json
+import hashlib
+import itertools
+import os
+import tempfile
+import time
+import click
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "kb" / "utils"))
+from pgvector_store import chunk_text
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v2:0"
+EMBEDDING_DIMENSIONS = 1024
+
+# FIXED_SIZE chunking counts tokens; English prose averages ~0.75 words per token
+WORDS_PER_TOKEN = 0.75
+
+
+def load_corpus(corpus_dir):
+    documents = []
+    for path in sorted(Path(corpus_dir).rglob('*')):
+        if path.suffix == '.json':
+            try:
+                text = json.loads(path.read_text(encoding='utf-8')).get('content', '')
+            except (ValueError, AttributeError):
+                continue
+        elif path.suffix in ('.txt', '.md'):
+            text = path.read_text(encoding='utf-8', errors='ignore')
+        else:
+            continue
+        if text.strip():
+            documents.append(text)
+    return documents
+
+
+class EmbeddingCache:
+    """Embeddings keyed by sha256(model + text), one .npy per vector under cache_dir"""
+
+    def __init__(self, cache_dir, embedder):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder
+        self.misses = 0
+        if embedder == 'bedrock':
+            import boto3
+            self.client = boto3.client('bedrock-runtime')
+        elif embedder == 'sentence-transformers':
+            from sentence_transformers import SentenceTransformer
+            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+
+    def _embed(self, text):
+        if self.embedder == 'bedrock':
+            response = self.client.invoke_model(
+                modelId=EMBEDDING_MODEL_ID,
+                body=json.dumps({"inputText": text, "dimensions": EMBEDDING_DIMENSIONS, "normalize": True})
+            )
+            return np.asarray(json.loads(response['body'].read())['embedding'], dtype=np.float32)
+        if self.embedder == 'sentence-transformers':
+            return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+        # 'hashing': dependency-free signed feature hashing; exercises the harness, not semantics
+        vector = np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32)
+        for word in text.lower().split():
+            h = int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+            vector[h % EMBEDDING_DIMENSIONS] += 1.0 if (h >> 63) else -1.0
+        return vector
+
+    def embed(self, texts):
+        vectors = []
+        for text in texts:
+            key = hashlib.sha256(f"{self.embedder}\0{text}".encode('utf-8')).hexdigest()
+            path = self.cache_dir / f"{key}.npy"
+            if path.exists():
+                vectors.append(np.load(path))
+                continue
+            vector = self._embed(text)
+            np.save(path, vector)
+            vectors.append(vector)
+            self.misses += 1
+        matrix = np.vstack(vectors).astype(np.float32)
+        return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def sample_queries(rng, chunks, count):
+    """Queries from a random sentence-sized window of random chunks (a paraphrase stand-in)"""
+    queries = []
+    for i in rng.integers(0, len(chunks), count):
+        words = chunks[i].split()
+        start = int(rng.integers(0, max(1, len(words) - 12)))
+        queries.append(' '.join(words[start:start + 12]))
+    return queries
+
+
+def exact_top_k(vectors, queries, k, space):
+    if space == 'cosine':
+        scores = queries @ vectors.T
+    else:
+        scores = -(np.sum(queries ** 2, axis=1, keepdims=True) - 2 * queries @ vectors.T + np.sum(vectors ** 2, axis=1))
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def build_faiss(vectors, space, m, ef_construction):
+    metric = faiss.METRIC_INNER_PRODUCT if space == 'cosine' else faiss.METRIC_L2
+    index = faiss.IndexHNSWFlat(vectors.shape[1], m, metric)
+    index.hnsw.efConstruction = ef_construction
+    index.add(vectors)
+    return index, len(faiss.serialize_index(index))
+
+
+def search_faiss(index, query, k, ef_search):
+    index.hnsw.efSearch = ef_search
+    return index.search(query[None, :], k)[1][0]
+
+
+def build_hnswlib(vectors, space, m, ef_construction):
+    index = hnswlib.Index(space='cosine' if space == 'cosine' else 'l2', dim=vectors.shape[1])
+    index.init_index(max_elements=len(vectors), M=m, ef_construction=ef_construction)
+    index.add_items(vectors, np.arange(len(vectors)))
+    with tempfile.NamedTemporaryFile(suffix='.bin') as f:
+        index.save_index(f.name)
+        size = os.path.getsize(f.name)
+    return index, size
+
+
+def search_hnswlib(index, query, k, ef_search):
+    index.set_ef(max(ef_search, k))
+    return index.knn_query(query, k=k)[0][0]
+
+
+ENGINES = {
+    'faiss': (lambda: faiss is not None, build_faiss, search_faiss),
+    'hnswlib': (lambda: hnswlib is not None, build_hnswlib, search_hnswlib),
+}
+
+
+def int_list(ctx, param, value):
+    return [int(v) for v in value.split(',')]
+
+
+@click.command()
+@click.option('--corpus-dir', required=True, type=click.Path(exists=True, file_okay=False), help='Local copy of the KB corpus')
+@click.option('--cache-dir', default='.kb-embedding-cache', help='Embedding cache directory')
+@click.option('--embedder', type=click.Choice(['bedrock', 'sentence-transformers', 'hashing']), default='bedrock',
+              help='Embedding source (bedrock = the KB model)')
+@click.option('--chunk-tokens', default='200,300,500', callback=int_list, help='Chunk sizes in tokens')
+@click.option('--overlap', default=20, help='Chunk overlap percentage')
+@click.option('--m', 'm_values', default='8,16,32', callback=int_list, help='HNSW M values')
+@click.option('--ef-construction', default='128,512', callback=int_list, help='HNSW ef_construction values')
+@click.option('--ef-search', default='32,128,512', callback=int_list, help='HNSW ef_search values')
+@click.option('--spaces', default='l2,cosine', help='Distance spaces')
+@click.option('--engines', default='faiss,hnswlib', help='Index libraries to try (skipped if not installed)')
+@click.option('--queries', default=200, help='Sampled queries per chunk size')
+@click.option('--k', default=5, help='Recall cutoff')
+@click.option('--output', default=None, help='Write all results as JSON lines')
+def main(corpus_dir, cache_dir, embedder, chunk_tokens, overlap, m_values, ef_construction, ef_search,
+         spaces, engines, queries, k, output):
+    """Sweep index and chunking parameters; report recall@k, latency and memory."""
+    rng = np.random.default_rng(0)
+    documents = load_corpus(corpus_dir)
+    if not documents:
+        click.echo(f"❌ No .json/.txt/.md documents under {corpus_dir}", err=True)
+        sys.exit(1)
+    engines = [e for e in engines.split(',') if e in ENGINES and ENGINES[e][0]()]
+    if not engines:
+        click.echo("⚠️  Neither faiss nor hnswlib is installed; only the exact baseline will run")
+    click.echo(f"📚 {len(documents):,} documents; engines: {', '.join(engines) or 'none'}")
+
+    cache = EmbeddingCache(cache_dir, embedder)
+    results = []
+    for tokens in chunk_tokens:
+        max_words = int(tokens * WORDS_PER_TOKEN)
+        chunks = [c for doc in documents for c in chunk_text(doc, max_words, max_words * overlap // 100)]
+        start = time.perf_counter()
+        vectors = cache.embed(chunks)
+        query_vectors = cache.embed(sample_queries(rng, chunks, queries))
+        click.echo(f"\n✂️  {tokens} tokens/chunk: {len(chunks):,} chunks, embedded in "
+                   f"{time.perf_counter() - start:.1f} s ({cache.misses:,} new embeddings so far)")
+
+        for space in spaces.split(','):
+            truth = exact_top_k(vectors, query_vectors, k, space)
+            start = time.perf_counter()
+            exact_top_k(vectors, query_vectors[:1], k, space)
+            click.echo(f"   🧮 exact {space}: {(time.perf_counter() - start) * 1000:.2f} ms/query, "
+                       f"{vectors.nbytes / 1e6:.1f} MB")
+
+            for engine, m, efc in itertools.product(engines, m_values, ef_construction):
+                _, build, search = ENGINES[engine]
+                start = time.perf_counter()
+                index, index_bytes = build(vectors, space, m, efc)
+                build_s = time.perf_counter() - start
+
+                for efs in ef_search:
+                    latencies, hits = [], 0
+                    for query, expected in zip(query_vectors, truth):
+                        start = time.perf_counter()
+                        found = search(index, query, k, efs)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        hits += len(set(int(i) for i in found) & set(expected.tolist()))
+                    p50, p95 = np.percentile(latencies, [50, 95])
+                    row = {
+                        'chunk_tokens': tokens, 'chunks': len(chunks), 'space': space, 'engine': engine,
+                        'm': m, 'ef_construction': efc, 'ef_search': efs,
+                        'recall_at_k': hits / (len(truth) * k), 'p50_ms': float(p50), 'p95_ms': float(p95),
+                        'build_s': build_s, 'index_mb': index_bytes / 1e6
+                    }
+                    results.append(row)
+                    click.echo(f"   🔎 {engine:7} {space:6} M={m:<3} efC={efc:<4} efS={efs:<4} "
+                               f"recall@{k} {row['recall_at_k']:.3f}  p50 {p50:.3f} ms  p95 {p95:.3f} ms  "
+                               f"build {build_s:.1f} s  {row['index_mb']:.1f} MB")
+
+    if output:
+        with open(output, 'w') as f:
+            for row in results:
+                f.write(json.dumps(row) + '\n')
+        click.echo(f"\n💾 Wrote {len(results)} rows to {output}")
+
+    # Cheapest configuration per chunk size that reaches 0.99 recall
+    for tokens in chunk_tokens:
+        good = [r for r in results if r['chunk_tokens'] == tokens and r['recall_at_k'] >= 0.99]
+        if good:
+            best = min(good, key=lambda r: r['p95_ms'])
+            click.echo(f"✅ {tokens} tokens: {best['engine']} {best['space']} M={best['m']} "
+                       f"efC={best['ef_construction']} efS={best['ef_search']} "
+                       f"(recall {best['recall_at_k']:.3f}, p95 {best['p95_ms']:.3f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the knowledge base vector quantization modes (kb/utils/vector_quantization.py).
+For fp32, fp16, int8 and binary vectors it reports memory per million chunks,
+query latency and recall@k against exact float32 search, with and without
+oversampled rescoring, and the smallest oversampling factor that keeps recall
+within the given tolerance.
+"""
+
+import sys
+import time
+import click
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "kb" / "utils"))
+from vector_quantization import (
+    QUANTIZATION_MODES, DEFAULT_BINARY_OVERSAMPLE, get_quantizer,
+    search_with_rescoring, recall_at_k, calibrate_oversample
+)
+
+# HNSW level-0 links dominate graph memory: 2*M neighbours of 4 bytes each
+HNSW_M = 16
+
+OVERSAMPLE_FACTORS = (1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 20.0, 40.0)
+
+
+def load_vectors(snapshot, chunks, dimensions, rng):
+    """Real embeddings from an export_snapshot.py version directory, else clustered synthetic ones"""
+    if snapshot:
+        vectors = np.load(Path(snapshot) / 'embeddings.npy').astype(np.float32)
+    else:
+        centroids = rng.standard_normal((64, dimensions)).astype(np.float32)
+        vectors = centroids[rng.integers(0, 64, chunks)] + 0.7 * rng.standard_normal((chunks, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@click.command()
+@click.option('--snapshot', default=None, type=click.Path(exists=True, file_okay=False),
+              help='KB snapshot version directory to use real embeddings')
+@click.option('--chunks', default=50000, help='Synthetic chunks when no snapshot is given')
+@click.option('--dimensions', default=1024, help='Synthetic embedding dimension')
+@click.option('--queries', default=200, help='Number of queries')
+@click.option('--k', default=5, help='Recall cutoff')
+@click.option('--tolerance', default=0.01, help='Allowed recall loss after rescoring')
+def main(snapshot, chunks, dimensions, queries, k, tolerance):
+    """Compare memory, latency and recall of each quantization mode."""
+    rng = np.random.default_rng(0)
+    vectors = load_vectors(snapshot, chunks, dimensions, rng)
+    count, dimensions = vectors.shape
+
+    # Queries near stored chunks, like a paraphrase of an indexed passage
+    noise = rng.standard_normal((queries, dimensions)).astype(np.float32)
+    query_vectors = vectors[rng.integers(0, count, queries)] + 0.5 * noise / np.linalg.norm(noise, axis=1, keepdims=True)
+    query_vectors = (query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)).astype(np.float32)
+    truth = np.argsort(-(query_vectors @ vectors.T), axis=1)[:, :k]
+    click.echo(f"📦 {count:,} vectors x {dimensions} dims, {queries} queries, k={k}, tolerance {tolerance:.1%}")
+
+    # The rescoring pass reads full-precision rows, as OpenSearch does from disk
+    full_vectors = vectors.astype(np.float16)
+    graph_bytes = 2 * HNSW_M * 4
+
+    for mode in QUANTIZATION_MODES:
+        quantizer = get_quantizer(mode).fit(vectors)
+        codes = quantizer.encode(vectors)
+        per_million_gb = (quantizer.bytes_per_vector(dimensions) + graph_bytes) * 1e6 / 1e9
+
+        raw_recall = recall_at_k(quantizer, codes, full_vectors, query_vectors, truth, k)
+        if mode == 'fp32':
+            factor, rescored_recall = 1.0, raw_recall
+        else:
+            factor, rescored_recall = calibrate_oversample(quantizer, codes, full_vectors, query_vectors, truth, k,
+                                                           tolerance, OVERSAMPLE_FACTORS)
+
+        latencies = []
+        for query in query_vectors:
+            start = time.perf_counter()
+            search_with_rescoring(quantizer, codes, full_vectors, query, k, factor)
+            latencies.append((time.perf_counter() - start) * 1000)
+        p50, p95 = np.percentile(latencies, [50, 95])
+
+        click.echo(f"\n🔢 {mode}: {quantizer.bytes_per_vector(dimensions):,} B/vector, "
+                   f"~{per_million_gb:.2f} GB per million chunks with an M={HNSW_M} graph")
+        click.echo(f"   recall@{k} first pass only: {raw_recall:.3f}")
+        click.echo(f"   recall@{k} with {factor:g}x rescoring: {rescored_recall:.3f} "
+                   f"{'✅' if rescored_recall >= 1 - tolerance else '⚠️'}  "
+                   f"(brute-force scan p50 {p50:.2f} ms, p95 {p95:.2f} ms)")
+        if mode == 'binary':
+            default_recall = recall_at_k(quantizer, codes, full_vectors, query_vectors, truth, k, DEFAULT_BINARY_OVERSAMPLE)
+            click.echo(f"   recall@{k} at OpenSearch's default {DEFAULT_BINARY_OVERSAMPLE:g}x oversampling: {default_recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
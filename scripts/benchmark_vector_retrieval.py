@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the pgvector retrieval backend (kb_chunks HNSW index).
+Loads synthetic clustered unit vectors under a throwaway kb_name, then measures
+query latency and recall@k of the HNSW search against an exact brute-force
+numpy baseline over the same vectors. The benchmark rows are deleted afterwards.
+"""
+
+import sys
+import time
+import click
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "kb" / "utils"))
+from pgvector_store import PgVectorStore, EMBEDDING_DIMENSIONS
+
+
+def synthetic_vectors(rng, count, clusters, dimensions):
+    """Unit vectors around random centroids, closer to real embedding geometry than uniform noise"""
+    centroids = rng.standard_normal((clusters, dimensions)).astype(np.float32)
+    vectors = centroids[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@click.command()
+@click.option('--cluster-arn', envvar='DB_CLUSTER_ARN', required=True, help='Aurora cluster ARN')
+@click.option('--secret-arn', envvar='DB_SECRET_ARN', required=True, help='Database secret ARN')
+@click.option('--database', default='medical_records', help='Database name')
+@click.option('--chunks', default=5000, help='Number of synthetic chunks to load')
+@click.option('--clusters', default=50, help='Number of topic clusters')
+@click.option('--queries', default=100, help='Number of queries')
+@click.option('--k', default=5, help='Results per query')
+@click.option('--ef-search', multiple=True, type=int, default=(40, 100), help='hnsw.ef_search values to compare')
+@click.option('--keep', is_flag=True, help='Keep the benchmark rows after the run')
+def main(cluster_arn, secret_arn, database, chunks, clusters, queries, k, ef_search, keep):
+    """Measure pgvector HNSW recall@k and latency against brute force."""
+    rng = np.random.default_rng(0)
+    store = PgVectorStore(cluster_arn, secret_arn, database, kb_name='benchmark-vector-kb')
+
+    vectors = synthetic_vectors(rng, chunks, clusters, EMBEDDING_DIMENSIONS)
+    store.delete_source()
+    start = time.perf_counter()
+    store.upsert_chunks([{
+        'source_uri': f"s3://benchmark/chunk-{i}.txt",
+        'chunk_index': 0,
+        'content': f"chunk {i}",
+        'embedding': vectors[i].tolist()
+    } for i in range(chunks)])
+    click.echo(f"📦 Loaded {chunks:,} chunks in {time.perf_counter() - start:.1f} s")
+
+    # Queries are perturbed copies of stored vectors, like a paraphrase of an indexed passage
+    query_vectors = vectors[rng.integers(0, chunks, queries)] + 0.3 * rng.standard_normal((queries, EMBEDDING_DIMENSIONS)).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+
+    start = time.perf_counter()
+    exact = np.argsort(-(query_vectors @ vectors.T), axis=1)[:, :k]
+    brute_ms = (time.perf_counter() - start) * 1000 / queries
+    click.echo(f"🧮 Brute force (numpy, in-process): {brute_ms:.2f} ms/query")
+
+    try:
+        for ef in ef_search:
+            latencies, hits = [], 0
+            for query, truth in zip(query_vectors, exact):
+                start = time.perf_counter()
+                rows = store.search(query.tolist(), k=k, ef_search=ef)
+                latencies.append((time.perf_counter() - start) * 1000)
+                found = {int(row['source_uri'].rsplit('-', 1)[1].split('.')[0]) for row in rows}
+                hits += len(found & set(truth.tolist()))
+
+            p50, p95 = np.percentile(latencies, [50, 95])
+            click.echo(f"🔎 HNSW ef_search={ef}: recall@{k} {hits / (queries * k):.3f}, "
+                       f"p50 {p50:.1f} ms, p95 {p95:.1f} ms (Data API round-trip included)")
+    finally:
+        if not keep:
+            store.delete_source()
+            click.echo("🗑️  Removed benchmark chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Encode completed days of cgm_readings into cgm_daily_series blobs.
+Finds patient-days in the window with no series row or with readings ingested
+after the row was last written, encodes each day with agent/cgm_codec.py and
+upserts it. Run nightly; the first run backfills the whole window.
+"""
+
+import sys
+import json
+import boto3
+import click
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+from cgm_codec import readings_to_days, TREND_CODES, GRID_MINUTES
+
+# Readings within half a grid step of midnight snap to the next day's first slot
+HALF_STEP = f"{GRID_MINUTES * 30} seconds"
+
+STALE_DAYS_SQL = f"""
+    SELECT r.patient_id::text AS patient_id,
+           ((r.reading_timestamp + INTERVAL '{HALF_STEP}') AT TIME ZONE 'UTC')::date::text AS series_date
+    FROM cgm_readings r
+    LEFT JOIN cgm_daily_series s
+      ON s.patient_id = r.patient_id
+     AND s.series_date = ((r.reading_timestamp + INTERVAL '{HALF_STEP}') AT TIME ZONE 'UTC')::date
+    WHERE r.reading_timestamp >= CURRENT_DATE - :days - INTERVAL '{HALF_STEP}'
+      AND r.reading_timestamp < CURRENT_DATE - INTERVAL '{HALF_STEP}'
+      AND r.sensor_error IS NOT TRUE
+      AND (CAST(:patient_id AS UUID) IS NULL OR r.patient_id = CAST(:patient_id AS UUID))
+    GROUP BY 1, 2, s.updated_at
+    HAVING s.updated_at IS NULL OR MAX(r.created_at) > s.updated_at
+    ORDER BY 1, 2
+"""
+
+DAY_READINGS_SQL = f"""
+    SELECT EXTRACT(EPOCH FROM reading_timestamp)::float8 AS ts, glucose_value, glucose_trend, device_type
+    FROM cgm_readings
+    WHERE patient_id = CAST(:patient_id AS UUID)
+      AND reading_timestamp >= CAST(:series_date AS DATE) - INTERVAL '{HALF_STEP}'
+      AND reading_timestamp < CAST(:series_date AS DATE) + 1 - INTERVAL '{HALF_STEP}'
+      AND sensor_error IS NOT TRUE
+    ORDER BY reading_timestamp
+"""
+
+UPSERT_SQL = """
+    INSERT INTO cgm_daily_series (
+        patient_id, series_date, codec_version, grid_minutes, valid_count,
+        validity_bitmap, glucose_deltas, trend_codes, device_type,
+        min_glucose, max_glucose, mean_glucose
+    )
+    VALUES (
+        CAST(:patient_id AS UUID), CAST(:series_date AS DATE), :codec_version, :grid_minutes, :valid_count,
+        :validity_bitmap, :glucose_deltas, :trend_codes, :device_type,
+        :min_glucose, :max_glucose, CAST(:mean_glucose AS DECIMAL(5,1))
+    )
+    ON CONFLICT (patient_id, series_date) DO UPDATE
+    SET codec_version = EXCLUDED.codec_version,
+        grid_minutes = EXCLUDED.grid_minutes,
+        valid_count = EXCLUDED.valid_count,
+        validity_bitmap = EXCLUDED.validity_bitmap,
+        glucose_deltas = EXCLUDED.glucose_deltas,
+        trend_codes = EXCLUDED.trend_codes,
+        device_type = EXCLUDED.device_type,
+        min_glucose = EXCLUDED.min_glucose,
+        max_glucose = EXCLUDED.max_glucose,
+        mean_glucose = EXCLUDED.mean_glucose
+"""
+
+
+class DataApi:
+    """Thin RDS Data API wrapper"""
+
+    def __init__(self, cluster_arn: str, secret_arn: str, database: str):
+        self.client = boto3.client('rds-data')
+        self.args = {'resourceArn': cluster_arn, 'secretArn': secret_arn, 'database': database}
+
+    def rows(self, sql: str, parameters=None):
+        response = self.client.execute_statement(
+            sql=sql, parameters=parameters or [], formatRecordsAs='JSON', **self.args
+        )
+        return json.loads(response.get('formattedRecords') or '[]')
+
+    def execute(self, sql: str, parameters=None):
+        return self.client.execute_statement(sql=sql, parameters=parameters or [], **self.args)
+
+
+def _value(value, kind):
+    return {kind: value} if value is not None else {'isNull': True}
+
+
+def encode_patient_day(db: DataApi, patient_id: str, series_date: str):
+    """Encoded columns for one patient-day, or None when it has no readings"""
+    readings = db.rows(DAY_READINGS_SQL, [
+        {'name': 'patient_id', 'value': {'stringValue': patient_id}},
+        {'name': 'series_date', 'value': {'stringValue': series_date}},
+    ])
+    if not readings:
+        return None
+    encoded = readings_to_days(
+        [r['ts'] for r in readings],
+        [r['glucose_value'] for r in readings],
+        [TREND_CODES.get(r['glucose_trend'], 0) for r in readings]
+    )
+    row = encoded.get(series_date)
+    if row is not None:
+        row['device_type'] = readings[-1]['device_type']
+    return row
+
+
+def upsert_day(db: DataApi, patient_id: str, series_date: str, row: dict):
+    db.execute(UPSERT_SQL, [
+        {'name': 'patient_id', 'value': {'stringValue': patient_id}},
+        {'name': 'series_date', 'value': {'stringValue': series_date}},
+        {'name': 'codec_version', 'value': {'longValue': row['codec_version']}},
+        {'name': 'grid_minutes', 'value': {'longValue': row['grid_minutes']}},
+        {'name': 'valid_count', 'value': {'longValue': row['valid_count']}},
+        {'name': 'validity_bitmap', 'value': {'blobValue': row['validity_bitmap']}},
+        {'name': 'glucose_deltas', 'value': {'blobValue': row['glucose_deltas']}},
+        {'name': 'trend_codes', 'value': _value(row['trend_codes'], 'blobValue')},
+        {'name': 'device_type', 'value': _value(row['device_type'], 'stringValue')},
+        {'name': 'min_glucose', 'value': _value(row['min_glucose'], 'longValue')},
+        {'name': 'max_glucose', 'value': _value(row['max_glucose'], 'longValue')},
+        {'name': 'mean_glucose', 'value': _value(
+            str(row['mean_glucose']) if row['mean_glucose'] is not None else None, 'stringValue')},
+    ])
+
+
+@click.command()
+@click.option('--cluster-arn', envvar='DB_CLUSTER_ARN', required=True, help='Aurora cluster ARN')
+@click.option('--secret-arn', envvar='DB_SECRET_ARN', required=True, help='Database secret ARN')
+@click.option('--database', default='medical_records', help='Database name')
+@click.option('--days', default=30, help='Completed days to keep encoded (the agent reads at most 30)')
+@click.option('--patient-id', default=None, help='Only this patient')
+@click.option('--dry-run', is_flag=True, help='List stale patient-days without encoding')
+def main(cluster_arn, secret_arn, database, days, patient_id, dry_run):
+    """Encode new or late-updated CGM days into cgm_daily_series."""
+    db = DataApi(cluster_arn, secret_arn, database)
+
+    stale = db.rows(STALE_DAYS_SQL, [
+        {'name': 'days', 'value': {'longValue': days}},
+        {'name': 'patient_id', 'value': {'stringValue': patient_id} if patient_id else {'isNull': True}},
+    ])
+    click.echo(f"📅 {len(stale)} patient-day(s) to encode")
+    if dry_run:
+        for day in stale:
+            click.echo(f"   {day['patient_id'][:8]}… {day['series_date']}")
+        return
+
+    written = 0
+    for day in stale:
+        row = encode_patient_day(db, day['patient_id'], day['series_date'])
+        if row is None:
+            continue
+        upsert_day(db, day['patient_id'], day['series_date'], row)
+        written += 1
+    click.echo(f"✅ Encoded {written} patient-day(s)")
+
+
+if __name__ == "__main__":
+    main()
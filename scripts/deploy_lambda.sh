@@ -14,12 +14,12 @@ echo ""
 TEMP_DIR=$(mktemp -d)
 echo "📦 Creating deployment package in $TEMP_DIR"
 
-# Copy Lambda code
-cp "$LAMBDA_DIR/index.py" "$TEMP_DIR/"
+# Copy Lambda code (index.py imports audit.py and cgm_alerts.py)
+cp "$LAMBDA_DIR/index.py" "$LAMBDA_DIR/audit.py" "$LAMBDA_DIR/cgm_alerts.py" "$TEMP_DIR/"
 
 # Create zip file
 cd "$TEMP_DIR"
-zip -q function.zip index.py
+zip -q function.zip index.py audit.py cgm_alerts.py
 
 echo "✅ Package created"
 
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Concurrency test for appointment booking.
+Fires a burst of simultaneous book_appointment requests at the deployed Lambda:
+many patients competing for the same slot plus retries of one request. Exactly one
+booking must win the slot and retries must return the same appointment.
+"""
+
+import sys
+import json
+import uuid
+import click
+import requests
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import get_ssm_parameter
+
+
+def book(lambda_url: str, payload: dict):
+    response = requests.post(lambda_url, json=payload, timeout=30)
+    return response.status_code, response.json()
+
+
+@click.command()
+@click.option('--provider-id', required=True, help='Provider UUID with a schedule covering the slot')
+@click.option('--date', 'scheduled_date', required=True, help='Slot date YYYY-MM-DD')
+@click.option('--time', 'scheduled_time', required=True, help='Slot time HH:MM')
+@click.option('--patient-id', 'patient_ids', multiple=True, required=True, help='Competing patient UUIDs (repeatable)')
+@click.option('--retries', default=5, help='Duplicate submissions of the first request')
+def main(provider_id, scheduled_date, scheduled_time, patient_ids, retries):
+    """Book one slot concurrently and verify there is exactly one winner."""
+    lambda_url = get_ssm_parameter("/app/medicalassistant/agentcore/lambda_url").rstrip('/')
+
+    def payload(patient_id, key):
+        return {
+            "action": "book_appointment",
+            "patient_id": patient_id,
+            "provider_id": provider_id,
+            "scheduled_date": scheduled_date,
+            "scheduled_time": scheduled_time,
+            "appointment_type": "Office Visit",
+            "appointment_reason": "Booking burst test",
+            "idempotency_key": key
+        }
+
+    replay_key = f"burst-{uuid.uuid4()}"
+    requests_to_send = [payload(patient_ids[0], replay_key) for _ in range(retries)]
+    requests_to_send += [payload(pid, f"burst-{uuid.uuid4()}") for pid in patient_ids[1:]]
+
+    with ThreadPoolExecutor(max_workers=len(requests_to_send)) as pool:
+        results = list(pool.map(lambda p: book(lambda_url, p), requests_to_send))
+
+    statuses = Counter(status for status, _ in results)
+    click.echo(f"📊 Responses: {dict(statuses)}")
+
+    booked_ids = {body.get('appointment_id') for status, body in results if status == 200}
+    replay_ids = {body.get('appointment_id') for (status, body), p in zip(results, requests_to_send)
+                  if status == 200 and p['idempotency_key'] == replay_key}
+
+    if len(booked_ids) == 1 and len(replay_ids) <= 1:
+        click.echo(f"✅ Exactly one appointment holds the slot: {booked_ids.pop()}")
+    else:
+        click.echo(f"❌ Expected one winning appointment, got: {json.dumps(sorted(booked_ids))}", err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()